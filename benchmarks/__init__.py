@@ -0,0 +1,8 @@
+"""
+Benchmarks del Sistema Financiero Inteligente
+=============================================
+
+Este paquete contiene las mediciones de rendimiento de ambos motores
+de inferencia (CLIPS y difuso) y el generador de perfiles sintéticos
+que las alimenta.
+"""
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Almacén Indexado de Resultados
+============================================
+
+Mide el guardado de N resultados sintéticos en SQLite:
+
+- fila_a_fila: un INSERT y un COMMIT por resultado (como al guardar cada
+  resultado en cuanto se obtiene)
+- masivo: AlmacenResultados.guardar (executemany en transacciones grandes)
+
+y la consulta "deuda-alta con etiqueta Conservadora" resuelta con los
+índices del almacén frente a la misma sentencia con NOT INDEXED (recorrido
+de la tabla), contando, leyendo solo identificadores (el índice los
+cubre) y leyendo también el perfil guardado.
+
+Uso:
+    python -m benchmarks.bench_almacen --filas 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from src.almacen_resultados import AlmacenResultados, _INSERTAR, _fila_resultado
+from src.resultados_compactos import MENSAJE_A_RECOMENDACION
+
+ETIQUETAS = ('Conservadora', 'Moderada', 'Agresiva')
+
+
+def generar_resultados(n: int, semilla: int = 42) -> List[Dict[str, Any]]:
+    """Resultados combinados sintéticos con mensajes y etiquetas aleatorios"""
+    rng = random.Random(semilla)
+    mensajes = list(MENSAJE_A_RECOMENDACION)
+    return [{
+        'perfil': {'ingresos': round(rng.uniform(500, 8000), 2), 'ahorro': round(rng.uniform(0, 20000), 2)},
+        'experto': {'mensajes': [m for m in mensajes if rng.random() < 0.3]},
+        'difuso': {'nivel_inversion': round(rng.uniform(0, 50), 2), 'etiqueta': rng.choice(ETIQUETAS),
+                   'metodo': 'Difuso'},
+    } for _ in range(n)]
+
+
+def medir_fila_a_fila(ruta: str, resultados: list) -> float:
+    """Segundos guardando con un INSERT y un COMMIT por resultado"""
+    AlmacenResultados(ruta).cerrar()
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    inicio = time.perf_counter()
+    for i, resultado in enumerate(resultados):
+        conexion.execute(_INSERTAR, _fila_resultado(resultado, i, 'fila', True))
+        conexion.commit()
+    segundos = time.perf_counter() - inicio
+    conexion.close()
+    return segundos
+
+
+def _medir(conexion: sqlite3.Connection, consulta: str, parametros: list, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        conexion.execute(consulta, parametros).fetchall()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def medir_consulta(almacen: AlmacenResultados, repeticiones: int) -> Dict[str, Any]:
+    """Milisegundos por consulta con índices y con NOT INDEXED (misma sentencia)"""
+    donde, parametros = almacen._filtro(['deuda-alta'], (), 'Conservadora', None)
+    medidas = {'filas_encontradas': almacen.contar(con=['deuda-alta'], etiqueta='Conservadora'),
+               'plan': almacen.plan_consulta(con=['deuda-alta'], etiqueta='Conservadora')}
+    for nombre, columnas in (('contar', 'COUNT(*)'), ('ids', 'perfil_id'), ('filas', 'perfil_id, perfil')):
+        indexada = _medir(almacen._conexion, f"SELECT {columnas} FROM resultados{donde}", parametros, repeticiones)
+        recorrido = _medir(almacen._conexion, f"SELECT {columnas} FROM resultados NOT INDEXED{donde}",
+                           parametros, repeticiones)
+        medidas[nombre] = {'indexada_ms': indexada, 'recorrido_ms': recorrido, 'aceleracion': recorrido / indexada}
+    return medidas
+
+
+def ejecutar(num_filas: int = 200000, filas_fila_a_fila: int = 5000, repeticiones: int = 5,
+             semilla: int = 42) -> Dict[str, Any]:
+    """Mide el guardado y las consultas en un directorio temporal"""
+    resultados = generar_resultados(num_filas, semilla)
+    directorio = tempfile.mkdtemp()
+    try:
+        uno = medir_fila_a_fila(os.path.join(directorio, 'fila.db'), resultados[:filas_fila_a_fila])
+        with AlmacenResultados(os.path.join(directorio, 'masivo.db')) as almacen:
+            inicio = time.perf_counter()
+            almacen.guardar(resultados, lote='bench')
+            masivo = time.perf_counter() - inicio
+            consulta = medir_consulta(almacen, repeticiones)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    por_fila = filas_fila_a_fila / uno
+    por_masivo = num_filas / masivo
+    return {
+        'filas': num_filas,
+        'guardado': {
+            'fila_a_fila': {'filas': filas_fila_a_fila, 'segundos': uno, 'filas_por_s': por_fila},
+            'masivo': {'filas': num_filas, 'segundos': masivo, 'filas_por_s': por_masivo},
+            'aceleracion': por_masivo / por_fila,
+        },
+        'consulta_deuda_alta_conservadora': consulta,
+    }
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Guardado masivo y consultas indexadas de resultados")
+    parser.add_argument('--filas', type=int, default=200000)
+    parser.add_argument('--filas-fila-a-fila', type=int, default=5000,
+                        help="Filas del guardado fila a fila (más lento)")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(ejecutar(args.filas, args.filas_fila_a_fila, args.repeticiones, args.semilla), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Compilador de Reglas Proposicionales
+==================================================
+
+Compara la evaluación de las reglas compiladas a máscaras de bits (NumPy
+sobre todas las filas a la vez) con la evaluación de CLIPS perfil a perfil
+(reset, assert, run). CLIPS se mide sobre una muestra y se extrapola al
+total de filas; sobre esa muestra se comprueba además que ambos producen
+las mismas recomendaciones.
+
+Uso:
+    python -m benchmarks.bench_compilador --filas 1000000 --muestra-clips 5000
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+
+from benchmarks.generador_perfiles import generar_perfiles
+from src.compilador_reglas import EvaluadorReglas
+from src.resultados_compactos import mascara_recomendaciones
+from src.sistema_experto import SistemaExperto
+
+CAMPOS_EXPERTO = ('ingresos', 'ahorro', 'gastos', 'deudas', 'ocio')
+
+
+def ejecutar(filas: int = 1_000_000, muestra_clips: int = 5000, semilla: int = 42) -> dict:
+    """
+    Ejecuta la comparación
+
+    Returns:
+        Dict con los tiempos, el rendimiento de cada motor y la aceleración
+    """
+    variedad = min(filas, 20_000)
+    perfiles = generar_perfiles(variedad, semilla)
+    base = {campo: np.array([p[campo] for p in perfiles], dtype=np.float64) for campo in CAMPOS_EXPERTO}
+    repeticiones = -(-filas // variedad)
+    columnas = {campo: np.tile(valores, repeticiones)[:filas] for campo, valores in base.items()}
+
+    evaluador = EvaluadorReglas()
+    if not evaluador.compilado:
+        raise AssertionError(f"Las reglas predefinidas no se compilaron: {evaluador.motivo}")
+
+    inicio = time.perf_counter()
+    mascaras = evaluador.evaluar_mascaras(columnas)
+    segundos_compilado = time.perf_counter() - inicio
+
+    sistema = SistemaExperto()
+    muestra = min(muestra_clips, filas)
+    esperadas = []
+    inicio = time.perf_counter()
+    for i in range(muestra):
+        sistema.insertar_hechos(**{campo: float(columnas[campo][i]) for campo in CAMPOS_EXPERTO})
+        sistema.ejecutar_inferencia()
+        esperadas.append(mascara_recomendaciones(sistema.mensajes_activados))
+    segundos_muestra = time.perf_counter() - inicio
+
+    if not np.array_equal(mascaras[:muestra], np.array(esperadas, dtype=np.uint8)):
+        raise AssertionError("Las reglas compiladas difieren de CLIPS")
+
+    segundos_clips = segundos_muestra / muestra * filas
+    return {
+        'filas': filas,
+        'muestra_clips': muestra,
+        'compilado_segundos': segundos_compilado,
+        'compilado_filas_por_s': filas / segundos_compilado,
+        'clips_segundos_extrapolados': segundos_clips,
+        'clips_filas_por_s': muestra / segundos_muestra,
+        'aceleracion': segundos_clips / segundos_compilado
+    }
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Reglas compiladas con NumPy frente a CLIPS")
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--muestra-clips', type=int, default=5000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(ejecutar(args.filas, args.muestra_clips, args.semilla), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
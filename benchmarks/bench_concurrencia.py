@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Concurrencia: Hilos frente a Procesos
+==================================================
+
+Mide cuánto paralelismo se obtiene con el sistema experto al repartir un
+lote de perfiles entre:
+
+- hilos: cada hilo usa su propio SistemaExperto del RegistroPorHilo (cffi
+  suelta el GIL dentro de CLIPS, pero el resto del ciclo lo necesita)
+- procesos: un ProcessPoolExecutor con un sistema precargado por proceso
+
+La creación de los sistemas y el arranque del pool quedan fuera del tiempo
+medido (el arranque se informa aparte). Para cada número de trabajadores
+se informa el rendimiento, el escalado frente a 1 trabajador, la
+eficiencia (escalado / trabajadores) y, con hilos, el uso de CPU del
+proceso (tiempo de CPU / tiempo real; > 1 indica hilos ejecutándose a la
+vez). La conclusión estima la fracción paralelizable con hilos (Amdahl) e
+indica el modelo de despliegue con más rendimiento en esta máquina.
+
+Uso:
+    python -m benchmarks.bench_concurrencia --trabajadores 1,2,4 --perfiles 2000
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List
+
+from src.registro_hilos import RegistroPorHilo
+from benchmarks.generador_perfiles import generar_perfiles
+
+# Registro del proceso trabajador (un sistema por proceso)
+_REGISTRO_PROCESO = None
+
+
+def _inicializar_proceso() -> None:
+    global _REGISTRO_PROCESO
+    _REGISTRO_PROCESO = RegistroPorHilo()
+    _REGISTRO_PROCESO.obtener()
+
+
+def _evaluar_trozo(perfiles: List[Dict[str, float]]) -> int:
+    for perfil in perfiles:
+        _REGISTRO_PROCESO.evaluar(perfil)
+    return len(perfiles)
+
+
+def _trozos(perfiles: list, trabajadores: int) -> List[list]:
+    return [perfiles[i::trabajadores] for i in range(trabajadores)]
+
+
+def medir_hilos(registro: RegistroPorHilo, perfiles: list, trabajadores: int) -> Dict[str, float]:
+    """Segundos y uso de CPU evaluando el lote repartido entre hilos"""
+    barrera = threading.Barrier(trabajadores + 1)
+
+    def trabajar(trozo):
+        registro.obtener()
+        barrera.wait()
+        for perfil in trozo:
+            registro.evaluar(perfil)
+
+    hilos = [threading.Thread(target=trabajar, args=(trozo,)) for trozo in _trozos(perfiles, trabajadores)]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    inicio, cpu = time.perf_counter(), time.process_time()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+    return {'segundos': segundos, 'uso_cpu': (time.process_time() - cpu) / segundos}
+
+
+def medir_procesos(perfiles: list, trabajadores: int) -> Dict[str, float]:
+    """Segundos de arranque del pool y de evaluación del lote repartido entre procesos"""
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=trabajadores, initializer=_inicializar_proceso) as pool:
+        # Un trozo vacío por proceso fuerza su arranque antes de medir
+        list(pool.map(_evaluar_trozo, [[]] * trabajadores))
+        arranque = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        evaluados = sum(pool.map(_evaluar_trozo, _trozos(perfiles, trabajadores)))
+        segundos = time.perf_counter() - inicio
+    assert evaluados == len(perfiles)
+    return {'segundos': segundos, 'arranque_s': arranque}
+
+
+def fraccion_paralela(escalado: float, trabajadores: int) -> float:
+    """Fracción paralelizable según la ley de Amdahl (acotada a [0, 1])"""
+    if trabajadores <= 1:
+        return 0.0
+    return min(1.0, max(0.0, (1 - 1 / escalado) / (1 - 1 / trabajadores)))
+
+
+def _filas(medidas: Dict[int, Dict[str, float]], num_perfiles: int) -> List[Dict[str, Any]]:
+    base = num_perfiles / medidas[min(medidas)]['segundos']
+    filas = []
+    for trabajadores, medida in sorted(medidas.items()):
+        rendimiento = num_perfiles / medida['segundos']
+        fila = {'trabajadores': trabajadores, 'evaluaciones_por_s': rendimiento,
+                'escalado': rendimiento / base, 'eficiencia': rendimiento / base / trabajadores}
+        fila.update({k: v for k, v in medida.items() if k != 'segundos'})
+        filas.append(fila)
+    return filas
+
+
+def ejecutar(trabajadores=(1, 2, 4), num_perfiles: int = 2000, semilla: int = 42) -> Dict[str, Any]:
+    """Mide hilos y procesos para cada número de trabajadores"""
+    perfiles = generar_perfiles(num_perfiles, semilla)
+    registro = RegistroPorHilo()
+    hilos = {n: medir_hilos(registro, perfiles, n) for n in trabajadores}
+    procesos = {n: medir_procesos(perfiles, n) for n in trabajadores}
+
+    filas_hilos = _filas(hilos, num_perfiles)
+    filas_procesos = _filas(procesos, num_perfiles)
+    mejor = max([('hilos', f) for f in filas_hilos] + [('procesos', f) for f in filas_procesos],
+                key=lambda par: par[1]['evaluaciones_por_s'])
+    mayor = filas_hilos[-1]
+    return {
+        'cpus': os.cpu_count(),
+        'python': f"{platform.python_implementation()} {platform.python_version()}",
+        'perfiles': num_perfiles,
+        'hilos': filas_hilos,
+        'procesos': filas_procesos,
+        'conclusion': {
+            'fraccion_paralela_hilos': fraccion_paralela(mayor['escalado'], mayor['trabajadores']),
+            'mejor_modelo': mejor[0],
+            'mejor_trabajadores': mejor[1]['trabajadores'],
+            # Con menos CPUs que trabajadores el escalado no refleja el GIL
+            'limitado_por_cpus': (os.cpu_count() or 1) < max(trabajadores),
+        },
+    }
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Rendimiento del sistema experto con hilos frente a procesos")
+    parser.add_argument('--trabajadores', default='1,2,4', help="Números de trabajadores separados por comas")
+    parser.add_argument('--perfiles', type=int, default=2000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    trabajadores = sorted({int(n) for n in args.trabajadores.split(',')})
+    print(json.dumps(ejecutar(trabajadores, args.perfiles, args.semilla), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la Deduplicación antes de la Inferencia
+====================================================
+
+Evalúa un lote con ambos motores (crear_evaluador_trozos, en el proceso
+actual) perfil a perfil y con evaluar_deduplicado, sobre dos conjuntos:
+
+- bandas: perfiles con ingresos por bandas salariales y ahorro, deudas y
+  ocio en importes estándar, repartidos entre unos pocos perfiles típicos
+  (muchos duplicados exactos)
+- continuos: perfiles de generador_perfiles cuantizados a un paso grueso
+
+La evaluación directa recibe los mismos perfiles cuantizados, así que los
+resultados deben coincidir (resultados_distintos = 0). Para cada conjunto
+se informa la proporción de duplicados, los tiempos, la aceleración y el
+ahorro estimado por evaluar_deduplicado frente al medido. El medido es
+menor que el estimado: scikit-fuzzy ya guarda en caché las entradas
+difusas repetidas, así que los duplicados cuestan menos que la media.
+
+Uso:
+    python -m benchmarks.bench_deduplicacion --perfiles 3000 --precision 500
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, Any, List
+
+from src.evaluacion_combinada import crear_evaluador_trozos
+from src.deduplicacion import agrupar_perfiles, expandir_resultados, evaluar_deduplicado
+from benchmarks.generador_perfiles import generar_perfiles
+
+BANDAS_INGRESOS = (800, 1200, 1500, 2000, 2500, 3000, 3500, 4000, 5000, 6500, 8000)
+IMPORTES_AHORRO = (0, 500, 1000, 2500, 5000, 10000, 20000)
+IMPORTES_DEUDA = (0, 0, 0, 250, 500, 1000, 3000)
+
+
+def _perfil_banda(rng: random.Random) -> Dict[str, float]:
+    ingresos = rng.choice(BANDAS_INGRESOS)
+    gastos = ingresos * rng.choice((0.6, 0.7, 0.8, 0.9))
+    return {
+        'ingresos': float(ingresos),
+        'ahorro': float(rng.choice(IMPORTES_AHORRO)),
+        'gastos': round(gastos, 2),
+        'deudas': float(rng.choice(IMPORTES_DEUDA)),
+        'ocio': round(gastos * rng.choice((0.1, 0.2, 0.3)), 2),
+        'riesgo': float(rng.choice((2, 5, 8))),
+    }
+
+
+def generar_perfiles_bandas(n: int, semilla: int = 42, tipos: int = 0) -> List[Dict[str, float]]:
+    """
+    Perfiles con importes por bandas, como los de nóminas y productos estándar
+
+    Los perfiles se reparten entre `tipos` perfiles típicos (por defecto
+    n / 8) con frecuencias muy desiguales, como en una población real.
+    """
+    rng = random.Random(semilla)
+    plantillas = [_perfil_banda(rng) for _ in range(tipos or max(1, n // 8))]
+    pesos = [1 / (i + 1) for i in range(len(plantillas))]
+    return [dict(perfil) for perfil in rng.choices(plantillas, weights=pesos, k=n)]
+
+
+def _diferencias(a: list, b: list) -> int:
+    return sum(1 for x, y in zip(a, b) if x['experto'] != y['experto'] or x['difuso'] != y['difuso'])
+
+
+def _evaluador_caliente(semilla: int):
+    """Motores nuevos tras unas evaluaciones de calentamiento
+
+    Cada medida usa los suyos: scikit-fuzzy guarda en caché las entradas ya
+    calculadas y favorecería a la segunda medida con los mismos motores.
+    """
+    evaluar = crear_evaluador_trozos()
+    evaluar(generar_perfiles(20, semilla + 1))
+    return evaluar
+
+
+def medir(perfiles: List[Dict[str, float]], precision, semilla: int) -> Dict[str, Any]:
+    """
+    Evaluación directa frente a deduplicada del mismo lote
+
+    La directa evalúa uno a uno los perfiles ya cuantizados, de modo que
+    ambas reciben las mismas entradas y solo cambia la deduplicación.
+    """
+    cuantizados = expandir_resultados(*agrupar_perfiles(perfiles, precision))
+    evaluar = _evaluador_caliente(semilla)
+    inicio = time.perf_counter()
+    directos = evaluar(cuantizados)
+    directa = time.perf_counter() - inicio
+
+    evaluar = _evaluador_caliente(semilla)
+    inicio = time.perf_counter()
+    resultados, estadisticas = evaluar_deduplicado(perfiles, evaluar, precision)
+    deduplicada = time.perf_counter() - inicio
+    return {
+        'perfiles': len(perfiles),
+        'unicos': estadisticas['unicos'],
+        'proporcion_duplicados': estadisticas['proporcion_duplicados'],
+        'directa_s': directa,
+        'deduplicada_s': deduplicada,
+        'aceleracion': directa / deduplicada,
+        'ahorro_estimado_s': estadisticas['segundos_ahorrados'],
+        'ahorro_medido_s': directa - deduplicada,
+        'agrupacion_y_reparto_s': estadisticas['segundos_agrupacion'] + estadisticas['segundos_reparto'],
+        'resultados_distintos': _diferencias(resultados, directos),
+    }
+
+
+def ejecutar(num_perfiles: int = 3000, precision: float = 500.0, semilla: int = 42) -> Dict[str, Any]:
+    """Mide ambos conjuntos"""
+    continuos = {campo: precision for campo in ('ingresos', 'ahorro', 'gastos', 'deudas', 'ocio')}
+    continuos['riesgo'] = 1.0
+    return {
+        'bandas': medir(generar_perfiles_bandas(num_perfiles, semilla), None, semilla),
+        'continuos': dict(medir(generar_perfiles(num_perfiles, semilla), continuos, semilla),
+                          precision=continuos),
+    }
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Evaluación con deduplicación de perfiles frente a directa")
+    parser.add_argument('--perfiles', type=int, default=3000)
+    parser.add_argument('--precision', type=float, default=500.0,
+                        help="Paso en USD de los importes del conjunto continuo (riesgo: 1)")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(ejecutar(args.perfiles, args.precision, args.semilla), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Motor Difuso Tensorial
+====================================
+
+Compara ModeloDifuso (pertenencias como matrices, reglas como índices) con
+el ControlSystem de scikit-fuzzy evaluando lotes completos:
+
+- Modelo financiero de 2 entradas y modelo extendido de 5 entradas
+- Modelos sintéticos de 5 entradas con 10, 100 y 1000 reglas (scikit-fuzzy
+  solo hasta --max-reglas-skfuzzy, porque su tiempo y memoria se disparan)
+
+Para cada caso se mide el tiempo del lote (en scikit-fuzzy incluye la
+construcción del ControlSystem, que también crece con las reglas), la
+memoria pico (tracemalloc, en una pasada aparte) y la diferencia máxima
+entre ambos motores.
+
+Uso:
+    python -m benchmarks.bench_difuso_tensorial --muestras 2000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from functools import reduce
+from typing import Dict, Any
+
+import numpy as np
+
+
+import skfuzzy as fuzz
+from skfuzzy import control as ctrl
+
+from src.difuso_tensorial import ModeloDifuso, VariableDifusa, modelo_financiero, modelo_financiero_extendido
+from src.fuzzy_system import TERMINOS_INVERSION
+
+PUNTOS_UNIVERSO = 201
+
+
+def simulador_skfuzzy(modelo: ModeloDifuso) -> ctrl.ControlSystemSimulation:
+    """ControlSystemSimulation Mamdani equivalente a un ModeloDifuso"""
+    variables = {}
+    for variable in modelo.entradas:
+        # Los puntos de quiebre se añaden al universo para que la interpolación sea exacta
+        quiebres = np.concatenate([variable._a, variable._b, variable._c, variable._d])
+        universo = np.union1d(np.linspace(*variable.rango, PUNTOS_UNIVERSO), quiebres)
+        antecedente = ctrl.Antecedent(universo, variable.nombre)
+        for termino, a, b, c, d in zip(variable.terminos, variable._a, variable._b, variable._c, variable._d):
+            antecedente[termino] = fuzz.trapmf(antecedente.universe, [a, b, c, d])
+        variables[variable.nombre] = antecedente
+
+    salida = ctrl.Consequent(modelo.universo, 'salida')
+    for k, termino in enumerate(modelo.nombres_salida):
+        salida[termino] = modelo._conjuntos_salida[k]
+
+    reglas = []
+    for operador, antecedentes, conclusion in modelo.reglas:
+        terminos = [variables[v][t] for v, t in antecedentes.items()]
+        condicion = reduce((lambda x, y: x & y) if operador == 'y' else (lambda x, y: x | y), terminos)
+        reglas.append(ctrl.Rule(condicion, salida[conclusion]))
+    return ctrl.ControlSystemSimulation(ctrl.ControlSystem(reglas))
+
+
+def modelo_sintetico(num_reglas: int, entradas: int = 5, terminos: int = 5, semilla: int = 42) -> ModeloDifuso:
+    """Modelo con particiones triangulares uniformes en [0, 1] y reglas 'y' aleatorias de 2 a 4 antecedentes"""
+    rng = random.Random(semilla)
+    paso = 1.0 / (terminos - 1)
+    particion = {f"t{i}": (max(0.0, (i - 1) * paso), i * paso, min(1.0, (i + 1) * paso)) for i in range(terminos)}
+    variables = [VariableDifusa(f"x{j}", (0, 1), particion) for j in range(entradas)]
+    reglas = []
+    for _ in range(num_reglas):
+        elegidas = rng.sample([v.nombre for v in variables], rng.randint(2, min(4, entradas)))
+        reglas.append(('y', {v: rng.choice(list(particion)) for v in elegidas}, rng.choice(list(TERMINOS_INVERSION))))
+    # Una regla 'o' sobre todos los términos de x0 garantiza que siempre hay salida
+    reglas += [('o', {'x0': t}, 'moderada') for t in particion]
+    return ModeloDifuso(variables, TERMINOS_INVERSION, reglas)
+
+
+def _medir(funcion) -> Dict[str, float]:
+    """Segundos y memoria pico (KiB) de una llamada; la memoria en una pasada aparte"""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcion()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'segundos': segundos, 'memoria_pico_kib': pico / 1024, 'resultado': resultado}
+
+
+def comparar(nombre: str, modelo: ModeloDifuso, muestras: int, con_skfuzzy: bool, semilla: int = 0) -> Dict[str, Any]:
+    """Mide un modelo con ambos motores sobre un lote aleatorio"""
+    rng = np.random.default_rng(semilla)
+    lote = {v.nombre: rng.uniform(*v.rango, muestras) for v in modelo.entradas}
+
+    tensorial = _medir(lambda: modelo.mamdani(lote))
+    resultado = {
+        'modelo': nombre,
+        'entradas': len(modelo.entradas),
+        'reglas': len(modelo.reglas),
+        'muestras': muestras,
+        'tensorial_s': tensorial['segundos'],
+        'tensorial_memoria_pico_kib': tensorial['memoria_pico_kib'],
+    }
+    if con_skfuzzy:
+        def evaluar_skfuzzy():
+            simulador = simulador_skfuzzy(modelo)
+            for nombre_variable, valores in lote.items():
+                simulador.input[nombre_variable] = valores
+            simulador.compute()
+            return simulador.output['salida']
+
+        skfuzzy = _medir(evaluar_skfuzzy)
+        resultado.update({
+            'skfuzzy_s': skfuzzy['segundos'],
+            'skfuzzy_memoria_pico_kib': skfuzzy['memoria_pico_kib'],
+            'aceleracion': skfuzzy['segundos'] / tensorial['segundos'],
+            'diferencia_maxima': float(np.nanmax(np.abs(skfuzzy['resultado'] - tensorial['resultado']))),
+        })
+    return resultado
+
+
+def ejecutar(muestras: int = 2000, max_reglas_skfuzzy: int = 100) -> list:
+    """Ejecuta todos los casos"""
+    casos = [('financiero', modelo_financiero(), True), ('extendido', modelo_financiero_extendido(), True)]
+    casos += [(f'sintetico_{n}', modelo_sintetico(n), n <= max_reglas_skfuzzy) for n in (10, 100, 1000)]
+    return [comparar(nombre, modelo, muestras, con_skfuzzy) for nombre, modelo, con_skfuzzy in casos]
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Motor difuso tensorial frente a ControlSystem de scikit-fuzzy")
+    parser.add_argument('--muestras', type=int, default=2000)
+    parser.add_argument('--max-reglas-skfuzzy', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(ejecutar(args.muestras, args.max_reglas_skfuzzy), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
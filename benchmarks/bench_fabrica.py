@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la Creación de Sistemas Expertos
+=============================================
+
+Compara la latencia de creación de instancias de SistemaExperto:
+
+- constructor: SistemaExperto() analiza plantillas, deffacts y reglas
+- fabrica: FabricaSistemas.crear() carga la imagen binaria de la plantilla
+  (bload) en un entorno vacío
+
+Para cada tamaño se crean N instancias seguidas (cada una se descarta al
+crear la siguiente, como en una creación por petición) y se informa el
+total y los percentiles por instancia. Aparte se mide la memoria CLIPS de
+una instancia ((mem-used)) y el coste único de construir la fábrica.
+
+Uso:
+    python -m benchmarks.bench_fabrica --instancias 1,100,10000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Any
+
+from src.sistema_experto import SistemaExperto
+from src.fabrica_sistemas import FabricaSistemas
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def medir_creacion(crear: Callable[[], SistemaExperto], instancias: int) -> Dict[str, Any]:
+    """Total y percentiles (microsegundos) de crear N instancias seguidas"""
+    latencias = []
+    inicio_total = time.perf_counter()
+    for _ in range(instancias):
+        inicio = time.perf_counter()
+        sistema = crear()
+        latencias.append((time.perf_counter() - inicio) * 1e6)
+        del sistema
+    total = time.perf_counter() - inicio_total
+    return {
+        'total_s': total,
+        'p50_us': statistics.median(latencias),
+        'p99_us': _percentil(latencias, 0.99),
+        'max_us': max(latencias),
+    }
+
+
+def memoria_clips(sistema: SistemaExperto) -> int:
+    """Bytes de memoria CLIPS de un entorno tras el reset, con (mem-used)"""
+    sistema.reiniciar_sistema()
+    return int(sistema.sistema.eval('(mem-used)'))
+
+
+def ejecutar(tamanos=(1, 100, 10000)) -> Dict[str, Any]:
+    """Mide ambos métodos de creación para cada tamaño"""
+    inicio = time.perf_counter()
+    fabrica = FabricaSistemas()
+    construccion = time.perf_counter() - inicio
+    # Calentamiento: primera carga de clipspy y de la imagen
+    SistemaExperto()
+    fabrica.crear()
+
+    resultados = []
+    for n in tamanos:
+        constructor = medir_creacion(SistemaExperto, n)
+        desde_imagen = medir_creacion(fabrica.crear, n)
+        resultados.append({
+            'instancias': n,
+            'constructor': constructor,
+            'fabrica': desde_imagen,
+            'aceleracion': constructor['total_s'] / desde_imagen['total_s'],
+        })
+    informe = {
+        'fabrica_construccion_s': construccion,
+        'imagen_bytes': fabrica.bytes_imagen,
+        'memoria_clips_bytes': {
+            'constructor': memoria_clips(SistemaExperto()),
+            'fabrica': memoria_clips(fabrica.crear()),
+        },
+        'creacion': resultados,
+    }
+    fabrica.cerrar()
+    return informe
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Latencia de creación de SistemaExperto: constructor frente a fábrica")
+    parser.add_argument('--instancias', default='1,100,10000', help="Tamaños separados por comas")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(ejecutar([int(n) for n in args.instancias.split(',')]), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
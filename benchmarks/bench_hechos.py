@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la Inserción de Hechos
+===================================
+
+Compara los dos modos de insertar_hechos del sistema experto:
+
+- cadena: umbrales evaluados en Python y un assert_string por hecho derivado
+- plantilla: un único hecho perfil-financiero asertado con la API de
+  plantillas; los umbrales los evalúan las reglas derivar-* en CLIPS
+
+Se miden por separado la inserción y el ciclo completo (inserción,
+inferencia y extracción de mensajes), y se comprueba que ambos modos
+producen las mismas recomendaciones.
+
+Uso:
+    python -m benchmarks.bench_hechos --perfiles 2000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+
+from benchmarks.generador_perfiles import generar_perfiles
+from src.sistema_experto import SistemaExperto
+
+CAMPOS_EXPERTO = ('ingresos', 'ahorro', 'gastos', 'deudas', 'ocio')
+
+
+def medir_modo(modo: str, perfiles: list) -> dict:
+    """
+    Mide la inserción y el ciclo completo de un modo
+
+    Args:
+        modo: 'cadena' o 'plantilla'
+        perfiles: Perfiles del sistema experto
+
+    Returns:
+        Dict con las medianas en microsegundos y los mensajes por perfil
+    """
+    sistema = SistemaExperto(modo_hechos=modo)
+    insercion, ciclo, mensajes = [], [], []
+
+    for perfil in perfiles:
+        inicio = time.perf_counter()
+        sistema.insertar_hechos(**perfil)
+        medio = time.perf_counter()
+        sistema.ejecutar_inferencia()
+        fin = time.perf_counter()
+
+        insercion.append((medio - inicio) * 1e6)
+        ciclo.append((fin - inicio) * 1e6)
+        mensajes.append(tuple(sistema.mensajes_activados))
+
+    return {
+        'insercion_mediana_us': statistics.median(insercion),
+        'ciclo_mediana_us': statistics.median(ciclo),
+        'mensajes': mensajes
+    }
+
+
+def ejecutar(n: int = 2000, semilla: int = 42) -> dict:
+    """
+    Ejecuta la comparación sobre n perfiles sintéticos
+
+    Returns:
+        Dict con las medianas de cada modo y la relación plantilla/cadena
+    """
+    perfiles = [{campo: perfil[campo] for campo in CAMPOS_EXPERTO}
+                for perfil in generar_perfiles(n, semilla)]
+
+    resultados = {modo: medir_modo(modo, perfiles) for modo in ('cadena', 'plantilla')}
+    if resultados['cadena'].pop('mensajes') != resultados['plantilla'].pop('mensajes'):
+        raise AssertionError("Los modos de inserción producen recomendaciones distintas")
+
+    return {
+        'perfiles': n,
+        'cadena': resultados['cadena'],
+        'plantilla': resultados['plantilla'],
+        'relacion_ciclo': resultados['plantilla']['ciclo_mediana_us'] / resultados['cadena']['ciclo_mediana_us']
+    }
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Inserción de hechos: assert_string frente a plantilla")
+    parser.add_argument('--perfiles', type=int, default=2000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(ejecutar(args.perfiles, args.semilla), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Tiempo de Importación
+===================================
+
+Mide, en intérpretes nuevos, cuánto tarda en importarse cada punto de
+entrada y qué dependencias gráficas arrastra:
+
+- src: núcleo sin interfaz (motor CLIPS y métricas)
+- src.difuso_escalar, src.difuso_tensorial: motores difusos del núcleo
+- src.graficos_difusos: renderizador (matplotlib se importa al dibujar)
+- src.fuzzy_system: motor de scikit-fuzzy (skfuzzy.control carga pyplot)
+- src.gui.main_window: interfaz gráfica completa
+
+Cada importación se repite en varios procesos y se toma la mejor.
+
+Uso:
+    python -m benchmarks.bench_importacion --repeticiones 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, Any
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MODULOS = ('src', 'src.difuso_escalar', 'src.difuso_tensorial', 'src.graficos_difusos',
+           'src.fuzzy_system', 'src.gui.main_window')
+
+GRAFICOS = ('tkinter', 'matplotlib', 'skfuzzy')
+
+SCRIPT = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+segundos = time.perf_counter() - inicio
+cargados = [m for m in {graficos!r} if m in sys.modules]
+print(json.dumps({{'segundos': segundos, 'modulos': len(sys.modules), 'dependencias': cargados}}))
+"""
+
+
+def medir(modulo: str, repeticiones: int = 5) -> Dict[str, Any]:
+    """Mejor tiempo de importación de un módulo en un intérprete nuevo"""
+    mejor = None
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', SCRIPT.format(modulo=modulo, graficos=GRAFICOS)],
+                                cwd=RAIZ, capture_output=True, text=True, check=True).stdout
+        datos = json.loads(next(l for l in salida.splitlines() if l.startswith('{')))
+        if mejor is None or datos['segundos'] < mejor['segundos']:
+            mejor = datos
+    return {
+        'modulo': modulo,
+        'importacion_ms': mejor['segundos'] * 1000,
+        'modulos_cargados': mejor['modulos'],
+        'dependencias_graficas': mejor['dependencias'],
+    }
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Tiempo de importación del núcleo frente a la GUI")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(json.dumps([medir(modulo, args.repeticiones) for modulo in MODULOS], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark de las Instantáneas de Sesión
+=======================================
+
+Simula una sesión de asesoría que ha acumulado N hechos de movimientos y
+compara dos formas de reconstruir su memoria de trabajo en un proceso
+nuevo:
+
+- reinsercion: volver a asertar cada hecho con assert_string
+- instantanea: restaurar_instantanea() sobre el archivo .sfsn
+
+Uso:
+    python -m benchmarks.bench_instantaneas --hechos 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from src.sistema_experto import SistemaExperto
+from src.instantaneas import guardar_instantanea, restaurar_instantanea
+
+PLANTILLA_MOVIMIENTO = "(deftemplate movimiento (slot id) (slot monto) (slot categoria))"
+CATEGORIAS = ('vivienda', 'comida', 'transporte', 'ocio', 'ahorro')
+
+
+def crear_sesion() -> SistemaExperto:
+    """Sistema experto con la plantilla de movimientos de la sesión"""
+    sistema = SistemaExperto()
+    sistema.sistema.build(PLANTILLA_MOVIMIENTO)
+    sistema.insertar_hechos(ingresos=3000, ahorro=9000, gastos=2600, deudas=0, ocio=500)
+    return sistema
+
+
+def ejecutar(num_hechos: int = 20000) -> dict:
+    """
+    Mide la reinserción y la restauración de num_hechos movimientos
+
+    Returns:
+        Dict con los tiempos en milisegundos, el tamaño del archivo y la aceleración
+    """
+    hechos = [f"(movimiento (id {i}) (monto {(i * 37) % 1000 + 0.5}) (categoria {CATEGORIAS[i % 5]}))"
+              for i in range(num_hechos)]
+
+    origen = crear_sesion()
+    inicio = time.perf_counter()
+    for hecho in hechos:
+        origen.sistema.assert_string(hecho)
+    reinsercion = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'sesion.sfsn')
+        inicio = time.perf_counter()
+        guardar_instantanea(origen, ruta)
+        guardado = time.perf_counter() - inicio
+        tamano = os.path.getsize(ruta)
+
+        destino = crear_sesion()
+        inicio = time.perf_counter()
+        restaurados = restaurar_instantanea(destino, ruta)
+        restauracion = time.perf_counter() - inicio
+
+    if restaurados != num_hechos + 2:
+        raise AssertionError(f"Se esperaban {num_hechos + 2} hechos y se restauraron {restaurados}")
+
+    return {
+        'hechos': num_hechos,
+        'reinsercion_ms': reinsercion * 1e3,
+        'guardado_ms': guardado * 1e3,
+        'restauracion_ms': restauracion * 1e3,
+        'bytes_archivo': tamano,
+        'bytes_por_hecho': tamano / restaurados,
+        'aceleracion': reinsercion / restauracion
+    }
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Restauración de sesión: reinserción frente a instantánea")
+    parser.add_argument('--hechos', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(ejecutar(args.hechos), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Memoria de los Resultados por Lotes
+================================================
+
+Compara la memoria que ocupan N resultados en su forma actual (dict de
+evaluar_mamdani + texto de obtener_resultado) con ResultadosCompactos.
+
+Los resultados se construyen con la misma forma que producen los motores
+pero sin ejecutar la inferencia, para poder medir lotes grandes.
+
+Uso:
+    python -m benchmarks.bench_memoria_resultados --filas 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+
+import numpy as np
+
+from src.resultados_compactos import ResultadosCompactos, RECOMENDACIONES, ETIQUETAS
+
+# Textos de obtener_resultado para cada recomendación
+TEXTOS = {
+    'ahorro-bajo': "- Estas ahorrando menos del 10% de tus ingresos.\n",
+    'deuda-alta': "- Tus deudas superan el 40% de tus ingresos. Reduce o renegocia.\n",
+    'sin-emergencia': "- No tienes un fondo de emergencia de al menos 3 meses de gastos.\n",
+    'ocio-excesivo': "- Gastas mas del 30% de tus gastos en ocio. Intenta controlarlo.\n",
+    'puede-invertir': "- Estas en buena posición para considerar inversiones.\n",
+}
+
+
+def _filas_sinteticas(n: int, semilla: int):
+    rng = random.Random(semilla)
+    for _ in range(n):
+        activadas = [r for r in RECOMENDACIONES if rng.random() < 0.4]
+        nivel = rng.uniform(0, 50)
+        yield activadas, nivel, ETIQUETAS[min(2, int(nivel // 17))], rng.uniform(0, 1000), rng.uniform(0, 10)
+
+
+def medir_dicts(n: int, semilla: int) -> int:
+    """Memoria (bytes) de la representación actual"""
+    tracemalloc.start()
+    resultados = []
+    for activadas, nivel, etiqueta, ahorro, riesgo in _filas_sinteticas(n, semilla):
+        texto = "\n".join(TEXTOS[r] for r in activadas) or "✅ Tu situación financiera está equilibrada."
+        difuso = {
+            'metodo': 'Difuso',
+            'ahorro_entrada': ahorro,
+            'riesgo_entrada': riesgo,
+            'nivel_inversion': np.float64(round(nivel, 2)),
+            'etiqueta': etiqueta,
+            'unidad': '%'
+        }
+        resultados.append((texto, difuso))
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultados
+    return actual
+
+
+def medir_compactos(n: int, semilla: int):
+    """Memoria (bytes) de ResultadosCompactos y tamaño del archivo .sfrc"""
+    tracemalloc.start()
+    lote = ResultadosCompactos(capacidad=n)
+    for activadas, nivel, etiqueta, _, _ in _filas_sinteticas(n, semilla):
+        lote.agregar_evaluacion(activadas, {'nivel_inversion': nivel, 'etiqueta': etiqueta})
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'lote.sfrc')
+        lote.guardar(ruta)
+        tamano_archivo = os.path.getsize(ruta)
+    return actual, tamano_archivo
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Memoria de resultados: dicts frente a columnas")
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    bytes_dicts = medir_dicts(args.filas, args.semilla)
+    bytes_compactos, bytes_archivo = medir_compactos(args.filas, args.semilla)
+    por_millon = 1_000_000 / args.filas
+
+    print(json.dumps({
+        'filas': args.filas,
+        'dicts_bytes_por_fila': bytes_dicts / args.filas,
+        'compactos_bytes_por_fila': bytes_compactos / args.filas,
+        'archivo_bytes_por_fila': bytes_archivo / args.filas,
+        'dicts_mib_por_millon': bytes_dicts * por_millon / 2**20,
+        'compactos_mib_por_millon': bytes_compactos * por_millon / 2**20,
+        'reduccion': bytes_dicts / max(1, bytes_compactos),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la Extracción de Mensajes con Reglas Personalizadas
+================================================================
+
+Carga N reglas que generan hechos de mensaje propios y compara la
+extracción de mensajes:
+
+- lineal: el mapa relación → texto recorrido para cada hecho buscando
+  "(relacion)" en su representación textual (implementación anterior)
+- indice: RegistroMensajes, una consulta al índice por hecho
+
+Uso:
+    python -m benchmarks.bench_mensajes --reglas 1000 --activas 20
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from src.sistema_experto import SistemaExperto
+
+
+def extraer_lineal(sistema: SistemaExperto, mapa_mensajes: dict) -> list:
+    """Extracción anterior: búsqueda de texto del mapa completo en cada hecho"""
+    mensajes = []
+    for fact in sistema.sistema.facts():
+        fact_str = str(fact)
+        for clave, texto in mapa_mensajes.items():
+            if f"({clave})" in fact_str:
+                mensajes.append(texto)
+                break
+    return mensajes
+
+
+def construir_sistema(num_reglas: int) -> tuple:
+    """Crea un sistema con num_reglas reglas que generan mensajes propios"""
+    sistema = SistemaExperto()
+    reglas = "\n".join(
+        f"(defrule regla-cliente-{i} (senal-{i}) => (assert (mensaje-cliente-{i})))"
+        for i in range(num_reglas)
+    )
+    mensajes = {f"mensaje-cliente-{i}": f"- Recomendación personalizada {i}.\n" for i in range(num_reglas)}
+    if not sistema.cargar_reglas(reglas, mensajes=mensajes):
+        raise RuntimeError("No se pudieron cargar las reglas del benchmark")
+    return sistema, mensajes
+
+
+def ejecutar(num_reglas: int = 1000, activas: int = 20, repeticiones: int = 200, semilla: int = 42) -> dict:
+    """
+    Mide ambas extracciones sobre la misma memoria de trabajo
+
+    Args:
+        num_reglas: Reglas personalizadas cargadas
+        activas: Señales activadas por evaluación
+        repeticiones: Evaluaciones medidas
+        semilla: Semilla para elegir las señales
+
+    Returns:
+        Dict con la mediana por extracción en microsegundos
+    """
+    sistema, mensajes = construir_sistema(num_reglas)
+    rng = random.Random(semilla)
+    tiempos = {'lineal': [], 'indice': []}
+
+    for _ in range(repeticiones):
+        sistema.reiniciar_sistema()
+        for i in rng.sample(range(num_reglas), activas):
+            sistema.sistema.assert_string(f"(senal-{i})")
+        sistema.sistema.run()
+
+        inicio = time.perf_counter()
+        lineal = extraer_lineal(sistema, mensajes)
+        tiempos['lineal'].append((time.perf_counter() - inicio) * 1e6)
+
+        inicio = time.perf_counter()
+        sistema._procesar_mensajes()
+        tiempos['indice'].append((time.perf_counter() - inicio) * 1e6)
+
+        textos, _ = sistema.registro_mensajes.extraer(sistema.sistema.facts())
+        if len(lineal) != activas or sorted(lineal) != sorted(textos):
+            raise AssertionError("Las extracciones no coinciden")
+
+    lineal = statistics.median(tiempos['lineal'])
+    indice = statistics.median(tiempos['indice'])
+    return {
+        'reglas': num_reglas,
+        'mensajes_activos': activas,
+        'lineal_mediana_us': lineal,
+        'indice_mediana_us': indice,
+        'aceleracion': lineal / indice,
+    }
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Extracción de mensajes: búsqueda lineal frente a índice")
+    parser.add_argument('--reglas', type=int, default=1000)
+    parser.add_argument('--activas', type=int, default=20)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(ejecutar(args.reglas, args.activas, args.repeticiones), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los Motores de Inferencia
+======================================
+
+Mide el rendimiento del sistema experto CLIPS y del sistema difuso:
+
+- Latencia por llamada (p50/p95/p99) de insertar_hechos + ejecutar_inferencia
+  + obtener_resultado, evaluar_mamdani, evaluar_tsk y evaluar_ambos_metodos,
+  y evaluar_mamdani/evaluar_tsk por la ruta escalar (ruta_escalar=True)
+- Rendimiento por lotes (perfiles por segundo)
+- Tiempo de construcción de cada motor
+- Tiempo de importación de cada módulo (en un proceso nuevo)
+- Memoria pico durante la construcción y los lotes
+
+Uso:
+    python -m benchmarks.bench_motores run --salida resultados.json
+    python -m benchmarks.bench_motores compare baseline.json resultados.json
+
+El comando compare termina con código 1 si alguna métrica empeora más
+que la tolerancia indicada respecto a la línea base.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, Any, List
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+from src.sistema_experto import SistemaExperto
+from src.fuzzy_system import SistemaDifusoFinanciero
+
+from benchmarks.generador_perfiles import generar_perfiles, entradas_difusas
+
+# Sentido de mejora de cada tipo de métrica
+MENOR_ES_MEJOR = 'menor'
+MAYOR_ES_MEJOR = 'mayor'
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """
+    Calcula un percentil por interpolación lineal
+
+    Args:
+        valores: Muestras (no necesariamente ordenadas)
+        p: Percentil en [0, 100]
+
+    Returns:
+        float: Valor del percentil
+    """
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    fraccion = posicion - inferior
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fraccion
+
+
+def medir_latencias(funcion: Callable[[Dict[str, float]], Any],
+                    perfiles: List[Dict[str, float]],
+                    calentamiento: int = 20) -> Dict[str, float]:
+    """
+    Mide la latencia de una función llamada una vez por perfil
+
+    Args:
+        funcion: Función a medir, recibe un perfil
+        perfiles: Perfiles de entrada
+        calentamiento: Llamadas previas que no se miden
+
+    Returns:
+        Dict con p50, p95, p99 y media en microsegundos
+    """
+    for perfil in perfiles[:calentamiento]:
+        funcion(perfil)
+
+    muestras = []
+    for perfil in perfiles:
+        inicio = time.perf_counter()
+        funcion(perfil)
+        muestras.append((time.perf_counter() - inicio) * 1e6)
+
+    return {
+        'p50_us': percentil(muestras, 50),
+        'p95_us': percentil(muestras, 95),
+        'p99_us': percentil(muestras, 99),
+        'media_us': statistics.fmean(muestras),
+    }
+
+
+def medir_lote(funcion: Callable[[Dict[str, float]], Any],
+               perfiles: List[Dict[str, float]]) -> float:
+    """
+    Mide el rendimiento de un lote completo
+
+    Args:
+        funcion: Función a aplicar a cada perfil
+        perfiles: Perfiles del lote
+
+    Returns:
+        float: Perfiles procesados por segundo
+    """
+    inicio = time.perf_counter()
+    for perfil in perfiles:
+        funcion(perfil)
+    return len(perfiles) / (time.perf_counter() - inicio)
+
+
+def medir_construccion(clase, repeticiones: int = 10) -> Dict[str, float]:
+    """
+    Mide el tiempo de construcción y la memoria pico de un motor
+
+    Args:
+        clase: Clase del motor a construir
+        repeticiones: Número de construcciones
+
+    Returns:
+        Dict con la mediana en milisegundos y la memoria pico en KiB
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        clase()
+        tiempos.append((time.perf_counter() - inicio) * 1e3)
+
+    tracemalloc.start()
+    instancia = clase()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instancia
+
+    return {
+        'mediana_ms': statistics.median(tiempos),
+        'memoria_pico_kib': pico / 1024,
+    }
+
+
+def medir_importacion(modulo: str, repeticiones: int = 3) -> float:
+    """
+    Mide el tiempo de importación de un módulo en un intérprete nuevo
+
+    Args:
+        modulo: Nombre del módulo dentro de src
+        repeticiones: Número de procesos lanzados
+
+    Returns:
+        float: Mediana del tiempo de importación en milisegundos
+    """
+    codigo = (
+        "import time; "
+        "t = time.perf_counter(); import src.{0}; "
+        "print((time.perf_counter() - t) * 1e3)"
+    ).format(modulo)
+
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-c', codigo],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        )
+        tiempos.append(float(salida.stdout.strip()))
+    return statistics.median(tiempos)
+
+
+def medir_memoria_lote(funcion: Callable[[Dict[str, float]], Any],
+                       perfiles: List[Dict[str, float]]) -> float:
+    """
+    Mide la memoria pico de Python al procesar un lote
+
+    Args:
+        funcion: Función a aplicar a cada perfil
+        perfiles: Perfiles del lote
+
+    Returns:
+        float: Memoria pico en KiB
+    """
+    tracemalloc.start()
+    resultados = [funcion(perfil) for perfil in perfiles]
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultados
+    return pico / 1024
+
+
+def ejecutar_benchmarks(n: int = 500, semilla: int = 42) -> Dict[str, Any]:
+    """
+    Ejecuta todos los benchmarks
+
+    Args:
+        n: Número de perfiles por medición
+        semilla: Semilla del generador de perfiles
+
+    Returns:
+        Dict serializable a JSON con metadatos y métricas
+    """
+    perfiles = generar_perfiles(n, semilla)
+    experto = SistemaExperto()
+    difuso = SistemaDifusoFinanciero()
+    escalar = SistemaDifusoFinanciero(ruta_escalar=True)
+
+    def evaluar_experto(perfil):
+        experto.insertar_hechos(**perfil)
+        experto.ejecutar_inferencia()
+        return experto.obtener_resultado()
+
+    def evaluar_mamdani(perfil):
+        return difuso.evaluar_mamdani(*entradas_difusas(perfil))
+
+    def evaluar_tsk(perfil):
+        return difuso.evaluar_tsk(*entradas_difusas(perfil))
+
+    def evaluar_ambos(perfil):
+        return difuso.evaluar_ambos_metodos(*entradas_difusas(perfil))
+
+    def evaluar_mamdani_escalar(perfil):
+        return escalar.evaluar_mamdani(*entradas_difusas(perfil))
+
+    def evaluar_tsk_escalar(perfil):
+        return escalar.evaluar_tsk(*entradas_difusas(perfil))
+
+    operaciones = {
+        'experto': evaluar_experto,
+        'mamdani': evaluar_mamdani,
+        'tsk': evaluar_tsk,
+        'ambos': evaluar_ambos,
+        'mamdani_escalar': evaluar_mamdani_escalar,
+        'tsk_escalar': evaluar_tsk_escalar,
+    }
+
+    metricas = {}
+
+    def registrar(nombre, valor, mejor):
+        metricas[nombre] = {'valor': valor, 'mejor': mejor}
+
+    for nombre, funcion in operaciones.items():
+        latencias = medir_latencias(funcion, perfiles)
+        for clave, valor in latencias.items():
+            registrar(f'{nombre}.latencia_{clave}', valor, MENOR_ES_MEJOR)
+        registrar(f'{nombre}.lote_perfiles_por_s', medir_lote(funcion, perfiles), MAYOR_ES_MEJOR)
+        registrar(f'{nombre}.lote_memoria_pico_kib', medir_memoria_lote(funcion, perfiles), MENOR_ES_MEJOR)
+
+    for nombre, clase in (('experto', SistemaExperto), ('difuso', SistemaDifusoFinanciero)):
+        construccion = medir_construccion(clase)
+        registrar(f'{nombre}.construccion_ms', construccion['mediana_ms'], MENOR_ES_MEJOR)
+        registrar(f'{nombre}.construccion_memoria_pico_kib', construccion['memoria_pico_kib'], MENOR_ES_MEJOR)
+
+    for modulo in ('sistema_experto', 'fuzzy_system'):
+        registrar(f'importacion.{modulo}_ms', medir_importacion(modulo), MENOR_ES_MEJOR)
+
+    return {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'perfiles': n,
+            'semilla': semilla,
+        },
+        'metricas': metricas,
+    }
+
+
+def comparar(base: Dict[str, Any], actual: Dict[str, Any], tolerancia: float = 0.15) -> List[Dict[str, Any]]:
+    """
+    Compara dos ejecuciones y devuelve las métricas que empeoraron
+
+    Args:
+        base: Resultados de la línea base
+        actual: Resultados actuales
+        tolerancia: Empeoramiento relativo permitido (0.15 = 15%)
+
+    Returns:
+        list: Regresiones con nombre, valores y cambio relativo
+    """
+    regresiones = []
+    for nombre, medida in actual['metricas'].items():
+        referencia = base['metricas'].get(nombre)
+        if referencia is None or referencia['valor'] == 0:
+            continue
+
+        cambio = (medida['valor'] - referencia['valor']) / referencia['valor']
+        if medida['mejor'] == MAYOR_ES_MEJOR:
+            cambio = -cambio
+
+        if cambio > tolerancia:
+            regresiones.append({
+                'metrica': nombre,
+                'base': referencia['valor'],
+                'actual': medida['valor'],
+                'cambio_relativo': round(cambio, 4),
+            })
+    return regresiones
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmarks de los motores de inferencia")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_run = subparsers.add_parser('run', help="Ejecuta los benchmarks y emite JSON")
+    parser_run.add_argument('--perfiles', type=int, default=500)
+    parser_run.add_argument('--semilla', type=int, default=42)
+    parser_run.add_argument('--salida', help="Archivo JSON de salida (por defecto stdout)")
+
+    parser_compare = subparsers.add_parser('compare', help="Compara contra una línea base")
+    parser_compare.add_argument('base')
+    parser_compare.add_argument('actual')
+    parser_compare.add_argument('--tolerancia', type=float, default=0.15)
+
+    args = parser.parse_args(argv)
+
+    if args.comando == 'run':
+        resultados = ejecutar_benchmarks(args.perfiles, args.semilla)
+        texto = json.dumps(resultados, indent=2, ensure_ascii=False)
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as f:
+                f.write(texto + "\n")
+        else:
+            print(texto)
+        return 0
+
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.actual, encoding='utf-8') as f:
+        actual = json.load(f)
+
+    regresiones = comparar(base, actual, args.tolerancia)
+    print(json.dumps({'tolerancia': args.tolerancia, 'regresiones': regresiones},
+                     indent=2, ensure_ascii=False))
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
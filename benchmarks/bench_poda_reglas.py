@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la Poda de Reglas por Soporte
+==========================================
+
+Mide cómo escala EvaluadorDifusoEscalar con bases de reglas grandes, con y
+sin la poda por intervalos de soporte (IndiceSoportes).
+
+Las bases son sintéticas: cada entrada se parte en k términos triangulares
+uniformes (k ≈ √reglas, para que haya pares de términos distintos de sobra),
+la salida en 7 términos, y cada regla combina un término de ahorro y uno de
+riesgo con 'y' (90%) u 'o'. Se comprueba que ambos modos dan la misma
+salida.
+
+Uso:
+    python -m benchmarks.bench_poda_reglas --reglas 10,100,1000
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from typing import Dict, Any
+
+from src.difuso_escalar import EvaluadorDifusoEscalar
+
+
+def particion(prefijo: str, minimo: float, maximo: float, k: int) -> Dict[str, tuple]:
+    """k términos triangulares uniformes; los extremos son hombros (a == b o b == c)"""
+    paso = (maximo - minimo) / (k - 1)
+    return {f"{prefijo}{i}": (max(minimo, minimo + (i - 1) * paso), minimo + i * paso,
+                              min(maximo, minimo + (i + 1) * paso))
+            for i in range(k)}
+
+
+def base_sintetica(num_reglas: int, semilla: int = 42) -> tuple:
+    """Términos de ahorro, riesgo y salida, singletones y reglas de una base sintética"""
+    rng = random.Random(semilla)
+    k = max(3, math.ceil(math.sqrt(num_reglas)))
+    ahorro = particion('a', 0.0, 1000.0, k)
+    riesgo = particion('r', 0.0, 10.0, k)
+    salida = particion('s', 0.0, 50.0, 7)
+    singletones = {nombre: puntos[1] for nombre, puntos in salida.items()}
+    reglas = tuple(
+        ('y' if rng.random() < 0.9 else 'o', rng.choice(list(ahorro)), rng.choice(list(riesgo)),
+         rng.choice(list(salida)))
+        for _ in range(num_reglas)
+    )
+    return ahorro, riesgo, salida, singletones, reglas
+
+
+def medir(num_reglas: int, evaluaciones: int = 5000, semilla: int = 42, repeticiones: int = 5) -> Dict[str, Any]:
+    """
+    Tiempo medio por llamada de cada operación con y sin poda (la mejor de
+    varias pasadas alternando los modos, para reducir el ruido)
+
+    Returns:
+        Dict con microsegundos por llamada, aceleración, reglas candidatas
+        medias y diferencia máxima entre modos
+    """
+    ahorro, riesgo, salida, singletones, reglas = base_sintetica(num_reglas, semilla)
+    evaluadores = {
+        podar: EvaluadorDifusoEscalar(ahorro, riesgo, salida, singletones, reglas, podar=podar)
+        for podar in (False, True)
+    }
+    rng = random.Random(semilla + 1)
+    entradas = [(rng.uniform(0, 1000), rng.uniform(0, 10)) for _ in range(evaluaciones)]
+
+    # Calienta la caché de candidatas y comprueba que ambos modos coinciden
+    diferencia = 0.0
+    for a, r in entradas:
+        completas, podadas = evaluadores[False].fuerzas(a, r), evaluadores[True].fuerzas(a, r)
+        diferencia = max(diferencia, max(abs(x - y) for x, y in zip(completas, podadas)))
+
+    podado = evaluadores[True]
+    candidatas = sum(len(podado._candidatas[(podado._indice_ahorro.tramo(a), podado._indice_riesgo.tramo(r))])
+                     for a, r in entradas) / len(entradas)
+
+    resultado = {'reglas': num_reglas, 'terminos_por_entrada': len(ahorro),
+                 'reglas_candidatas_media': candidatas, 'diferencia_maxima': diferencia}
+    for operacion in ('fuerzas', 'mamdani', 'tsk'):
+        tiempos = {False: float('inf'), True: float('inf')}
+        for _ in range(repeticiones):
+            for podar, evaluador in evaluadores.items():
+                funcion = getattr(evaluador, operacion)
+                inicio = time.perf_counter()
+                for a, r in entradas:
+                    funcion(a, r)
+                tiempos[podar] = min(tiempos[podar], (time.perf_counter() - inicio) / len(entradas) * 1e6)
+        resultado[operacion] = {
+            'completo_us': tiempos[False],
+            'podado_us': tiempos[True],
+            'aceleracion': tiempos[False] / tiempos[True]
+        }
+    return resultado
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Escalado de la evaluación difusa con y sin poda por soporte")
+    parser.add_argument('--reglas', default='10,100,1000', help="Tamaños de base separados por comas")
+    parser.add_argument('--evaluaciones', type=int, default=5000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    resultados = [medir(int(n), args.evaluaciones, args.semilla) for n in args.reglas.split(',')]
+    print(json.dumps(resultados, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Coste de las Trazas por Muestreo
+==============================================
+
+Mide el sobrecoste de TrazadorMuestreo sobre ambos motores con tasas de
+muestreo de 0%, 1% y 100%, comparado con los motores sin trazador.
+
+Uso:
+    python -m benchmarks.bench_trazas --perfiles 2000 --salida trazas.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Any
+
+from src.sistema_experto import SistemaExperto
+from src.fuzzy_system import SistemaDifusoFinanciero
+from src.trazas import TrazadorMuestreo
+
+from benchmarks.generador_perfiles import generar_perfiles, entradas_difusas
+
+TASAS = (0.0, 0.01, 1.0)
+
+
+def _tiempo_experto(perfiles, trazador) -> float:
+    sistema = SistemaExperto(trazador=trazador)
+    inicio = time.perf_counter()
+    for perfil in perfiles:
+        sistema.insertar_hechos(**perfil)
+        sistema.ejecutar_inferencia()
+        sistema.obtener_resultado()
+    return time.perf_counter() - inicio
+
+
+def _tiempo_difuso(perfiles, trazador) -> float:
+    sistema = SistemaDifusoFinanciero(trazador=trazador)
+    entradas = [entradas_difusas(perfil) for perfil in perfiles]
+    inicio = time.perf_counter()
+    for ahorro, riesgo in entradas:
+        sistema.evaluar_mamdani(ahorro, riesgo)
+    return time.perf_counter() - inicio
+
+
+def ejecutar(n: int = 2000, semilla: int = 42) -> Dict[str, Any]:
+    """
+    Mide el sobrecoste de las trazas para cada motor y tasa
+
+    Args:
+        n: Número de perfiles por medición
+        semilla: Semilla del generador de perfiles
+
+    Returns:
+        Dict serializable a JSON con tiempos por llamada y sobrecoste relativo
+    """
+    perfiles = generar_perfiles(n, semilla)
+    resultados = {'perfiles': n, 'motores': {}}
+
+    for motor, medir in (('experto', _tiempo_experto), ('difuso', _tiempo_difuso)):
+        base = medir(perfiles, None)
+        filas = {'sin_trazador_us': base / n * 1e6}
+        for tasa in TASAS:
+            trazador = TrazadorMuestreo(tasa=tasa, capacidad=n, semilla=semilla)
+            tiempo = medir(perfiles, trazador)
+            filas[f'tasa_{tasa:g}'] = {
+                'por_llamada_us': tiempo / n * 1e6,
+                'sobrecoste_pct': (tiempo - base) / base * 100,
+                'trazas': len(trazador.trazas()),
+            }
+        resultados['motores'][motor] = filas
+
+    return resultados
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Sobrecoste de las trazas por muestreo")
+    parser.add_argument('--perfiles', type=int, default=2000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', help="Archivo JSON de salida (por defecto stdout)")
+    args = parser.parse_args(argv)
+
+    texto = json.dumps(ejecutar(args.perfiles, args.semilla), indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Prueba de Resistencia (Soak) de Ambos Motores
+=============================================
+
+Ejecuta millones de evaluaciones con entradas variadas sobre el sistema
+experto (reset/assert/run en cada perfil) y el sistema difuso (compute de
+scikit-fuzzy) y, cada cierto número de evaluaciones, toma una muestra de:
+
+- RSS del proceso (/proc/self/statm, o ru_maxrss si no existe)
+- Memoria Python trazada por tracemalloc (opcional, ralentiza la prueba)
+- Memoria del entorno CLIPS, con (mem-used)
+
+La primera muestra tras el calentamiento es la referencia. La prueba
+falla si alguna medida crece más que el umbral relativo respecto a ella
+(con un mínimo absoluto para ignorar el ruido del asignador). Con
+tracemalloc, el informe incluye las líneas con más crecimiento.
+
+Opcionalmente, los motores se reciclan (se crean de nuevo) al superar una
+edad en segundos o un número de evaluaciones, como haría un servicio que
+renueva sus entornos periódicamente.
+
+Uso:
+    python -m benchmarks.soak --evaluaciones 2000000 --intervalo 50000
+    python -m benchmarks.soak --evaluaciones 500000 --tracemalloc --edad-maxima 600
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, Any, List, Optional
+
+
+from benchmarks.generador_perfiles import generar_perfiles, entradas_difusas
+
+CAMPOS_EXPERTO = ('ingresos', 'ahorro', 'gastos', 'deudas', 'ocio')
+MEDIDAS = ('rss_bytes', 'tracemalloc_bytes', 'clips_bytes')
+
+# Crecimiento absoluto por debajo del cual no se considera fuga
+MINIMO_ABSOLUTO_POR_DEFECTO = 4 * 1024 * 1024
+
+
+def leer_rss() -> int:
+    """RSS actual del proceso en bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss es el máximo (KiB en Linux), suficiente para detectar crecimiento
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Motores:
+    """Motores bajo prueba junto con su edad, para poder reciclarlos"""
+
+    def __init__(self, motores: tuple, metodo: str):
+        from src.sistema_experto import SistemaExperto
+        from src.fuzzy_system import SistemaDifusoFinanciero
+
+        self.experto = SistemaExperto() if 'experto' in motores else None
+        self.difuso = SistemaDifusoFinanciero() if 'difuso' in motores else None
+        self.metodo = metodo
+        self.creado = time.monotonic()
+        self.evaluaciones = 0
+
+    def evaluar(self, perfil: Dict[str, float], entradas: tuple) -> None:
+        """Una evaluación completa de cada motor activo"""
+        if self.experto is not None:
+            self.experto.insertar_hechos(**perfil)
+            self.experto.ejecutar_inferencia()
+            self.experto.obtener_resultado()
+        if self.difuso is not None:
+            if self.metodo == 'tsk':
+                self.difuso.evaluar_tsk(*entradas)
+            else:
+                self.difuso.evaluar_mamdani(*entradas)
+        self.evaluaciones += 1
+
+    def memoria_clips(self) -> int:
+        """Memoria usada por el entorno CLIPS (0 si el experto no participa)"""
+        if self.experto is None:
+            return 0
+        return int(self.experto.sistema.eval('(mem-used)'))
+
+    def edad(self) -> float:
+        return time.monotonic() - self.creado
+
+
+def tomar_muestra(motores: Motores, evaluaciones: int, inicio: float, con_tracemalloc: bool) -> Dict[str, Any]:
+    """Muestra de memoria tras un número de evaluaciones"""
+    gc.collect()
+    return {
+        'evaluaciones': evaluaciones,
+        'segundos': time.perf_counter() - inicio,
+        'rss_bytes': leer_rss(),
+        'tracemalloc_bytes': tracemalloc.get_traced_memory()[0] if con_tracemalloc else None,
+        'clips_bytes': motores.memoria_clips(),
+    }
+
+
+def evaluar_crecimiento(muestras: List[Dict[str, Any]], umbral: float,
+                        minimo_absoluto: int = MINIMO_ABSOLUTO_POR_DEFECTO) -> Dict[str, Dict[str, Any]]:
+    """
+    Compara la última muestra con la primera (referencia) para cada medida
+
+    Args:
+        muestras: Muestras en orden; la primera es la referencia
+        umbral: Crecimiento relativo máximo permitido (0.10 = 10%)
+        minimo_absoluto: Crecimiento en bytes por debajo del cual se ignora
+
+    Returns:
+        Dict medida → {'referencia', 'final', 'crecimiento', 'relativo', 'excedido'}
+    """
+    if len(muestras) < 2:
+        return {}
+
+    referencia, final = muestras[0], muestras[-1]
+    informe = {}
+    for medida in MEDIDAS:
+        if referencia.get(medida) is None or final.get(medida) is None:
+            continue
+        crecimiento = final[medida] - referencia[medida]
+        relativo = crecimiento / referencia[medida] if referencia[medida] else 0.0
+        informe[medida] = {
+            'referencia': referencia[medida],
+            'final': final[medida],
+            'crecimiento': crecimiento,
+            'relativo': relativo,
+            'excedido': crecimiento > minimo_absoluto and relativo > umbral,
+        }
+    return informe
+
+
+def ejecutar_soak(evaluaciones: int = 1_000_000, intervalo: int = 50_000, calentamiento: int = 10_000,
+                  umbral: float = 0.10, minimo_absoluto: int = MINIMO_ABSOLUTO_POR_DEFECTO,
+                  motores: tuple = ('experto', 'difuso'), metodo: str = 'mamdani',
+                  con_tracemalloc: bool = False, edad_maxima: Optional[float] = None,
+                  reciclar_cada: Optional[int] = None, variedad: int = 10_000,
+                  semilla: int = 42, progreso=None) -> Dict[str, Any]:
+    """
+    Ejecuta la prueba de resistencia
+
+    Args:
+        evaluaciones: Evaluaciones totales tras el calentamiento
+        intervalo: Evaluaciones entre muestras
+        calentamiento: Evaluaciones previas a la muestra de referencia
+        umbral: Crecimiento relativo máximo permitido
+        minimo_absoluto: Crecimiento en bytes por debajo del cual se ignora
+        motores: Motores a ejercitar, 'experto' y/o 'difuso'
+        metodo: Método difuso, 'mamdani' o 'tsk'
+        con_tracemalloc: Activar tracemalloc (más lento, informe por línea)
+        edad_maxima: Segundos tras los que se reciclan los motores
+        reciclar_cada: Evaluaciones tras las que se reciclan los motores
+        variedad: Perfiles distintos que se recorren cíclicamente
+        semilla: Semilla del generador de perfiles
+        progreso: Función opcional que recibe cada muestra
+
+    Returns:
+        Dict serializable a JSON con las muestras, el crecimiento y 'fallo'
+    """
+    if intervalo < 1 or evaluaciones < 1:
+        raise ValueError("Las evaluaciones y el intervalo deben ser positivos")
+
+    perfiles = generar_perfiles(variedad, semilla)
+    casos = [({campo: p[campo] for campo in CAMPOS_EXPERTO}, entradas_difusas(p)) for p in perfiles]
+
+    if con_tracemalloc:
+        tracemalloc.start(10)
+
+    activos = Motores(tuple(motores), metodo)
+    reciclajes = 0
+
+    def reciclar_si_toca():
+        nonlocal activos, reciclajes
+        por_edad = edad_maxima is not None and activos.edad() >= edad_maxima
+        por_uso = reciclar_cada is not None and activos.evaluaciones >= reciclar_cada
+        if por_edad or por_uso:
+            activos = Motores(tuple(motores), metodo)
+            reciclajes += 1
+
+    indice = 0
+    for _ in range(calentamiento):
+        perfil, entradas = casos[indice % variedad]
+        activos.evaluar(perfil, entradas)
+        indice += 1
+        reciclar_si_toca()
+
+    inicio = time.perf_counter()
+    muestras = [tomar_muestra(activos, 0, inicio, con_tracemalloc)]
+    instantanea_inicial = tracemalloc.take_snapshot() if con_tracemalloc else None
+    if progreso is not None:
+        progreso(muestras[0])
+
+    for hechas in range(1, evaluaciones + 1):
+        perfil, entradas = casos[indice % variedad]
+        activos.evaluar(perfil, entradas)
+        indice += 1
+        reciclar_si_toca()
+
+        if hechas % intervalo == 0 or hechas == evaluaciones:
+            muestras.append(tomar_muestra(activos, hechas, inicio, con_tracemalloc))
+            if progreso is not None:
+                progreso(muestras[-1])
+
+    crecimiento = evaluar_crecimiento(muestras, umbral, minimo_absoluto)
+    informe = {
+        'evaluaciones': evaluaciones,
+        'motores': list(motores),
+        'metodo': metodo,
+        'umbral': umbral,
+        'minimo_absoluto': minimo_absoluto,
+        'reciclajes': reciclajes,
+        'evaluaciones_por_s': evaluaciones / (time.perf_counter() - inicio),
+        'muestras': muestras,
+        'crecimiento': crecimiento,
+        'fallo': any(m['excedido'] for m in crecimiento.values()),
+    }
+
+    if con_tracemalloc:
+        diferencias = tracemalloc.take_snapshot().compare_to(instantanea_inicial, 'lineno')
+        informe['mayores_crecimientos'] = [
+            {'origen': str(d.traceback), 'bytes': d.size_diff, 'bloques': d.count_diff}
+            for d in diferencias[:10] if d.size_diff > 0
+        ]
+        tracemalloc.stop()
+
+    return informe
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Prueba de resistencia y detección de fugas de ambos motores")
+    parser.add_argument('--evaluaciones', type=int, default=1_000_000)
+    parser.add_argument('--intervalo', type=int, default=50_000)
+    parser.add_argument('--calentamiento', type=int, default=10_000)
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help="Crecimiento relativo máximo (0.10 = 10%%)")
+    parser.add_argument('--minimo-absoluto', type=int, default=MINIMO_ABSOLUTO_POR_DEFECTO,
+                        help="Crecimiento en bytes por debajo del cual se ignora")
+    parser.add_argument('--motores', default='experto,difuso')
+    parser.add_argument('--metodo', choices=('mamdani', 'tsk'), default='mamdani')
+    parser.add_argument('--tracemalloc', action='store_true')
+    parser.add_argument('--edad-maxima', type=float, default=None,
+                        help="Segundos tras los que se reciclan los motores")
+    parser.add_argument('--reciclar-cada', type=int, default=None,
+                        help="Evaluaciones tras las que se reciclan los motores")
+    parser.add_argument('--salida', help="Archivo JSON con el informe completo")
+    args = parser.parse_args(argv)
+
+    def progreso(muestra):
+        print(f"{muestra['evaluaciones']:>10} evaluaciones  rss={muestra['rss_bytes'] / 2**20:.1f} MiB  "
+              f"clips={muestra['clips_bytes'] / 2**20:.2f} MiB", file=sys.stderr)
+
+    informe = ejecutar_soak(
+        evaluaciones=args.evaluaciones, intervalo=args.intervalo, calentamiento=args.calentamiento,
+        umbral=args.umbral, minimo_absoluto=args.minimo_absoluto,
+        motores=tuple(m.strip() for m in args.motores.split(',') if m.strip()),
+        metodo=args.metodo, con_tracemalloc=args.tracemalloc,
+        edad_maxima=args.edad_maxima, reciclar_cada=args.reciclar_cada, progreso=progreso
+    )
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2)
+
+    print(json.dumps({k: v for k, v in informe.items() if k != 'muestras'}, indent=2))
+    return 1 if informe['fallo'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,7 @@ def demo_simple():
     print("=" * 50)
     
     try:
-        from sistema_experto import SistemaExperto
+        from src.sistema_experto import SistemaExperto
         
         # Crear sistema experto
         print("1️⃣ Creando sistema experto...")
@@ -80,7 +80,7 @@ def demo_reglas_personalizadas():
     print("=" * 50)
     
     try:
-        from sistema_experto import SistemaExperto
+        from src.sistema_experto import SistemaExperto
         
         # Reglas personalizadas
         reglas_especiales = """
@@ -11,11 +11,6 @@ Autor: Sistema Experto Financiero
 Fecha: 2024
 """
 
-import sys
-import os
-
-# Agregar el directorio src al path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 def ejemplo_basico():
     """Ejemplo básico de uso del sistema difuso"""
@@ -23,7 +18,7 @@ def ejemplo_basico():
     print("=" * 60)
     
     try:
-        from fuzzy_system import SistemaDifusoFinanciero
+        from src.fuzzy_system import SistemaDifusoFinanciero
         
         # Crear instancia del sistema
         sistema = SistemaDifusoFinanciero()
@@ -83,7 +78,7 @@ def ejemplo_analisis_comparativo():
     print("=" * 60)
     
     try:
-        from fuzzy_system import SistemaDifusoFinanciero
+        from src.fuzzy_system import SistemaDifusoFinanciero
         
         sistema = SistemaDifusoFinanciero()
         
@@ -123,16 +118,16 @@ def ejemplo_visualizacion():
     print("=" * 60)
     
     try:
-        from fuzzy_system import SistemaDifusoFinanciero
+        from src.fuzzy_system import SistemaDifusoFinanciero
         
         sistema = SistemaDifusoFinanciero()
         
         print("🎨 Generando visualización de conjuntos difusos...")
-        print("💡 Se abrirá una ventana con los gráficos")
-        print("📁 También puedes guardar la imagen como 'conjuntos_difusos_financieros.png'")
+        print("💡 La figura se dibuja fuera de pantalla y se guarda en caché")
         
-        # Mostrar visualización
-        sistema.visualizar_conjuntos_difusos()
+        # Guardar visualización (una segunda llamada la lee de la caché)
+        sistema.evaluar_mamdani(700, 3)
+        sistema.visualizar_conjuntos_difusos(guardar_imagen=True)
         
         print("✅ Visualización completada")
         
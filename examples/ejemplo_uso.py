@@ -4,7 +4,7 @@ Ejemplo de uso del módulo sistema_experto.py
 Demuestra cómo usar el sistema experto CLIPS desde otros archivos Python
 """
 
-from sistema_experto import (
+from src.sistema_experto import (
     SistemaExperto, 
     cargar_reglas, 
     insertar_hechos, 
@@ -230,7 +230,7 @@ if __name__ == "__main__":
         print("\n✅ Todos los ejemplos ejecutados correctamente!")
         print("\n💡 Ahora puedes usar este módulo en otros archivos:")
         print("""
-from sistema_experto import SistemaExperto
+from src.sistema_experto import SistemaExperto
 
 sistema = SistemaExperto()
 sistema.insertar_hechos(ingresos=5000, ahorro=300, gastos=3000, deudas=2500, ocio=1200)
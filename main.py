@@ -10,21 +10,15 @@ el sistema financiero inteligente que integra:
 """
 
 import sys
-import os
-
-# Agregar el directorio src al path para importar el módulo
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 def main():
     """Función principal"""
     try:
-        from gui.main_window import SistemaFinancieroGUI
-        import tkinter as tk
+        # Entrada perezosa: tkinter solo se importa aquí, no con el paquete src
+        from src.gui import main as iniciar_gui
         
         # Crear y ejecutar la interfaz gráfica
-        root = tk.Tk()
-        app = SistemaFinancieroGUI(root)
-        root.mainloop()
+        iniciar_gui()
         
     except ImportError as e:
         print(f"❌ Error de importación: {e}")
@@ -46,8 +46,17 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "clips>=1.0.0",
+        "numpy>=1.21.0",
     ],
     extras_require={
+        # El núcleo sin interfaz solo necesita clipspy y numpy; el motor de
+        # scikit-fuzzy (fuzzy_system), los gráficos y la GUI necesitan además:
+        "difuso": [
+            "scikit-fuzzy>=0.4.2",
+            "scipy>=1.7.0",
+            "networkx>=2.5",
+            "matplotlib>=3.3.0",
+        ],
         "dev": [
             "pytest>=6.0.0",
             "black>=21.0.0",
@@ -56,7 +65,7 @@ setup(
     },
     entry_points={
         "console_scripts": [
-            "sistema-experto-gui=src.gui.main_window:main",
+            "sistema-experto-gui=src.gui:main",
         ],
     },
     include_package_data=True,
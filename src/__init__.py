@@ -4,18 +4,37 @@ Sistema Experto CLIPS para Finanzas Personales
 
 Este paquete contiene la implementación principal del sistema experto
 basado en CLIPS para análisis financiero personal.
+
+El paquete es un núcleo sin interfaz: importarlo (o cualquiera de los
+módulos de MODULOS_NUCLEO) no carga tkinter ni matplotlib, así que los
+servicios pueden usar los motores sin dependencias gráficas. Quedan fuera
+la interfaz (src.gui, que importa tkinter al usarse) y los módulos basados
+en scikit-fuzzy (fuzzy_system, superficie_difusa, evaluacion_combinada),
+porque skfuzzy.control importa matplotlib.pyplot; el sistema difuso sin
+ellos está en difuso_escalar y difuso_tensorial.
 """
 
 __version__ = "2.0.0"
 __author__ = "Sistema Experto CLIPS Team"
 __description__ = "Sistema experto para finanzas personales usando CLIPS"
 
+# Módulos que se pueden importar sin dependencias gráficas
+MODULOS_NUCLEO = (
+    'sistema_experto', 'metricas', 'trazas', 'resultados_compactos', 'compilador_reglas',
+    'instantaneas', 'inquilinos', 'recarga_reglas', 'fabrica_sistemas', 'registro_hilos',
+    'coordinador_lotes', 'cola_trabajos', 'almacen_resultados', 'deduplicacion',
+    'configuracion_difusa', 'difuso_escalar', 'difuso_tensorial', 'graficos_difusos',
+)
+
 from .sistema_experto import SistemaExperto, cargar_reglas, insertar_hechos, ejecutar_inferencia, obtener_resultado
+from .metricas import RegistroMetricas
 
 __all__ = [
     'SistemaExperto',
     'cargar_reglas', 
     'insertar_hechos', 
     'ejecutar_inferencia', 
-    'obtener_resultado'
+    'obtener_resultado',
+    'RegistroMetricas',
+    'MODULOS_NUCLEO'
 ]
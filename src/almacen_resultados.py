@@ -0,0 +1,271 @@
+"""
+Almacén Indexado de Resultados
+==============================
+
+Este módulo guarda los resultados de evaluaciones por lotes en una base
+SQLite para consultarlos después sin volver a ejecutar la inferencia:
+
+- Una fila por perfil: identificador, lote, máscara de recomendaciones
+  del sistema experto (bits de resultados_compactos), nivel de inversión,
+  etiqueta y método del sistema difuso y, opcionalmente, el perfil en JSON
+- Escritura masiva con executemany (una sentencia preparada reutilizada
+  para todas las filas) en transacciones grandes
+- Índices por (lote, identificador), por (recomendaciones, etiqueta) y por
+  (etiqueta, recomendaciones); ambos incluyen el identificador, así que
+  contar() e iterar_ids() no leen la tabla
+
+Las consultas por recomendaciones se traducen a la lista de máscaras que
+las cumplen (con 5 recomendaciones hay como mucho 32), de modo que
+"deuda-alta y etiqueta Conservadora" se resuelve con búsquedas en el
+índice y no recorriendo la tabla:
+
+    almacen = AlmacenResultados('resultados.db')
+    almacen.guardar(resultados, lote='enero')
+    filas = almacen.consultar(con=['deuda-alta'], etiqueta='Conservadora')
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import json
+import math
+import sqlite3
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .resultados_compactos import (
+    RECOMENDACIONES, BIT_RECOMENDACION, ETIQUETAS, SIN_ETIQUETA, mascara_recomendaciones
+)
+
+# Filas por transacción al guardar
+FILAS_POR_TRANSACCION = 50000
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    id INTEGER PRIMARY KEY,
+    lote TEXT NOT NULL,
+    perfil_id TEXT NOT NULL,
+    recomendaciones INTEGER NOT NULL,
+    nivel_inversion REAL,
+    etiqueta TEXT,
+    metodo TEXT,
+    perfil TEXT
+);
+CREATE INDEX IF NOT EXISTS resultados_perfil ON resultados (lote, perfil_id);
+CREATE INDEX IF NOT EXISTS resultados_recomendaciones ON resultados (recomendaciones, etiqueta, perfil_id);
+CREATE INDEX IF NOT EXISTS resultados_etiqueta ON resultados (etiqueta, recomendaciones, perfil_id);
+"""
+
+_INSERTAR = ("INSERT INTO resultados (lote, perfil_id, recomendaciones, nivel_inversion, etiqueta, metodo, perfil) "
+             "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+_COLUMNAS = ('perfil_id', 'lote', 'recomendaciones', 'nivel_inversion', 'etiqueta', 'metodo', 'perfil')
+
+
+def mascaras_que_cumplen(con: Iterable[str] = (), sin: Iterable[str] = ()) -> List[int]:
+    """
+    Máscaras de recomendaciones que tienen todas las de `con` y ninguna de `sin`
+
+    Raises:
+        KeyError: Si alguna recomendación no existe
+    """
+    requeridas = sum(BIT_RECOMENDACION[nombre] for nombre in set(con))
+    excluidas = sum(BIT_RECOMENDACION[nombre] for nombre in set(sin))
+    return [mascara for mascara in range(1 << len(RECOMENDACIONES))
+            if mascara & requeridas == requeridas and not mascara & excluidas]
+
+
+def _fila_resultado(resultado: Dict[str, Any], perfil_id: Any, lote: str, guardar_perfil: bool) -> Tuple:
+    """Convierte un resultado combinado (perfil, experto, difuso) en una fila"""
+    experto = resultado.get('experto') or {}
+    difuso = resultado.get('difuso') or {}
+    perfil = resultado.get('perfil')
+    return (lote, str(perfil_id), mascara_recomendaciones(experto.get('mensajes', ())),
+            difuso.get('nivel_inversion'), difuso.get('etiqueta'), difuso.get('metodo'),
+            json.dumps(perfil) if guardar_perfil and perfil is not None else None)
+
+
+class AlmacenResultados:
+    """
+    Resultados de lotes en SQLite con índices para consultas por
+    identificador, etiqueta y recomendaciones.
+    """
+
+    def __init__(self, ruta: str, filas_por_transaccion: int = FILAS_POR_TRANSACCION):
+        """
+        Abre (o crea) el almacén
+
+        Args:
+            ruta: Archivo SQLite (':memory:' para uno temporal)
+            filas_por_transaccion: Filas escritas en cada transacción al guardar
+        """
+        self.ruta = ruta
+        self.filas_por_transaccion = max(1, filas_por_transaccion)
+        self._conexion = sqlite3.connect(ruta, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(_ESQUEMA)
+
+    def _escribir(self, filas: Iterable[Tuple]) -> int:
+        """Inserta filas con executemany en transacciones de filas_por_transaccion"""
+        total = 0
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) == self.filas_por_transaccion:
+                total += self._escribir_bloque(bloque)
+                bloque = []
+        if bloque:
+            total += self._escribir_bloque(bloque)
+        return total
+
+    def _escribir_bloque(self, bloque: List[Tuple]) -> int:
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            self._conexion.executemany(_INSERTAR, bloque)
+            self._conexion.execute("COMMIT")
+        except BaseException:
+            self._conexion.execute("ROLLBACK")
+            raise
+        return len(bloque)
+
+    def guardar(self, resultados: Iterable[Dict[str, Any]], lote: str = '',
+                ids: Optional[Iterable[Any]] = None, guardar_perfiles: bool = True) -> int:
+        """
+        Guarda resultados combinados (los de evaluar_perfil_completo,
+        EvaluadorCombinado, CoordinadorLotes o ColaTrabajos)
+
+        Args:
+            resultados: Iterable de dicts con 'perfil', 'experto' y 'difuso'
+            lote: Nombre del lote
+            ids: Identificador de cada perfil; por defecto perfil['id'] o,
+                 si no lo tiene, su posición a continuación de las filas del lote
+            guardar_perfiles: Guardar también el perfil de entrada en JSON
+
+        Returns:
+            int: Filas guardadas
+        """
+        if ids is None:
+            siguiente = self.contar(lote=lote)
+
+            def filas():
+                for posicion, resultado in enumerate(resultados, siguiente):
+                    perfil_id = (resultado.get('perfil') or {}).get('id', posicion)
+                    yield _fila_resultado(resultado, perfil_id, lote, guardar_perfiles)
+        else:
+            def filas():
+                for perfil_id, resultado in zip(ids, resultados):
+                    yield _fila_resultado(resultado, perfil_id, lote, guardar_perfiles)
+        return self._escribir(filas())
+
+    def guardar_compactos(self, compactos, ids: Sequence[Any], lote: str = '', metodo: Optional[str] = None) -> int:
+        """
+        Guarda un lote de ResultadosCompactos
+
+        Args:
+            compactos: ResultadosCompactos
+            ids: Identificador de cada fila
+            lote: Nombre del lote
+            metodo: Método difuso con el que se obtuvieron
+
+        Returns:
+            int: Filas guardadas
+        """
+        if len(ids) != len(compactos):
+            raise ValueError("Se necesita un identificador por fila")
+        n = len(compactos)
+        recomendaciones = compactos.recomendaciones[:n].tolist()
+        niveles = compactos.nivel_inversion[:n].tolist()
+        etiquetas = compactos.etiqueta[:n].tolist()
+        return self._escribir(
+            (lote, str(perfil_id), mascara, None if math.isnan(nivel) else round(nivel, 2),
+             None if codigo == SIN_ETIQUETA else ETIQUETAS[codigo], metodo, None)
+            for perfil_id, mascara, nivel, codigo in zip(ids, recomendaciones, niveles, etiquetas))
+
+    def _filtro(self, con: Iterable[str], sin: Iterable[str], etiqueta: Optional[str],
+                lote: Optional[str]) -> Tuple[str, list]:
+        """Cláusula WHERE y parámetros de una consulta"""
+        condiciones, parametros = [], []
+        con, sin = list(con), list(sin)
+        if con or sin:
+            mascaras = mascaras_que_cumplen(con, sin)
+            condiciones.append(f"recomendaciones IN ({', '.join(map(str, mascaras))})" if mascaras else "0")
+        if etiqueta is not None:
+            condiciones.append("etiqueta = ?")
+            parametros.append(etiqueta)
+        if lote is not None:
+            condiciones.append("lote = ?")
+            parametros.append(lote)
+        return (" WHERE " + " AND ".join(condiciones)) if condiciones else "", parametros
+
+    @staticmethod
+    def _a_dict(fila: Tuple) -> Dict[str, Any]:
+        datos = dict(zip(_COLUMNAS, fila))
+        datos['recomendaciones'] = [nombre for nombre in RECOMENDACIONES
+                                    if datos['recomendaciones'] & BIT_RECOMENDACION[nombre]]
+        datos['perfil'] = json.loads(datos['perfil']) if datos['perfil'] is not None else None
+        return datos
+
+    def consultar(self, con: Iterable[str] = (), sin: Iterable[str] = (), etiqueta: Optional[str] = None,
+                  lote: Optional[str] = None, limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Resultados que cumplen los filtros
+
+        Args:
+            con: Recomendaciones que deben estar activadas (p. ej. ['deuda-alta'])
+            sin: Recomendaciones que no deben estar activadas
+            etiqueta: Etiqueta difusa ('Conservadora', 'Moderada', 'Agresiva')
+            lote: Limitar a un lote
+            limite: Número máximo de filas
+
+        Returns:
+            Lista de dicts con perfil_id, lote, recomendaciones (nombres),
+            nivel_inversion, etiqueta, metodo y perfil
+        """
+        donde, parametros = self._filtro(con, sin, etiqueta, lote)
+        consulta = f"SELECT {', '.join(_COLUMNAS)} FROM resultados{donde} ORDER BY id"
+        if limite is not None:
+            consulta += " LIMIT ?"
+            parametros.append(limite)
+        return [self._a_dict(fila) for fila in self._conexion.execute(consulta, parametros)]
+
+    def iterar_ids(self, con: Iterable[str] = (), sin: Iterable[str] = (), etiqueta: Optional[str] = None,
+                   lote: Optional[str] = None) -> Iterator[str]:
+        """Identificadores de los perfiles que cumplen los filtros, sin cargar las filas"""
+        donde, parametros = self._filtro(con, sin, etiqueta, lote)
+        for (perfil_id,) in self._conexion.execute(f"SELECT perfil_id FROM resultados{donde}", parametros):
+            yield perfil_id
+
+    def contar(self, con: Iterable[str] = (), sin: Iterable[str] = (), etiqueta: Optional[str] = None,
+               lote: Optional[str] = None) -> int:
+        """Número de resultados que cumplen los filtros"""
+        donde, parametros = self._filtro(con, sin, etiqueta, lote)
+        return self._conexion.execute(f"SELECT COUNT(*) FROM resultados{donde}", parametros).fetchone()[0]
+
+    def obtener(self, perfil_id: Any, lote: str = '') -> Optional[Dict[str, Any]]:
+        """Resultado de un perfil (el último guardado con ese identificador)"""
+        fila = self._conexion.execute(
+            f"SELECT {', '.join(_COLUMNAS)} FROM resultados WHERE lote = ? AND perfil_id = ? "
+            "ORDER BY id DESC LIMIT 1", (lote, str(perfil_id))).fetchone()
+        return self._a_dict(fila) if fila is not None else None
+
+    def plan_consulta(self, con: Iterable[str] = (), sin: Iterable[str] = (), etiqueta: Optional[str] = None,
+                      lote: Optional[str] = None) -> List[str]:
+        """Plan de SQLite (EXPLAIN QUERY PLAN) de consultar() con esos filtros"""
+        donde, parametros = self._filtro(con, sin, etiqueta, lote)
+        return [fila[-1] for fila in self._conexion.execute(
+            f"EXPLAIN QUERY PLAN SELECT {', '.join(_COLUMNAS)} FROM resultados{donde} ORDER BY id", parametros)]
+
+    def eliminar_lote(self, lote: str) -> int:
+        """Borra las filas de un lote"""
+        return self._conexion.execute("DELETE FROM resultados WHERE lote = ?", (lote,)).rowcount
+
+    def cerrar(self) -> None:
+        """Cierra la conexión"""
+        self._conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+        return False
@@ -0,0 +1,464 @@
+"""
+Cola de Trabajos Reanudable en SQLite
+=====================================
+
+Este módulo guarda en una base SQLite (modo WAL) los trabajos de evaluación
+de lotes grandes con ambos motores, partidos en trozos:
+
+- crear_trabajo guarda los perfiles de cada trozo y sus límites en el lote
+- Los trabajadores (hilos o procesos, cada uno con su ColaTrabajos sobre el
+  mismo archivo) toman trozos pendientes con una transacción inmediata; un
+  trozo tomado queda reservado durante `caducidad` segundos
+- Los resultados de un trozo se escriben y el trozo se marca como hecho en
+  la misma transacción, y solo si la reserva sigue siendo del trabajador
+- Tras una caída, lo ya confirmado no se repite: los trozos hechos se
+  conservan y los que estaban en curso vuelven a tomarse cuando caduca su
+  reserva (o al instante con reanudar())
+- Cada toma cuenta como un intento; un trozo que se libera con error, o
+  cuya reserva caduca, tras `max_intentos` intentos pasa a fallido y ya no
+  se toma, así que un trozo defectuoso no bloquea el resto del trabajo.
+  reintentar_fallidos() los devuelve a pendiente
+
+progreso() informa de trozos y perfiles hechos y fallidos, del rendimiento
+reciente y de una estimación del tiempo restante.
+
+Uso desde la línea de comandos:
+
+    python -m src.cola_trabajos crear --bd cola.db perfiles.json
+    python -m src.cola_trabajos ejecutar --bd cola.db --trabajo 1
+    python -m src.cola_trabajos reanudar --bd cola.db --trabajo 1
+    python -m src.cola_trabajos progreso --bd cola.db --trabajo 1
+    python -m src.cola_trabajos reintentar --bd cola.db --trabajo 1
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+
+# Perfiles por trozo por defecto
+TAMANO_TROZO_POR_DEFECTO = 256
+
+# Segundos que un trozo tomado queda reservado para su trabajador
+CADUCIDAD_POR_DEFECTO = 300.0
+
+# Intentos (tomas) de un trozo antes de marcarlo como fallido
+MAX_INTENTOS_POR_DEFECTO = 3
+
+# Segundos de historia usados para el rendimiento y la estimación restante
+VENTANA_RENDIMIENTO = 60.0
+
+PENDIENTE, EN_CURSO, HECHO, FALLIDO = 'pendiente', 'en_curso', 'hecho', 'fallido'
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT,
+    metodo TEXT NOT NULL,
+    total_perfiles INTEGER NOT NULL,
+    tamano_trozo INTEGER NOT NULL,
+    creado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trozos (
+    trabajo INTEGER NOT NULL REFERENCES trabajos(id),
+    indice INTEGER NOT NULL,
+    inicio INTEGER NOT NULL,
+    fin INTEGER NOT NULL,
+    perfiles TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    trabajador TEXT,
+    tomado REAL,
+    terminado REAL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    resultados TEXT,
+    PRIMARY KEY (trabajo, indice)
+);
+CREATE INDEX IF NOT EXISTS trozos_estado ON trozos (trabajo, estado, indice);
+"""
+
+
+def identificador_trabajador() -> str:
+    """Identificador por defecto de un trabajador: equipo y proceso"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ColaTrabajos:
+    """
+    Cola de trozos de evaluación persistida en SQLite.
+
+    Uso:
+        cola = ColaTrabajos('cola.db')
+        trabajo = cola.crear_trabajo(perfiles, tamano_trozo=500)
+        cola.ejecutar(trabajo)            # en uno o varios procesos
+        resultados = cola.resultados(trabajo)
+    """
+
+    def __init__(self, ruta: str, caducidad: float = CADUCIDAD_POR_DEFECTO,
+                 max_intentos: int = MAX_INTENTOS_POR_DEFECTO):
+        """
+        Abre (o crea) la base de datos
+
+        Args:
+            ruta: Archivo SQLite
+            caducidad: Segundos tras los que un trozo en curso puede tomarlo otro trabajador
+            max_intentos: Intentos de un trozo antes de marcarlo como fallido
+        """
+        if max_intentos < 1:
+            raise ValueError("max_intentos debe ser al menos 1")
+        self.ruta = ruta
+        self.caducidad = caducidad
+        self.max_intentos = max_intentos
+        # Autocommit: las transacciones se abren explícitamente
+        self._conexion = sqlite3.connect(ruta, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        # En WAL, NORMAL no pierde transacciones confirmadas si cae el proceso
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(_ESQUEMA)
+
+    def _transaccion(self):
+        """Abre una transacción que reserva la escritura desde el principio"""
+        self._conexion.execute("BEGIN IMMEDIATE")
+        return self._conexion
+
+    def crear_trabajo(self, perfiles: Sequence[Dict[str, float]], tamano_trozo: int = TAMANO_TROZO_POR_DEFECTO,
+                      metodo: str = 'mamdani', nombre: Optional[str] = None) -> int:
+        """
+        Guarda un trabajo nuevo con sus trozos pendientes
+
+        Returns:
+            int: Identificador del trabajo
+        """
+        if tamano_trozo < 1:
+            raise ValueError("El tamaño de trozo debe ser positivo")
+        if metodo not in ('mamdani', 'tsk'):
+            raise ValueError(f"Método difuso no soportado: {metodo}")
+        perfiles = list(perfiles)
+        conexion = self._transaccion()
+        try:
+            cursor = conexion.execute(
+                "INSERT INTO trabajos (nombre, metodo, total_perfiles, tamano_trozo, creado) VALUES (?, ?, ?, ?, ?)",
+                (nombre, metodo, len(perfiles), tamano_trozo, time.time()))
+            trabajo = cursor.lastrowid
+            conexion.executemany(
+                "INSERT INTO trozos (trabajo, indice, inicio, fin, perfiles) VALUES (?, ?, ?, ?, ?)",
+                ((trabajo, indice, inicio, min(inicio + tamano_trozo, len(perfiles)),
+                  json.dumps(perfiles[inicio:inicio + tamano_trozo]))
+                 for indice, inicio in enumerate(range(0, len(perfiles), tamano_trozo))))
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        return trabajo
+
+    def trabajo(self, trabajo: int) -> Dict[str, Any]:
+        """Datos de un trabajo (KeyError si no existe)"""
+        fila = self._conexion.execute(
+            "SELECT id, nombre, metodo, total_perfiles, tamano_trozo, creado FROM trabajos WHERE id = ?",
+            (trabajo,)).fetchone()
+        if fila is None:
+            raise KeyError(f"Trabajo inexistente: {trabajo}")
+        return dict(zip(('id', 'nombre', 'metodo', 'total_perfiles', 'tamano_trozo', 'creado'), fila))
+
+    def tomar_trozo(self, trabajo: int, trabajador: Optional[str] = None
+                    ) -> Optional[Tuple[int, List[Dict[str, float]]]]:
+        """
+        Reserva el siguiente trozo pendiente (o en curso con la reserva caducada)
+
+        Los trozos con la reserva caducada que ya agotaron sus intentos
+        pasan a fallido en vez de volver a tomarse.
+
+        Returns:
+            (índice, perfiles) o None si no queda nada que tomar
+        """
+        trabajador = trabajador or identificador_trabajador()
+        ahora = time.time()
+        conexion = self._transaccion()
+        try:
+            conexion.execute(
+                "UPDATE trozos SET estado = ?, trabajador = NULL, tomado = NULL, "
+                "error = COALESCE(error, 'reserva caducada') "
+                "WHERE trabajo = ? AND estado = ? AND tomado < ? AND intentos >= ?",
+                (FALLIDO, trabajo, EN_CURSO, ahora - self.caducidad, self.max_intentos))
+            fila = conexion.execute(
+                "SELECT indice, perfiles FROM trozos WHERE trabajo = ? "
+                "AND (estado = ? OR (estado = ? AND tomado < ?)) ORDER BY indice LIMIT 1",
+                (trabajo, PENDIENTE, EN_CURSO, ahora - self.caducidad)).fetchone()
+            if fila is not None:
+                conexion.execute(
+                    "UPDATE trozos SET estado = ?, trabajador = ?, tomado = ?, intentos = intentos + 1 "
+                    "WHERE trabajo = ? AND indice = ?",
+                    (EN_CURSO, trabajador, ahora, trabajo, fila[0]))
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        if fila is None:
+            return None
+        return fila[0], json.loads(fila[1])
+
+    def completar_trozo(self, trabajo: int, indice: int, resultados: List[Dict[str, Any]],
+                        trabajador: Optional[str] = None) -> bool:
+        """
+        Guarda los resultados de un trozo y lo marca como hecho
+
+        Returns:
+            bool: False si la reserva ya no era del trabajador (el trozo
+                  caducó y lo tomó otro, o ya está hecho); nada se escribe
+        """
+        trabajador = trabajador or identificador_trabajador()
+        conexion = self._transaccion()
+        try:
+            cursor = conexion.execute(
+                "UPDATE trozos SET estado = ?, terminado = ?, resultados = ?, error = NULL "
+                "WHERE trabajo = ? AND indice = ? AND estado = ? AND trabajador = ?",
+                (HECHO, time.time(), json.dumps(resultados), trabajo, indice, EN_CURSO, trabajador))
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def liberar_trozo(self, trabajo: int, indice: int, error: Optional[str] = None,
+                      trabajador: Optional[str] = None) -> bool:
+        """
+        Devuelve a pendiente un trozo reservado por el trabajador, anotando
+        el error; si ya agotó sus intentos, lo marca como fallido
+        """
+        trabajador = trabajador or identificador_trabajador()
+        cursor = self._conexion.execute(
+            "UPDATE trozos SET estado = CASE WHEN intentos >= ? THEN ? ELSE ? END, "
+            "trabajador = NULL, tomado = NULL, error = ? "
+            "WHERE trabajo = ? AND indice = ? AND estado = ? AND trabajador = ?",
+            (self.max_intentos, FALLIDO, PENDIENTE, error, trabajo, indice, EN_CURSO, trabajador))
+        return cursor.rowcount == 1
+
+    def reanudar(self, trabajo: int) -> int:
+        """
+        Devuelve a pendiente todos los trozos en curso de un trabajo (usar
+        cuando se sabe que sus trabajadores ya no existen); los que agotaron
+        sus intentos pasan a fallido
+
+        Returns:
+            int: Trozos liberados (incluidos los que pasan a fallido)
+        """
+        cursor = self._conexion.execute(
+            "UPDATE trozos SET estado = CASE WHEN intentos >= ? THEN ? ELSE ? END, "
+            "trabajador = NULL, tomado = NULL WHERE trabajo = ? AND estado = ?",
+            (self.max_intentos, FALLIDO, PENDIENTE, trabajo, EN_CURSO))
+        return cursor.rowcount
+
+    def reintentar_fallidos(self, trabajo: int) -> int:
+        """
+        Devuelve a pendiente los trozos fallidos de un trabajo, con los
+        intentos a cero (el último error se conserva hasta que se completen)
+
+        Returns:
+            int: Trozos devueltos a pendiente
+        """
+        cursor = self._conexion.execute(
+            "UPDATE trozos SET estado = ?, intentos = 0 WHERE trabajo = ? AND estado = ?",
+            (PENDIENTE, trabajo, FALLIDO))
+        return cursor.rowcount
+
+    def progreso(self, trabajo: int, ventana: float = VENTANA_RENDIMIENTO) -> Dict[str, Any]:
+        """
+        Estado de un trabajo
+
+        El rendimiento se calcula con los trozos terminados en los últimos
+        `ventana` segundos (desde que se tomó el primero de ellos), así que
+        incluye a todos los trabajadores y no cuenta el tiempo parado tras
+        una caída.
+
+        Returns:
+            Dict con trozos por estado, perfiles hechos, fallidos y
+            restantes (los que aún pueden evaluarse), 'completado' (todos
+            los perfiles hechos), 'terminado' (no queda nada pendiente ni en
+            curso, aunque haya fallidos), rendimiento (perfiles/s, None sin
+            datos recientes) y segundos restantes estimados
+        """
+        datos = self.trabajo(trabajo)
+        trozos = {PENDIENTE: 0, EN_CURSO: 0, HECHO: 0, FALLIDO: 0}
+        perfiles_por_estado = {}
+        for estado, cantidad, perfiles in self._conexion.execute(
+                "SELECT estado, COUNT(*), COALESCE(SUM(fin - inicio), 0) FROM trozos WHERE trabajo = ? "
+                "GROUP BY estado", (trabajo,)):
+            trozos[estado] = cantidad
+            perfiles_por_estado[estado] = perfiles
+        perfiles_hechos = perfiles_por_estado.get(HECHO, 0)
+        perfiles_fallidos = perfiles_por_estado.get(FALLIDO, 0)
+
+        ahora = time.time()
+        recientes, desde = self._conexion.execute(
+            "SELECT COALESCE(SUM(fin - inicio), 0), MIN(tomado) FROM trozos "
+            "WHERE trabajo = ? AND estado = ? AND terminado >= ?",
+            (trabajo, HECHO, ahora - ventana)).fetchone()
+        rendimiento = None
+        if recientes and ahora > desde:
+            rendimiento = recientes / (ahora - max(desde, ahora - ventana))
+        restantes = datos['total_perfiles'] - perfiles_hechos - perfiles_fallidos
+        if restantes == 0:
+            segundos_restantes = 0.0
+        else:
+            segundos_restantes = restantes / rendimiento if rendimiento else None
+        return {
+            'trabajo': trabajo,
+            'trozos': trozos,
+            'total_perfiles': datos['total_perfiles'],
+            'perfiles_hechos': perfiles_hechos,
+            'perfiles_fallidos': perfiles_fallidos,
+            'perfiles_restantes': restantes,
+            'completado': perfiles_hechos == datos['total_perfiles'],
+            'terminado': restantes == 0,
+            'rendimiento': rendimiento,
+            'segundos_restantes': segundos_restantes,
+        }
+
+    def resultados(self, trabajo: int) -> List[Dict[str, Any]]:
+        """
+        Resultados de un trabajo terminado, en el orden de los perfiles
+
+        Raises:
+            RuntimeError: Si quedan trozos sin terminar o fallidos
+        """
+        self.trabajo(trabajo)
+        fallidos = [indice for (indice,) in self._conexion.execute(
+            "SELECT indice FROM trozos WHERE trabajo = ? AND estado = ? ORDER BY indice", (trabajo, FALLIDO))]
+        if fallidos:
+            raise RuntimeError(f"El trabajo {trabajo} tiene trozos fallidos: {fallidos}")
+        resultados = []
+        for estado, datos in self._conexion.execute(
+                "SELECT estado, resultados FROM trozos WHERE trabajo = ? ORDER BY indice", (trabajo,)):
+            if estado != HECHO:
+                raise RuntimeError(f"El trabajo {trabajo} no ha terminado")
+            resultados.extend(json.loads(datos))
+        return resultados
+
+    def ejecutar(self, trabajo: int, evaluar_trozo: Optional[Callable[[list], list]] = None,
+                 trabajador: Optional[str] = None,
+                 al_progresar: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Toma y evalúa trozos hasta que no quede ninguno disponible
+
+        Si la evaluación de un trozo lanza una excepción, el trozo se libera
+        con el error anotado (o pasa a fallido si agotó sus intentos) y la
+        excepción se propaga.
+
+        Args:
+            trabajo: Identificador del trabajo
+            evaluar_trozo: Función lista de perfiles → lista de resultados;
+                           por defecto ambos motores con el método del trabajo
+            trabajador: Identificador de este trabajador
+            al_progresar: Se llama con progreso() tras cada trozo confirmado
+
+        Returns:
+            Dict con trozos y perfiles evaluados por esta llamada, trozos
+            descartados por reserva caducada, segundos y rendimiento
+        """
+        trabajador = trabajador or identificador_trabajador()
+        if evaluar_trozo is None:
+            from .evaluacion_combinada import crear_evaluador_trozos
+            evaluar_trozo = crear_evaluador_trozos(self.trabajo(trabajo)['metodo'])
+
+        trozos = perfiles = descartados = 0
+        inicio = time.perf_counter()
+        while True:
+            tomado = self.tomar_trozo(trabajo, trabajador)
+            if tomado is None:
+                break
+            indice, lote = tomado
+            try:
+                resultados = evaluar_trozo(lote)
+            except Exception as e:
+                self.liberar_trozo(trabajo, indice, f"{type(e).__name__}: {e}", trabajador)
+                raise
+            if self.completar_trozo(trabajo, indice, resultados, trabajador):
+                trozos += 1
+                perfiles += len(lote)
+                if al_progresar is not None:
+                    al_progresar(self.progreso(trabajo))
+            else:
+                descartados += 1
+        segundos = time.perf_counter() - inicio
+        return {
+            'trozos': trozos,
+            'perfiles': perfiles,
+            'descartados': descartados,
+            'segundos': segundos,
+            'rendimiento': perfiles / segundos if segundos > 0 else 0.0,
+        }
+
+    def cerrar(self) -> None:
+        """Cierra la conexión"""
+        self._conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+        return False
+
+
+def _mostrar_progreso(progreso: Dict[str, Any]) -> None:
+    restante = progreso['segundos_restantes']
+    fallidos = progreso['perfiles_fallidos']
+    print(f"{progreso['perfiles_hechos']}/{progreso['total_perfiles']} perfiles"
+          f"{f' ({fallidos} fallidos)' if fallidos else ''}"
+          f" - {progreso['rendimiento'] or 0:.1f} perfiles/s"
+          f" - restante: {'?' if restante is None else f'{restante:.0f} s'}", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Cola de trabajos de evaluación reanudable")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    crear = subparsers.add_parser('crear', help="Crear un trabajo desde un JSON con una lista de perfiles")
+    crear.add_argument('perfiles')
+    crear.add_argument('--tamano-trozo', type=int, default=TAMANO_TROZO_POR_DEFECTO)
+    crear.add_argument('--metodo', choices=('mamdani', 'tsk'), default='mamdani')
+    crear.add_argument('--nombre')
+
+    for nombre, ayuda in (('ejecutar', "Evaluar trozos pendientes"),
+                          ('reanudar', "Liberar los trozos en curso tras una caída"),
+                          ('progreso', "Mostrar el progreso"),
+                          ('reintentar', "Devolver a pendiente los trozos fallidos"),
+                          ('resultados', "Escribir los resultados en JSON")):
+        sub = subparsers.add_parser(nombre, help=ayuda)
+        sub.add_argument('--trabajo', type=int, required=True)
+    for sub in subparsers.choices.values():
+        sub.add_argument('--bd', required=True, help="Archivo SQLite de la cola")
+        sub.add_argument('--caducidad', type=float, default=CADUCIDAD_POR_DEFECTO)
+        sub.add_argument('--max-intentos', type=int, default=MAX_INTENTOS_POR_DEFECTO)
+    args = parser.parse_args(argv)
+
+    with ColaTrabajos(args.bd, caducidad=args.caducidad, max_intentos=args.max_intentos) as cola:
+        if args.comando == 'crear':
+            with open(args.perfiles, 'r', encoding='utf-8') as f:
+                perfiles = json.load(f)
+            salida = {'trabajo': cola.crear_trabajo(perfiles, args.tamano_trozo, args.metodo, args.nombre)}
+        elif args.comando == 'ejecutar':
+            salida = cola.ejecutar(args.trabajo, al_progresar=_mostrar_progreso)
+            salida['progreso'] = cola.progreso(args.trabajo)
+        elif args.comando == 'reanudar':
+            salida = {'liberados': cola.reanudar(args.trabajo)}
+        elif args.comando == 'reintentar':
+            salida = {'reintentados': cola.reintentar_fallidos(args.trabajo)}
+        elif args.comando == 'progreso':
+            salida = cola.progreso(args.trabajo)
+        else:
+            salida = cola.resultados(args.trabajo)
+    print(json.dumps(salida, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
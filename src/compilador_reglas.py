@@ -0,0 +1,363 @@
+"""
+Compilador de Reglas Proposicionales
+====================================
+
+Las reglas financieras predefinidas, y muchas personalizadas, son
+proposicionales: una conjunción de hechos sin campos que asserta otros
+hechos sin campos, por ejemplo:
+
+    (defrule reglaDeuda (deuda-alta) => (assert (mensajeDeuda)))
+
+Este módulo detecta cuándo todas las reglas de un SistemaExperto son de
+ese tipo y las compila a una tabla de decisión con máscaras de bits:
+
+- Cada hecho proposicional es un bit de un estado uint64 por perfil
+  (varias palabras si hay más de 64 hechos)
+- Las reglas derivar-* predefinidas se evalúan como comparaciones
+  vectorizadas sobre las columnas del perfil con la política del sistema
+- Cada regla es un par (requisitos, conclusiones); se aplican con NumPy a
+  todas las filas a la vez hasta alcanzar el punto fijo, lo que resuelve
+  el encadenamiento
+
+Si alguna regla usa algo que el compilador no sabe tratar (variables,
+not, test, retract, printout, hechos con campos, plantillas...) se lanza
+ReglasNoCompilables, y EvaluadorReglas usa CLIPS automáticamente.
+
+Como las reglas compiladas solo añaden hechos, el resultado es el mismo
+conjunto de hechos que produciría CLIPS; el orden de disparo no se
+conserva.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import re
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .sistema_experto import SistemaExperto, liberar_hechos
+from .resultados_compactos import MENSAJE_A_RECOMENDACION, BIT_RECOMENDACION, mascara_recomendaciones
+
+CAMPOS_PERFIL = ('ingresos', 'ahorro', 'gastos', 'deudas', 'ocio')
+
+# Reglas derivar-* predefinidas: hecho que asertan y su predicado vectorizado
+DERIVACIONES: Dict[str, Tuple[str, Callable[[Dict[str, np.ndarray], Dict[str, float]], np.ndarray]]] = {
+    'derivar-ahorro-bajo': (
+        'ahorro-bajo', lambda c, p: c['ahorro'] < c['ingresos'] * p['ahorro-minimo']),
+    'derivar-deuda-alta': (
+        'deuda-alta', lambda c, p: c['deudas'] > c['ingresos'] * p['deuda-maxima']),
+    'derivar-sin-emergencia': (
+        'sin-emergencia', lambda c, p: c['ahorro'] < c['gastos'] * p['meses-emergencia']),
+    'derivar-ocio-excesivo': (
+        'ocio-excesivo', lambda c, p: c['ocio'] > c['gastos'] * p['ocio-maximo']),
+    'derivar-puede-invertir': (
+        'puede-invertir', lambda c, p: (c['ahorro'] >= c['ingresos'] * p['ahorro-inversion'])
+                                       & (c['deudas'] < c['ingresos'] * p['deuda-inversion'])),
+}
+
+_SIMBOLO = re.compile(r'^[A-Za-z][A-Za-z0-9_\-]*$')
+_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|[()]|[^\s()"]+')
+
+# Representación textual de las reglas derivar-* en un sistema de referencia
+_REFERENCIA_DERIVACIONES: Optional[Dict[str, str]] = None
+
+
+class ReglasNoCompilables(Exception):
+    """El conjunto de reglas usa características que el compilador no trata"""
+
+
+def _parsear(texto: str) -> list:
+    """Convierte una construcción CLIPS en listas anidadas de tokens"""
+    pila: List[list] = [[]]
+    for token in _TOKENS.findall(texto):
+        if token == '(':
+            pila.append([])
+        elif token == ')':
+            if len(pila) == 1:
+                raise ReglasNoCompilables(f"Paréntesis desequilibrados en {texto!r}")
+            lista = pila.pop()
+            pila[-1].append(lista)
+        else:
+            pila[-1].append(token)
+    if len(pila) != 1 or len(pila[0]) != 1:
+        raise ReglasNoCompilables(f"Construcción mal formada: {texto!r}")
+    return pila[0][0]
+
+
+def _es_hecho_proposicional(patron, plantillas: set) -> bool:
+    """(simbolo) sin campos, que no sea una plantilla con slots"""
+    return (isinstance(patron, list) and len(patron) == 1 and isinstance(patron[0], str)
+            and _SIMBOLO.match(patron[0]) is not None and patron[0] not in plantillas)
+
+
+def _analizar_regla(texto: str, plantillas: set) -> Tuple[str, List[str], List[str]]:
+    """
+    Extrae (nombre, requisitos, conclusiones) de una regla proposicional
+
+    Raises:
+        ReglasNoCompilables: Si la regla no es proposicional
+    """
+    regla = _parsear(texto)
+    if len(regla) < 3 or regla[0] != 'defrule':
+        raise ReglasNoCompilables(f"No es una regla: {texto!r}")
+    nombre = regla[1].split('::')[-1]
+    cuerpo = regla[2:]
+    if cuerpo and isinstance(cuerpo[0], str) and cuerpo[0].startswith('"'):
+        cuerpo = cuerpo[1:]
+    if cuerpo and isinstance(cuerpo[0], list) and cuerpo[0] and cuerpo[0][0] == 'declare':
+        # La prioridad solo cambia el orden de disparo, no el punto fijo
+        for declaracion in cuerpo[0][1:]:
+            if not (isinstance(declaracion, list) and declaracion and declaracion[0] == 'salience'):
+                raise ReglasNoCompilables(f"{nombre}: declaración no soportada {declaracion}")
+        cuerpo = cuerpo[1:]
+
+    if '=>' not in cuerpo:
+        raise ReglasNoCompilables(f"{nombre}: regla sin '=>'")
+    flecha = cuerpo.index('=>')
+    lhs, rhs = cuerpo[:flecha], cuerpo[flecha + 1:]
+
+    requisitos = []
+    for patron in lhs:
+        if not _es_hecho_proposicional(patron, plantillas):
+            raise ReglasNoCompilables(f"{nombre}: patrón no proposicional {patron}")
+        requisitos.append(patron[0])
+
+    conclusiones = []
+    for accion in rhs:
+        if not (isinstance(accion, list) and accion and accion[0] == 'assert'):
+            raise ReglasNoCompilables(f"{nombre}: acción no soportada {accion}")
+        for hecho in accion[1:]:
+            if not _es_hecho_proposicional(hecho, plantillas):
+                raise ReglasNoCompilables(f"{nombre}: hecho no proposicional {hecho}")
+            conclusiones.append(hecho[0])
+
+    return nombre, requisitos, conclusiones
+
+
+def _referencia_derivaciones() -> Dict[str, str]:
+    """Texto de las reglas derivar-* tal como las define SistemaExperto"""
+    global _REFERENCIA_DERIVACIONES
+    if _REFERENCIA_DERIVACIONES is None:
+        referencia = SistemaExperto()
+        _REFERENCIA_DERIVACIONES = {
+            regla.name: str(regla) for regla in referencia.sistema.rules() if regla.name in DERIVACIONES
+        }
+    return _REFERENCIA_DERIVACIONES
+
+
+def _columnas(perfiles: Union[Sequence[Dict[str, float]], Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Columnas float64 del perfil a partir de una lista de dicts o de un dict de columnas"""
+    if isinstance(perfiles, dict):
+        n = max((len(np.atleast_1d(v)) for v in perfiles.values()), default=0)
+        return {campo: np.broadcast_to(np.asarray(perfiles.get(campo, 0), dtype=np.float64), (n,))
+                for campo in CAMPOS_PERFIL}
+    return {campo: np.fromiter((p.get(campo, 0) for p in perfiles), dtype=np.float64, count=len(perfiles))
+            for campo in CAMPOS_PERFIL}
+
+
+class ReglasCompiladas:
+    """
+    Tabla de decisión con máscaras de bits de un conjunto de reglas proposicionales.
+
+    El estado de cada perfil es una fila de `palabras` enteros uint64; el
+    bit i corresponde a simbolos[i].
+    """
+
+    def __init__(self, simbolos: List[str], derivaciones: List[str], reglas: List[Tuple[str, List[str], List[str]]],
+                 iniciales: List[str], politica: Dict[str, float], mensajes: List[str]):
+        self.simbolos = tuple(simbolos)
+        self.indice = {simbolo: i for i, simbolo in enumerate(self.simbolos)}
+        self.palabras = max(1, (len(self.simbolos) + 63) // 64)
+        self.derivaciones = list(derivaciones)
+        self.nombres_reglas = [nombre for nombre, _, _ in reglas]
+        self.politica = dict(politica)
+        self.mensajes = [m for m in mensajes if m in self.indice]
+
+        self.requisitos = np.stack([self._mascara(req) for _, req, _ in reglas]) if reglas \
+            else np.zeros((0, self.palabras), dtype=np.uint64)
+        self.conclusiones = np.stack([self._mascara(con) for _, _, con in reglas]) if reglas \
+            else np.zeros((0, self.palabras), dtype=np.uint64)
+        self.iniciales = self._mascara(iniciales)
+
+    def _mascara(self, simbolos: List[str]) -> np.ndarray:
+        """Máscara de bits de un conjunto de símbolos"""
+        mascara = np.zeros(self.palabras, dtype=np.uint64)
+        for simbolo in simbolos:
+            i = self.indice[simbolo]
+            mascara[i // 64] |= np.uint64(1 << (i % 64))
+        return mascara
+
+    def evaluar(self, perfiles: Union[Sequence[Dict[str, float]], Dict[str, Any]]) -> np.ndarray:
+        """
+        Calcula el estado final de todos los perfiles
+
+        Args:
+            perfiles: Lista de dicts de perfil o dict de columnas
+                      (ingresos, ahorro, gastos, deudas, ocio)
+
+        Returns:
+            np.ndarray: Estados uint64 de forma (n, palabras)
+        """
+        columnas = _columnas(perfiles)
+        n = len(columnas['ingresos'])
+        estado = np.tile(self.iniciales, (n, 1))
+
+        for nombre in self.derivaciones:
+            hecho, predicado = DERIVACIONES[nombre]
+            i = self.indice[hecho]
+            bit = np.uint64(1 << (i % 64))
+            estado[:, i // 64] |= np.where(predicado(columnas, self.politica), bit, np.uint64(0))
+
+        # Encadenamiento hacia delante hasta que ninguna regla añade bits
+        while True:
+            anterior = estado.copy()
+            for requisitos, conclusiones in zip(self.requisitos, self.conclusiones):
+                cumple = ((estado & requisitos) == requisitos).all(axis=1)
+                estado[cumple] |= conclusiones
+            if np.array_equal(anterior, estado):
+                return estado
+
+    def tiene(self, estado: np.ndarray, simbolo: str) -> np.ndarray:
+        """Vector booleano: filas en las que el hecho está presente"""
+        if simbolo not in self.indice:
+            return np.zeros(len(estado), dtype=bool)
+        i = self.indice[simbolo]
+        return (estado[:, i // 64] >> np.uint64(i % 64)) & np.uint64(1) == 1
+
+    def hechos(self, estado: np.ndarray, fila: int) -> List[str]:
+        """Hechos presentes en una fila, en orden de símbolo"""
+        return [s for i, s in enumerate(self.simbolos) if int(estado[fila, i // 64]) >> (i % 64) & 1]
+
+    def mensajes_activados(self, estado: np.ndarray, fila: int) -> List[str]:
+        """Hechos de mensaje registrados presentes en una fila"""
+        presentes = set(self.hechos(estado, fila))
+        return [m for m in self.mensajes if m in presentes]
+
+    def mascara_recomendaciones(self, estado: np.ndarray) -> np.ndarray:
+        """Máscaras uint8 de recomendaciones, compatibles con ResultadosCompactos"""
+        mascaras = np.zeros(len(estado), dtype=np.uint8)
+        for mensaje, recomendacion in MENSAJE_A_RECOMENDACION.items():
+            if mensaje in self.indice:
+                mascaras |= np.where(self.tiene(estado, mensaje), np.uint8(BIT_RECOMENDACION[recomendacion]),
+                                     np.uint8(0))
+        return mascaras
+
+
+def compilar(sistema: SistemaExperto) -> ReglasCompiladas:
+    """
+    Compila las reglas de un sistema experto a una tabla de máscaras de bits
+
+    Args:
+        sistema: Sistema experto con las reglas cargadas
+
+    Returns:
+        ReglasCompiladas: Tabla de decisión equivalente
+
+    Raises:
+        ReglasNoCompilables: Si alguna regla o deffacts no es proposicional
+    """
+    entorno = sistema.sistema
+    plantillas = {t.name for t in entorno.templates() if not t.implied}
+    referencia = _referencia_derivaciones()
+
+    derivaciones, reglas = [], []
+    for regla in entorno.rules():
+        texto = sistema.texto_construccion(regla)
+        if regla.name in DERIVACIONES:
+            if texto != referencia.get(regla.name):
+                raise ReglasNoCompilables(f"{regla.name}: regla de derivación modificada")
+            derivaciones.append(regla.name)
+            continue
+        reglas.append(_analizar_regla(texto, plantillas))
+
+    iniciales = []
+    for deffacts in entorno.defined_facts():
+        if deffacts.name == 'politica-inicial':
+            continue
+        construccion = _parsear(sistema.texto_construccion(deffacts))
+        for hecho in construccion[2:]:
+            if isinstance(hecho, str) and hecho.startswith('"'):
+                continue
+            if not _es_hecho_proposicional(hecho, plantillas):
+                raise ReglasNoCompilables(f"{deffacts.name}: hecho inicial no proposicional {hecho}")
+            iniciales.append(hecho[0])
+
+    simbolos = []
+    vistos = set()
+    for simbolo in ([DERIVACIONES[n][0] for n in derivaciones] + iniciales
+                    + [s for _, req, con in reglas for s in req + con]):
+        if simbolo not in vistos:
+            vistos.add(simbolo)
+            simbolos.append(simbolo)
+
+    mensajes = [simbolo for simbolo in simbolos if simbolo in sistema.registro_mensajes]
+    return ReglasCompiladas(simbolos, derivaciones, reglas, iniciales, sistema.politica, mensajes)
+
+
+class EvaluadorReglas:
+    """
+    Evalúa lotes con las reglas compiladas o, si no se pueden compilar, con CLIPS.
+
+    Uso:
+        evaluador = EvaluadorReglas(sistema)
+        mascaras = evaluador.evaluar_mascaras(columnas)    # uint8 por perfil
+        print(evaluador.compilado, evaluador.motivo)
+    """
+
+    def __init__(self, sistema: Optional[SistemaExperto] = None):
+        """
+        Args:
+            sistema: Sistema experto con las reglas a evaluar (uno nuevo por defecto)
+        """
+        self.sistema = sistema if sistema is not None else SistemaExperto()
+        self.motivo: Optional[str] = None
+        try:
+            self.compiladas: Optional[ReglasCompiladas] = compilar(self.sistema)
+        except ReglasNoCompilables as e:
+            self.compiladas = None
+            self.motivo = str(e)
+
+    @property
+    def compilado(self) -> bool:
+        """True si se usa la tabla compilada en lugar de CLIPS"""
+        return self.compiladas is not None
+
+    def _perfiles(self, perfiles) -> List[Dict[str, float]]:
+        """Lista de dicts de perfil a partir de columnas (para CLIPS)"""
+        if not isinstance(perfiles, dict):
+            return list(perfiles)
+        columnas = _columnas(perfiles)
+        return [dict(zip(CAMPOS_PERFIL, fila)) for fila in zip(*(columnas[c].tolist() for c in CAMPOS_PERFIL))]
+
+    def _clips(self, perfil: Dict[str, float]) -> Tuple[List[str], List[str]]:
+        """(hechos sin campos, mensajes activados) evaluando con CLIPS"""
+        self.sistema.insertar_hechos(**perfil)
+        self.sistema.ejecutar_inferencia()
+        hechos = list(self.sistema.sistema.facts())
+        try:
+            proposicionales = [h.template.name for h in hechos if h.template.implied and len(h) == 0]
+        finally:
+            liberar_hechos(hechos)
+        return proposicionales, list(self.sistema.mensajes_activados)
+
+    def evaluar_hechos(self, perfiles) -> List[set]:
+        """Conjunto de hechos proposicionales final de cada perfil"""
+        if self.compiladas is not None:
+            estado = self.compiladas.evaluar(perfiles)
+            return [set(self.compiladas.hechos(estado, fila)) for fila in range(len(estado))]
+        return [set(self._clips(perfil)[0]) for perfil in self._perfiles(perfiles)]
+
+    def evaluar_lote(self, perfiles) -> List[List[str]]:
+        """Mensajes activados de cada perfil (sin orden de disparo si está compilado)"""
+        if self.compiladas is not None:
+            estado = self.compiladas.evaluar(perfiles)
+            return [self.compiladas.mensajes_activados(estado, fila) for fila in range(len(estado))]
+        return [self._clips(perfil)[1] for perfil in self._perfiles(perfiles)]
+
+    def evaluar_mascaras(self, perfiles) -> np.ndarray:
+        """Máscaras uint8 de recomendaciones de cada perfil"""
+        if self.compiladas is not None:
+            return self.compiladas.mascara_recomendaciones(self.compiladas.evaluar(perfiles))
+        return np.array([mascara_recomendaciones(mensajes) for mensajes in self.evaluar_lote(perfiles)],
+                        dtype=np.uint8)
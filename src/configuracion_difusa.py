@@ -0,0 +1,52 @@
+"""
+Configuración del Sistema Difuso Financiero
+===========================================
+
+Universos, conjuntos difusos, singletones TSK, etiquetas y reglas del
+sistema difuso financiero, como datos de Python sin dependencias.
+
+Los comparten el motor de scikit-fuzzy (fuzzy_system), los evaluadores
+escalar y tensorial y el renderizador de gráficos; al no importar
+scikit-fuzzy (cuyo módulo control carga matplotlib.pyplot), los motores
+del núcleo sin interfaz pueden usarlos sin arrastrar dependencias gráficas.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+# Universos de discurso (argumentos de np.arange)
+UNIVERSO_AHORRO = (0, 1001, 1)
+UNIVERSO_RIESGO = (0, 11, 0.1)
+UNIVERSO_INVERSION = (0, 51, 0.1)
+
+# Puntos de quiebre de los conjuntos difusos: 3 puntos trimf, 4 puntos trapmf
+TERMINOS_AHORRO = {
+    'bajo': (0, 0, 400),
+    'medio': (200, 500, 800),
+    'alto': (600, 1000, 1000),
+}
+TERMINOS_RIESGO = {
+    'bajo': (0, 0, 2, 3),
+    'moderado': (2, 4, 6, 8),
+    'alto': (7, 8, 10, 10),
+}
+TERMINOS_INVERSION = {
+    'conservadora': (0, 10, 20),
+    'moderada': (15, 25, 35),
+    'agresiva': (30, 40, 50),
+}
+
+# Singletones de salida del método TSK (picos de los conjuntos de salida)
+SINGLETONES_TSK = {'conservadora': 10, 'moderada': 25, 'agresiva': 40}
+
+# Límite superior (inclusive) del nivel de inversión de cada etiqueta lingüística
+ETIQUETAS_INVERSION = ((20, "Conservadora"), (35, "Moderada"), (float('inf'), "Agresiva"))
+
+# Reglas R1..R5 como (operador, término de ahorro, término de riesgo, salida)
+REGLAS_DIFUSAS = (
+    ('o', 'bajo', 'alto', 'conservadora'),
+    ('y', 'medio', 'moderado', 'moderada'),
+    ('y', 'alto', 'bajo', 'agresiva'),
+    ('y', 'medio', 'bajo', 'moderada'),
+    ('y', 'alto', 'moderado', 'agresiva'),
+)
@@ -0,0 +1,381 @@
+"""
+Coordinador de Lotes Distribuido
+================================
+
+Este módulo reparte la evaluación de un lote de perfiles entre procesos
+trabajadores conectados por sockets de multiprocessing.connection, en el
+mismo equipo o en otros:
+
+- Trabajador: escucha en una dirección (host, puerto) con una clave de
+  autenticación, mantiene un SistemaExperto y un SistemaDifusoFinanciero
+  calientes y evalúa los trozos que recibe con ambos motores
+- Coordinador: parte el lote en trozos y asigna a cada trabajador un tramo
+  contiguo de trozos. Cada trabajador toma los suyos por el principio y,
+  cuando se queda sin trabajo, roba por el final de la cola más larga de
+  los demás (robo de trabajo)
+- Un trozo que falla (error al evaluar o conexión perdida) se reintenta en
+  otro trabajador distinto de los que ya fallaron con él; un trabajador
+  cuya conexión se pierde deja de recibir trozos
+
+Para pruebas basta con varios trabajadores locales
+(iniciar_trabajadores_locales). En otro equipo el trabajador se arranca con:
+
+    python -m src.coordinador_lotes --puerto 6001 --clave secreto
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+from collections import deque
+from multiprocessing.connection import Client, Listener, AuthenticationError
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+
+# Tamaño de trozo por defecto (perfiles por mensaje)
+TAMANO_TROZO_POR_DEFECTO = 64
+
+
+class TrozoFallido(Exception):
+    """Uno o más trozos agotaron sus reintentos o no quedan trabajadores donde reintentarlos"""
+
+    def __init__(self, mensaje: str, errores: List[Dict[str, Any]], resultados: list):
+        super().__init__(mensaje)
+        self.errores = errores
+        self.resultados = resultados
+
+
+def _evaluador_combinado(metodo: str) -> Callable[[list], list]:
+    """Evaluación con ambos motores precargados (importados solo en el trabajador)"""
+    from .evaluacion_combinada import crear_evaluador_trozos
+    return crear_evaluador_trozos(metodo)
+
+
+def servir_trabajador(oyente: Listener, evaluar_trozo: Optional[Callable[[list], list]] = None,
+                      metodo: str = 'mamdani') -> None:
+    """
+    Atiende coordinadores, de uno en uno, hasta recibir ('cerrar',)
+
+    Mensajes: ('evaluar', índice, perfiles) → ('resultado', índice, resultados)
+    o ('error', índice, texto); ('ping',) → ('pong', pid).
+
+    Args:
+        oyente: Listener ya abierto
+        evaluar_trozo: Función lista de perfiles → lista de resultados; por
+                       defecto ambos motores con el método difuso indicado
+        metodo: 'mamdani' o 'tsk'
+    """
+    if evaluar_trozo is None:
+        evaluar_trozo = _evaluador_combinado(metodo)
+    while True:
+        try:
+            conexion = oyente.accept()
+        except AuthenticationError:
+            continue
+        except OSError:
+            return
+        with conexion:
+            while True:
+                try:
+                    mensaje = conexion.recv()
+                except (EOFError, OSError):
+                    break
+                if mensaje[0] == 'cerrar':
+                    oyente.close()
+                    return
+                if mensaje[0] == 'ping':
+                    conexion.send(('pong', os.getpid()))
+                elif mensaje[0] == 'evaluar':
+                    _, indice, perfiles = mensaje
+                    try:
+                        respuesta = ('resultado', indice, evaluar_trozo(perfiles))
+                    except Exception as e:
+                        respuesta = ('error', indice, f"{type(e).__name__}: {e}")
+                    conexion.send(respuesta)
+
+
+def _proceso_trabajador(direccion: Tuple[str, int], clave: bytes, metodo: str, canal) -> None:
+    """Cuerpo de un trabajador local: abre el socket, comunica su dirección y atiende"""
+    oyente = Listener(direccion, authkey=clave)
+    canal.send(oyente.address)
+    canal.close()
+    servir_trabajador(oyente, metodo=metodo)
+
+
+def iniciar_trabajadores_locales(cantidad: int, clave: bytes, metodo: str = 'mamdani',
+                                 host: str = 'localhost') -> List[Tuple[multiprocessing.Process, Tuple[str, int]]]:
+    """
+    Arranca trabajadores en procesos locales, cada uno en un puerto libre
+
+    Returns:
+        Lista de (proceso, dirección) una vez que todos escuchan
+    """
+    contexto = multiprocessing.get_context('spawn')
+    trabajadores = []
+    for _ in range(cantidad):
+        receptor, emisor = contexto.Pipe(duplex=False)
+        proceso = contexto.Process(target=_proceso_trabajador, args=((host, 0), clave, metodo, emisor),
+                                   daemon=True)
+        proceso.start()
+        emisor.close()
+        trabajadores.append((proceso, receptor))
+    return [(proceso, receptor.recv()) for proceso, receptor in trabajadores]
+
+
+class _Trozo:
+    """Tramo del lote con su historial de fallos"""
+
+    __slots__ = ('indice', 'inicio', 'perfiles', 'intentos', 'fallidos', 'ultimo_error')
+
+    def __init__(self, indice: int, inicio: int, perfiles: list):
+        self.indice = indice
+        self.inicio = inicio
+        self.perfiles = perfiles
+        self.intentos = 0
+        self.fallidos = set()
+        self.ultimo_error = None
+
+
+class CoordinadorLotes:
+    """
+    Reparte lotes entre trabajadores remotos con robo de trabajo y reintentos.
+
+    Uso:
+        clave = os.urandom(16)
+        trabajadores = iniciar_trabajadores_locales(4, clave)
+        with CoordinadorLotes([d for _, d in trabajadores], clave) as coordinador:
+            resultados = coordinador.evaluar(perfiles)
+    """
+
+    def __init__(self, direcciones: Sequence[Tuple[str, int]], clave: bytes,
+                 tamano_trozo: int = TAMANO_TROZO_POR_DEFECTO, reintentos: int = 2,
+                 tiempo_espera: Optional[float] = None):
+        """
+        Conecta con los trabajadores
+
+        Args:
+            direcciones: (host, puerto) de cada trabajador
+            clave: Clave de autenticación común
+            tamano_trozo: Perfiles por trozo
+            reintentos: Reintentos de un trozo fallido (cada uno en otro trabajador)
+            tiempo_espera: Segundos máximos de respuesta por trozo; un trabajador
+                           que los supera se da por perdido (None sin límite)
+
+        Raises:
+            ConnectionError: Si no se puede conectar con ningún trabajador
+        """
+        if tamano_trozo < 1:
+            raise ValueError("El tamaño de trozo debe ser positivo")
+        self.tamano_trozo = tamano_trozo
+        self.reintentos = reintentos
+        self.tiempo_espera = tiempo_espera
+        self._conexiones = {}
+        for direccion in direcciones:
+            try:
+                self._conexiones[tuple(direccion)] = Client(tuple(direccion), authkey=clave)
+            except (OSError, AuthenticationError):
+                continue
+        if not self._conexiones:
+            raise ConnectionError("No se pudo conectar con ningún trabajador")
+        self._estadisticas = {direccion: self._estadistica_vacia() for direccion in self._conexiones}
+        self.reintentados = 0
+
+    @staticmethod
+    def _estadistica_vacia() -> Dict[str, int]:
+        return {'trozos': 0, 'perfiles': 0, 'robados': 0, 'fallos': 0}
+
+    @property
+    def trabajadores(self) -> List[Tuple[str, int]]:
+        """Direcciones de los trabajadores conectados"""
+        return list(self._conexiones)
+
+    def evaluar(self, perfiles: Sequence[Dict[str, float]]) -> List[Dict[str, Any]]:
+        """
+        Evalúa un lote repartiéndolo entre los trabajadores
+
+        Args:
+            perfiles: Lista de perfiles
+
+        Returns:
+            list: Resultados en el mismo orden que los perfiles
+
+        Raises:
+            TrozoFallido: Si algún trozo no se pudo evaluar; lleva los
+                          errores y los resultados parciales (None en los huecos)
+        """
+        perfiles = list(perfiles)
+        resultados: List[Optional[Dict[str, Any]]] = [None] * len(perfiles)
+        if not perfiles:
+            return resultados
+        if not self._conexiones:
+            raise ConnectionError("No quedan trabajadores conectados")
+
+        trozos = [_Trozo(i, inicio, perfiles[inicio:inicio + self.tamano_trozo])
+                  for i, inicio in enumerate(range(0, len(perfiles), self.tamano_trozo))]
+        # Tramos contiguos: cada trabajador empieza por su parte del lote
+        vivos = list(self._conexiones)
+        colas = {direccion: deque() for direccion in vivos}
+        for trozo in trozos:
+            colas[vivos[trozo.indice * len(vivos) // len(trozos)]].append(trozo)
+
+        estado = {
+            'colas': colas,
+            'reintentar': deque(),
+            'vivos': set(vivos),
+            'pendientes': len(trozos),
+            'errores': [],
+            'resultados': resultados,
+            'condicion': threading.Condition(),
+        }
+        hilos = [threading.Thread(target=self._atender, args=(direccion, estado), daemon=True)
+                 for direccion in vivos]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        if estado['errores']:
+            raise TrozoFallido(f"{len(estado['errores'])} trozos sin evaluar", estado['errores'], resultados)
+        return resultados
+
+    def _tomar(self, direccion: Tuple[str, int], estado: Dict[str, Any]) -> Optional[_Trozo]:
+        """Siguiente trozo para un trabajador: reintentos, su cola o robo (con la condición tomada)"""
+        condicion = estado['condicion']
+        while estado['pendientes'] > 0:
+            for trozo in estado['reintentar']:
+                if direccion not in trozo.fallidos:
+                    estado['reintentar'].remove(trozo)
+                    return trozo
+            propia = estado['colas'][direccion]
+            if propia:
+                return propia.popleft()
+            victima = max(estado['colas'].values(), key=len)
+            if victima:
+                self._estadisticas[direccion]['robados'] += 1
+                return victima.pop()
+            # Nada disponible ahora: esperar a que otro trabajador termine o falle
+            condicion.wait()
+        return None
+
+    def _fallar(self, trozo: _Trozo, direccion: Tuple[str, int], error: str, estado: Dict[str, Any]) -> None:
+        """Registra el fallo de un trozo y lo reintenta o lo da por perdido (con la condición tomada)"""
+        trozo.intentos += 1
+        trozo.fallidos.add(direccion)
+        trozo.ultimo_error = error
+        self._estadisticas[direccion]['fallos'] += 1
+        if trozo.intentos <= self.reintentos and estado['vivos'] - trozo.fallidos:
+            self.reintentados += 1
+            estado['reintentar'].append(trozo)
+        else:
+            self._descartar(trozo, estado)
+
+    def _descartar(self, trozo: _Trozo, estado: Dict[str, Any]) -> None:
+        estado['errores'].append({'trozo': trozo.indice, 'inicio': trozo.inicio, 'perfiles': len(trozo.perfiles),
+                                  'intentos': trozo.intentos, 'error': trozo.ultimo_error})
+        estado['pendientes'] -= 1
+
+    def _perder_trabajador(self, direccion: Tuple[str, int], estado: Dict[str, Any]) -> None:
+        """Saca un trabajador caído y descarta los reintentos que ya no tienen dónde ejecutarse"""
+        estado['vivos'].discard(direccion)
+        conexion = self._conexiones.pop(direccion, None)
+        if conexion is not None:
+            conexion.close()
+        for trozo in list(estado['reintentar']):
+            if not estado['vivos'] - trozo.fallidos:
+                estado['reintentar'].remove(trozo)
+                self._descartar(trozo, estado)
+        if not estado['vivos']:
+            # Sin trabajadores: lo que queda en las colas no se puede evaluar
+            for cola in estado['colas'].values():
+                while cola:
+                    trozo = cola.popleft()
+                    trozo.ultimo_error = trozo.ultimo_error or "sin trabajadores disponibles"
+                    self._descartar(trozo, estado)
+
+    def _atender(self, direccion: Tuple[str, int], estado: Dict[str, Any]) -> None:
+        """Bucle de un trabajador: toma trozos, los envía y guarda sus resultados"""
+        conexion = self._conexiones[direccion]
+        condicion = estado['condicion']
+        while True:
+            with condicion:
+                trozo = self._tomar(direccion, estado)
+            if trozo is None:
+                return
+            try:
+                conexion.send(('evaluar', trozo.indice, trozo.perfiles))
+                if self.tiempo_espera is not None and not conexion.poll(self.tiempo_espera):
+                    raise TimeoutError(f"sin respuesta en {self.tiempo_espera} s")
+                tipo, _, datos = conexion.recv()
+            except (EOFError, OSError, TimeoutError) as e:
+                with condicion:
+                    self._fallar(trozo, direccion, f"conexión perdida: {type(e).__name__}", estado)
+                    self._perder_trabajador(direccion, estado)
+                    condicion.notify_all()
+                return
+
+            with condicion:
+                if tipo == 'resultado':
+                    estado['resultados'][trozo.inicio:trozo.inicio + len(datos)] = datos
+                    estado['pendientes'] -= 1
+                    estadistica = self._estadisticas[direccion]
+                    estadistica['trozos'] += 1
+                    estadistica['perfiles'] += len(datos)
+                else:
+                    self._fallar(trozo, direccion, datos, estado)
+                condicion.notify_all()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Trozos, perfiles, robos y fallos por trabajador, y trozos reintentados"""
+        return {
+            'trabajadores': {f"{host}:{puerto}": dict(datos) for (host, puerto), datos in self._estadisticas.items()},
+            'conectados': len(self._conexiones),
+            'reintentados': self.reintentados,
+        }
+
+    def cerrar(self, detener_trabajadores: bool = False) -> None:
+        """
+        Cierra las conexiones
+
+        Args:
+            detener_trabajadores: Pedir a los trabajadores que terminen
+        """
+        for conexion in self._conexiones.values():
+            try:
+                if detener_trabajadores:
+                    conexion.send(('cerrar',))
+            except OSError:
+                pass
+            conexion.close()
+        self._conexiones = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+        return False
+
+
+def main(argv=None) -> int:
+    """Arranca un trabajador que escucha en el puerto indicado"""
+    parser = argparse.ArgumentParser(description="Trabajador del coordinador de lotes")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--puerto', type=int, required=True)
+    parser.add_argument('--clave', default=os.environ.get('CLAVE_TRABAJADORES'),
+                        help="Clave de autenticación (o variable CLAVE_TRABAJADORES)")
+    parser.add_argument('--metodo', choices=('mamdani', 'tsk'), default='mamdani')
+    args = parser.parse_args(argv)
+    if not args.clave:
+        parser.error("se necesita --clave o CLAVE_TRABAJADORES")
+
+    oyente = Listener((args.host, args.puerto), authkey=args.clave.encode('utf-8'))
+    print(f"Trabajador escuchando en {oyente.address}")
+    servir_trabajador(oyente, metodo=args.metodo)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
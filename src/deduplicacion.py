@@ -0,0 +1,179 @@
+"""
+Deduplicación de Perfiles antes de la Inferencia
+================================================
+
+Ambos motores son deterministas: dos perfiles iguales producen el mismo
+resultado. En los datos reales muchos perfiles coinciden tras redondear
+(bandas salariales, importes de ahorro estándar), así que un lote se puede
+evaluar así:
+
+1. Cuantizar cada campo del perfil a un paso (por defecto 1 USD en los
+   importes y 0.1 en el riesgo) y formar la clave canónica: la tupla de
+   múltiplos enteros del paso, que es exacta y se usa como clave de un dict
+2. Evaluar una sola vez cada perfil canónico distinto
+3. Repartir cada resultado a todos los perfiles que comparten clave
+
+Se evalúa el perfil cuantizado, no el primero de cada grupo, para que el
+resultado de un perfil no dependa de qué duplicado aparece antes. Con
+pasos más finos que la precisión de los datos la deduplicación es exacta.
+
+    resultados, estadisticas = evaluar_deduplicado(perfiles, evaluador.evaluar_lote)
+    print(estadisticas['proporcion_duplicados'], estadisticas['segundos_ahorrados'])
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import time
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple, Union
+
+# Campos del perfil que usan los motores
+CAMPOS_PERFIL = ('ingresos', 'ahorro', 'gastos', 'deudas', 'ocio', 'riesgo')
+
+# Paso de cuantización por campo
+PRECISION_POR_DEFECTO = {
+    'ingresos': 1.0,
+    'ahorro': 1.0,
+    'gastos': 1.0,
+    'deudas': 1.0,
+    'ocio': 1.0,
+    'riesgo': 0.1,
+}
+
+# Decimales con los que se reconstruye el valor cuantizado (evita 0.30000000000000004)
+_DECIMALES = 10
+
+
+def _pasos(precision: Union[float, Dict[str, float], None], campos: Sequence[str]) -> Dict[str, float]:
+    """Paso de cada campo a partir de un número común o de un dict por campo"""
+    if precision is None:
+        pasos = {campo: PRECISION_POR_DEFECTO.get(campo, 1.0) for campo in campos}
+    elif isinstance(precision, dict):
+        pasos = {campo: precision.get(campo, PRECISION_POR_DEFECTO.get(campo, 1.0)) for campo in campos}
+    else:
+        pasos = {campo: float(precision) for campo in campos}
+    for campo, paso in pasos.items():
+        if paso <= 0:
+            raise ValueError(f"El paso de '{campo}' debe ser positivo")
+    return pasos
+
+
+def clave_canonica(perfil: Dict[str, float], pasos: Dict[str, float]) -> Tuple:
+    """
+    Clave canónica de un perfil: (campo, múltiplo entero del paso) por campo presente
+
+    Args:
+        perfil: Perfil financiero
+        pasos: Paso de cuantización de cada campo considerado
+    """
+    return tuple((campo, round(perfil[campo] / paso)) for campo, paso in pasos.items() if campo in perfil)
+
+
+def perfil_canonico(clave: Tuple, pasos: Dict[str, float]) -> Dict[str, float]:
+    """Perfil cuantizado correspondiente a una clave canónica"""
+    return {campo: round(multiplo * pasos[campo], _DECIMALES) for campo, multiplo in clave}
+
+
+def agrupar_perfiles(perfiles: Sequence[Dict[str, float]],
+                     precision: Union[float, Dict[str, float], None] = None,
+                     campos: Sequence[str] = CAMPOS_PERFIL) -> Tuple[List[Dict[str, float]], List[int]]:
+    """
+    Agrupa los perfiles que coinciden tras cuantizar
+
+    Args:
+        perfiles: Lista de perfiles
+        precision: Paso común, dict de pasos por campo o None para
+                   PRECISION_POR_DEFECTO
+        campos: Campos que forman la clave (el resto se ignora)
+
+    Returns:
+        (únicos, índices): perfiles canónicos distintos en orden de primera
+        aparición y, para cada perfil, la posición de su canónico en únicos
+    """
+    pasos = _pasos(precision, campos)
+    posiciones: Dict[Tuple, int] = {}
+    unicos = []
+    indices = []
+    for perfil in perfiles:
+        clave = clave_canonica(perfil, pasos)
+        posicion = posiciones.get(clave)
+        if posicion is None:
+            posicion = posiciones[clave] = len(unicos)
+            unicos.append(perfil_canonico(clave, pasos))
+        indices.append(posicion)
+    return unicos, indices
+
+
+def expandir_resultados(resultados_unicos: Sequence[Any], indices: Sequence[int],
+                        perfiles: Optional[Sequence[Dict[str, float]]] = None) -> List[Any]:
+    """
+    Reparte los resultados de los perfiles únicos a todos los perfiles
+
+    Args:
+        resultados_unicos: Un resultado por perfil único
+        indices: Posición del único de cada perfil (de agrupar_perfiles)
+        perfiles: Perfiles originales; si se indican, los resultados que
+                  son dicts con 'perfil' se copian con el perfil original
+
+    Returns:
+        list: Un resultado por perfil
+    """
+    if perfiles is None:
+        return [resultados_unicos[i] for i in indices]
+    expandidos = []
+    for perfil, i in zip(perfiles, indices):
+        resultado = resultados_unicos[i]
+        if isinstance(resultado, dict) and 'perfil' in resultado:
+            resultado = dict(resultado, perfil=perfil)
+        expandidos.append(resultado)
+    return expandidos
+
+
+def evaluar_deduplicado(perfiles: Sequence[Dict[str, float]],
+                        evaluar_lote: Callable[[List[Dict[str, float]]], List[Any]],
+                        precision: Union[float, Dict[str, float], None] = None,
+                        campos: Sequence[str] = CAMPOS_PERFIL) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Evalúa un lote evaluando una sola vez cada perfil canónico distinto
+
+    Args:
+        perfiles: Lista de perfiles
+        evaluar_lote: Función lista de perfiles → lista de resultados (por
+                      ejemplo EvaluadorCombinado.evaluar_lote,
+                      crear_evaluador_trozos() o CoordinadorLotes.evaluar)
+        precision: Paso común, dict de pasos por campo o None para
+                   PRECISION_POR_DEFECTO
+        campos: Campos que forman la clave
+
+    Returns:
+        (resultados, estadisticas): un resultado por perfil, y un dict con
+        perfiles, únicos, duplicados, proporcion_duplicados, segundos de
+        agrupación, evaluación y reparto, y segundos_ahorrados (estimación:
+        duplicados × tiempo medio por perfil evaluado, menos el coste de
+        agrupar y repartir)
+    """
+    perfiles = list(perfiles)
+    inicio = time.perf_counter()
+    unicos, indices = agrupar_perfiles(perfiles, precision, campos)
+    agrupacion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados_unicos = evaluar_lote(unicos) if unicos else []
+    evaluacion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados = expandir_resultados(resultados_unicos, indices, perfiles)
+    reparto = time.perf_counter() - inicio
+
+    duplicados = len(perfiles) - len(unicos)
+    por_perfil = evaluacion / len(unicos) if unicos else 0.0
+    return resultados, {
+        'perfiles': len(perfiles),
+        'unicos': len(unicos),
+        'duplicados': duplicados,
+        'proporcion_duplicados': duplicados / len(perfiles) if perfiles else 0.0,
+        'segundos_agrupacion': agrupacion,
+        'segundos_evaluacion': evaluacion,
+        'segundos_reparto': reparto,
+        'segundos_ahorrados': duplicados * por_perfil - agrupacion - reparto,
+    }
@@ -0,0 +1,297 @@
+"""
+Evaluación Difusa Escalar
+=========================
+
+Ruta rápida para evaluaciones individuales del sistema difuso financiero.
+scikit-fuzzy fuzzifica interpolando arrays de pertenencia sobre universos
+de 1001 y 110 puntos y defuzzifica recorriendo los 510 puntos del universo
+de salida; aquí todo se calcula con floats de Python, sin crear arrays:
+
+- Las pertenencias trimf/trapmf se evalúan analíticamente a partir de sus
+  puntos de quiebre (un trimf (a, b, c) es el trapecio (a, b, b, c))
+- La fuerza de cada regla es el mínimo (y) o el máximo (o) de sus
+  antecedentes, y las reglas con la misma salida se acumulan con el máximo
+- Mamdani: la salida agregada max(min(fuerza, conjunto)) es lineal a trozos;
+  su centroide se integra exactamente entre sus puntos de quiebre
+- Poda por soporte: un índice de los intervalos de soporte de los términos
+  de cada entrada da, para cada valor, los términos con pertenencia
+  posiblemente no nula; solo se evalúan esos términos y las reglas que los
+  usan (y: todos sus antecedentes activos; o: alguno), que son las únicas
+  con fuerza no nula. Con bases de cientos de reglas la evaluación deja de
+  recorrerlas todas
+- TSK: media de los singletones ponderada como la calcula scikit-fuzzy.
+  Allí cada singleton es un pico de un solo punto del universo de salida;
+  recortado a la fuerza w es un trapecio de área proporcional a w(2 - w),
+  simétrico respecto al singleton, así que ese es su peso en el centroide
+
+Como los puntos de quiebre de las entradas caen sobre los universos de
+scikit-fuzzy, las pertenencias coinciden con las suyas. El centroide es el
+de la función continua, por lo que difiere del de scikit-fuzzy (que la
+muestrea cada 0.1) en milésimas como mucho.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+from bisect import bisect_right
+from typing import Dict, List, Sequence, Tuple
+
+from .configuracion_difusa import (TERMINOS_AHORRO, TERMINOS_RIESGO, TERMINOS_INVERSION,
+                                   SINGLETONES_TSK, REGLAS_DIFUSAS)
+
+
+def trapecio(puntos: tuple) -> Tuple[float, float, float, float]:
+    """Puntos de quiebre como trapecio (a, b, c, d); un trimf (a, b, c) es (a, b, b, c)"""
+    if len(puntos) == 3:
+        a, b, c = puntos
+        return float(a), float(b), float(b), float(c)
+    a, b, c, d = puntos
+    return float(a), float(b), float(c), float(d)
+
+
+def pertenencia(x: float, a: float, b: float, c: float, d: float) -> float:
+    """
+    Grado de pertenencia de x al trapecio (a, b, c, d), como trapmf de scikit-fuzzy
+
+    Los lados verticales (a == b o c == d) valen 1 en el vértice.
+    """
+    if x < a or x > d:
+        return 0.0
+    if x < b:
+        return (x - a) / (b - a)
+    if x <= c:
+        return 1.0
+    return (d - x) / (d - c)
+
+
+def _lados(a: float, b: float, c: float, d: float) -> List[Tuple[float, float, float, float]]:
+    """Lados inclinados del trapecio como segmentos (x0, y0, x1, y1)"""
+    lados = []
+    if b > a:
+        lados.append((a, 0.0, b, 1.0))
+    if d > c:
+        lados.append((c, 1.0, d, 0.0))
+    return lados
+
+
+def centroide_mamdani(conjuntos: List[Tuple[float, float, float, float]], fuerzas: List[float]) -> float:
+    """
+    Centroide exacto de max_k(min(fuerza_k, conjunto_k))
+
+    Args:
+        conjuntos: Trapecios de salida
+        fuerzas: Fuerza acumulada de cada conjunto de salida
+
+    Returns:
+        float: Centroide de la salida agregada
+
+    Raises:
+        ValueError: Si ninguna regla se activa (área nula)
+    """
+    activos = [(t, w) for t, w in zip(conjuntos, fuerzas) if w > 0.0]
+    if not activos:
+        raise ValueError("Ninguna regla se activó: no se puede calcular la salida")
+
+    # Puntos de quiebre: vértices, cortes de cada lado con cada nivel de
+    # fuerza y cruces entre lados de conjuntos distintos
+    puntos = set()
+    lados = []
+    for (a, b, c, d), _ in activos:
+        puntos.update((a, b, c, d))
+        for lado in _lados(a, b, c, d):
+            x0, y0, x1, y1 = lado
+            for _, nivel in activos:
+                if nivel < 1.0:
+                    puntos.add(x0 + (nivel - y0) / (y1 - y0) * (x1 - x0))
+            lados.append(lado)
+    for i in range(len(lados)):
+        x0, y0, x1, y1 = lados[i]
+        pendiente = (y1 - y0) / (x1 - x0)
+        for j in range(i + 1, len(lados)):
+            u0, v0, u1, v1 = lados[j]
+            otra = (v1 - v0) / (u1 - u0)
+            if pendiente != otra:
+                x = (v0 - y0 + pendiente * x0 - otra * u0) / (pendiente - otra)
+                if max(x0, u0) < x < min(x1, u1):
+                    puntos.add(x)
+
+    area = 0.0
+    momento = 0.0
+    anterior_x = None
+    anterior_y = 0.0
+    for x in sorted(puntos):
+        y = 0.0
+        for (a, b, c, d), w in activos:
+            valor = pertenencia(x, a, b, c, d)
+            if valor > w:
+                valor = w
+            if valor > y:
+                y = valor
+        if anterior_x is not None:
+            ancho = x - anterior_x
+            area += ancho * (anterior_y + y) / 2.0
+            momento += ancho * (anterior_x * (2.0 * anterior_y + y) + x * (anterior_y + 2.0 * y)) / 6.0
+        anterior_x, anterior_y = x, y
+
+    if area <= 0.0:
+        raise ValueError("Ninguna regla se activó: no se puede calcular la salida")
+    return momento / area
+
+
+class IndiceSoportes:
+    """
+    Índice de los intervalos de soporte [a, d] de los términos de una variable.
+
+    Los extremos de todos los soportes parten el eje en tramos; cada tramo
+    guarda los términos cuyo soporte lo toca, los únicos que pueden tener
+    pertenencia no nula dentro de él. La consulta es una búsqueda binaria.
+    """
+
+    def __init__(self, trapecios: Sequence[Tuple[float, float, float, float]]):
+        """
+        Args:
+            trapecios: Trapecios (a, b, c, d) de los términos, en orden de índice
+        """
+        self.bordes = sorted({t[0] for t in trapecios} | {t[3] for t in trapecios})
+        limites = [float('-inf')] + self.bordes + [float('inf')]
+        # El tramo k cubre [limites[k], limites[k + 1]); un término que acaba
+        # justo en limites[k] solo vale algo allí si su lado derecho es vertical
+        self.tramos = tuple(
+            tuple(i for i, (a, _, c, d) in enumerate(trapecios)
+                  if a < limites[k + 1] and (d > limites[k] or (d == limites[k] and c == d)))
+            for k in range(len(limites) - 1)
+        )
+
+    def tramo(self, x: float) -> int:
+        """Índice del tramo que contiene x"""
+        return bisect_right(self.bordes, x)
+
+    def terminos(self, x: float) -> Tuple[int, ...]:
+        """Índices de los términos con pertenencia posiblemente no nula en x"""
+        return self.tramos[bisect_right(self.bordes, x)]
+
+
+class EvaluadorDifusoEscalar:
+    """
+    Mamdani y TSK del sistema difuso financiero evaluados con floats de Python.
+
+    Uso:
+        escalar = EvaluadorDifusoEscalar()
+        nivel = escalar.mamdani(700, 3)
+        nivel_tsk = escalar.tsk(700, 3)
+    """
+
+    def __init__(self, terminos_ahorro: Dict[str, tuple] = TERMINOS_AHORRO,
+                 terminos_riesgo: Dict[str, tuple] = TERMINOS_RIESGO,
+                 terminos_salida: Dict[str, tuple] = TERMINOS_INVERSION,
+                 singletones: Dict[str, float] = SINGLETONES_TSK,
+                 reglas: tuple = REGLAS_DIFUSAS, podar: bool = True):
+        """
+        Args:
+            terminos_ahorro: Puntos de quiebre de los conjuntos de ahorro
+            terminos_riesgo: Puntos de quiebre de los conjuntos de riesgo
+            terminos_salida: Puntos de quiebre de los conjuntos de salida (Mamdani)
+            singletones: Valor de cada conjunto de salida (TSK)
+            reglas: Tuplas (operador 'y'/'o', término de ahorro, término de riesgo, salida)
+            podar: Evaluar solo las reglas con antecedentes activos (IndiceSoportes)
+        """
+        self.nombres_ahorro = tuple(terminos_ahorro)
+        self.nombres_riesgo = tuple(terminos_riesgo)
+        self.nombres_salida = tuple(terminos_salida)
+        self._ahorro = tuple(trapecio(p) for p in terminos_ahorro.values())
+        self._riesgo = tuple(trapecio(p) for p in terminos_riesgo.values())
+        self._salida = [trapecio(p) for p in terminos_salida.values()]
+        self._singletones = tuple(float(singletones[n]) for n in self.nombres_salida)
+
+        for operador, _, _, _ in reglas:
+            if operador not in ('y', 'o'):
+                raise ValueError(f"Operador de regla no soportado: {operador!r}")
+        # Índices precalculados: (es_y, índice de ahorro, índice de riesgo, índice de salida)
+        self._reglas = tuple(
+            (operador == 'y', self.nombres_ahorro.index(ahorro), self.nombres_riesgo.index(riesgo),
+             self.nombres_salida.index(salida))
+            for operador, ahorro, riesgo, salida in reglas
+        )
+
+        self.podar = podar
+        self._indice_ahorro = IndiceSoportes(self._ahorro)
+        self._indice_riesgo = IndiceSoportes(self._riesgo)
+        # (tramo de ahorro, tramo de riesgo) → reglas candidatas, calculadas al primer uso
+        self._candidatas: Dict[Tuple[int, int], tuple] = {}
+
+    def _reglas_candidatas(self, tramo_ahorro: int, tramo_riesgo: int) -> tuple:
+        """Reglas que pueden tener fuerza no nula en un par de tramos"""
+        activos_ahorro = set(self._indice_ahorro.tramos[tramo_ahorro])
+        activos_riesgo = set(self._indice_riesgo.tramos[tramo_riesgo])
+        candidatas = tuple(
+            regla for regla in self._reglas
+            if ((regla[1] in activos_ahorro and regla[2] in activos_riesgo) if regla[0]
+                else (regla[1] in activos_ahorro or regla[2] in activos_riesgo))
+        )
+        self._candidatas[(tramo_ahorro, tramo_riesgo)] = candidatas
+        return candidatas
+
+    def fuerzas(self, ahorro: float, riesgo: float) -> List[float]:
+        """Fuerza acumulada (máximo de sus reglas) de cada conjunto de salida"""
+        if self.podar:
+            tramo_ahorro = self._indice_ahorro.tramo(ahorro)
+            tramo_riesgo = self._indice_riesgo.tramo(riesgo)
+            reglas = self._candidatas.get((tramo_ahorro, tramo_riesgo))
+            if reglas is None:
+                reglas = self._reglas_candidatas(tramo_ahorro, tramo_riesgo)
+            # Solo se calculan las pertenencias de los términos activos; el resto es 0
+            grados_ahorro = [0.0] * len(self._ahorro)
+            for i in self._indice_ahorro.tramos[tramo_ahorro]:
+                grados_ahorro[i] = pertenencia(ahorro, *self._ahorro[i])
+            grados_riesgo = [0.0] * len(self._riesgo)
+            for j in self._indice_riesgo.tramos[tramo_riesgo]:
+                grados_riesgo[j] = pertenencia(riesgo, *self._riesgo[j])
+        else:
+            reglas = self._reglas
+            grados_ahorro = [pertenencia(ahorro, *t) for t in self._ahorro]
+            grados_riesgo = [pertenencia(riesgo, *t) for t in self._riesgo]
+
+        fuerzas = [0.0] * len(self._singletones)
+        for es_y, i, j, k in reglas:
+            x, y = grados_ahorro[i], grados_riesgo[j]
+            fuerza = (x if x < y else y) if es_y else (x if x > y else y)
+            if fuerza > fuerzas[k]:
+                fuerzas[k] = fuerza
+        return fuerzas
+
+    def mamdani(self, ahorro: float, riesgo: float) -> float:
+        """Nivel de inversión Mamdani (implicación mínimo, agregación máximo, centroide)"""
+        return centroide_mamdani(self._salida, self.fuerzas(ahorro, riesgo))
+
+    def tsk(self, ahorro: float, riesgo: float) -> float:
+        """Nivel de inversión TSK (singletones ponderados por w(2 - w), como scikit-fuzzy)"""
+        total = 0.0
+        momento = 0.0
+        for w, singleton in zip(self.fuerzas(ahorro, riesgo), self._singletones):
+            peso = w * (2.0 - w)
+            total += peso
+            momento += peso * singleton
+        if total <= 0.0:
+            raise ValueError("Ninguna regla se activó: no se puede calcular la salida")
+        return momento / total
+
+    def detalle(self, ahorro: float, riesgo: float) -> Dict[str, Dict[str, float]]:
+        """
+        Pertenencias de las entradas y activación de cada regla (para trazas)
+
+        Returns:
+            Dict con 'pertenencias' por variable y término y 'activaciones' R1..Rn
+        """
+        grados_ahorro = [pertenencia(ahorro, *t) for t in self._ahorro]
+        grados_riesgo = [pertenencia(riesgo, *t) for t in self._riesgo]
+        activaciones = {}
+        for n, (es_y, i, j, _) in enumerate(self._reglas, 1):
+            x, y = grados_ahorro[i], grados_riesgo[j]
+            activaciones[f"R{n}"] = min(x, y) if es_y else max(x, y)
+        return {
+            'pertenencias': {
+                'ahorro_mensual': dict(zip(self.nombres_ahorro, grados_ahorro)),
+                'riesgo_inversion': dict(zip(self.nombres_riesgo, grados_riesgo)),
+            },
+            'activaciones': activaciones,
+        }
@@ -0,0 +1,464 @@
+"""
+Sistema Difuso Tensorial de N Entradas
+======================================
+
+Variante del motor difuso para modelos con más entradas que ahorro y
+riesgo (ratio de deuda, edad, horizonte...) y lotes completos de perfiles.
+En lugar del grafo de ControlSystem de scikit-fuzzy, el modelo se guarda
+como arrays:
+
+- Pertenencias: una matriz (muestras × términos) por variable, calculada
+  analíticamente a partir de los puntos de quiebre trimf/trapmf
+- Reglas: arrays de índices de columna sobre las pertenencias de todas
+  las variables concatenadas; las reglas con menos antecedentes se
+  rellenan con una columna de unos (y) o de ceros (o)
+- Fuerza de cada conjunto de salida: máximo de sus reglas
+- Mamdani: agregación máximo/mínimo sobre el universo de salida muestreado
+  y centroide lineal a trozos, expresado como dos productos matriz-vector.
+  scikit-fuzzy añade además al universo los puntos donde cada conjunto
+  corta su nivel de activación, así que los resultados difieren en
+  milésimas
+- TSK: singletones ponderados por w(2 - w), como scikit-fuzzy (ver
+  difuso_escalar)
+
+El coste crece linealmente con las reglas y los lotes se procesan por
+bloques de tamaño acotado. SistemaDifusoTensorial mantiene encima la API
+de SistemaDifusoFinanciero (evaluar_mamdani, evaluar_tsk,
+evaluar_ambos_metodos) y añade evaluar_lote.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+from time import perf_counter
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .configuracion_difusa import (TERMINOS_AHORRO, TERMINOS_RIESGO, TERMINOS_INVERSION, SINGLETONES_TSK,
+                                   REGLAS_DIFUSAS, UNIVERSO_INVERSION, ETIQUETAS_INVERSION)
+
+# Elementos máximos de las matrices intermedias por bloque del lote
+ELEMENTOS_POR_BLOQUE = 4_000_000
+
+# Regla: (operador 'y'/'o', {variable: término}, conjunto de salida)
+Regla = Tuple[str, Dict[str, str], str]
+
+
+class VariableDifusa:
+    """Variable de entrada con sus términos trimf (3 puntos) o trapmf (4 puntos)"""
+
+    def __init__(self, nombre: str, rango: Tuple[float, float], terminos: Dict[str, tuple],
+                 clave: Optional[str] = None):
+        """
+        Args:
+            nombre: Nombre de la variable (p. ej. 'ahorro_mensual')
+            rango: Valores admitidos (mínimo, máximo)
+            terminos: Puntos de quiebre de cada término
+            clave: Prefijo de '<clave>_entrada' en los resultados (por defecto el nombre)
+        """
+        if not terminos:
+            raise ValueError(f"La variable {nombre!r} no tiene términos")
+        self.nombre = nombre
+        self.rango = (float(rango[0]), float(rango[1]))
+        self.clave = clave or nombre
+        self.terminos = tuple(terminos)
+        puntos = np.array([_trapecio(p) for p in terminos.values()], dtype=np.float64)
+        self._a, self._b, self._c, self._d = puntos.T
+
+    def pertenencias(self, x: np.ndarray) -> np.ndarray:
+        """
+        Grados de pertenencia de un vector de valores
+
+        Returns:
+            np.ndarray: Matriz (muestras × términos)
+        """
+        x = np.asarray(x, dtype=np.float64)[:, None]
+        a, b, c, d = self._a, self._b, self._c, self._d
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Lados verticales (a == b o c == d) valen 1 dentro del soporte
+            izquierda = np.where(b > a, (x - a) / (b - a), np.where(x >= a, 1.0, 0.0))
+            derecha = np.where(d > c, (d - x) / (d - c), np.where(x <= d, 1.0, 0.0))
+        return np.clip(np.minimum(izquierda, derecha), 0.0, 1.0)
+
+
+def _trapecio(puntos: tuple) -> Tuple[float, float, float, float]:
+    """Un trimf (a, b, c) es el trapecio (a, b, b, c)"""
+    if len(puntos) == 3:
+        return puntos[0], puntos[1], puntos[1], puntos[2]
+    if len(puntos) == 4:
+        return tuple(puntos)
+    raise ValueError(f"Se esperaban 3 o 4 puntos de quiebre: {puntos!r}")
+
+
+class ModeloDifuso:
+    """
+    Modelo difuso de N entradas y una salida evaluado con operaciones de arrays.
+
+    Uso:
+        modelo = modelo_financiero_extendido()
+        niveles = modelo.mamdani({'ahorro_mensual': ahorros, 'riesgo_inversion': riesgos, ...})
+    """
+
+    def __init__(self, entradas: Sequence[VariableDifusa], terminos_salida: Dict[str, tuple],
+                 reglas: Sequence[Regla], singletones: Optional[Dict[str, float]] = None,
+                 universo_salida: tuple = UNIVERSO_INVERSION):
+        """
+        Args:
+            entradas: Variables de entrada, en el orden de los argumentos posicionales
+            terminos_salida: Puntos de quiebre de los conjuntos de salida (Mamdani)
+            reglas: Reglas (operador 'y'/'o', {variable: término}, salida)
+            singletones: Valor de cada conjunto de salida para TSK (por defecto su pico)
+            universo_salida: Argumentos de np.arange del universo de salida
+
+        Raises:
+            ValueError: Si una regla usa variables, términos u operadores desconocidos
+        """
+        self.entradas = tuple(entradas)
+        self.nombres = tuple(v.nombre for v in self.entradas)
+        if len(set(self.nombres)) != len(self.nombres):
+            raise ValueError("Nombres de variables de entrada repetidos")
+        self.nombres_salida = tuple(terminos_salida)
+
+        # Columna de cada (variable, término) en la matriz de pertenencias concatenada
+        columnas = {}
+        for variable in self.entradas:
+            for termino in variable.terminos:
+                columnas[(variable.nombre, termino)] = len(columnas)
+        self.num_columnas = len(columnas)
+        unos, ceros = self.num_columnas, self.num_columnas + 1
+
+        self.reglas = tuple(reglas)
+        if not self.reglas:
+            raise ValueError("El modelo no tiene reglas")
+        grupos = {'y': [], 'o': []}
+        salida_de_regla = {'y': [], 'o': []}
+        for operador, antecedentes, salida in self.reglas:
+            if operador not in grupos:
+                raise ValueError(f"Operador de regla no soportado: {operador!r}")
+            if not antecedentes:
+                raise ValueError("Regla sin antecedentes")
+            if salida not in terminos_salida:
+                raise ValueError(f"Conjunto de salida desconocido: {salida!r}")
+            indices = []
+            for variable, termino in antecedentes.items():
+                if (variable, termino) not in columnas:
+                    raise ValueError(f"Término desconocido: {variable}={termino!r}")
+                indices.append(columnas[(variable, termino)])
+            grupos[operador].append(indices)
+            salida_de_regla[operador].append(self.nombres_salida.index(salida))
+
+        # Índices (reglas × antecedentes) rellenos con el elemento neutro del operador
+        self._indices = {}
+        for operador, relleno in (('y', unos), ('o', ceros)):
+            ancho = max((len(i) for i in grupos[operador]), default=0)
+            self._indices[operador] = np.array(
+                [i + [relleno] * (ancho - len(i)) for i in grupos[operador]], dtype=np.intp
+            ).reshape(len(grupos[operador]), ancho)
+
+        # Reglas (en el orden y..., o...) que concluyen cada conjunto de salida
+        orden = salida_de_regla['y'] + salida_de_regla['o']
+        self._reglas_por_salida = [np.flatnonzero(np.array(orden, dtype=np.intp) == k)
+                                   for k in range(len(self.nombres_salida))]
+
+        self.universo = np.arange(*universo_salida, dtype=np.float64)
+        salida = VariableDifusa('salida', (self.universo[0], self.universo[-1]), terminos_salida)
+        self._conjuntos_salida = salida.pertenencias(self.universo).T     # (términos × universo)
+
+        # Centroide lineal a trozos como productos escalares con la salida muestreada
+        x1, x2 = self.universo[:-1], self.universo[1:]
+        dx = x2 - x1
+        self._pesos_area = np.zeros_like(self.universo)
+        self._pesos_area[:-1] += dx / 2
+        self._pesos_area[1:] += dx / 2
+        self._pesos_momento = np.zeros_like(self.universo)
+        self._pesos_momento[:-1] += dx * (2 * x1 + x2) / 6
+        self._pesos_momento[1:] += dx * (x1 + 2 * x2) / 6
+
+        if singletones is None:
+            singletones = {n: _trapecio(p)[1] for n, p in terminos_salida.items()}
+        self._singletones = np.array([singletones[n] for n in self.nombres_salida], dtype=np.float64)
+
+        por_muestra = self._indices['y'].size + self._indices['o'].size + len(self.reglas) + len(self.universo)
+        self.tamano_bloque = max(64, ELEMENTOS_POR_BLOQUE // max(1, por_muestra))
+
+    def columnas(self, entradas: Union[Dict[str, Any], np.ndarray]) -> List[np.ndarray]:
+        """
+        Vectores float64 de cada entrada, en el orden del modelo
+
+        Args:
+            entradas: Dict variable → valores, o matriz (muestras × entradas)
+        """
+        if isinstance(entradas, dict):
+            faltan = [n for n in self.nombres if n not in entradas]
+            if faltan:
+                raise ValueError(f"Faltan entradas: {', '.join(faltan)}")
+            valores = [np.atleast_1d(np.asarray(entradas[n], dtype=np.float64)) for n in self.nombres]
+        else:
+            matriz = np.atleast_2d(np.asarray(entradas, dtype=np.float64))
+            if matriz.shape[1] != len(self.nombres):
+                raise ValueError(f"Se esperaban {len(self.nombres)} columnas de entrada")
+            valores = list(matriz.T)
+        n = max(len(v) for v in valores)
+        return [np.broadcast_to(v, (n,)) for v in valores]
+
+    def _fuerzas_bloque(self, valores: List[np.ndarray]) -> np.ndarray:
+        """Fuerza de cada conjunto de salida (muestras × salidas) de un bloque"""
+        n = len(valores[0])
+        pertenencias = np.empty((n, self.num_columnas + 2))
+        inicio = 0
+        for variable, x in zip(self.entradas, valores):
+            fin = inicio + len(variable.terminos)
+            pertenencias[:, inicio:fin] = variable.pertenencias(x)
+            inicio = fin
+        pertenencias[:, -2] = 1.0
+        pertenencias[:, -1] = 0.0
+
+        activaciones = []
+        for operador, combinar in (('y', np.minimum), ('o', np.maximum)):
+            indices = self._indices[operador]
+            if indices.shape[0] == 0:
+                continue
+            activacion = pertenencias[:, indices[:, 0]]
+            for posicion in range(1, indices.shape[1]):
+                combinar(activacion, pertenencias[:, indices[:, posicion]], out=activacion)
+            activaciones.append(activacion)
+        activacion = np.concatenate(activaciones, axis=1)
+
+        fuerzas = np.zeros((n, len(self.nombres_salida)))
+        for k, reglas in enumerate(self._reglas_por_salida):
+            if len(reglas):
+                fuerzas[:, k] = activacion[:, reglas].max(axis=1)
+        return fuerzas
+
+    def _por_bloques(self, entradas, funcion) -> np.ndarray:
+        """Aplica funcion a bloques del lote y concatena los resultados"""
+        valores = self.columnas(entradas)
+        n = len(valores[0])
+        resultado = np.empty(n)
+        for inicio in range(0, n, self.tamano_bloque):
+            fin = min(n, inicio + self.tamano_bloque)
+            resultado[inicio:fin] = funcion(self._fuerzas_bloque([v[inicio:fin] for v in valores]))
+        return resultado
+
+    def fuerzas(self, entradas) -> np.ndarray:
+        """Fuerza acumulada de cada conjunto de salida (muestras × salidas)"""
+        return self._fuerzas_bloque(self.columnas(entradas))
+
+    def _centroide(self, fuerzas: np.ndarray) -> np.ndarray:
+        """Centroide de la salida agregada max_k(min(fuerza_k, conjunto_k))"""
+        agregada = np.zeros((len(fuerzas), len(self.universo)))
+        for k in range(fuerzas.shape[1]):
+            np.maximum(agregada, np.minimum(fuerzas[:, k, None], self._conjuntos_salida[k]), out=agregada)
+        area = agregada @ self._pesos_area
+        momento = agregada @ self._pesos_momento
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(area > 0, momento / area, np.nan)
+
+    def _media_singletones(self, fuerzas: np.ndarray) -> np.ndarray:
+        """Singletones ponderados por w(2 - w)"""
+        pesos = fuerzas * (2.0 - fuerzas)
+        total = pesos.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, (pesos @ self._singletones) / total, np.nan)
+
+    def mamdani(self, entradas) -> np.ndarray:
+        """Salida Mamdani de cada muestra (NaN si ninguna regla se activa)"""
+        return self._por_bloques(entradas, self._centroide)
+
+    def tsk(self, entradas) -> np.ndarray:
+        """Salida TSK de cada muestra (NaN si ninguna regla se activa)"""
+        return self._por_bloques(entradas, self._media_singletones)
+
+
+def modelo_financiero() -> ModeloDifuso:
+    """Modelo de dos entradas equivalente a SistemaDifusoFinanciero"""
+    entradas = [
+        VariableDifusa('ahorro_mensual', (0, 1000), TERMINOS_AHORRO, clave='ahorro'),
+        VariableDifusa('riesgo_inversion', (0, 10), TERMINOS_RIESGO, clave='riesgo'),
+    ]
+    reglas = [(operador, {'ahorro_mensual': ahorro, 'riesgo_inversion': riesgo}, salida)
+              for operador, ahorro, riesgo, salida in REGLAS_DIFUSAS]
+    return ModeloDifuso(entradas, TERMINOS_INVERSION, reglas, singletones=SINGLETONES_TSK)
+
+
+def modelo_financiero_extendido() -> ModeloDifuso:
+    """
+    Modelo de cinco entradas: ahorro y riesgo más ratio de deuda (deudas /
+    ingresos), edad y horizonte de inversión en años
+    """
+    entradas = [
+        VariableDifusa('ahorro_mensual', (0, 1000), TERMINOS_AHORRO, clave='ahorro'),
+        VariableDifusa('riesgo_inversion', (0, 10), TERMINOS_RIESGO, clave='riesgo'),
+        VariableDifusa('ratio_deuda', (0, 1), {
+            'bajo': (0, 0, 0.2, 0.35), 'medio': (0.2, 0.35, 0.5), 'alto': (0.4, 0.6, 1, 1)}),
+        VariableDifusa('edad', (18, 90), {
+            'joven': (18, 18, 30, 40), 'media': (30, 45, 60), 'mayor': (50, 65, 90, 90)}),
+        VariableDifusa('horizonte', (0, 40), {
+            'corto': (0, 0, 2, 5), 'medio': (3, 7, 12), 'largo': (10, 15, 40, 40)}),
+    ]
+    reglas = [(operador, {'ahorro_mensual': ahorro, 'riesgo_inversion': riesgo}, salida)
+              for operador, ahorro, riesgo, salida in REGLAS_DIFUSAS]
+    reglas += [
+        ('y', {'ratio_deuda': 'alto'}, 'conservadora'),
+        ('y', {'edad': 'mayor', 'horizonte': 'corto'}, 'conservadora'),
+        ('o', {'horizonte': 'corto', 'ratio_deuda': 'medio'}, 'conservadora'),
+        ('y', {'ratio_deuda': 'medio', 'horizonte': 'medio'}, 'moderada'),
+        ('y', {'edad': 'media', 'horizonte': 'largo', 'ratio_deuda': 'bajo'}, 'moderada'),
+        ('y', {'edad': 'joven', 'horizonte': 'largo', 'ratio_deuda': 'bajo', 'riesgo_inversion': 'moderado'},
+         'agresiva'),
+        ('y', {'ahorro_mensual': 'alto', 'ratio_deuda': 'bajo', 'horizonte': 'largo'}, 'agresiva'),
+    ]
+    return ModeloDifuso(entradas, TERMINOS_INVERSION, reglas, singletones=SINGLETONES_TSK)
+
+
+class SistemaDifusoTensorial:
+    """
+    API de SistemaDifusoFinanciero sobre un ModeloDifuso de N entradas.
+
+    Las entradas se pasan en el orden del modelo o por nombre:
+        sistema = SistemaDifusoTensorial()               # ahorro y riesgo
+        sistema.evaluar_mamdani(700, 3)
+        extendido = SistemaDifusoTensorial(modelo_financiero_extendido())
+        extendido.evaluar_tsk(700, 3, ratio_deuda=0.1, edad=30, horizonte=20)
+        niveles = extendido.evaluar_lote(columnas, metodo='mamdani')
+    """
+
+    def __init__(self, modelo: Optional[ModeloDifuso] = None, metricas=None):
+        """
+        Args:
+            modelo: Modelo a evaluar (por defecto modelo_financiero())
+            metricas: RegistroMetricas opcional
+        """
+        self.modelo = modelo if modelo is not None else modelo_financiero()
+        self.metricas = metricas
+
+    def _comprobar_nombres(self, nombres) -> None:
+        """ValueError si alguna entrada con nombre no es una variable del modelo"""
+        desconocidas = sorted(set(nombres) - set(self.modelo.nombres))
+        if desconocidas:
+            raise ValueError(f"Entradas desconocidas: {', '.join(desconocidas)}; "
+                             f"el modelo tiene {', '.join(self.modelo.nombres)}")
+
+    def _entradas(self, valores: tuple, por_nombre: Dict[str, float]) -> Dict[str, float]:
+        """Entradas por nombre a partir de argumentos posicionales y con nombre, validadas"""
+        if len(valores) > len(self.modelo.nombres):
+            raise ValueError(f"El modelo tiene {len(self.modelo.nombres)} entradas")
+        entradas = dict(zip(self.modelo.nombres, valores))
+        entradas.update(por_nombre)
+        for variable in self.modelo.entradas:
+            if variable.nombre not in entradas:
+                raise ValueError(f"Falta la entrada {variable.nombre}")
+            minimo, maximo = variable.rango
+            if not (minimo <= entradas[variable.nombre] <= maximo):
+                raise ValueError(f"{variable.nombre} debe estar entre {minimo:g} y {maximo:g}")
+        return entradas
+
+    def _evaluar(self, metodo: str, valores: tuple, por_nombre: Dict[str, float]) -> Dict[str, Any]:
+        """Evaluación individual con el formato de SistemaDifusoFinanciero"""
+        nombre_metodo = 'Difuso' if metodo == 'mamdani' else 'TSK'
+        # Un nombre mal escrito es un error de uso, no de los datos: se lanza
+        self._comprobar_nombres(por_nombre)
+        try:
+            entradas = self._entradas(valores, por_nombre)
+            inicio = perf_counter() if self.metricas is not None else 0.0
+            funcion = self.modelo.mamdani if metodo == 'mamdani' else self.modelo.tsk
+            resultado_numerico = float(funcion(entradas)[0])
+            if self.metricas is not None:
+                self.metricas.observar('fase_segundos', perf_counter() - inicio,
+                                       motor='difuso', fase=f'tensorial_{metodo}')
+                self.metricas.incrementar('llamadas_total', motor='difuso', operacion=metodo)
+            if np.isnan(resultado_numerico):
+                raise ValueError("Ninguna regla se activó: no se puede calcular la salida")
+
+            resultado = {'metodo': nombre_metodo}
+            for variable in self.modelo.entradas:
+                resultado[f'{variable.clave}_entrada'] = entradas[variable.nombre]
+            resultado.update({
+                'nivel_inversion': round(resultado_numerico, 2),
+                'etiqueta': determinar_etiqueta(resultado_numerico),
+                'unidad': '%'
+            })
+            return resultado
+
+        except Exception as e:
+            if self.metricas is not None:
+                self.metricas.incrementar('errores_total', motor='difuso', operacion=metodo)
+            return {
+                'error': f"Error en evaluación {'Mamdani' if metodo == 'mamdani' else 'TSK'}: {str(e)}",
+                'metodo': 'Mamdani' if metodo == 'mamdani' else 'TSK'
+            }
+
+    def evaluar_mamdani(self, *valores: float, **por_nombre: float) -> Dict[str, Any]:
+        """Evalúa un perfil con Mamdani; mismo formato que SistemaDifusoFinanciero"""
+        return self._evaluar('mamdani', valores, por_nombre)
+
+    def evaluar_tsk(self, *valores: float, **por_nombre: float) -> Dict[str, Any]:
+        """Evalúa un perfil con TSK; mismo formato que SistemaDifusoFinanciero"""
+        return self._evaluar('tsk', valores, por_nombre)
+
+    def evaluar_ambos_metodos(self, *valores: float, **por_nombre: float) -> Dict[str, Any]:
+        """Evalúa un perfil con ambos métodos"""
+        resultado_mamdani = self.evaluar_mamdani(*valores, **por_nombre)
+        resultado_tsk = self.evaluar_tsk(*valores, **por_nombre)
+        entradas = dict(zip(self.modelo.nombres, valores))
+        entradas.update(por_nombre)
+        return {
+            'entradas': entradas,
+            'resultados': {
+                'mamdani': resultado_mamdani,
+                'tsk': resultado_tsk
+            },
+            'comparacion': {
+                'diferencia': abs(resultado_mamdani.get('nivel_inversion', 0) -
+                                  resultado_tsk.get('nivel_inversion', 0))
+            }
+        }
+
+    def evaluar_lote(self, entradas: Union[Dict[str, Any], np.ndarray], metodo: str = 'mamdani') -> np.ndarray:
+        """
+        Evalúa un lote completo
+
+        Los valores fuera de rango no se validan; las muestras sin ninguna
+        regla activada dan NaN.
+
+        Args:
+            entradas: Dict variable → valores, o matriz (muestras × entradas)
+            metodo: 'mamdani' o 'tsk'
+
+        Returns:
+            np.ndarray: Nivel de inversión de cada muestra
+        """
+        if metodo not in ('mamdani', 'tsk'):
+            raise ValueError("El método debe ser 'mamdani' o 'tsk'")
+        if isinstance(entradas, dict):
+            self._comprobar_nombres(entradas)
+        inicio = perf_counter() if self.metricas is not None else 0.0
+        niveles = self.modelo.mamdani(entradas) if metodo == 'mamdani' else self.modelo.tsk(entradas)
+        if self.metricas is not None:
+            self.metricas.observar('fase_segundos', perf_counter() - inicio,
+                                   motor='difuso', fase=f'tensorial_lote_{metodo}')
+        return niveles
+
+
+def determinar_etiqueta(valor: float) -> str:
+    """Etiqueta lingüística de un nivel de inversión"""
+    for limite, etiqueta in ETIQUETAS_INVERSION:
+        if valor <= limite:
+            return etiqueta
+    return ETIQUETAS_INVERSION[-1][1]
+
+
+def etiquetas_lote(niveles: np.ndarray) -> np.ndarray:
+    """
+    Etiquetas lingüísticas de un vector de niveles (los límites son inclusivos)
+
+    Los niveles NaN (ninguna regla activada) reciben la etiqueta vacía '',
+    que resultados_compactos codifica como SIN_ETIQUETA.
+    """
+    niveles = np.asarray(niveles)
+    limites = np.array([limite for limite, _ in ETIQUETAS_INVERSION[:-1]])
+    nombres = np.array([etiqueta for _, etiqueta in ETIQUETAS_INVERSION] + [''])
+    indices = np.searchsorted(limites, niveles, side='left')
+    indices[np.isnan(niveles)] = len(nombres) - 1
+    return nombres[indices]
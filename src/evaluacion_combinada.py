@@ -0,0 +1,275 @@
+"""
+Evaluación Combinada Experto + Difuso
+=====================================
+
+Este módulo evalúa un perfil financiero con ambos motores a la vez:
+
+- Sistema experto CLIPS: recomendaciones a partir de ingresos, ahorro,
+  gastos, deudas y ocio
+- Sistema difuso: nivel de inversión a partir del ahorro mensual (derivado
+  de ingresos - gastos) y del riesgo de inversión del perfil
+
+Para un perfil, los dos motores se ejecutan en paralelo (el difuso en un
+hilo auxiliar). Para un lote, los bloques de cada motor se reparten entre
+un pool de procesos con motores precargados, de forma que los bloques del
+experto y del difuso se solapan, y los resultados se combinan por perfil.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Any, List, Tuple, Optional
+
+from .sistema_experto import SistemaExperto
+from .fuzzy_system import SistemaDifusoFinanciero
+
+# Valor de riesgo usado cuando el perfil no lo indica (centro de la escala)
+RIESGO_POR_DEFECTO = 5.0
+
+# Límites del universo de ahorro mensual del sistema difuso
+AHORRO_MENSUAL_MAXIMO = 1000.0
+
+
+def derivar_entradas_difusas(perfil: Dict[str, float]) -> Tuple[float, float]:
+    """
+    Deriva las entradas del sistema difuso a partir de un perfil del experto
+
+    El ahorro mensual es la diferencia entre ingresos y gastos, acotada al
+    universo del sistema difuso (0-1000 USD).
+
+    Args:
+        perfil: Perfil con ingresos y gastos (y opcionalmente riesgo 0-10)
+
+    Returns:
+        Tuple (ahorro_mensual, riesgo_inversion)
+    """
+    ahorro_mensual = perfil.get('ingresos', 0) - perfil.get('gastos', 0)
+    ahorro_mensual = min(AHORRO_MENSUAL_MAXIMO, max(0.0, float(ahorro_mensual)))
+    riesgo = perfil.get('riesgo', RIESGO_POR_DEFECTO)
+    return ahorro_mensual, riesgo
+
+
+def _evaluar_experto(experto: SistemaExperto, perfil: Dict[str, float]) -> Dict[str, Any]:
+    """Ejecuta el ciclo completo del sistema experto para un perfil"""
+    experto.insertar_hechos(**perfil)
+    experto.ejecutar_inferencia()
+    return {
+        'recomendaciones': experto.obtener_resultado(),
+        'mensajes': list(experto.mensajes_activados)
+    }
+
+
+def _evaluar_difuso(difuso: SistemaDifusoFinanciero, perfil: Dict[str, float], metodo: str) -> Dict[str, Any]:
+    """Ejecuta el sistema difuso con las entradas derivadas del perfil"""
+    ahorro_mensual, riesgo = derivar_entradas_difusas(perfil)
+    if metodo == 'tsk':
+        return difuso.evaluar_tsk(ahorro_mensual, riesgo)
+    return difuso.evaluar_mamdani(ahorro_mensual, riesgo)
+
+
+def _combinar(perfil: Dict[str, float], experto: Dict[str, Any], difuso: Dict[str, Any]) -> Dict[str, Any]:
+    """Une los resultados de ambos motores en un único dict"""
+    return {
+        'perfil': perfil,
+        'experto': experto,
+        'difuso': difuso
+    }
+
+
+def crear_evaluador_trozos(metodo: str = 'mamdani') -> Callable[[List[Dict[str, float]]], List[Dict[str, Any]]]:
+    """
+    Crea los dos motores una vez y devuelve una función que evalúa trozos de
+    perfiles en el proceso actual (para trabajadores de larga duración)
+
+    Args:
+        metodo: 'mamdani' o 'tsk'
+    """
+    experto = SistemaExperto()
+    difuso = SistemaDifusoFinanciero()
+
+    def evaluar(perfiles: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+        return [_combinar(perfil, _evaluar_experto(experto, perfil), _evaluar_difuso(difuso, perfil, metodo))
+                for perfil in perfiles]
+    return evaluar
+
+
+# Motores precargados de cada proceso del pool
+_EXPERTO_TRABAJADOR = None
+_DIFUSO_TRABAJADOR = None
+
+
+def _inicializar_trabajador() -> None:
+    """Crea una vez por proceso los motores que usarán los bloques"""
+    global _EXPERTO_TRABAJADOR, _DIFUSO_TRABAJADOR
+    _EXPERTO_TRABAJADOR = SistemaExperto()
+    _DIFUSO_TRABAJADOR = SistemaDifusoFinanciero()
+
+
+def _bloque_experto(perfiles: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+    """Evalúa un bloque con el sistema experto del proceso"""
+    return [_evaluar_experto(_EXPERTO_TRABAJADOR, perfil) for perfil in perfiles]
+
+
+def _bloque_difuso(perfiles: List[Dict[str, float]], metodo: str) -> List[Dict[str, Any]]:
+    """Evalúa un bloque con el sistema difuso del proceso"""
+    return [_evaluar_difuso(_DIFUSO_TRABAJADOR, perfil, metodo) for perfil in perfiles]
+
+
+class EvaluadorCombinado:
+    """
+    Evalúa perfiles con el sistema experto y el sistema difuso a la vez.
+
+    Uso:
+        with EvaluadorCombinado(max_workers=4) as evaluador:
+            resultado = evaluador.evaluar_perfil_completo(perfil)
+            resultados = evaluador.evaluar_lote(perfiles)
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, metodo: str = 'mamdani',
+                 tamano_bloque: int = 64):
+        """
+        Inicializa el evaluador
+
+        Args:
+            max_workers: Procesos del pool para lotes (por defecto, número de CPUs)
+            metodo: Método difuso, 'mamdani' o 'tsk'
+            tamano_bloque: Perfiles por bloque enviado a cada proceso
+        """
+        if metodo not in ('mamdani', 'tsk'):
+            raise ValueError("El método debe ser 'mamdani' o 'tsk'")
+        if tamano_bloque < 1:
+            raise ValueError("El tamaño de bloque debe ser positivo")
+
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.metodo = metodo
+        self.tamano_bloque = tamano_bloque
+
+        # Motores locales para evaluaciones individuales
+        self._experto = SistemaExperto()
+        self._difuso = SistemaDifusoFinanciero()
+        self._lock = threading.Lock()
+        self._hilo_difuso = ThreadPoolExecutor(max_workers=1, thread_name_prefix="difuso")
+        self._pool = None
+
+    def evaluar_perfil_completo(self, perfil: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Evalúa un perfil con ambos motores ejecutándose en paralelo
+
+        Args:
+            perfil: Dict con ingresos, ahorro, gastos, deudas, ocio y opcionalmente riesgo
+
+        Returns:
+            Dict con el perfil y los resultados 'experto' y 'difuso'
+        """
+        with self._lock:
+            futuro_difuso = self._hilo_difuso.submit(_evaluar_difuso, self._difuso, perfil, self.metodo)
+            resultado_experto = _evaluar_experto(self._experto, perfil)
+            return _combinar(perfil, resultado_experto, futuro_difuso.result())
+
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        """Crea el pool de procesos la primera vez que se necesita"""
+        if self._pool is None:
+            # spawn: los procesos no heredan entornos CLIPS ni hilos del padre
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_trabajador
+            )
+        return self._pool
+
+    def evaluar_lote(self, perfiles: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+        """
+        Evalúa un lote repartiendo bloques de ambos motores entre el pool
+
+        Los bloques del experto y del difuso se envían intercalados y con un
+        número limitado en vuelo, de modo que ambos motores se solapan y la
+        memoria no crece con el tamaño del lote.
+
+        Args:
+            perfiles: Lista de perfiles
+
+        Returns:
+            list: Resultados combinados en el mismo orden que los perfiles
+        """
+        perfiles = list(perfiles)
+        if not perfiles:
+            return []
+
+        pool = self._obtener_pool()
+        experto: List[Optional[Dict[str, Any]]] = [None] * len(perfiles)
+        difuso: List[Optional[Dict[str, Any]]] = [None] * len(perfiles)
+
+        tareas = []
+        for inicio in range(0, len(perfiles), self.tamano_bloque):
+            bloque = perfiles[inicio:inicio + self.tamano_bloque]
+            tareas.append((experto, inicio, _bloque_experto, (bloque,)))
+            tareas.append((difuso, inicio, _bloque_difuso, (bloque, self.metodo)))
+
+        max_en_vuelo = 2 * self.max_workers
+        en_vuelo = {}
+        siguiente = 0
+        while siguiente < len(tareas) or en_vuelo:
+            while siguiente < len(tareas) and len(en_vuelo) < max_en_vuelo:
+                destino, inicio, funcion, argumentos = tareas[siguiente]
+                en_vuelo[pool.submit(funcion, *argumentos)] = (destino, inicio)
+                siguiente += 1
+
+            terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                destino, inicio = en_vuelo.pop(futuro)
+                resultados = futuro.result()
+                destino[inicio:inicio + len(resultados)] = resultados
+
+        return [_combinar(perfil, e, d) for perfil, e, d in zip(perfiles, experto, difuso)]
+
+    def cerrar(self) -> None:
+        """Libera el hilo auxiliar y el pool de procesos"""
+        self._hilo_difuso.shutdown(wait=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+        return False
+
+
+# Funciones de conveniencia para uso directo
+def evaluar_perfil_completo(perfil: Dict[str, float], metodo: str = 'mamdani') -> Dict[str, Any]:
+    """
+    Función de conveniencia para evaluar un perfil con ambos motores
+
+    Args:
+        perfil: Perfil financiero
+        metodo: Método difuso, 'mamdani' o 'tsk'
+
+    Returns:
+        Dict con los resultados combinados
+    """
+    with EvaluadorCombinado(max_workers=1, metodo=metodo) as evaluador:
+        return evaluador.evaluar_perfil_completo(perfil)
+
+
+def evaluar_lote_completo(perfiles: List[Dict[str, float]], max_workers: Optional[int] = None,
+                          metodo: str = 'mamdani', tamano_bloque: int = 64) -> List[Dict[str, Any]]:
+    """
+    Función de conveniencia para evaluar un lote con ambos motores
+
+    Args:
+        perfiles: Lista de perfiles
+        max_workers: Procesos del pool
+        metodo: Método difuso, 'mamdani' o 'tsk'
+        tamano_bloque: Perfiles por bloque
+
+    Returns:
+        list: Resultados combinados en el mismo orden que los perfiles
+    """
+    with EvaluadorCombinado(max_workers=max_workers, metodo=metodo,
+                            tamano_bloque=tamano_bloque) as evaluador:
+        return evaluador.evaluar_lote(perfiles)
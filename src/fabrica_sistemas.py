@@ -0,0 +1,129 @@
+"""
+Fábrica de Sistemas Expertos desde una Imagen Binaria
+=====================================================
+
+Cada SistemaExperto() crea un entorno CLIPS y analiza el texto de sus
+plantillas, del deffacts de la política y de las diez reglas financieras.
+Cuando se crean instancias por petición o por trabajador ese análisis se
+repite sin necesidad.
+
+FabricaSistemas construye una plantilla una sola vez (con la política, las
+reglas adicionales y los mensajes que se le indiquen), la guarda con bsave
+y crea cada instancia nueva con bload sobre un entorno vacío, sin analizar
+texto. CLIPS solo carga imágenes binarias desde fichero, así que la imagen
+se guarda en /dev/shm (memoria) cuando existe y en el directorio temporal
+en otro caso.
+
+Los sistemas creados así no admiten nuevas construcciones (CLIPS no lo
+permite con una imagen binaria cargada): las reglas y la política se fijan
+en la fábrica.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import multiprocessing.util
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from typing import Callable, Dict, Any, Optional
+
+from .sistema_experto import SistemaExperto, MODO_PLANTILLA, LIMITE_SALIDA_POR_DEFECTO
+
+# Directorio en memoria para la imagen binaria, si el sistema lo tiene
+DIRECTORIO_MEMORIA = '/dev/shm'
+
+
+class FabricaSistemas:
+    """
+    Crea instancias de SistemaExperto clonando una plantilla con bload.
+
+    Uso:
+        with FabricaSistemas(politica={'deuda_maxima': 0.35}) as fabrica:
+            sistema = fabrica.crear()
+            sistema.insertar_hechos(ingresos=3000, ahorro=200, ...)
+            sistema.ejecutar_inferencia()
+    """
+
+    def __init__(self, reglas: str = "", mensajes: Optional[Dict[str, str]] = None,
+                 politica: Optional[Dict[str, Any]] = None, directorio: Optional[str] = None):
+        """
+        Construye la plantilla y guarda su imagen binaria
+
+        Args:
+            reglas: Reglas CLIPS adicionales, una por línea como en cargar_reglas
+            mensajes: Textos de los hechos de mensaje de esas reglas
+            politica: Umbrales de la política con guiones bajos, como en configurar_politica
+            directorio: Directorio de la imagen (por defecto /dev/shm o el temporal)
+
+        Raises:
+            ValueError: Si las reglas no se pueden cargar
+        """
+        plantilla = SistemaExperto()
+        if politica:
+            plantilla.configurar_politica(**politica)
+        if (reglas or mensajes) and not plantilla.cargar_reglas(reglas, mensajes=mensajes):
+            raise ValueError("No se pudieron cargar las reglas de la plantilla")
+
+        self.politica = dict(plantilla.politica)
+        self.registro_mensajes = plantilla.registro_mensajes
+        self.textos = plantilla.textos_construcciones()
+
+        if directorio is None and os.path.isdir(DIRECTORIO_MEMORIA):
+            directorio = DIRECTORIO_MEMORIA
+        self._directorio = tempfile.mkdtemp(prefix='fabrica_clips_', dir=directorio)
+        # Una fábrica que no se cierra borra igualmente su imagen al
+        # liberarse o al salir del proceso (en /dev/shm ocuparía RAM)
+        self._borrar_directorio = weakref.finalize(self, shutil.rmtree, self._directorio, True)
+        # Los hijos de multiprocessing terminan con os._exit, sin atexit: allí
+        # se borra con los finalizadores propios de multiprocessing
+        multiprocessing.util.Finalize(self, self._borrar_directorio, exitpriority=0)
+        self.ruta_imagen = os.path.join(self._directorio, 'plantilla.bin')
+        # Con la comprobación dinámica activa bsave guarda también las
+        # restricciones de los slots (y no avisa de que las omite)
+        plantilla.sistema.eval('(set-dynamic-constraint-checking TRUE)')
+        plantilla.sistema.save(self.ruta_imagen, binary=True)
+        self.bytes_imagen = os.path.getsize(self.ruta_imagen)
+        self.creados = 0
+        self._lock = threading.Lock()
+
+    def crear(self, metricas=None, trazador=None, modo_hechos: str = MODO_PLANTILLA,
+              limite_salida: Optional[int] = LIMITE_SALIDA_POR_DEFECTO,
+              callback_salida: Optional[Callable[[str], None]] = None) -> SistemaExperto:
+        """
+        Crea un sistema nuevo e independiente a partir de la imagen
+
+        Los argumentos son los del constructor de SistemaExperto. Puede
+        llamarse desde varios hilos a la vez.
+
+        Returns:
+            SistemaExperto con las construcciones de la plantilla
+        """
+        if self.ruta_imagen is None:
+            raise RuntimeError("La fábrica está cerrada")
+        sistema = SistemaExperto.desde_imagen(
+            self.ruta_imagen, politica=self.politica, registro_mensajes=self.registro_mensajes,
+            textos=self.textos, metricas=metricas, trazador=trazador, modo_hechos=modo_hechos,
+            limite_salida=limite_salida, callback_salida=callback_salida
+        )
+        with self._lock:
+            self.creados += 1
+        return sistema
+
+    def __call__(self) -> SistemaExperto:
+        """Permite usar la fábrica donde se espera un callable sin argumentos"""
+        return self.crear()
+
+    def cerrar(self) -> None:
+        """Borra la imagen binaria; los sistemas ya creados siguen funcionando"""
+        if self.ruta_imagen is not None:
+            self._borrar_directorio()
+            self.ruta_imagen = None
+
+    def __enter__(self) -> 'FabricaSistemas':
+        return self
+
+    def __exit__(self, *excepcion) -> None:
+        self.cerrar()
@@ -15,11 +15,23 @@ Autor: Sistema Experto Financiero
 Fecha: 2024
 """
 
+from time import perf_counter
+
 import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 from typing import Dict, Tuple, Any
-import matplotlib.pyplot as plt
+
+from .configuracion_difusa import (UNIVERSO_AHORRO, UNIVERSO_RIESGO, UNIVERSO_INVERSION,
+                                   TERMINOS_AHORRO, TERMINOS_RIESGO, TERMINOS_INVERSION,
+                                   SINGLETONES_TSK, ETIQUETAS_INVERSION, REGLAS_DIFUSAS)
+
+
+def _funcion_pertenencia(universo: np.ndarray, puntos: tuple) -> np.ndarray:
+    """trimf o trapmf de scikit-fuzzy según el número de puntos de quiebre"""
+    if len(puntos) == 3:
+        return fuzz.trimf(universo, list(puntos))
+    return fuzz.trapmf(universo, list(puntos))
 
 
 class SistemaDifusoFinanciero:
@@ -36,8 +48,25 @@ class SistemaDifusoFinanciero:
     Implementa tanto el método de inferencia Mamdani como TSK.
     """
     
-    def __init__(self):
-        """Inicializa el sistema difuso financiero"""
+    def __init__(self, metricas=None, trazador=None, ruta_escalar: bool = False):
+        """
+        Inicializa el sistema difuso financiero
+        
+        Args:
+            metricas: RegistroMetricas opcional para instrumentar compute()
+            trazador: TrazadorMuestreo opcional para registrar pertenencias y activaciones
+            ruta_escalar: Evaluar con EvaluadorDifusoEscalar (floats de Python, sin
+                          arrays) en lugar de los simuladores de scikit-fuzzy
+        """
+        self.metricas = metricas
+        self.trazador = trazador
+        self.escalar = None
+        if ruta_escalar:
+            from .difuso_escalar import EvaluadorDifusoEscalar
+            self.escalar = EvaluadorDifusoEscalar()
+        # Última (ahorro, riesgo) evaluada y su método, que se marcan en el gráfico de salida
+        self._ultima_entrada = None
+        self._ultimo_metodo = 'mamdani'
         self._configurar_variables()
         self._configurar_reglas()
         self._crear_sistemas_control()
@@ -56,46 +85,26 @@ class SistemaDifusoFinanciero:
         
         # Variable de entrada: Ahorro mensual (0-1000 USD)
         # Conjuntos difusos triangulares según especificación
-        self.ahorro_mensual = ctrl.Antecedent(np.arange(0, 1001, 1), 'ahorro_mensual')
-        
-        # Definir conjuntos difusos triangulares
-        # Bajo: (0, 0, 400) - Triángulo que va de 0 a 400
-        self.ahorro_mensual['bajo'] = fuzz.trimf(self.ahorro_mensual.universe, [0, 0, 400])
+        self.ahorro_mensual = ctrl.Antecedent(np.arange(*UNIVERSO_AHORRO), 'ahorro_mensual')
         
-        # Medio: (200, 500, 800) - Triángulo centrado en 500
-        self.ahorro_mensual['medio'] = fuzz.trimf(self.ahorro_mensual.universe, [200, 500, 800])
-        
-        # Alto: (600, 1000, 1000) - Triángulo que va de 600 a 1000
-        self.ahorro_mensual['alto'] = fuzz.trimf(self.ahorro_mensual.universe, [600, 1000, 1000])
+        # Bajo: (0, 0, 400), Medio: (200, 500, 800), Alto: (600, 1000, 1000)
+        for nombre, puntos in TERMINOS_AHORRO.items():
+            self.ahorro_mensual[nombre] = _funcion_pertenencia(self.ahorro_mensual.universe, puntos)
         
         # Variable de entrada: Riesgo de inversión (0-10)
-        # Conjuntos difusos gaussianos según especificación
-        self.riesgo_inversion = ctrl.Antecedent(np.arange(0, 11, 0.1), 'riesgo_inversion')
+        self.riesgo_inversion = ctrl.Antecedent(np.arange(*UNIVERSO_RIESGO), 'riesgo_inversion')
         
-        # Definir conjuntos difusos trapezoidales (cuadrados)
-        # Bajo: empieza en 0, máximo hasta 3
-        self.riesgo_inversion['bajo'] = fuzz.trapmf(self.riesgo_inversion.universe, [0, 0, 2, 3])
-
-        # Moderado: centrado en 5, ancho entre 2 y 8
-        self.riesgo_inversion['moderado'] = fuzz.trapmf(self.riesgo_inversion.universe, [2, 4, 6, 8])
-
+        # Conjuntos difusos trapezoidales (cuadrados)
+        # Bajo: empieza en 0, máximo hasta 3; Moderado: centrado en 5, ancho entre 2 y 8;
         # Alto: empieza desde 7 y llega a 10
-        self.riesgo_inversion['alto'] = fuzz.trapmf(self.riesgo_inversion.universe, [7, 8, 10, 10])
-
+        for nombre, puntos in TERMINOS_RIESGO.items():
+            self.riesgo_inversion[nombre] = _funcion_pertenencia(self.riesgo_inversion.universe, puntos)
         
         # Variable de salida: Nivel de inversión (0-50%)
-        # Conjuntos difusos triangulares según especificación
-        self.nivel_inversion = ctrl.Consequent(np.arange(0, 51, 0.1), 'nivel_inversion')
-        
-        # Definir conjuntos difusos triangulares
-        # Conservadora: (0, 10, 20) - Triángulo centrado en 10%
-        self.nivel_inversion['conservadora'] = fuzz.trimf(self.nivel_inversion.universe, [0, 10, 20])
-        
-        # Moderada: (15, 25, 35) - Triángulo centrado en 25%
-        self.nivel_inversion['moderada'] = fuzz.trimf(self.nivel_inversion.universe, [15, 25, 35])
-        
-        # Agresiva: (30, 40, 50) - Triángulo centrado en 40%
-        self.nivel_inversion['agresiva'] = fuzz.trimf(self.nivel_inversion.universe, [30, 40, 50])
+        # Conjuntos difusos triangulares centrados en 10%, 25% y 40%
+        self.nivel_inversion = ctrl.Consequent(np.arange(*UNIVERSO_INVERSION), 'nivel_inversion')
+        for nombre, puntos in TERMINOS_INVERSION.items():
+            self.nivel_inversion[nombre] = _funcion_pertenencia(self.nivel_inversion.universe, puntos)
     
     def _configurar_reglas(self):
         """
@@ -151,21 +160,19 @@ class SistemaDifusoFinanciero:
         """
         
         # Sistema Mamdani: Conjuntos difusos de salida
-        self.sistema_mamdani = ctrl.ControlSystem([
-            self.regla1, self.regla2, self.regla3, self.regla4, self.regla5
-        ])
+        self.reglas_mamdani = [self.regla1, self.regla2, self.regla3, self.regla4, self.regla5]
+        self.sistema_mamdani = ctrl.ControlSystem(self.reglas_mamdani)
         
         # Simulador para Mamdani
         self.simulador_mamdani = ctrl.ControlSystemSimulation(self.sistema_mamdani)
         
         # Sistema TSK: Singletones como salida
         # Definir singletones en el valor máximo de cada conjunto de salida
-        self.nivel_inversion_tsk = ctrl.Consequent(np.arange(0, 51, 0.1), 'nivel_inversion_tsk')
+        self.nivel_inversion_tsk = ctrl.Consequent(np.arange(*UNIVERSO_INVERSION), 'nivel_inversion_tsk')
         
         # Singletones: valores fijos en los picos de los conjuntos difusos
-        self.nivel_inversion_tsk['conservadora'] = fuzz.trimf(self.nivel_inversion_tsk.universe, [10, 10, 10])
-        self.nivel_inversion_tsk['moderada'] = fuzz.trimf(self.nivel_inversion_tsk.universe, [25, 25, 25])
-        self.nivel_inversion_tsk['agresiva'] = fuzz.trimf(self.nivel_inversion_tsk.universe, [40, 40, 40])
+        for nombre, pico in SINGLETONES_TSK.items():
+            self.nivel_inversion_tsk[nombre] = fuzz.trimf(self.nivel_inversion_tsk.universe, [pico, pico, pico])
         
         # Reglas TSK con singletones
         self.regla1_tsk = ctrl.Rule(
@@ -195,9 +202,8 @@ class SistemaDifusoFinanciero:
         )
         
         # Sistema TSK
-        self.sistema_tsk = ctrl.ControlSystem([
-            self.regla1_tsk, self.regla2_tsk, self.regla3_tsk, self.regla4_tsk, self.regla5_tsk
-        ])
+        self.reglas_tsk = [self.regla1_tsk, self.regla2_tsk, self.regla3_tsk, self.regla4_tsk, self.regla5_tsk]
+        self.sistema_tsk = ctrl.ControlSystem(self.reglas_tsk)
         
         # Simulador para TSK
         self.simulador_tsk = ctrl.ControlSystemSimulation(self.sistema_tsk)
@@ -220,20 +226,31 @@ class SistemaDifusoFinanciero:
             if not (0 <= riesgo <= 10):
                 raise ValueError("Riesgo debe estar entre 0 y 10")
             
-            # Configurar entradas
-            self.simulador_mamdani.input['ahorro_mensual'] = ahorro
-            self.simulador_mamdani.input['riesgo_inversion'] = riesgo
-            
-            # Ejecutar inferencia
-            self.simulador_mamdani.compute()
-            
-            # Obtener resultado
-            resultado_numerico = self.simulador_mamdani.output['nivel_inversion']
+            metricas = self.metricas
+            inicio = perf_counter() if metricas is not None else 0.0
+            if self.escalar is not None:
+                # Ruta escalar: pertenencias analíticas, sin arrays de NumPy
+                resultado_numerico = self.escalar.mamdani(ahorro, riesgo)
+                fase = 'escalar_mamdani'
+            else:
+                # Configurar entradas
+                self.simulador_mamdani.input['ahorro_mensual'] = ahorro
+                self.simulador_mamdani.input['riesgo_inversion'] = riesgo
+                
+                # Ejecutar inferencia y obtener resultado
+                self.simulador_mamdani.compute()
+                resultado_numerico = self.simulador_mamdani.output['nivel_inversion']
+                fase = 'compute_mamdani'
+            self._ultima_entrada = (ahorro, riesgo)
+            self._ultimo_metodo = 'mamdani'
+            if metricas is not None:
+                metricas.observar('fase_segundos', perf_counter() - inicio, motor='difuso', fase=fase)
+                metricas.incrementar('llamadas_total', motor='difuso', operacion='mamdani')
             
             # Determinar etiqueta lingüística
             etiqueta = self._determinar_etiqueta(resultado_numerico)
             
-            return {
+            resultado = {
                 'metodo': 'Difuso',
                 'ahorro_entrada': ahorro,
                 'riesgo_entrada': riesgo,
@@ -242,7 +259,14 @@ class SistemaDifusoFinanciero:
                 'unidad': '%'
             }
             
+            if self.trazador is not None:
+                self._trazar('mamdani', self.simulador_mamdani, self.reglas_mamdani, resultado)
+            
+            return resultado
+            
         except Exception as e:
+            if self.metricas is not None:
+                self.metricas.incrementar('errores_total', motor='difuso', operacion='mamdani')
             return {
                 'error': f"Error en evaluación Mamdani: {str(e)}",
                 'metodo': 'Mamdani'
@@ -266,20 +290,31 @@ class SistemaDifusoFinanciero:
             if not (0 <= riesgo <= 10):
                 raise ValueError("Riesgo debe estar entre 0 y 10")
             
-            # Configurar entradas
-            self.simulador_tsk.input['ahorro_mensual'] = ahorro
-            self.simulador_tsk.input['riesgo_inversion'] = riesgo
-            
-            # Ejecutar inferencia
-            self.simulador_tsk.compute()
-            
-            # Obtener resultado
-            resultado_numerico = self.simulador_tsk.output['nivel_inversion_tsk']
+            metricas = self.metricas
+            inicio = perf_counter() if metricas is not None else 0.0
+            if self.escalar is not None:
+                # Ruta escalar: pertenencias analíticas, sin arrays de NumPy
+                resultado_numerico = self.escalar.tsk(ahorro, riesgo)
+                fase = 'escalar_tsk'
+            else:
+                # Configurar entradas
+                self.simulador_tsk.input['ahorro_mensual'] = ahorro
+                self.simulador_tsk.input['riesgo_inversion'] = riesgo
+                
+                # Ejecutar inferencia y obtener resultado
+                self.simulador_tsk.compute()
+                resultado_numerico = self.simulador_tsk.output['nivel_inversion_tsk']
+                fase = 'compute_tsk'
+            self._ultima_entrada = (ahorro, riesgo)
+            self._ultimo_metodo = 'tsk'
+            if metricas is not None:
+                metricas.observar('fase_segundos', perf_counter() - inicio, motor='difuso', fase=fase)
+                metricas.incrementar('llamadas_total', motor='difuso', operacion='tsk')
             
             # Determinar etiqueta lingüística
             etiqueta = self._determinar_etiqueta(resultado_numerico)
             
-            return {
+            resultado = {
                 'metodo': 'TSK',
                 'ahorro_entrada': ahorro,
                 'riesgo_entrada': riesgo,
@@ -288,12 +323,64 @@ class SistemaDifusoFinanciero:
                 'unidad': '%'
             }
             
+            if self.trazador is not None:
+                self._trazar('tsk', self.simulador_tsk, self.reglas_tsk, resultado)
+            
+            return resultado
+            
         except Exception as e:
+            if self.metricas is not None:
+                self.metricas.incrementar('errores_total', motor='difuso', operacion='tsk')
             return {
                 'error': f"Error en evaluación TSK: {str(e)}",
                 'metodo': 'TSK'
             }
     
+    def _trazar(self, metodo: str, simulador, reglas: list, resultado: Dict[str, Any]) -> None:
+        """
+        Registra pertenencias y activaciones de la última evaluación si se muestrea
+        
+        Args:
+            metodo: 'mamdani' o 'tsk'
+            simulador: Simulador que acaba de ejecutar compute()
+            reglas: Reglas del sistema en orden (R1..Rn)
+            resultado: Resultado devuelto al llamador
+        """
+        entradas = {
+            'ahorro_mensual': resultado['ahorro_entrada'],
+            'riesgo_inversion': resultado['riesgo_entrada']
+        }
+        if not self.trazador.debe_muestrear({'motor': 'difuso', 'metodo': metodo, 'entradas': entradas}):
+            return
+        
+        if self.escalar is not None:
+            # La ruta escalar no pasa por el simulador: se recalculan analíticamente
+            detalle = self.escalar.detalle(resultado['ahorro_entrada'], resultado['riesgo_entrada'])
+            pertenencias, activaciones = detalle['pertenencias'], detalle['activaciones']
+        else:
+            # Grados de pertenencia calculados por scikit-fuzzy durante la fuzzificación
+            pertenencias = {
+                variable.label: {
+                    nombre: float(termino.membership_value[simulador])
+                    for nombre, termino in variable.terms.items()
+                }
+                for variable in (self.ahorro_mensual, self.riesgo_inversion)
+            }
+            activaciones = {
+                f"R{i}": float(regla.aggregate_firing[simulador])
+                for i, regla in enumerate(reglas, 1)
+            }
+
+        self.trazador.registrar({
+            'motor': 'difuso',
+            'metodo': metodo,
+            'entradas': entradas,
+            'pertenencias': pertenencias,
+            'activaciones': activaciones,
+            'nivel_inversion': float(resultado['nivel_inversion']),
+            'etiqueta': resultado['etiqueta']
+        })
+    
     def _determinar_etiqueta(self, valor: float) -> str:
         """
         Determina la etiqueta lingüística basada en el valor numérico.
@@ -304,12 +391,10 @@ class SistemaDifusoFinanciero:
         Returns:
             String con la etiqueta lingüística
         """
-        if valor <= 20:
-            return "Conservadora"
-        elif valor <= 35:
-            return "Moderada"
-        else:
-            return "Agresiva"
+        for limite, etiqueta in ETIQUETAS_INVERSION:
+            if valor <= limite:
+                return etiqueta
+        return ETIQUETAS_INVERSION[-1][1]
     
     def evaluar_ambos_metodos(self, ahorro: float, riesgo: float) -> Dict[str, Any]:
         """
@@ -340,36 +425,35 @@ class SistemaDifusoFinanciero:
             }
         }
     
-    def visualizar_conjuntos_difusos(self, guardar_imagen: bool = False) -> None:
+    def visualizar_conjuntos_difusos(self, guardar_imagen: bool = False,
+                                     ruta: str = 'conjuntos_difusos_financieros.png',
+                                     formato: str = 'png', dpi: int = 100) -> bytes:
         """
-        Visualiza los conjuntos difusos del sistema.
+        Genera la figura de los conjuntos difusos del sistema.
+        
+        La figura se dibuja fuera de pantalla (Agg, en un proceso trabajador)
+        y se guarda en la caché de graficos_difusos. Si ya hubo una evaluación,
+        el gráfico de salida muestra su resultado: la salida agregada y su
+        centroide (Mamdani) o los singletones activados y su media (TSK).
         
         Args:
-            guardar_imagen: Si es True, guarda la imagen en lugar de mostrarla
-        """
-        try:
-            # Crear figura con subplots
-            
-            # Ahorro mensual
-            self.ahorro_mensual.view()
-            
-            # Riesgo de inversión
-            self.riesgo_inversion.view()
+            guardar_imagen: Si es True, escribe la imagen también en `ruta`
+            ruta: Fichero de destino cuando guardar_imagen es True
+            formato: 'png' o 'svg'
+            dpi: Resolución de la imagen
             
-            # Nivel de inversión
-            #self.nivel_inversion.view(ax=axes[2])
-            self.nivel_inversion.view(sim=self.simulador_mamdani)
-            
-            plt.tight_layout()
-            
-            if guardar_imagen:
-                plt.savefig('conjuntos_difusos_financieros.png', dpi=300, bbox_inches='tight')
-                print("Imagen guardada como 'conjuntos_difusos_financieros.png'")
-            else:
-                plt.show()
-                
-        except Exception as e:
-            print(f"Error al visualizar conjuntos difusos: {e}")
+        Returns:
+            Bytes de la imagen
+        """
+        from .graficos_difusos import renderizador_compartido
+        
+        imagen = renderizador_compartido().renderizar(self._ultima_entrada, formato, dpi,
+                                                     self._ultimo_metodo)
+        if guardar_imagen:
+            with open(ruta, 'wb') as archivo:
+                archivo.write(imagen)
+            print(f"Imagen guardada como '{ruta}'")
+        return imagen
     
     def obtener_info_sistema(self) -> Dict[str, Any]:
         """
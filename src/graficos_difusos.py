@@ -0,0 +1,345 @@
+"""
+Gráficos de Conjuntos Difusos Fuera de Pantalla
+===============================================
+
+Este módulo dibuja los conjuntos difusos del sistema financiero sin pasar
+por el estado global de pyplot ni por ventanas interactivas:
+
+- Las figuras se crean con matplotlib.figure.Figure sobre un lienzo Agg y
+  se devuelven como bytes PNG o SVG, así que funcionan en servidores sin
+  pantalla y en cualquier hilo
+- El dibujo se hace en un proceso trabajador (arrancado con 'spawn', sin
+  heredar el estado gráfico ni tkinter del proceso principal)
+- Cada figura se guarda en una caché en disco cuyo nombre es el hash de la
+  configuración de pertenencias, de la entrada evaluada y su método (solo
+  afectan al gráfico de salida), del formato y de la resolución; las
+  peticiones repetidas devuelven los bytes guardados sin volver a dibujar
+- La entrada se redondea a DECIMALES_ENTRADA antes de calcular la clave, y
+  la caché guarda como mucho MAX_FIGURAS figuras: al superarlas se borran
+  las menos usadas recientemente (la fecha de modificación se actualiza en
+  cada acierto)
+- Las pertenencias, las fuerzas de las reglas y las salidas Mamdani y TSK
+  se calculan con difuso_escalar, igual que en la evaluación
+
+La interfaz gráfica y los ejemplos de línea de comandos obtienen las
+figuras a través de SistemaDifusoFinanciero.visualizar_conjuntos_difusos,
+que usa el renderizador compartido de este módulo.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .configuracion_difusa import (UNIVERSO_AHORRO, UNIVERSO_RIESGO, UNIVERSO_INVERSION,
+                                   TERMINOS_AHORRO, TERMINOS_RIESGO, TERMINOS_INVERSION,
+                                   SINGLETONES_TSK, REGLAS_DIFUSAS)
+from .difuso_escalar import EvaluadorDifusoEscalar, pertenencia, trapecio
+
+# Cambiar al modificar el dibujo, para no servir figuras antiguas de la caché
+VERSION_DIBUJO = 2
+
+FORMATOS = ('png', 'svg')
+
+METODOS = ('mamdani', 'tsk')
+
+# Decimales de la entrada en la clave (y en el dibujo): evita una figura por cada float
+DECIMALES_ENTRADA = 2
+
+# Figuras guardadas como máximo en el directorio de la caché
+MAX_FIGURAS = 256
+
+DIRECTORIO_CACHE = os.path.join(tempfile.gettempdir(), 'sistema_experto_graficos')
+
+
+def configuracion_financiera() -> Dict[str, Any]:
+    """Configuración de pertenencias y reglas del sistema difuso financiero"""
+    return {
+        'variables': [
+            {'nombre': 'ahorro_mensual', 'titulo': 'Ahorro mensual (USD)',
+             'universo': list(UNIVERSO_AHORRO), 'terminos': dict(TERMINOS_AHORRO)},
+            {'nombre': 'riesgo_inversion', 'titulo': 'Riesgo de inversión (0-10)',
+             'universo': list(UNIVERSO_RIESGO), 'terminos': dict(TERMINOS_RIESGO)},
+        ],
+        'salida': {'nombre': 'nivel_inversion', 'titulo': 'Nivel de inversión (%)',
+                   'universo': list(UNIVERSO_INVERSION), 'terminos': dict(TERMINOS_INVERSION),
+                   'singletones': dict(SINGLETONES_TSK)},
+        'reglas': [list(regla) for regla in REGLAS_DIFUSAS],
+    }
+
+
+def redondear_entrada(entrada: Optional[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """(ahorro, riesgo) redondeados a DECIMALES_ENTRADA, o None"""
+    if entrada is None:
+        return None
+    return round(float(entrada[0]), DECIMALES_ENTRADA), round(float(entrada[1]), DECIMALES_ENTRADA)
+
+
+def clave_figura(configuracion: Dict[str, Any], entrada: Optional[Tuple[float, float]] = None,
+                 formato: str = 'png', dpi: int = 100, metodo: str = 'mamdani') -> str:
+    """
+    Hash SHA-256 que identifica una figura en la caché
+
+    Args:
+        configuracion: Configuración de pertenencias y reglas
+        entrada: (ahorro, riesgo) evaluado en el gráfico de salida, o None
+                 (se redondea a DECIMALES_ENTRADA)
+        formato: 'png' o 'svg'
+        dpi: Resolución de la imagen
+        metodo: 'mamdani' o 'tsk', el método con que se evaluó la entrada
+
+    Returns:
+        Cadena hexadecimal
+    """
+    entrada = redondear_entrada(entrada)
+    contenido = {
+        'version': VERSION_DIBUJO,
+        'configuracion': configuracion,
+        'entrada': None if entrada is None else list(entrada),
+        # Sin entrada el método no cambia el dibujo
+        'metodo': None if entrada is None else metodo,
+        'formato': formato,
+        'dpi': dpi,
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _curva(universo, puntos):
+    """Pertenencia de cada punto del universo a un conjunto (trimf o trapmf)"""
+    a, b, c, d = trapecio(puntos)
+    return np.array([pertenencia(float(x), a, b, c, d) for x in universo])
+
+
+def _evaluador(configuracion: Dict[str, Any]) -> EvaluadorDifusoEscalar:
+    """Evaluador escalar con las pertenencias y reglas de la configuración"""
+    ahorro, riesgo = configuracion['variables']
+    salida = configuracion['salida']
+    return EvaluadorDifusoEscalar(ahorro['terminos'], riesgo['terminos'], salida['terminos'],
+                                  salida.get('singletones', SINGLETONES_TSK),
+                                  tuple(tuple(regla) for regla in configuracion['reglas']))
+
+
+def dibujar_conjuntos(configuracion: Dict[str, Any], entrada: Optional[Tuple[float, float]] = None,
+                      formato: str = 'png', dpi: int = 100, metodo: str = 'mamdani') -> bytes:
+    """
+    Dibuja las variables de entrada y de salida en una figura Agg
+
+    Se ejecuta en el proceso trabajador, pero no depende de él: puede
+    llamarse directamente desde cualquier hilo. Con una entrada, el gráfico
+    de salida muestra la salida agregada y su centroide (Mamdani) o los
+    singletones recortados a su fuerza y su media ponderada (TSK).
+
+    Returns:
+        Bytes de la imagen en el formato pedido
+    """
+    # matplotlib solo se importa al dibujar (en el proceso trabajador)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    variables = configuracion['variables'] + [configuracion['salida']]
+    figura = Figure(figsize=(8, 3 * len(variables)), dpi=dpi)
+    FigureCanvasAgg(figura)
+    ejes = figura.subplots(len(variables), 1)
+
+    for eje, variable in zip(ejes, variables):
+        universo = np.arange(*variable['universo'])
+        for termino, puntos in variable['terminos'].items():
+            eje.plot(universo, _curva(universo, puntos), linewidth=1.5, label=termino)
+        eje.set_title(variable['titulo'])
+        eje.set_ylim(-0.05, 1.05)
+        eje.set_ylabel('Pertenencia')
+        eje.legend(loc='upper right')
+
+    if entrada is not None:
+        for eje, valor in zip(ejes, entrada):
+            eje.axvline(valor, color='black', linestyle='--', linewidth=1)
+        evaluador = _evaluador(configuracion)
+        fuerzas = evaluador.fuerzas(*entrada)
+        salida = configuracion['salida']
+        if metodo == 'tsk':
+            singletones = [salida.get('singletones', SINGLETONES_TSK)[n] for n in evaluador.nombres_salida]
+            ejes[-1].vlines(singletones, 0, fuerzas, color='tab:orange', linewidth=4)
+            calcular = evaluador.tsk
+        else:
+            universo = np.arange(*salida['universo'])
+            agregado = np.zeros_like(universo, dtype=float)
+            for puntos, fuerza in zip(salida['terminos'].values(), fuerzas):
+                agregado = np.maximum(agregado, np.minimum(fuerza, _curva(universo, puntos)))
+            ejes[-1].fill_between(universo, agregado, color='tab:orange', alpha=0.5)
+            calcular = evaluador.mamdani
+        if any(fuerzas):
+            ejes[-1].axvline(calcular(*entrada), color='black', linewidth=2)
+
+    figura.tight_layout()
+    salida = io.BytesIO()
+    figura.savefig(salida, format=formato)
+    return salida.getvalue()
+
+
+class RenderizadorConjuntos:
+    """
+    Renderiza los gráficos de conjuntos difusos con caché en disco.
+
+    Uso:
+        renderizador = RenderizadorConjuntos()
+        png = renderizador.renderizar(entrada=(700, 3))
+        svg = renderizador.renderizar(formato='svg')
+
+    Es seguro usarlo desde varios hilos: las peticiones simultáneas de la
+    misma figura comparten un único dibujo.
+    """
+
+    def __init__(self, directorio: str = DIRECTORIO_CACHE, configuracion: Optional[Dict[str, Any]] = None,
+                 en_proceso: bool = True, max_figuras: int = MAX_FIGURAS):
+        """
+        Args:
+            directorio: Directorio de la caché en disco
+            configuracion: Configuración de pertenencias (por defecto la del sistema financiero)
+            en_proceso: Dibujar en un proceso trabajador; si es False se dibuja en el hilo llamante
+            max_figuras: Figuras guardadas como máximo; al superarlas se borran las menos usadas
+        """
+        if max_figuras < 1:
+            raise ValueError("max_figuras debe ser al menos 1")
+        self.directorio = directorio
+        self.configuracion = configuracion if configuracion is not None else configuracion_financiera()
+        self.en_proceso = en_proceso
+        self.max_figuras = max_figuras
+        self.aciertos = 0
+        self.fallos = 0
+        self._ejecutor = None
+        self._pendientes: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def ruta(self, clave: str, formato: str) -> str:
+        """Ruta del fichero de caché de una figura"""
+        return os.path.join(self.directorio, f"{clave}.{formato}")
+
+    def _trabajador(self) -> ProcessPoolExecutor:
+        """Proceso trabajador, creado al primer dibujo"""
+        if self._ejecutor is None:
+            self._ejecutor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        return self._ejecutor
+
+    def _podar(self) -> None:
+        """Borra las figuras menos usadas recientemente por encima de max_figuras"""
+        figuras = []
+        for nombre in os.listdir(self.directorio):
+            if os.path.splitext(nombre)[1].lstrip('.') in FORMATOS:
+                ruta = os.path.join(self.directorio, nombre)
+                try:
+                    figuras.append((os.path.getmtime(ruta), ruta))
+                except FileNotFoundError:
+                    pass
+        figuras.sort()
+        for _, ruta in figuras[:len(figuras) - self.max_figuras]:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                # Otro proceso que comparte la caché la borró antes
+                pass
+
+    def renderizar(self, entrada: Optional[Tuple[float, float]] = None, formato: str = 'png',
+                   dpi: int = 100, metodo: str = 'mamdani') -> bytes:
+        """
+        Bytes de la figura, desde la caché o dibujándola
+
+        Args:
+            entrada: (ahorro, riesgo) a marcar, con el resultado del método en
+                     el gráfico de salida; se redondea a DECIMALES_ENTRADA
+            formato: 'png' o 'svg'
+            dpi: Resolución de la imagen
+            metodo: 'mamdani' o 'tsk'
+
+        Returns:
+            Bytes de la imagen
+        """
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato!r}")
+        if metodo not in METODOS:
+            raise ValueError(f"Método no soportado: {metodo!r}")
+        entrada = redondear_entrada(entrada)
+        clave = clave_figura(self.configuracion, entrada, formato, dpi, metodo)
+        ruta = self.ruta(clave, formato)
+
+        with self._lock:
+            try:
+                with open(ruta, 'rb') as archivo:
+                    datos = archivo.read()
+                # La fecha de modificación hace de marca de último uso para _podar
+                os.utime(ruta)
+                self.aciertos += 1
+                return datos
+            except FileNotFoundError:
+                pass
+            futuro = self._pendientes.get(clave)
+            propietario = futuro is None
+            if propietario:
+                self.fallos += 1
+                futuro = Future()
+                self._pendientes[clave] = futuro
+
+        if not propietario:
+            return futuro.result()
+
+        try:
+            if self.en_proceso:
+                datos = self._trabajador().submit(dibujar_conjuntos, self.configuracion, entrada,
+                                                  formato, dpi, metodo).result()
+            else:
+                datos = dibujar_conjuntos(self.configuracion, entrada, formato, dpi, metodo)
+            # Escritura atómica: otro proceso nunca lee un fichero a medias
+            descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+            with os.fdopen(descriptor, 'wb') as archivo:
+                archivo.write(datos)
+            os.replace(temporal, ruta)
+            self._podar()
+            futuro.set_result(datos)
+            return datos
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pendientes.pop(clave, None)
+
+    def guardar(self, ruta: str, entrada: Optional[Tuple[float, float]] = None, dpi: int = 100,
+                metodo: str = 'mamdani') -> str:
+        """Escribe la figura en un fichero; el formato se toma de la extensión"""
+        formato = os.path.splitext(ruta)[1].lstrip('.').lower() or 'png'
+        with open(ruta, 'wb') as archivo:
+            archivo.write(self.renderizar(entrada, formato, dpi, metodo))
+        return ruta
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Aciertos y fallos de la caché"""
+        return {'aciertos': self.aciertos, 'fallos': self.fallos}
+
+    def cerrar(self) -> None:
+        """Detiene el proceso trabajador"""
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown()
+            self._ejecutor = None
+
+
+_renderizador_compartido = None
+_lock_compartido = threading.Lock()
+
+
+def renderizador_compartido() -> RenderizadorConjuntos:
+    """Renderizador común del proceso (un solo trabajador y una sola caché)"""
+    global _renderizador_compartido
+    with _lock_compartido:
+        if _renderizador_compartido is None:
+            _renderizador_compartido = RenderizadorConjuntos()
+        return _renderizador_compartido
@@ -4,8 +4,22 @@ Interfaz gráfica del Sistema Experto CLIPS
 
 Este paquete contiene la interfaz gráfica para el sistema experto
 de finanzas personales.
+
+main_window (y con él tkinter) solo se importa al usar SistemaFinancieroGUI
+o main(): importar el paquete no carga ninguna dependencia gráfica.
 """
 
-from .main_window import SistemaFinancieroGUI
+__all__ = ['SistemaFinancieroGUI', 'main']
+
+
+def main():
+    """Punto de entrada de la interfaz gráfica"""
+    from .main_window import main as iniciar
+    return iniciar()
+
 
-__all__ = ['SistemaFinancieroGUI']
+def __getattr__(nombre):
+    if nombre == 'SistemaFinancieroGUI':
+        from .main_window import SistemaFinancieroGUI
+        return SistemaFinancieroGUI
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
@@ -1,7 +1,11 @@
+import base64
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-from sistema_experto import SistemaExperto
-from fuzzy_system import SistemaDifusoFinanciero
+
+from ..sistema_experto import SistemaExperto
+from ..fuzzy_system import SistemaDifusoFinanciero
+from ..superficie_difusa import SuperficieDifusa
 
 class SistemaFinancieroGUI:
     """Interfaz gráfica principal que integra el sistema experto CLIPS y el sistema difuso"""
@@ -13,10 +17,17 @@ class SistemaFinancieroGUI:
         
         # Crear instancias de ambos sistemas
         self.sistema_experto = SistemaExperto()
-        self.sistema_difuso = SistemaDifusoFinanciero()
+        self.sistema_difuso = SistemaDifusoFinanciero(ruta_escalar=True)
+        
+        # Superficie precalculada para el modo en tiempo real (se calcula en segundo plano)
+        self.superficie_difusa = SuperficieDifusa(self.sistema_difuso)
+        self._slider_pendiente = None
         
         # Configurar interfaz con pestañas
         self._crear_interfaz()
+        
+        threading.Thread(target=self.superficie_difusa.precalcular, daemon=True).start()
+        self._programar_actualizacion_sliders()
     
     def _crear_interfaz(self):
         """Crea la interfaz gráfica con pestañas"""
@@ -151,6 +162,9 @@ class SistemaFinancieroGUI:
                                    command=self._visualizar_conjuntos)
         btn_visualizar.pack(pady=10)
         
+        # Modo en tiempo real con deslizadores
+        self._crear_modo_tiempo_real(frame_inputs)
+        
         # Frame derecho (resultados)
         frame_output = ttk.LabelFrame(content_frame, text="📈 Resultados del Sistema Difuso", padding="10")
         frame_output.pack(side="right", fill="both", expand=True)
@@ -191,6 +205,64 @@ class SistemaFinancieroGUI:
         self.text_resultado_difuso.insert(tk.END, info_text)
         self.text_resultado_difuso.config(state="disabled")
     
+    def _crear_modo_tiempo_real(self, parent):
+        """Crea los deslizadores que actualizan el nivel de inversión en vivo"""
+        frame_sliders = ttk.LabelFrame(parent, text="🎚️ Modo en tiempo real", padding="10")
+        frame_sliders.pack(fill="x", pady=(10, 0))
+        
+        self.var_slider_ahorro = tk.DoubleVar(value=700)
+        self.var_slider_riesgo = tk.DoubleVar(value=3)
+        
+        ttk.Label(frame_sliders, text="💰 Ahorro mensual:").pack(anchor="w")
+        self.slider_ahorro = ttk.Scale(frame_sliders, from_=0, to=1000, orient="horizontal",
+                                       variable=self.var_slider_ahorro,
+                                       command=self._programar_actualizacion_sliders)
+        self.slider_ahorro.pack(fill="x", pady=(0, 5))
+        
+        ttk.Label(frame_sliders, text="⚠️ Riesgo de inversión:").pack(anchor="w")
+        self.slider_riesgo = ttk.Scale(frame_sliders, from_=0, to=10, orient="horizontal",
+                                       variable=self.var_slider_riesgo,
+                                       command=self._programar_actualizacion_sliders)
+        self.slider_riesgo.pack(fill="x", pady=(0, 5))
+        
+        self.label_tiempo_real = ttk.Label(frame_sliders, text="⏳ Precalculando superficie...",
+                                           font=("Arial", 10, "bold"))
+        self.label_tiempo_real.pack(anchor="w", pady=(5, 0))
+    
+    def _programar_actualizacion_sliders(self, _valor=None):
+        """Agrupa los eventos de movimiento: solo se procesa el último tras una breve pausa"""
+        if self._slider_pendiente is not None:
+            self.root.after_cancel(self._slider_pendiente)
+        self._slider_pendiente = self.root.after(30, self._actualizar_desde_sliders)
+    
+    def _actualizar_desde_sliders(self):
+        """Muestra el nivel de inversión servido desde la superficie precalculada"""
+        self._slider_pendiente = None
+        
+        if not self.superficie_difusa.lista:
+            # Reintentar cuando termine el precálculo en segundo plano
+            self._slider_pendiente = self.root.after(100, self._actualizar_desde_sliders)
+            return
+        
+        ahorro = round(self.var_slider_ahorro.get())
+        riesgo = round(self.var_slider_riesgo.get(), 1)
+        
+        resultado = self.superficie_difusa.consultar(ahorro, riesgo)
+        if 'error' in resultado:
+            self.label_tiempo_real.config(text=f"❌ {resultado['error']}")
+            return
+        
+        self.label_tiempo_real.config(
+            text=f"📤 {ahorro} USD / riesgo {riesgo} → "
+                 f"{resultado['nivel_inversion']}% ({resultado['etiqueta']})"
+        )
+        
+        # Mantener sincronizados los campos de texto para el botón "Evaluar"
+        self.entry_ahorro.delete(0, tk.END)
+        self.entry_ahorro.insert(0, str(ahorro))
+        self.entry_riesgo.delete(0, tk.END)
+        self.entry_riesgo.insert(0, str(riesgo))
+    
     def _crear_tab_info(self):
         """Crea la pestaña de información del sistema"""
         # Frame principal con scroll
@@ -477,11 +549,28 @@ validando la consistencia del sistema difuso.
     
     def _visualizar_conjuntos(self):
         """Visualiza los conjuntos difusos del sistema"""
+        self._evaluar_mamdani()
+        # La figura se dibuja (o se lee de la caché) fuera del hilo de la interfaz
+        threading.Thread(target=self._renderizar_conjuntos, daemon=True).start()
+    
+    def _renderizar_conjuntos(self):
+        """Obtiene el PNG de los conjuntos difusos y lo muestra desde el hilo de Tk"""
         try:
-            self._evaluar_mamdani()
-            self.sistema_difuso.visualizar_conjuntos_difusos()
+            imagen = self.sistema_difuso.visualizar_conjuntos_difusos()
         except Exception as e:
-            messagebox.showerror("Error", f"❌ Error al visualizar: {str(e)}")
+            mensaje = f"❌ Error al visualizar: {str(e)}"
+            self.root.after(0, lambda: messagebox.showerror("Error", mensaje))
+            return
+        self.root.after(0, self._mostrar_imagen_conjuntos, imagen)
+    
+    def _mostrar_imagen_conjuntos(self, imagen: bytes):
+        """Muestra la figura de los conjuntos difusos en una ventana emergente"""
+        ventana = tk.Toplevel(self.root)
+        ventana.title("Conjuntos Difusos")
+        foto = tk.PhotoImage(data=base64.b64encode(imagen))
+        etiqueta = ttk.Label(ventana, image=foto)
+        etiqueta.image = foto  # Conservar la referencia para que Tk no la libere
+        etiqueta.pack(padx=10, pady=10)
     
     def _mostrar_estado_sistema(self):
         """Muestra el estado completo del sistema experto"""
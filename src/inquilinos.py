@@ -0,0 +1,243 @@
+"""
+Gestión de Reglas por Inquilino
+===============================
+
+Este módulo sirve el sistema experto a varias organizaciones cliente
+(inquilinos), cada una con sus propias reglas además de las reglas
+financieras predefinidas:
+
+- Base compartida: la fábrica del sistema base y las reglas y mensajes
+  comunes se definen una vez para todos los inquilinos
+- Delta por inquilino: reglas y mensajes propios cargados con
+  cargar_reglas sobre la base
+- Los entornos de los inquilinos usados recientemente quedan residentes;
+  cuando la memoria CLIPS de los residentes supera el presupuesto se
+  desalojan los menos usados (LRU) y se reconstruyen al volver a pedirse
+
+Los entornos se construyen fuera del lock del gestor con una copia del
+delta; solo se publican si, al terminar, el inquilino sigue registrado con
+ese mismo delta, así que un inquilino eliminado o sustituido durante la
+construcción no vuelve a aparecer con las reglas antiguas.
+
+La memoria de cada entorno se mide con (mem-used) de CLIPS tras
+construirlo. Si se indica un RegistroMetricas, se registran la latencia
+de construcción, las reconstrucciones, los desalojos y los entornos y la
+memoria residentes.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional
+
+from .sistema_experto import SistemaExperto
+
+# Presupuesto de memoria CLIPS por defecto para los entornos residentes
+PRESUPUESTO_POR_DEFECTO = 64 * 1024 * 1024
+
+
+class EntornoInquilino:
+    """Sistema experto residente de un inquilino, con su lock y su tamaño"""
+
+    __slots__ = ('inquilino', 'sistema', 'lock', 'bytes', 'construido')
+
+    def __init__(self, inquilino: str, sistema: SistemaExperto, bytes_usados: int):
+        self.inquilino = inquilino
+        self.sistema = sistema
+        self.lock = threading.Lock()
+        self.bytes = bytes_usados
+        self.construido = time.time()
+
+
+class GestorInquilinos:
+    """
+    Entornos del sistema experto por inquilino con desalojo LRU.
+
+    Uso:
+        gestor = GestorInquilinos(presupuesto_bytes=32 * 1024 * 1024)
+        gestor.registrar_inquilino('banco-a', reglas, mensajes)
+        resultado = gestor.evaluar('banco-a', perfil)
+    """
+
+    def __init__(self, presupuesto_bytes: int = PRESUPUESTO_POR_DEFECTO,
+                 fabrica: Callable[[], SistemaExperto] = SistemaExperto,
+                 reglas_base: str = "", mensajes_base: Optional[Dict[str, str]] = None,
+                 metricas=None):
+        """
+        Inicializa el gestor
+
+        Args:
+            presupuesto_bytes: Memoria CLIPS máxima de los entornos residentes
+            fabrica: Crea el sistema experto base de cada entorno
+            reglas_base: Reglas comunes a todos los inquilinos
+            mensajes_base: Mensajes de las reglas comunes
+            metricas: RegistroMetricas opcional
+        """
+        if presupuesto_bytes <= 0:
+            raise ValueError("El presupuesto de memoria debe ser positivo")
+
+        self.presupuesto_bytes = presupuesto_bytes
+        self.fabrica = fabrica
+        self.reglas_base = reglas_base
+        self.mensajes_base = dict(mensajes_base or {})
+        self.metricas = metricas
+
+        self._deltas: Dict[str, tuple] = {}
+        self._residentes: 'OrderedDict[str, EntornoInquilino]' = OrderedDict()
+        self._bytes_residentes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_residentes(self) -> int:
+        """Memoria CLIPS total de los entornos residentes"""
+        with self._lock:
+            return self._bytes_residentes
+
+    def residentes(self) -> List[str]:
+        """Inquilinos residentes, del menos al más usado recientemente"""
+        with self._lock:
+            return list(self._residentes)
+
+    def inquilinos(self) -> List[str]:
+        """Inquilinos registrados"""
+        with self._lock:
+            return sorted(self._deltas)
+
+    def _construir(self, inquilino: str, delta: tuple) -> EntornoInquilino:
+        """Construye el entorno de un inquilino: base más su delta (sin el lock)"""
+        reglas, mensajes = delta
+        inicio = time.perf_counter()
+
+        sistema = self.fabrica()
+        for reglas_str, mensajes_str in ((self.reglas_base, self.mensajes_base), (reglas, mensajes)):
+            if (reglas_str or mensajes_str) and not sistema.cargar_reglas(reglas_str, mensajes=mensajes_str):
+                raise ValueError(f"No se pudieron cargar las reglas del inquilino {inquilino!r}")
+        sistema.reiniciar_sistema()
+        bytes_usados = int(sistema.sistema.eval('(mem-used)'))
+
+        if self.metricas is not None:
+            self.metricas.observar('fase_segundos', time.perf_counter() - inicio,
+                                   motor='experto', fase='construir_inquilino')
+            self.metricas.incrementar('inquilinos_reconstruidos_total')
+        return EntornoInquilino(inquilino, sistema, bytes_usados)
+
+    def _publicar_metricas(self) -> None:
+        """Actualiza los indicadores de entornos y memoria residentes"""
+        if self.metricas is not None:
+            self.metricas.fijar('inquilinos_residentes', len(self._residentes))
+            self.metricas.fijar('inquilinos_memoria_bytes', self._bytes_residentes)
+
+    def _desalojar_excedente(self, conservar: str) -> None:
+        """Desaloja los menos usados hasta cumplir el presupuesto (con el lock tomado)"""
+        while self._bytes_residentes > self.presupuesto_bytes and len(self._residentes) > 1:
+            inquilino, entorno = next(iter(self._residentes.items()))
+            if inquilino == conservar:
+                break
+            del self._residentes[inquilino]
+            self._bytes_residentes -= entorno.bytes
+            if self.metricas is not None:
+                self.metricas.incrementar('inquilinos_desalojados_total')
+
+    def registrar_inquilino(self, inquilino: str, reglas: str = "",
+                            mensajes: Optional[Dict[str, str]] = None) -> None:
+        """
+        Registra (o sustituye) las reglas propias de un inquilino
+
+        El entorno se construye en el momento para validar las reglas y
+        queda residente como el más usado recientemente. Si las reglas no
+        se pueden cargar, el inquilino conserva su registro anterior.
+
+        Args:
+            inquilino: Identificador del inquilino
+            reglas: Reglas CLIPS propias, una por línea como en cargar_reglas
+            mensajes: Textos de los hechos de mensaje de sus reglas
+
+        Raises:
+            ValueError: Si las reglas no se pueden cargar
+        """
+        delta = (reglas, dict(mensajes or {}))
+        entorno = self._construir(inquilino, delta)
+        with self._lock:
+            self._deltas[inquilino] = delta
+            self._instalar(entorno)
+
+    def eliminar_inquilino(self, inquilino: str) -> None:
+        """Olvida un inquilino y libera su entorno si está residente"""
+        with self._lock:
+            self._deltas.pop(inquilino, None)
+            entorno = self._residentes.pop(inquilino, None)
+            if entorno is not None:
+                self._bytes_residentes -= entorno.bytes
+            self._publicar_metricas()
+
+    def _instalar(self, entorno: EntornoInquilino) -> EntornoInquilino:
+        """Deja un entorno residente como el más reciente y aplica el presupuesto (con el lock tomado)"""
+        previo = self._residentes.pop(entorno.inquilino, None)
+        if previo is not None:
+            self._bytes_residentes -= previo.bytes
+        self._residentes[entorno.inquilino] = entorno
+        self._bytes_residentes += entorno.bytes
+        self._desalojar_excedente(conservar=entorno.inquilino)
+        self._publicar_metricas()
+        return entorno
+
+    def obtener(self, inquilino: str) -> EntornoInquilino:
+        """
+        Entorno de un inquilino, reconstruyéndolo si fue desalojado
+
+        Args:
+            inquilino: Identificador del inquilino
+
+        Returns:
+            EntornoInquilino: Entorno residente (usar su lock para evaluar)
+
+        Raises:
+            KeyError: Si el inquilino no está registrado (o se elimina
+                      mientras se reconstruye su entorno)
+        """
+        while True:
+            with self._lock:
+                delta = self._deltas.get(inquilino)
+                if delta is None:
+                    raise KeyError(f"Inquilino no registrado: {inquilino!r}")
+                entorno = self._residentes.get(inquilino)
+                if entorno is not None:
+                    self._residentes.move_to_end(inquilino)
+                    return entorno
+
+            # La construcción se hace fuera del lock para no bloquear a otros inquilinos
+            entorno = self._construir(inquilino, delta)
+
+            with self._lock:
+                if self._deltas.get(inquilino) is delta:
+                    actual = self._residentes.get(inquilino)
+                    if actual is not None:
+                        # Otro hilo lo reconstruyó a la vez
+                        self._residentes.move_to_end(inquilino)
+                        return actual
+                    return self._instalar(entorno)
+            # Eliminado o registrado de nuevo durante la construcción: se descarta
+
+    def evaluar(self, inquilino: str, perfil: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Evalúa un perfil con las reglas de un inquilino
+
+        Args:
+            inquilino: Identificador del inquilino
+            perfil: Dict con ingresos, ahorro, gastos, deudas y ocio
+
+        Returns:
+            Dict con 'recomendaciones' y 'mensajes'
+        """
+        entorno = self.obtener(inquilino)
+        with entorno.lock:
+            sistema = entorno.sistema
+            sistema.insertar_hechos(**perfil)
+            sistema.ejecutar_inferencia()
+            return {
+                'recomendaciones': sistema.obtener_resultado(),
+                'mensajes': list(sistema.mensajes_activados)
+            }
@@ -0,0 +1,305 @@
+"""
+Instantáneas de la Memoria de Trabajo
+=====================================
+
+Este módulo guarda y restaura los hechos de un SistemaExperto (y
+opcionalmente su agenda) en un archivo binario compacto (.sfsn), para
+sesiones de asesoría de larga duración que acumulan hechos:
+
+- Los hechos se serializan con bsave-facts de CLIPS, que se vuelve a
+  cargar con bload-facts sin analizar texto ni reinsertar hecho a hecho
+- La imagen binaria se comprime con zlib (nivel rápido)
+- La agenda se guarda como las activaciones pendientes (regla y posición
+  de los hechos que las soportan); al restaurar se eliminan las
+  activaciones que ya se habían disparado antes de la instantánea
+
+El sistema de destino debe tener las mismas plantillas y reglas que el de
+origen (por ejemplo, otro SistemaExperto con las mismas reglas cargadas).
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import json
+import os
+import re
+import struct
+import tempfile
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+import clips
+
+from .sistema_experto import SistemaExperto, liberar_hechos
+
+# Formato de archivo: cabecera + metadatos JSON + imagen bsave-facts comprimida
+MAGIA = b'SFSN'
+VERSION_FORMATO = 1
+_CABECERA = struct.Struct('<4sBBIII')
+_CON_AGENDA = 0x01
+
+EXTENSION_SESION = '.sfsn'
+
+# "12 reglaDeuda: f-1,f-4" o "0 reglaX: *" para patrones negados
+_PATRON_ACTIVACION = re.compile(r'^\S+\s+(\S+):\s*(.*)$')
+_PATRON_SESION = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def _base_activacion(activacion, posiciones: Dict[int, int]) -> Tuple[str, Tuple[int, ...]]:
+    """(regla, posiciones de los hechos) de una activación; -1 para patrones sin hecho"""
+    coincidencia = _PATRON_ACTIVACION.match(str(activacion))
+    if coincidencia is None:
+        return activacion.name, ()
+    hechos = []
+    for token in coincidencia.group(2).split(','):
+        token = token.strip()
+        if token.startswith('f-'):
+            hechos.append(posiciones.get(int(token[2:]), -1))
+        elif token:
+            hechos.append(-1)
+    return coincidencia.group(1), tuple(hechos)
+
+
+def _posiciones_hechos(entorno: clips.Environment) -> Dict[int, int]:
+    """Índice de hecho → posición en la memoria de trabajo"""
+    hechos = list(entorno.facts())
+    try:
+        return {hecho.index: posicion for posicion, hecho in enumerate(hechos)}
+    finally:
+        liberar_hechos(hechos)
+
+
+def guardar_instantanea(sistema: SistemaExperto, ruta: str, incluir_agenda: bool = False,
+                        nivel_compresion: int = 1) -> int:
+    """
+    Guarda los hechos del sistema (y opcionalmente su agenda) en un archivo
+
+    El archivo se escribe completo en un temporal y luego se renombra.
+
+    Args:
+        sistema: Sistema experto de origen
+        ruta: Ruta del archivo (.sfsn)
+        incluir_agenda: Guardar también las activaciones pendientes
+        nivel_compresion: Nivel de zlib (1 rápido, 9 máximo)
+
+    Returns:
+        int: Número de hechos guardados
+    """
+    entorno = sistema.sistema
+    directorio = os.path.dirname(os.path.abspath(ruta))
+
+    descriptor, imagen = tempfile.mkstemp(suffix='.bin', dir=directorio)
+    os.close(descriptor)
+    try:
+        num_hechos = entorno.call('bsave-facts', imagen, clips.Symbol('local'))
+        if num_hechos is False or num_hechos < 0:
+            raise OSError(f"CLIPS no pudo guardar los hechos en {imagen}")
+        with open(imagen, 'rb') as f:
+            datos = zlib.compress(f.read(), nivel_compresion)
+    finally:
+        os.remove(imagen)
+
+    agenda = None
+    if incluir_agenda:
+        posiciones = _posiciones_hechos(entorno)
+        agenda = [list(_base_activacion(a, posiciones)) for a in entorno.activations()]
+
+    metadatos = json.dumps({
+        'hechos': num_hechos,
+        'agenda': agenda,
+        'mensajes_activados': sistema.mensajes_activados,
+        'resultado': sistema.resultado_capturado,
+        'creado': time.time()
+    }, ensure_ascii=False).encode('utf-8')
+
+    banderas = _CON_AGENDA if incluir_agenda else 0
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as f:
+        f.write(_CABECERA.pack(MAGIA, VERSION_FORMATO, banderas, num_hechos, len(metadatos), len(datos)))
+        f.write(metadatos)
+        f.write(datos)
+    os.replace(temporal, ruta)
+    return num_hechos
+
+
+def leer_metadatos(ruta: str) -> Dict[str, Any]:
+    """
+    Lee los metadatos de una instantánea sin cargar los hechos
+
+    Args:
+        ruta: Ruta del archivo (.sfsn)
+
+    Returns:
+        Dict con 'hechos', 'agenda', 'mensajes_activados', 'resultado' y 'creado'
+    """
+    with open(ruta, 'rb') as f:
+        metadatos, _ = _leer(f, cargar_datos=False)
+    return metadatos
+
+
+def _leer(f, cargar_datos: bool = True) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """Valida la cabecera y devuelve los metadatos y la imagen comprimida"""
+    cabecera = f.read(_CABECERA.size)
+    if len(cabecera) < _CABECERA.size:
+        raise ValueError("Archivo de instantánea truncado")
+    magia, version, _, _, largo_meta, largo_datos = _CABECERA.unpack(cabecera)
+    if magia != MAGIA:
+        raise ValueError("El archivo no es una instantánea del sistema experto")
+    if version != VERSION_FORMATO:
+        raise ValueError(f"Versión de instantánea no soportada: {version}")
+
+    metadatos = json.loads(f.read(largo_meta).decode('utf-8'))
+    if not cargar_datos:
+        return metadatos, None
+    datos = f.read(largo_datos)
+    if len(datos) != largo_datos:
+        raise ValueError("Archivo de instantánea truncado")
+    return metadatos, datos
+
+
+def _cargar_hechos(entorno: clips.Environment, imagen: str) -> Optional[int]:
+    """bload-facts de una imagen; None si CLIPS no la pudo cargar"""
+    try:
+        num_hechos = entorno.call('bload-facts', imagen)
+    except clips.CLIPSError:
+        return None
+    if num_hechos is False or num_hechos < 0:
+        return None
+    return num_hechos
+
+
+def restaurar_instantanea(sistema: SistemaExperto, ruta: str) -> int:
+    """
+    Sustituye la memoria de trabajo del sistema por la de una instantánea
+
+    Si la instantánea incluye la agenda, quedan pendientes solo las
+    activaciones que lo estaban al guardarla. Si no, la agenda es la que
+    produce la red Rete con los hechos restaurados.
+
+    La cabecera se valida y la imagen se descomprime antes de tocar el
+    sistema. Si CLIPS no puede cargarla (imagen corrupta o plantillas
+    distintas), se vuelven a cargar los hechos y la agenda que había.
+
+    Args:
+        sistema: Sistema experto de destino (mismas plantillas y reglas)
+        ruta: Ruta del archivo (.sfsn)
+
+    Returns:
+        int: Número de hechos restaurados
+
+    Raises:
+        ValueError: Si la instantánea no es válida o no se puede cargar
+    """
+    with open(ruta, 'rb') as f:
+        metadatos, datos = _leer(f)
+    try:
+        datos = zlib.decompress(datos)
+    except zlib.error as e:
+        raise ValueError(f"Instantánea corrupta {ruta}: {e}") from e
+
+    entorno = sistema.sistema
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, imagen = tempfile.mkstemp(suffix='.bin', dir=directorio)
+    descriptor_respaldo, respaldo = tempfile.mkstemp(suffix='.bin', dir=directorio)
+    os.close(descriptor_respaldo)
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(datos)
+        # Respaldo de la memoria de trabajo actual por si la carga falla
+        posiciones = _posiciones_hechos(entorno)
+        agenda_previa = [list(_base_activacion(a, posiciones)) for a in entorno.activations()]
+        guardados = entorno.call('bsave-facts', respaldo, clips.Symbol('local'))
+        if guardados is False or guardados < 0:
+            raise OSError(f"CLIPS no pudo respaldar los hechos en {respaldo}")
+
+        entorno.eval('(retract *)')
+        num_hechos = _cargar_hechos(entorno, imagen)
+        if num_hechos is None:
+            # Una carga fallida puede dejar parte de los hechos: se descartan
+            entorno.eval('(retract *)')
+            _cargar_hechos(entorno, respaldo)
+            _restaurar_agenda(entorno, agenda_previa)
+            raise ValueError(f"CLIPS no pudo restaurar los hechos de {ruta}")
+    finally:
+        os.remove(imagen)
+        os.remove(respaldo)
+
+    if metadatos['agenda'] is not None:
+        _restaurar_agenda(entorno, metadatos['agenda'])
+
+    sistema.mensajes_activados = list(metadatos['mensajes_activados'])
+    sistema.resultado_capturado = metadatos['resultado']
+    return num_hechos
+
+
+def _restaurar_agenda(entorno: clips.Environment, agenda: List[list]) -> None:
+    """Elimina las activaciones que no estaban pendientes en la instantánea"""
+    pendientes = Counter((regla, tuple(hechos)) for regla, hechos in agenda)
+    posiciones = _posiciones_hechos(entorno)
+    for activacion in list(entorno.activations()):
+        clave = _base_activacion(activacion, posiciones)
+        if pendientes[clave] > 0:
+            pendientes[clave] -= 1
+        else:
+            activacion.delete()
+
+
+class GestorSesiones:
+    """
+    Instantáneas por sesión en un directorio, un archivo .sfsn por sesión.
+
+    Uso:
+        sesiones = GestorSesiones('sesiones/')
+        sesiones.guardar('cliente-42', sistema)
+        ...
+        sesiones.restaurar('cliente-42', otro_sistema)
+    """
+
+    def __init__(self, directorio: str, incluir_agenda: bool = False, nivel_compresion: int = 1):
+        """
+        Inicializa el gestor
+
+        Args:
+            directorio: Directorio de las instantáneas (se crea si no existe)
+            incluir_agenda: Guardar también la agenda de cada sesión
+            nivel_compresion: Nivel de zlib de los archivos
+        """
+        self.directorio = directorio
+        self.incluir_agenda = incluir_agenda
+        self.nivel_compresion = nivel_compresion
+        os.makedirs(directorio, exist_ok=True)
+
+    def ruta(self, id_sesion: str) -> str:
+        """Ruta del archivo de una sesión"""
+        if not _PATRON_SESION.match(id_sesion) or id_sesion in ('.', '..'):
+            raise ValueError(f"Identificador de sesión inválido: {id_sesion!r}")
+        return os.path.join(self.directorio, id_sesion + EXTENSION_SESION)
+
+    def guardar(self, id_sesion: str, sistema: SistemaExperto) -> int:
+        """Guarda la memoria de trabajo de una sesión; devuelve los hechos guardados"""
+        return guardar_instantanea(sistema, self.ruta(id_sesion),
+                                   incluir_agenda=self.incluir_agenda,
+                                   nivel_compresion=self.nivel_compresion)
+
+    def restaurar(self, id_sesion: str, sistema: SistemaExperto) -> int:
+        """Restaura una sesión en el sistema; devuelve los hechos restaurados"""
+        return restaurar_instantanea(sistema, self.ruta(id_sesion))
+
+    def existe(self, id_sesion: str) -> bool:
+        """Indica si hay instantánea para la sesión"""
+        return os.path.exists(self.ruta(id_sesion))
+
+    def eliminar(self, id_sesion: str) -> bool:
+        """Elimina la instantánea de una sesión; devuelve False si no existía"""
+        try:
+            os.remove(self.ruta(id_sesion))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def listar(self) -> List[str]:
+        """Identificadores de las sesiones guardadas"""
+        return sorted(nombre[:-len(EXTENSION_SESION)] for nombre in os.listdir(self.directorio)
+                      if nombre.endswith(EXTENSION_SESION))
@@ -0,0 +1,262 @@
+"""
+Métricas de Rendimiento
+=======================
+
+Este módulo implementa un registro de métricas opcional para ambos motores
+de inferencia:
+
+- Histogramas de duración por fase (reset, assert_string, run,
+  _procesar_mensajes, compute de scikit-fuzzy, ...)
+- Contadores de llamadas, reglas disparadas y errores
+- Indicadores de valor actual (por ejemplo, entornos residentes)
+- Exportación en formato de texto de Prometheus a un archivo o a un
+  endpoint HTTP local
+
+Los motores solo registran métricas si reciben una instancia de
+RegistroMetricas; sin ella el coste es una comprobación de atributo.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple, Optional
+
+# Límites de los buckets en segundos (de 10 µs a 1 s)
+BUCKETS_POR_DEFECTO = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+
+# Descripciones de las métricas que registran los motores
+DESCRIPCIONES = {
+    'fase_segundos': "Duración de cada fase de la inferencia en segundos",
+    'llamadas_total': "Número de llamadas por operación",
+    'reglas_disparadas_total': "Número de reglas CLIPS disparadas",
+    'errores_total': "Número de errores por operación",
+    'inquilinos_residentes': "Entornos de inquilino residentes en memoria",
+    'inquilinos_memoria_bytes': "Memoria CLIPS de los entornos de inquilino residentes",
+    'inquilinos_reconstruidos_total': "Número de entornos de inquilino construidos",
+    'inquilinos_desalojados_total': "Número de entornos de inquilino desalojados",
+}
+
+Etiquetas = Tuple[Tuple[str, str], ...]
+
+
+class Histograma:
+    """Histograma acumulativo con buckets fijos (semántica de Prometheus)"""
+
+    __slots__ = ('limites', 'conteos', 'suma', 'total')
+
+    def __init__(self, limites: Tuple[float, ...] = BUCKETS_POR_DEFECTO):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        """Registra una observación"""
+        self.conteos[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+class RegistroMetricas:
+    """
+    Registro de histogramas y contadores con exportación a Prometheus.
+
+    Los nombres se exportan con el prefijo indicado y las etiquetas se
+    pasan como argumentos con nombre, por ejemplo:
+
+        metricas.observar('fase_segundos', 0.0012, motor='experto', fase='run')
+        metricas.incrementar('llamadas_total', motor='difuso', operacion='mamdani')
+    """
+
+    def __init__(self, prefijo: str = 'sistema_financiero',
+                 buckets: Tuple[float, ...] = BUCKETS_POR_DEFECTO):
+        """
+        Inicializa un registro vacío
+
+        Args:
+            prefijo: Prefijo de los nombres de métrica exportados
+            buckets: Límites de los buckets de los histogramas en segundos
+        """
+        self.prefijo = prefijo
+        self.buckets = tuple(buckets)
+        self._histogramas: Dict[Tuple[str, Etiquetas], Histograma] = {}
+        self._contadores: Dict[Tuple[str, Etiquetas], float] = {}
+        self._indicadores: Dict[Tuple[str, Etiquetas], float] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, nombre: str, valor: float, **etiquetas) -> None:
+        """
+        Registra una observación en un histograma
+
+        Args:
+            nombre: Nombre de la métrica (sin prefijo)
+            valor: Valor observado (normalmente segundos)
+            **etiquetas: Etiquetas de la serie
+        """
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = Histograma(self.buckets)
+            histograma.observar(valor)
+
+    def incrementar(self, nombre: str, cantidad: float = 1, **etiquetas) -> None:
+        """
+        Incrementa un contador
+
+        Args:
+            nombre: Nombre de la métrica (sin prefijo)
+            cantidad: Incremento
+            **etiquetas: Etiquetas de la serie
+        """
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def fijar(self, nombre: str, valor: float, **etiquetas) -> None:
+        """
+        Fija el valor de un indicador (gauge)
+
+        Args:
+            nombre: Nombre de la métrica (sin prefijo)
+            valor: Valor actual
+            **etiquetas: Etiquetas de la serie
+        """
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._indicadores[clave] = valor
+
+    def obtener_indicador(self, nombre: str, **etiquetas) -> Optional[float]:
+        """Retorna el valor actual de un indicador (None si no existe)"""
+        return self._indicadores.get((nombre, tuple(sorted(etiquetas.items()))))
+
+    def obtener_contador(self, nombre: str, **etiquetas) -> float:
+        """Retorna el valor actual de un contador (0 si no existe)"""
+        return self._contadores.get((nombre, tuple(sorted(etiquetas.items()))), 0)
+
+    def obtener_histograma(self, nombre: str, **etiquetas) -> Optional[Histograma]:
+        """Retorna el histograma de una serie (None si no existe)"""
+        return self._histogramas.get((nombre, tuple(sorted(etiquetas.items()))))
+
+    def reiniciar(self) -> None:
+        """Descarta todas las métricas registradas"""
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+            self._indicadores.clear()
+
+    @staticmethod
+    def _formatear_etiquetas(etiquetas: Etiquetas, extra: Tuple[str, str] = None) -> str:
+        """Formatea etiquetas como {clave="valor",...}"""
+        pares = list(etiquetas)
+        if extra is not None:
+            pares.append(extra)
+        if not pares:
+            return ""
+        texto = ",".join(
+            '{0}="{1}"'.format(clave, str(valor).replace('\\', '\\\\').replace('"', '\\"'))
+            for clave, valor in pares
+        )
+        return "{" + texto + "}"
+
+    def exportar_prometheus(self) -> str:
+        """
+        Exporta todas las métricas en formato de texto de Prometheus
+
+        Returns:
+            str: Exposición de métricas (versión 0.0.4 del formato de texto)
+        """
+        with self._lock:
+            histogramas = sorted(self._histogramas.items())
+            contadores = sorted(self._contadores.items())
+            indicadores = sorted(self._indicadores.items())
+
+        lineas = []
+        tipos_emitidos = set()
+
+        def cabecera(nombre, tipo):
+            if nombre in tipos_emitidos:
+                return
+            tipos_emitidos.add(nombre)
+            completo = f"{self.prefijo}_{nombre}"
+            lineas.append(f"# HELP {completo} {DESCRIPCIONES.get(nombre, nombre)}")
+            lineas.append(f"# TYPE {completo} {tipo}")
+
+        for (nombre, etiquetas), histograma in histogramas:
+            cabecera(nombre, 'histogram')
+            completo = f"{self.prefijo}_{nombre}"
+            acumulado = 0
+            for limite, conteo in zip(histograma.limites, histograma.conteos):
+                acumulado += conteo
+                le = self._formatear_etiquetas(etiquetas, ('le', repr(limite)))
+                lineas.append(f"{completo}_bucket{le} {acumulado}")
+            le = self._formatear_etiquetas(etiquetas, ('le', '+Inf'))
+            lineas.append(f"{completo}_bucket{le} {histograma.total}")
+            texto_etiquetas = self._formatear_etiquetas(etiquetas)
+            lineas.append(f"{completo}_sum{texto_etiquetas} {histograma.suma!r}")
+            lineas.append(f"{completo}_count{texto_etiquetas} {histograma.total}")
+
+        for (nombre, etiquetas), valor in contadores:
+            cabecera(nombre, 'counter')
+            lineas.append(f"{self.prefijo}_{nombre}{self._formatear_etiquetas(etiquetas)} {valor}")
+
+        for (nombre, etiquetas), valor in indicadores:
+            cabecera(nombre, 'gauge')
+            lineas.append(f"{self.prefijo}_{nombre}{self._formatear_etiquetas(etiquetas)} {valor}")
+
+        return "\n".join(lineas) + "\n"
+
+    def escribir_archivo(self, ruta: str) -> None:
+        """
+        Escribe las métricas en un archivo de forma atómica
+
+        Compatible con el textfile collector de node_exporter: el archivo
+        se escribe completo en un temporal y luego se renombra.
+
+        Args:
+            ruta: Ruta del archivo .prom
+        """
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(self.exportar_prometheus())
+        os.replace(temporal, ruta)
+
+    def servir_http(self, puerto: int = 9464, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """
+        Expone las métricas en http://host:puerto/metrics desde un hilo de fondo
+
+        Args:
+            puerto: Puerto TCP (0 para elegir uno libre)
+            host: Interfaz de escucha (solo local por defecto)
+
+        Returns:
+            ThreadingHTTPServer: Servidor en ejecución (usar shutdown() para detenerlo)
+        """
+        registro = self
+
+        class ManejadorMetricas(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                cuerpo = registro.exportar_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, format, *args):
+                pass
+
+        servidor = ThreadingHTTPServer((host, puerto), ManejadorMetricas)
+        hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+        hilo.start()
+        return servidor
@@ -0,0 +1,273 @@
+"""
+Recarga en Caliente de Reglas
+=============================
+
+Este módulo vigila archivos de reglas CLIPS (.clp) y, cuando cambian,
+construye en segundo plano un sistema experto nuevo con las reglas
+actualizadas, lo valida con un conjunto de perfiles de humo y lo
+intercambia de forma atómica por el sistema en servicio.
+
+- Las evaluaciones en curso terminan sobre el sistema con el que empezaron
+- Nunca se expone un sistema con las reglas cargadas a medias
+- Si la construcción o la validación fallan, se sigue sirviendo el
+  sistema anterior y el error queda en ultimo_error
+
+Los textos de los hechos de mensaje de cada archivo se leen de un archivo
+JSON junto a él con el mismo nombre y extensión .mensajes.json, por
+ejemplo reglas_cliente.clp y reglas_cliente.mensajes.json.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Sequence
+
+from .sistema_experto import SistemaExperto
+
+# Perfiles de humo por defecto: cubren todas las recomendaciones predefinidas
+PERFILES_HUMO = [
+    dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300),
+    dict(ingresos=5000, ahorro=20000, gastos=2000, deudas=100, ocio=200),
+    dict(ingresos=3000, ahorro=9000, gastos=2600, deudas=0, ocio=500),
+    dict(ingresos=0, ahorro=0, gastos=0, deudas=0, ocio=0),
+]
+
+# Disparos máximos por perfil de humo; más indica un bucle de reglas
+LIMITE_DISPAROS_VALIDACION = 10000
+
+EXTENSION_MENSAJES = '.mensajes.json'
+
+
+class ErrorRecarga(Exception):
+    """La construcción o la validación de un conjunto de reglas ha fallado"""
+
+
+class EntornoVersionado:
+    """
+    Sistema experto en servicio junto con su versión y su lock.
+
+    El lock serializa las evaluaciones sobre el mismo entorno CLIPS; al
+    intercambiar entornos, las evaluaciones que ya tienen la referencia al
+    anterior terminan sobre él.
+    """
+
+    __slots__ = ('sistema', 'version', 'lock', 'creado')
+
+    def __init__(self, sistema: SistemaExperto, version: int):
+        self.sistema = sistema
+        self.version = version
+        self.lock = threading.Lock()
+        self.creado = time.time()
+
+
+def ruta_mensajes(ruta_reglas: str) -> str:
+    """Ruta del archivo de mensajes asociado a un archivo de reglas"""
+    return os.path.splitext(ruta_reglas)[0] + EXTENSION_MENSAJES
+
+
+class GestorRecargaReglas:
+    """
+    Sirve evaluaciones del sistema experto y recarga sus reglas en caliente.
+
+    Uso:
+        with GestorRecargaReglas(['reglas/cliente.clp']) as gestor:
+            gestor.iniciar()                  # vigilancia en segundo plano
+            resultado = gestor.evaluar(perfil)
+    """
+
+    def __init__(self, rutas: Sequence[str], perfiles_humo: Optional[List[Dict[str, float]]] = None,
+                 validador: Optional[Callable[[Dict[str, float], SistemaExperto], bool]] = None,
+                 intervalo: float = 1.0, fabrica: Callable[[], SistemaExperto] = SistemaExperto,
+                 metricas=None):
+        """
+        Inicializa el gestor y construye el primer entorno
+
+        Args:
+            rutas: Archivos .clp a cargar, en orden
+            perfiles_humo: Perfiles que debe evaluar sin error un entorno nuevo
+            validador: Comprobación adicional opcional por perfil; recibe el
+                       perfil y el sistema ya evaluado y devuelve True si es válido
+            intervalo: Segundos entre comprobaciones de los archivos
+            fabrica: Crea el sistema experto base sobre el que se cargan las reglas
+            metricas: RegistroMetricas opcional para contar recargas y errores
+
+        Raises:
+            ErrorRecarga: Si las reglas iniciales no se pueden cargar o validar
+        """
+        if intervalo <= 0:
+            raise ValueError("El intervalo debe ser positivo")
+
+        self.rutas = [os.path.abspath(ruta) for ruta in rutas]
+        self.perfiles_humo = list(PERFILES_HUMO if perfiles_humo is None else perfiles_humo)
+        self.validador = validador
+        self.intervalo = intervalo
+        self.fabrica = fabrica
+        self.metricas = metricas
+
+        self.ultimo_error: Optional[str] = None
+        self._lock_recarga = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+        self._firmas = self._leer_firmas()
+        self._entorno = EntornoVersionado(self._construir_validado(), version=1)
+
+    @property
+    def version(self) -> int:
+        """Versión del entorno en servicio (empieza en 1)"""
+        return self._entorno.version
+
+    def obtener_entorno(self) -> EntornoVersionado:
+        """Entorno en servicio; la referencia sigue siendo válida tras un intercambio"""
+        return self._entorno
+
+    def evaluar(self, perfil: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Evalúa un perfil con el entorno en servicio
+
+        Args:
+            perfil: Dict con ingresos, ahorro, gastos, deudas y ocio
+
+        Returns:
+            Dict con 'recomendaciones', 'mensajes' y la 'version' de las reglas usadas
+        """
+        entorno = self._entorno
+        with entorno.lock:
+            sistema = entorno.sistema
+            sistema.insertar_hechos(**perfil)
+            sistema.ejecutar_inferencia()
+            return {
+                'recomendaciones': sistema.obtener_resultado(),
+                'mensajes': list(sistema.mensajes_activados),
+                'version': entorno.version
+            }
+
+    def _leer_firmas(self) -> Dict[str, Optional[tuple]]:
+        """(mtime, tamaño) de cada archivo de reglas y de mensajes vigilado"""
+        firmas = {}
+        for ruta in self.rutas:
+            for vigilada in (ruta, ruta_mensajes(ruta)):
+                try:
+                    estado = os.stat(vigilada)
+                    firmas[vigilada] = (estado.st_mtime_ns, estado.st_size)
+                except FileNotFoundError:
+                    firmas[vigilada] = None
+        return firmas
+
+    def _construir(self) -> SistemaExperto:
+        """Crea un sistema nuevo con todas las reglas vigiladas cargadas"""
+        sistema = self.fabrica()
+        for ruta in self.rutas:
+            try:
+                sistema.sistema.load(ruta)
+            except Exception as e:
+                raise ErrorRecarga(f"No se pudieron cargar las reglas de {ruta}: {e}") from e
+
+            archivo_mensajes = ruta_mensajes(ruta)
+            if os.path.exists(archivo_mensajes):
+                try:
+                    with open(archivo_mensajes, encoding='utf-8') as f:
+                        sistema.registro_mensajes.registrar_varios(json.load(f))
+                except (OSError, ValueError) as e:
+                    raise ErrorRecarga(f"Mensajes inválidos en {archivo_mensajes}: {e}") from e
+        return sistema
+
+    def _validar(self, sistema: SistemaExperto) -> None:
+        """Evalúa los perfiles de humo; lanza ErrorRecarga ante el primer fallo"""
+        for perfil in self.perfiles_humo:
+            try:
+                # evaluar captura el printout de las reglas candidatas: no
+                # llega a la salida estándar del proceso
+                evaluacion = sistema.evaluar(perfil, LIMITE_DISPAROS_VALIDACION)
+                if evaluacion['pendientes']:
+                    raise ErrorRecarga(
+                        f"Las reglas no terminan tras {LIMITE_DISPAROS_VALIDACION} disparos con {perfil}"
+                    )
+            except ErrorRecarga:
+                raise
+            except Exception as e:
+                raise ErrorRecarga(f"Error al evaluar el perfil de humo {perfil}: {e}") from e
+
+            if self.validador is not None and not self.validador(perfil, sistema):
+                raise ErrorRecarga(f"El validador rechazó el perfil de humo {perfil}")
+        sistema.reiniciar_sistema()
+
+    def _construir_validado(self) -> SistemaExperto:
+        """Construye y valida un sistema nuevo sin exponerlo"""
+        sistema = self._construir()
+        self._validar(sistema)
+        return sistema
+
+    def recargar(self) -> bool:
+        """
+        Construye, valida e intercambia un entorno con las reglas actuales
+
+        Returns:
+            bool: True si se intercambió el entorno, False si falló (el
+                  entorno anterior sigue en servicio y el motivo queda en ultimo_error)
+        """
+        with self._lock_recarga:
+            firmas = self._leer_firmas()
+            inicio = time.perf_counter()
+            try:
+                sistema = self._construir_validado()
+            except ErrorRecarga as e:
+                # No se reintenta hasta que los archivos vuelvan a cambiar
+                self._firmas = firmas
+                self.ultimo_error = str(e)
+                if self.metricas is not None:
+                    self.metricas.incrementar('errores_total', motor='experto', operacion='recargar_reglas')
+                return False
+
+            # Asignar la referencia es atómico: una evaluación usa el entorno
+            # anterior o el nuevo, nunca uno a medio cargar
+            self._entorno = EntornoVersionado(sistema, self._entorno.version + 1)
+            self._firmas = firmas
+            self.ultimo_error = None
+            if self.metricas is not None:
+                self.metricas.observar('fase_segundos', time.perf_counter() - inicio,
+                                       motor='experto', fase='recargar_reglas')
+                self.metricas.incrementar('llamadas_total', motor='experto', operacion='recargar_reglas')
+            return True
+
+    def comprobar(self) -> bool:
+        """
+        Recarga si algún archivo vigilado ha cambiado desde la última recarga
+
+        Returns:
+            bool: True si se intercambió el entorno
+        """
+        if self._leer_firmas() == self._firmas:
+            return False
+        return self.recargar()
+
+    def _vigilar(self) -> None:
+        """Bucle del hilo de vigilancia"""
+        while not self._detener.wait(self.intervalo):
+            self.comprobar()
+
+    def iniciar(self) -> None:
+        """Arranca la vigilancia de los archivos en un hilo en segundo plano"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._vigilar, name="recarga-reglas", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        """Detiene el hilo de vigilancia"""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detener()
+        return False
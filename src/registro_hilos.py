@@ -0,0 +1,136 @@
+"""
+Registro de Sistemas Expertos por Hilo
+======================================
+
+Un SistemaExperto no se puede compartir entre hilos sin un lock: cada
+evaluación hace reset, assert y run sobre el mismo entorno CLIPS. Este
+módulo da a cada hilo su propio sistema, creado la primera vez que el hilo
+lo pide y liberado cuando el hilo termina (threading.local):
+
+    from src.registro_hilos import sistema_del_hilo
+    sistema = sistema_del_hilo()
+    sistema.insertar_hechos(**perfil)
+
+Los sistemas se crean con FabricaSistemas (bload de una plantilla), o con
+la fábrica que se indique.
+
+Sobre el paralelismo: clipspy llama a CLIPS a través de cffi, que suelta el
+GIL durante cada llamada a C, pero el router de captura, los hechos que
+vuelven a Python y el procesamiento de mensajes se ejecutan con el GIL
+tomado. El rendimiento real con varios hilos frente a varios procesos se
+mide con benchmarks/bench_concurrencia.py, que lo escribe en JSON.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import threading
+import weakref
+from typing import Callable, Dict, Any, Optional
+
+from .sistema_experto import SistemaExperto
+from .fabrica_sistemas import FabricaSistemas
+
+
+class RegistroPorHilo:
+    """
+    Un SistemaExperto por hilo, creado bajo demanda.
+
+    Uso:
+        registro = RegistroPorHilo()
+        resultado = registro.evaluar({'ingresos': 3000, 'ahorro': 200, ...})
+    """
+
+    def __init__(self, fabrica: Optional[Callable[[], SistemaExperto]] = None):
+        """
+        Args:
+            fabrica: Callable sin argumentos que crea un sistema; por defecto
+                     una FabricaSistemas creada al primer uso
+        """
+        self._fabrica = fabrica
+        self._local = threading.local()
+        self._activos = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._cerrar_fabrica = None
+        self._cerrado = False
+        self.creados = 0
+
+    def _crear(self) -> SistemaExperto:
+        """Crea el sistema de un hilo (y la fábrica por defecto, si hace falta)"""
+        with self._lock:
+            if self._cerrado:
+                raise RuntimeError("El registro está cerrado")
+            if self._fabrica is None:
+                self._fabrica = FabricaSistemas()
+                # La fábrica propia se cierra con el registro o al salir del proceso
+                self._cerrar_fabrica = weakref.finalize(self, self._fabrica.cerrar)
+            fabrica = self._fabrica
+        sistema = fabrica()
+        with self._lock:
+            self.creados += 1
+            self._activos.add(sistema)
+        return sistema
+
+    def obtener(self) -> SistemaExperto:
+        """Sistema del hilo actual"""
+        sistema = getattr(self._local, 'sistema', None)
+        if sistema is None:
+            sistema = self._local.sistema = self._crear()
+        return sistema
+
+    def evaluar(self, perfil: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Evalúa un perfil con el sistema del hilo actual
+
+        Returns:
+            Dict con las recomendaciones y los mensajes activados
+        """
+        sistema = self.obtener()
+        sistema.insertar_hechos(**perfil)
+        sistema.ejecutar_inferencia()
+        return {
+            'recomendaciones': sistema.obtener_resultado(),
+            'mensajes': list(sistema.mensajes_activados)
+        }
+
+    def descartar(self) -> None:
+        """Olvida el sistema del hilo actual; el siguiente obtener() crea otro"""
+        self._local.sistema = None
+
+    def cerrar(self) -> None:
+        """
+        Cierra el registro y la fábrica creada por él (no una fábrica indicada)
+
+        Los hilos que ya tienen sistema lo siguen usando; los que lo piden
+        por primera vez reciben RuntimeError.
+        """
+        with self._lock:
+            self._cerrado = True
+            if self._cerrar_fabrica is not None:
+                self._cerrar_fabrica()
+                self._cerrar_fabrica = None
+                self._fabrica = None
+
+    @property
+    def activos(self) -> int:
+        """Sistemas vivos (los de hilos terminados se liberan con el hilo)"""
+        with self._lock:
+            return len(self._activos)
+
+
+_registro_compartido = None
+_lock_compartido = threading.Lock()
+
+
+def registro_compartido() -> RegistroPorHilo:
+    """Registro común del proceso"""
+    global _registro_compartido
+    with _lock_compartido:
+        if _registro_compartido is None:
+            _registro_compartido = RegistroPorHilo()
+        return _registro_compartido
+
+
+def sistema_del_hilo() -> SistemaExperto:
+    """SistemaExperto del hilo actual en el registro común"""
+    return registro_compartido().obtener()
@@ -0,0 +1,306 @@
+"""
+Resultados Compactos para Lotes
+===============================
+
+Este módulo define una representación columnar de los resultados de
+evaluaciones por lotes, pensada para millones de perfiles:
+
+- Recomendaciones del sistema experto como máscara de bits uint8
+- Nivel de inversión del sistema difuso como float32
+- Etiqueta lingüística como código uint8
+
+Cada resultado ocupa 6 bytes frente a los cientos de bytes de un dict de
+siete claves con cadenas o del texto unido de obtener_resultado().
+
+También incluye un formato de archivo binario columnar (.sfrc) para
+guardar y cargar los lotes sin conversión.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import struct
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+
+# Recomendaciones del sistema experto en orden de bit (bit 0 = ahorro-bajo)
+RECOMENDACIONES = ('ahorro-bajo', 'deuda-alta', 'sin-emergencia', 'ocio-excesivo', 'puede-invertir')
+
+# Hecho de mensaje generado por cada recomendación
+MENSAJE_A_RECOMENDACION = {
+    'mensajeAhorro': 'ahorro-bajo',
+    'mensajeDeuda': 'deuda-alta',
+    'mensajeEmergencia': 'sin-emergencia',
+    'mensajeOcio': 'ocio-excesivo',
+    'mensajeInversion': 'puede-invertir',
+}
+
+BIT_RECOMENDACION = {nombre: 1 << i for i, nombre in enumerate(RECOMENDACIONES)}
+
+# Etiquetas lingüísticas del sistema difuso
+ETIQUETAS = ('Conservadora', 'Moderada', 'Agresiva')
+CODIGO_ETIQUETA = {etiqueta: i for i, etiqueta in enumerate(ETIQUETAS)}
+SIN_ETIQUETA = 255
+
+# Formato de archivo: cabecera + descriptores de columna + datos contiguos
+MAGIA = b'SFRC'
+VERSION_FORMATO = 1
+_CABECERA = struct.Struct('<4sBQB')
+_COLUMNAS = (('recomendaciones', np.dtype('<u1')),
+             ('nivel_inversion', np.dtype('<f4')),
+             ('etiqueta', np.dtype('<u1')))
+
+
+def mascara_recomendaciones(mensajes: Iterable[str]) -> int:
+    """
+    Convierte los hechos de mensaje activados en una máscara de bits
+
+    Args:
+        mensajes: Claves de mensaje (por ejemplo SistemaExperto.mensajes_activados)
+                  o nombres de recomendación
+
+    Returns:
+        int: Máscara con un bit por recomendación (los desconocidos se ignoran)
+    """
+    mascara = 0
+    for mensaje in mensajes:
+        nombre = MENSAJE_A_RECOMENDACION.get(mensaje, mensaje)
+        mascara |= BIT_RECOMENDACION.get(nombre, 0)
+    return mascara
+
+
+def codigo_etiqueta(etiqueta: Optional[str]) -> int:
+    """Convierte una etiqueta lingüística en su código (SIN_ETIQUETA si no existe)"""
+    return CODIGO_ETIQUETA.get(etiqueta, SIN_ETIQUETA)
+
+
+class FilaResultado:
+    """Vista de un único resultado compacto"""
+
+    __slots__ = ('recomendaciones', 'nivel_inversion', 'etiqueta_codigo')
+
+    def __init__(self, recomendaciones: int, nivel_inversion: float, etiqueta_codigo: int):
+        self.recomendaciones = recomendaciones
+        self.nivel_inversion = nivel_inversion
+        self.etiqueta_codigo = etiqueta_codigo
+
+    @property
+    def etiqueta(self) -> Optional[str]:
+        """Etiqueta lingüística (None si el perfil no tiene resultado difuso)"""
+        if self.etiqueta_codigo == SIN_ETIQUETA:
+            return None
+        return ETIQUETAS[self.etiqueta_codigo]
+
+    def tiene(self, recomendacion: str) -> bool:
+        """Indica si la recomendación está activada"""
+        return bool(self.recomendaciones & BIT_RECOMENDACION[recomendacion])
+
+    def lista_recomendaciones(self) -> List[str]:
+        """Retorna los nombres de las recomendaciones activadas"""
+        return [nombre for nombre in RECOMENDACIONES if self.tiene(nombre)]
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Expande la fila a un dict legible"""
+        return {
+            'recomendaciones': self.lista_recomendaciones(),
+            'nivel_inversion': round(self.nivel_inversion, 2),
+            'etiqueta': self.etiqueta,
+        }
+
+    def __repr__(self):
+        return (f"FilaResultado(recomendaciones={self.lista_recomendaciones()}, "
+                f"nivel_inversion={self.nivel_inversion:.2f}, etiqueta={self.etiqueta})")
+
+
+class ResultadosCompactos:
+    """
+    Resultados de un lote almacenados por columnas.
+
+    Las columnas crecen por duplicación al agregar filas, como una lista,
+    y pueden recortarse con compactar() al terminar el lote.
+    """
+
+    def __init__(self, capacidad: int = 1024):
+        """
+        Inicializa un lote vacío
+
+        Args:
+            capacidad: Número de filas reservadas inicialmente
+        """
+        capacidad = max(1, capacidad)
+        self.recomendaciones = np.zeros(capacidad, dtype=np.uint8)
+        self.nivel_inversion = np.zeros(capacidad, dtype=np.float32)
+        self.etiqueta = np.full(capacidad, SIN_ETIQUETA, dtype=np.uint8)
+        self._n = 0
+
+    @classmethod
+    def desde_columnas(cls, recomendaciones, nivel_inversion, etiqueta) -> 'ResultadosCompactos':
+        """
+        Crea un lote a partir de columnas ya calculadas
+
+        Args:
+            recomendaciones: Máscaras de bits
+            nivel_inversion: Niveles de inversión
+            etiqueta: Códigos de etiqueta
+
+        Returns:
+            ResultadosCompactos: Lote con las columnas convertidas a sus tipos
+        """
+        recomendaciones = np.asarray(recomendaciones, dtype=np.uint8)
+        nivel_inversion = np.asarray(nivel_inversion, dtype=np.float32)
+        etiqueta = np.asarray(etiqueta, dtype=np.uint8)
+        if not (len(recomendaciones) == len(nivel_inversion) == len(etiqueta)):
+            raise ValueError("Todas las columnas deben tener la misma longitud")
+
+        lote = cls.__new__(cls)
+        lote.recomendaciones = recomendaciones
+        lote.nivel_inversion = nivel_inversion
+        lote.etiqueta = etiqueta
+        lote._n = len(recomendaciones)
+        return lote
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _crecer(self) -> None:
+        """Duplica la capacidad de las columnas"""
+        capacidad = max(1, len(self.recomendaciones) * 2)
+        for nombre, relleno in (('recomendaciones', 0), ('nivel_inversion', 0), ('etiqueta', SIN_ETIQUETA)):
+            actual = getattr(self, nombre)
+            nueva = np.full(capacidad, relleno, dtype=actual.dtype)
+            nueva[:self._n] = actual[:self._n]
+            setattr(self, nombre, nueva)
+
+    def agregar(self, recomendaciones: int = 0, nivel_inversion: float = float('nan'),
+                etiqueta: Optional[str] = None) -> None:
+        """
+        Agrega un resultado al lote
+
+        Args:
+            recomendaciones: Máscara de bits de recomendaciones
+            nivel_inversion: Nivel de inversión (NaN si no hay resultado difuso)
+            etiqueta: Etiqueta lingüística
+        """
+        if self._n == len(self.recomendaciones):
+            self._crecer()
+        self.recomendaciones[self._n] = recomendaciones
+        self.nivel_inversion[self._n] = nivel_inversion
+        self.etiqueta[self._n] = codigo_etiqueta(etiqueta)
+        self._n += 1
+
+    def agregar_evaluacion(self, mensajes: Iterable[str] = (),
+                           resultado_difuso: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Agrega un resultado a partir de las salidas de los motores
+
+        Args:
+            mensajes: Claves de mensaje activadas en el sistema experto
+            resultado_difuso: Dict devuelto por evaluar_mamdani/evaluar_tsk
+        """
+        nivel = float('nan')
+        etiqueta = None
+        if resultado_difuso is not None and 'error' not in resultado_difuso:
+            nivel = resultado_difuso['nivel_inversion']
+            etiqueta = resultado_difuso['etiqueta']
+        self.agregar(mascara_recomendaciones(mensajes), nivel, etiqueta)
+
+    def compactar(self) -> None:
+        """Libera la capacidad reservada no usada"""
+        self.recomendaciones = self.recomendaciones[:self._n].copy()
+        self.nivel_inversion = self.nivel_inversion[:self._n].copy()
+        self.etiqueta = self.etiqueta[:self._n].copy()
+
+    def __getitem__(self, indice: int) -> FilaResultado:
+        if indice < 0:
+            indice += self._n
+        if not 0 <= indice < self._n:
+            raise IndexError("Índice fuera del lote")
+        return FilaResultado(int(self.recomendaciones[indice]),
+                             float(self.nivel_inversion[indice]),
+                             int(self.etiqueta[indice]))
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+    def filtrar(self, recomendacion: Optional[str] = None,
+                etiqueta: Optional[str] = None) -> np.ndarray:
+        """
+        Retorna los índices de las filas que cumplen los criterios
+
+        Args:
+            recomendacion: Recomendación que debe estar activada
+            etiqueta: Etiqueta lingüística requerida
+
+        Returns:
+            np.ndarray: Índices de las filas
+        """
+        mascara = np.ones(self._n, dtype=bool)
+        if recomendacion is not None:
+            mascara &= (self.recomendaciones[:self._n] & BIT_RECOMENDACION[recomendacion]) != 0
+        if etiqueta is not None:
+            mascara &= self.etiqueta[:self._n] == CODIGO_ETIQUETA[etiqueta]
+        return np.flatnonzero(mascara)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados por las filas usadas de las columnas"""
+        return self._n * sum(dtype.itemsize for _, dtype in _COLUMNAS)
+
+    def guardar(self, ruta: str) -> None:
+        """
+        Guarda el lote en formato binario columnar
+
+        Args:
+            ruta: Ruta del archivo (.sfrc)
+        """
+        with open(ruta, 'wb') as f:
+            f.write(_CABECERA.pack(MAGIA, VERSION_FORMATO, self._n, len(_COLUMNAS)))
+            for nombre, dtype in _COLUMNAS:
+                nombre_bytes = nombre.encode('ascii')
+                tipo_bytes = dtype.str.encode('ascii')
+                f.write(struct.pack('<B', len(nombre_bytes)) + nombre_bytes)
+                f.write(struct.pack('<B', len(tipo_bytes)) + tipo_bytes)
+            for nombre, dtype in _COLUMNAS:
+                f.write(getattr(self, nombre)[:self._n].astype(dtype, copy=False).tobytes())
+
+    @classmethod
+    def cargar(cls, ruta: str) -> 'ResultadosCompactos':
+        """
+        Carga un lote guardado con guardar()
+
+        Args:
+            ruta: Ruta del archivo (.sfrc)
+
+        Returns:
+            ResultadosCompactos: Lote cargado
+        """
+        with open(ruta, 'rb') as f:
+            datos = f.read()
+
+        magia, version, n, num_columnas = _CABECERA.unpack_from(datos, 0)
+        if magia != MAGIA:
+            raise ValueError("El archivo no es un lote de resultados compactos")
+        if version != VERSION_FORMATO:
+            raise ValueError(f"Versión de formato no soportada: {version}")
+
+        posicion = _CABECERA.size
+        descriptores = []
+        for _ in range(num_columnas):
+            longitud = datos[posicion]
+            nombre = datos[posicion + 1:posicion + 1 + longitud].decode('ascii')
+            posicion += 1 + longitud
+            longitud = datos[posicion]
+            dtype = np.dtype(datos[posicion + 1:posicion + 1 + longitud].decode('ascii'))
+            posicion += 1 + longitud
+            descriptores.append((nombre, dtype))
+
+        columnas = {}
+        for nombre, dtype in descriptores:
+            columnas[nombre] = np.frombuffer(datos, dtype=dtype, count=n, offset=posicion).copy()
+            posicion += n * dtype.itemsize
+
+        return cls.desde_columnas(columnas['recomendaciones'],
+                                  columnas['nivel_inversion'],
+                                  columnas['etiqueta'])
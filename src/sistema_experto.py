@@ -1,7 +1,295 @@
 import clips
+import math
 import sys
 import io
-from typing import Dict, Any, Optional
+from time import perf_counter
+from typing import Callable, Dict, Any, Iterable, List, Optional
+
+try:
+    from clips._clips import lib as _lib_clips
+except ImportError:
+    _lib_clips = None
+
+from .trazas import RouterTraza
+
+# Umbrales de la política financiera (fracciones de ingresos/gastos y meses)
+POLITICA_FINANCIERA = {
+    'ahorro-minimo': 0.10,      # ahorro < ingresos * 10%       → ahorro-bajo
+    'deuda-maxima': 0.40,       # deudas > ingresos * 40%       → deuda-alta
+    'meses-emergencia': 3,      # ahorro < gastos * 3           → sin-emergencia
+    'ocio-maximo': 0.30,        # ocio > gastos * 30%           → ocio-excesivo
+    'ahorro-inversion': 0.15,   # ahorro >= ingresos * 15% y
+    'deuda-inversion': 0.20     # deudas < ingresos * 20%       → puede-invertir
+}
+
+
+def mensajes_financieros(politica: Dict[str, float]) -> Dict[str, str]:
+    """
+    Textos de los hechos de mensaje de las reglas predefinidas con los
+    umbrales de una política
+    
+    Args:
+        politica: Umbrales como en POLITICA_FINANCIERA
+        
+    Returns:
+        Dict relación → texto
+    """
+    def porcentaje(fraccion):
+        return f"{fraccion * 100:g}%"
+    
+    meses = politica['meses-emergencia']
+    return {
+        'mensajeAhorro': f"- Estas ahorrando menos del {porcentaje(politica['ahorro-minimo'])} de tus ingresos.\n",
+        'mensajeDeuda': (f"- Tus deudas superan el {porcentaje(politica['deuda-maxima'])} de tus ingresos. "
+                         "Reduce o renegocia.\n"),
+        'mensajeEmergencia': (f"- No tienes un fondo de emergencia de al menos {meses:g} "
+                              f"{'mes' if meses == 1 else 'meses'} de gastos.\n"),
+        'mensajeOcio': (f"- Gastas mas del {porcentaje(politica['ocio-maximo'])} de tus gastos en ocio. "
+                        "Intenta controlarlo.\n"),
+        'mensajeInversion': "- Estas en buena posición para considerar inversiones.\n"
+    }
+
+
+# Textos de los hechos de mensaje que generan las reglas financieras predefinidas
+MENSAJES_FINANCIEROS = mensajes_financieros(POLITICA_FINANCIERA)
+
+# Modos de inserción de hechos de insertar_hechos
+MODO_PLANTILLA = 'plantilla'
+MODO_CADENA = 'cadena'
+
+# Plantillas de hechos de soporte que no se muestran en listar_hechos_actuales
+PLANTILLAS_INTERNAS = ('perfil-financiero', 'politica-financiera')
+
+# Límite por defecto de la salida de printout capturada en cada evaluación
+LIMITE_SALIDA_POR_DEFECTO = 64 * 1024
+MARCADOR_TRUNCADO = "\n[... salida truncada ...]\n"
+
+# None hasta comprobar si clipspy libera los hechos que envuelve
+_LIBERACION_MANUAL = None
+
+
+def _liberacion_manual() -> bool:
+    """
+    Indica si hay que liberar a mano los hechos envueltos por clipspy
+    
+    clipspy 1.0.x retiene cada hecho que pasa por Python (RetainFact) pero
+    su Fact.__del__ llama a ReleaseFact con un argumento de más y el error
+    se ignora, así que CLIPS nunca libera esos hechos tras un reset: la
+    memoria y el coste de cada reset crecen con cada evaluación. Se
+    comprueba una vez midiendo (mem-used) en un entorno de prueba.
+    """
+    global _LIBERACION_MANUAL
+    if _LIBERACION_MANUAL is None:
+        if _lib_clips is None:
+            _LIBERACION_MANUAL = False
+        else:
+            entorno = clips.Environment()
+            # Se guardan los hechos para liberarlos antes de destruir el
+            # entorno; si no, CLIPS avisa en stdout (ENVRNMNT8) de memoria
+            # sin liberar al destruirlo
+            sondas = []
+            
+            def ciclos(n):
+                for _ in range(n):
+                    entorno.reset()
+                    sondas.append(entorno.assert_string("(sonda)")._fact)
+            
+            ciclos(10)
+            antes = entorno.eval('(mem-used)')
+            ciclos(50)
+            _LIBERACION_MANUAL = entorno.eval('(mem-used)') - antes > 1000
+            if _LIBERACION_MANUAL:
+                for hecho in sondas:
+                    _lib_clips.ReleaseFact(hecho)
+            entorno.clear()
+    return _LIBERACION_MANUAL
+
+
+def liberar_hechos(hechos: Iterable) -> None:
+    """
+    Libera en CLIPS hechos envueltos por clipspy que ya no se van a usar
+    
+    Solo actúa si la versión de clipspy no los libera por sí misma. Los
+    objetos no deben usarse después de llamar a esta función.
+    
+    Args:
+        hechos: Hechos de clipspy (los None se ignoran)
+    """
+    if not _liberacion_manual():
+        return
+    for hecho in hechos:
+        if hecho is not None:
+            _lib_clips.ReleaseFact(hecho._fact)
+
+
+class CapturaRouter(clips.Router):
+    """
+    Router CLIPS que captura la salida de printout de una evaluación.
+    
+    La salida se acumula en una lista de fragmentos (sin concatenar en cada
+    escritura) hasta un límite de bytes; a partir de ahí se descarta y se
+    añade una única vez el marcador de truncado. Con un callback, cada
+    fragmento se entrega según se escribe y no se guarda nada.
+    
+    Como los demás routers de este paquete, solo se registra mientras se
+    ejecutan las reglas y cada evaluación empieza con el buffer vacío.
+    """
+    
+    PRIORIDAD = 30
+    
+    def __init__(self, limite_bytes: Optional[int] = LIMITE_SALIDA_POR_DEFECTO,
+                 marcador: str = MARCADOR_TRUNCADO,
+                 callback: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            limite_bytes: Bytes UTF-8 máximos por evaluación (None sin límite)
+            marcador: Texto añadido al final cuando se trunca la salida
+            callback: Función que recibe cada fragmento en modo streaming
+        """
+        super().__init__("captura", self.PRIORIDAD)
+        if limite_bytes is not None and limite_bytes < 0:
+            raise ValueError("El límite de bytes no puede ser negativo")
+        self.limite_bytes = limite_bytes
+        self.marcador = marcador
+        self.callback = callback
+        self.activo = False
+        self.truncado = False
+        self.bytes_capturados = 0
+        self.bytes_descartados = 0
+        self._fragmentos: List[str] = []
+    
+    def query(self, logical_name: str) -> bool:
+        return self.activo and logical_name == "stdout"
+    
+    def write(self, logical_name: str, text: str) -> None:
+        if self.callback is not None:
+            self.callback(text)
+            return
+        
+        tamano = len(text.encode('utf-8'))
+        if self.truncado:
+            self.bytes_descartados += tamano
+            return
+        
+        limite = self.limite_bytes
+        if limite is not None and self.bytes_capturados + tamano > limite:
+            disponible = limite - self.bytes_capturados
+            parcial = text.encode('utf-8')[:disponible].decode('utf-8', errors='ignore')
+            if parcial:
+                self._fragmentos.append(parcial)
+            self._fragmentos.append(self.marcador)
+            self.bytes_capturados += len(parcial.encode('utf-8'))
+            self.bytes_descartados += tamano - len(parcial.encode('utf-8'))
+            self.truncado = True
+            return
+        
+        self._fragmentos.append(text)
+        self.bytes_capturados += tamano
+    
+    def iniciar(self) -> None:
+        """Empieza una evaluación con el buffer vacío"""
+        self._fragmentos = []
+        self.bytes_capturados = 0
+        self.bytes_descartados = 0
+        self.truncado = False
+        self.activo = True
+    
+    def detener(self) -> str:
+        """
+        Deja de capturar y retorna la salida de la evaluación
+        
+        Returns:
+            str: Salida capturada (vacía en modo streaming)
+        """
+        self.activo = False
+        salida = "".join(self._fragmentos)
+        self._fragmentos = []
+        return salida
+
+
+class RegistroMensajes:
+    """
+    Índice relación → texto de los hechos de mensaje declarados por las reglas.
+    
+    Las reglas declaran al cargarse qué hechos de mensaje generan y con qué
+    texto se muestran. La extracción consulta el índice por el nombre de la
+    relación de cada hecho, sin convertir los hechos a texto.
+    """
+    
+    # Relación de compatibilidad: (mensaje "texto libre")
+    RELACION_TEXTO_LIBRE = 'mensaje'
+    
+    def __init__(self, mensajes: Optional[Dict[str, str]] = None):
+        """
+        Inicializa el registro
+        
+        Args:
+            mensajes: Dict opcional relación → texto a registrar
+        """
+        self._textos: Dict[str, str] = {}
+        if mensajes:
+            self.registrar_varios(mensajes)
+    
+    def registrar(self, relacion: str, texto: str) -> None:
+        """
+        Registra (o reemplaza) el texto de un hecho de mensaje
+        
+        Args:
+            relacion: Nombre de la relación del hecho, por ejemplo 'mensajeAhorro'
+            texto: Texto que se muestra cuando el hecho está presente
+        """
+        if not relacion or any(c in relacion for c in ' ()"\t\n'):
+            raise ValueError(f"Nombre de relación inválido: {relacion!r}")
+        if relacion == self.RELACION_TEXTO_LIBRE:
+            raise ValueError(f"'{relacion}' está reservada para mensajes de texto libre")
+        self._textos[relacion] = texto
+    
+    def registrar_varios(self, mensajes: Dict[str, str]) -> None:
+        """Registra varios mensajes a la vez"""
+        for relacion, texto in mensajes.items():
+            self.registrar(relacion, texto)
+    
+    def texto(self, relacion: str) -> Optional[str]:
+        """Retorna el texto registrado para una relación (None si no existe)"""
+        return self._textos.get(relacion)
+    
+    def copiar(self) -> 'RegistroMensajes':
+        """Retorna una copia independiente del registro"""
+        return RegistroMensajes(self._textos)
+    
+    def __contains__(self, relacion: str) -> bool:
+        return relacion in self._textos
+    
+    def __len__(self) -> int:
+        return len(self._textos)
+    
+    def extraer(self, hechos) -> tuple:
+        """
+        Extrae los mensajes de los hechos presentes, en orden de hechos
+        
+        Args:
+            hechos: Iterable de hechos de clipspy
+            
+        Returns:
+            Tuple (textos, relaciones) con los textos de los mensajes y las
+            relaciones registradas que los produjeron
+        """
+        textos = []
+        relaciones = []
+        indice = self._textos
+        for hecho in hechos:
+            relacion = hecho.template.name
+            texto = indice.get(relacion)
+            if texto is not None:
+                textos.append(texto)
+                relaciones.append(relacion)
+            elif relacion == self.RELACION_TEXTO_LIBRE:
+                # Compatibilidad: (mensaje "texto")
+                valores = list(hecho)
+                if valores:
+                    textos.append(str(valores[0]))
+        return textos, relaciones
+
 
 class SistemaExperto:
     """
@@ -9,33 +297,244 @@ class SistemaExperto:
     Encapsula toda la lógica de reglas, hechos y inferencia.
     """
     
-    def __init__(self):
-        """Inicializa el sistema experto CLIPS"""
+    def __init__(self, metricas=None, trazador=None, modo_hechos: str = MODO_PLANTILLA,
+                 limite_salida: Optional[int] = LIMITE_SALIDA_POR_DEFECTO,
+                 callback_salida: Optional[Callable[[str], None]] = None):
+        """
+        Inicializa el sistema experto CLIPS
+        
+        Args:
+            metricas: RegistroMetricas opcional para instrumentar cada fase
+            trazador: TrazadorMuestreo opcional para registrar las reglas disparadas
+            modo_hechos: 'plantilla' asserta el perfil como hecho perfil-financiero
+                         y deriva los hechos con reglas CLIPS; 'cadena' evalúa
+                         los umbrales en Python y usa assert_string
+            limite_salida: Bytes máximos de salida de printout capturados por
+                           evaluación (None sin límite)
+            callback_salida: Función que recibe la salida de printout según se
+                             escribe, en lugar de acumularla en el resultado
+        """
+        self._inicializar(metricas, trazador, modo_hechos, limite_salida, callback_salida)
+        self._cargar_plantillas()
+        self._cargar_reglas_financieras()
+    
+    def _inicializar(self, metricas, trazador, modo_hechos: str,
+                     limite_salida: Optional[int], callback_salida: Optional[Callable[[str], None]]):
+        """Estado de Python y entorno CLIPS vacío, sin construcciones"""
+        if modo_hechos not in (MODO_PLANTILLA, MODO_CADENA):
+            raise ValueError(f"Modo de hechos desconocido: {modo_hechos}")
+        self.modo_hechos = modo_hechos
+        self.politica = dict(POLITICA_FINANCIERA)
+        self.metricas = metricas
+        self.trazador = trazador
+        self._traza_actual = None
+        self._router_traza = None
+        self._imagen_binaria = False
+        self._textos_imagen = None
         self.sistema = clips.Environment()
         self.sistema.clear()
         self.resultado_capturado = ""
+        self.salida_capturada = ""
+        self.mensajes_activados = []
+        self.registro_mensajes = RegistroMensajes(MENSAJES_FINANCIEROS)
         self.router_captura = None
-        self._configurar_router()
-        self._cargar_reglas_financieras()
+        self._configurar_router(limite_salida, callback_salida)
     
-    def _configurar_router(self):
-        """Configura un router personalizado para capturar la salida de printout"""
-        class CapturaRouter(clips.Router):
-            def __init__(self, sistema_experto):
-                super().__init__("captura", ["stdout", "stderr"])
-                self.sistema_experto = sistema_experto
-            
-            def query(self, logical_name):
-                return True
+    @classmethod
+    def desde_imagen(cls, ruta_imagen: str, politica: Optional[Dict[str, Any]] = None,
+                     registro_mensajes: Optional['RegistroMensajes'] = None,
+                     textos: Optional[Dict[tuple, str]] = None, metricas=None, trazador=None,
+                     modo_hechos: str = MODO_PLANTILLA,
+                     limite_salida: Optional[int] = LIMITE_SALIDA_POR_DEFECTO,
+                     callback_salida: Optional[Callable[[str], None]] = None) -> 'SistemaExperto':
+        """
+        Crea un sistema cargando las construcciones desde una imagen binaria (bload)
+        
+        Evita analizar el texto de plantillas y reglas. CLIPS no admite nuevas
+        construcciones mientras hay una imagen binaria cargada, así que el
+        sistema creado no acepta cargar_reglas ni configurar_politica.
+        
+        Args:
+            ruta_imagen: Fichero generado con bsave desde un sistema ya construido
+            politica: Umbrales de la política guardada en la imagen
+            registro_mensajes: Mensajes del sistema de origen (se copia)
+            textos: Texto de las reglas y deffacts del sistema de origen, de
+                    textos_construcciones() (la imagen binaria no lo guarda)
+            metricas, trazador, modo_hechos, limite_salida, callback_salida:
+                Como en el constructor
             
-            def print(self, logical_name, text):
-                self.sistema_experto.resultado_capturado += text
+        Returns:
+            SistemaExperto listo para evaluar
+        """
+        sistema = cls.__new__(cls)
+        sistema._inicializar(metricas, trazador, modo_hechos, limite_salida, callback_salida)
+        sistema.sistema.load(ruta_imagen, binary=True)
+        sistema._imagen_binaria = True
+        sistema._textos_imagen = dict(textos) if textos is not None else {}
+        if registro_mensajes is not None:
+            sistema.registro_mensajes = registro_mensajes.copiar()
+        if politica is not None:
+            anterior = sistema.politica
+            sistema.politica = dict(politica)
+            if registro_mensajes is None:
+                sistema._actualizar_mensajes(anterior)
+        sistema._plantilla_perfil = sistema.sistema.find_template('perfil-financiero')
+        return sistema
+    
+    def _configurar_router(self, limite_salida: Optional[int] = LIMITE_SALIDA_POR_DEFECTO,
+                           callback_salida: Optional[Callable[[str], None]] = None):
+        """Configura un router personalizado para capturar la salida de printout"""
+        self.router_captura = CapturaRouter(limite_salida, callback=callback_salida)
+    
+    def _cargar_plantillas(self):
+        """Define las plantillas del perfil y de la política, y la política inicial"""
+        self.sistema.build("""
+            (deftemplate perfil-financiero
+                (slot ingresos (type NUMBER) (default 0))
+                (slot ahorro (type NUMBER) (default 0))
+                (slot gastos (type NUMBER) (default 0))
+                (slot deudas (type NUMBER) (default 0))
+                (slot ocio (type NUMBER) (default 0)))
+            """)
+        self.sistema.build("""
+            (deftemplate politica-financiera
+                (slot ahorro-minimo (type NUMBER))
+                (slot deuda-maxima (type NUMBER))
+                (slot meses-emergencia (type NUMBER))
+                (slot ocio-maximo (type NUMBER))
+                (slot ahorro-inversion (type NUMBER))
+                (slot deuda-inversion (type NUMBER)))
+            """)
+        self._definir_politica()
+        self._plantilla_perfil = self.sistema.find_template('perfil-financiero')
+    
+    @staticmethod
+    def _texto_politica(politica: Dict[str, float]) -> str:
+        """Texto del deffacts politica-inicial con los umbrales como floats de CLIPS"""
+        slots = " ".join(f"({nombre} {float(valor)!r})" for nombre, valor in politica.items())
+        return f"(deffacts politica-inicial (politica-financiera {slots}))"
+    
+    def _definir_politica(self, politica: Optional[Dict[str, float]] = None):
+        """
+        (Re)define el deffacts con la política indicada (por defecto la actual);
+        se aplica en cada reset
+        
+        Si el deffacts nuevo no se puede construir se vuelve a definir el de
+        self.politica: sin él ninguna regla derivar-* se activaría.
+        """
+        existente = self.sistema.find_defined_facts('politica-inicial') if self._existe_politica() else None
+        if existente is not None:
+            existente.undefine()
+        try:
+            self.sistema.build(self._texto_politica(self.politica if politica is None else politica))
+        except clips.CLIPSError:
+            if politica is not None:
+                self.sistema.build(self._texto_politica(self.politica))
+            raise
+    
+    def _existe_politica(self) -> bool:
+        """Indica si el deffacts de la política ya está definido"""
+        return any(d.name == 'politica-inicial' for d in self.sistema.defined_facts())
+    
+    def configurar_politica(self, **umbrales) -> None:
+        """
+        Cambia los umbrales de la política financiera sin tocar el código
+        
+        Los cambios se aplican a partir de la siguiente llamada a insertar_hechos,
+        junto con los textos de los mensajes predefinidos que citan los
+        umbrales (salvo los que se hayan personalizado). Todos los umbrales se validan y se convierten a float antes de
+        aplicar ninguno: ante un error la política anterior sigue vigente.
+        
+        Args:
+            **umbrales: Umbrales a cambiar con guiones bajos en lugar de guiones,
+                        por ejemplo ahorro_minimo=0.12, meses_emergencia=6
+        
+        Raises:
+            ValueError: Si algún umbral es desconocido o no es un número finito
+        """
+        if self._imagen_binaria:
+            raise RuntimeError("La política de un sistema cargado desde una imagen binaria no se puede cambiar")
+        desconocidos = {nombre.replace('_', '-') for nombre in umbrales} - set(self.politica)
+        if desconocidos:
+            raise ValueError(f"Umbrales desconocidos: {sorted(desconocidos)}")
+        nuevos = {}
+        for nombre, valor in umbrales.items():
+            try:
+                numero = float(valor)
+            except (TypeError, ValueError):
+                raise ValueError(f"El umbral {nombre} debe ser numérico: {valor!r}") from None
+            if not math.isfinite(numero):
+                raise ValueError(f"El umbral {nombre} debe ser finito: {valor!r}")
+            nuevos[nombre.replace('_', '-')] = numero
+        politica = dict(self.politica)
+        politica.update(nuevos)
+        self._definir_politica(politica)
+        anterior, self.politica = self.politica, politica
+        self._actualizar_mensajes(anterior)
+    
+    def _actualizar_mensajes(self, anterior: Dict[str, float]) -> None:
+        """
+        Rehace los textos predefinidos con los umbrales de self.politica
         
-        self.router_captura = CapturaRouter(self)
+        Solo se sustituyen los textos que siguen siendo los generados con la
+        política anterior; los registrados por el usuario se conservan.
+        """
+        previos = mensajes_financieros(anterior)
+        for relacion, texto in mensajes_financieros(self.politica).items():
+            if self.registro_mensajes.texto(relacion) == previos[relacion]:
+                self.registro_mensajes.registrar(relacion, texto)
     
     def _cargar_reglas_financieras(self):
         """Carga las reglas predefinidas del sistema financiero usando assert en lugar de printout"""
-        reglas = [
+        # Reglas de derivación: umbrales de la política sobre el perfil. La
+        # prioridad decreciente fija el orden de los hechos derivados (el mismo
+        # que el de la inserción desde Python)
+        derivaciones = [
+            """
+            (defrule derivar-ahorro-bajo
+                (declare (salience 15))
+                (politica-financiera (ahorro-minimo ?p))
+                (perfil-financiero (ingresos ?i) (ahorro ?a&:(< ?a (* ?i ?p))))
+                =>
+                (assert (ahorro-bajo)))
+            """,
+            """
+            (defrule derivar-deuda-alta
+                (declare (salience 14))
+                (politica-financiera (deuda-maxima ?p))
+                (perfil-financiero (ingresos ?i) (deudas ?d&:(> ?d (* ?i ?p))))
+                =>
+                (assert (deuda-alta)))
+            """,
+            """
+            (defrule derivar-sin-emergencia
+                (declare (salience 13))
+                (politica-financiera (meses-emergencia ?m))
+                (perfil-financiero (gastos ?g) (ahorro ?a&:(< ?a (* ?g ?m))))
+                =>
+                (assert (sin-emergencia)))
+            """,
+            """
+            (defrule derivar-ocio-excesivo
+                (declare (salience 12))
+                (politica-financiera (ocio-maximo ?p))
+                (perfil-financiero (gastos ?g) (ocio ?o&:(> ?o (* ?g ?p))))
+                =>
+                (assert (ocio-excesivo)))
+            """,
+            """
+            (defrule derivar-puede-invertir
+                (declare (salience 11))
+                (politica-financiera (ahorro-inversion ?pa) (deuda-inversion ?pd))
+                (perfil-financiero (ingresos ?i)
+                                   (ahorro ?a&:(>= ?a (* ?i ?pa)))
+                                   (deudas ?d&:(< ?d (* ?i ?pd))))
+                =>
+                (assert (puede-invertir)))
+            """
+        ]
+        
+        reglas = derivaciones + [
             """
             (defrule reglaAhorro
                 (ahorro-bajo)
@@ -71,12 +570,14 @@ class SistemaExperto:
         for regla in reglas:
             self.sistema.build(regla)
     
-    def cargar_reglas(self, reglas_str: str) -> bool:
+    def cargar_reglas(self, reglas_str: str, mensajes: Optional[Dict[str, str]] = None) -> bool:
         """
         Carga reglas adicionales desde un string
         
         Args:
             reglas_str: String con las reglas CLIPS a cargar
+            mensajes: Dict opcional con los hechos de mensaje que generan las
+                      reglas y su texto, por ejemplo {'mensajeGastoAlto': "- ..."}
             
         Returns:
             bool: True si se cargaron correctamente, False en caso contrario
@@ -87,8 +588,12 @@ class SistemaExperto:
                 regla = regla.strip()
                 if regla and regla.startswith("(defrule"):
                     self.sistema.build(regla)
+            if mensajes:
+                self.registro_mensajes.registrar_varios(mensajes)
             return True
         except Exception as e:
+            if self.metricas is not None:
+                self.metricas.incrementar('errores_total', motor='experto', operacion='cargar_reglas')
             print(f"Error al cargar reglas: {e}")
             return False
     
@@ -100,86 +605,216 @@ class SistemaExperto:
             **kwargs: Parámetros con los valores financieros
                      (ingresos, ahorro, gastos, deudas, ocio)
         """
+        metricas = self.metricas
+        
         # Limpiar hechos anteriores
+        inicio = perf_counter() if metricas is not None else 0.0
         self.sistema.reset()
         self.resultado_capturado = ""
+        self.salida_capturada = ""
+        self.mensajes_activados = []
+        if metricas is not None:
+            fin = perf_counter()
+            metricas.observar('fase_segundos', fin - inicio, motor='experto', fase='reset')
+            inicio = fin
         
-        # Extraer valores
-        ingresos = kwargs.get('ingresos', 0)
-        ahorro = kwargs.get('ahorro', 0)
-        gastos = kwargs.get('gastos', 0)
-        deudas = kwargs.get('deudas', 0)
-        ocio = kwargs.get('ocio', 0)
-        
-        # Insertar hechos según condiciones
-        if ahorro < ingresos * 0.10:
-            self.sistema.assert_string("(ahorro-bajo)")
+        # Extraer valores (como float: los slots de la plantilla no aceptan
+        # tipos de numpy, bool ni cadenas numéricas)
+        ingresos = float(kwargs.get('ingresos', 0))
+        ahorro = float(kwargs.get('ahorro', 0))
+        gastos = float(kwargs.get('gastos', 0))
+        deudas = float(kwargs.get('deudas', 0))
+        ocio = float(kwargs.get('ocio', 0))
         
-        if deudas > ingresos * 0.40:
-            self.sistema.assert_string("(deuda-alta)")
+        # Decidir si esta evaluación se traza
+        if self.trazador is not None:
+            self._traza_actual = None
+            if self.trazador.debe_muestrear({'motor': 'experto', 'entradas': kwargs}):
+                self._traza_actual = {'motor': 'experto', 'entradas': dict(kwargs)}
         
-        if ahorro < gastos * 3:
-            self.sistema.assert_string("(sin-emergencia)")
-        
-        if ocio > gastos * 0.30:
-            self.sistema.assert_string("(ocio-excesivo)")
+        if self.modo_hechos == MODO_PLANTILLA:
+            # Un único hecho con el perfil; las reglas derivar-* evalúan los umbrales
+            hecho = self._plantilla_perfil.assert_fact(
+                ingresos=ingresos, ahorro=ahorro, gastos=gastos, deudas=deudas, ocio=ocio
+            )
+            liberar_hechos((hecho,))
+            fase = 'assert_fact'
+        else:
+            # Insertar hechos según condiciones
+            politica = self.politica
+            hechos = []
+            if ahorro < ingresos * politica['ahorro-minimo']:
+                hechos.append(self.sistema.assert_string("(ahorro-bajo)"))
+            
+            if deudas > ingresos * politica['deuda-maxima']:
+                hechos.append(self.sistema.assert_string("(deuda-alta)"))
+            
+            if ahorro < gastos * politica['meses-emergencia']:
+                hechos.append(self.sistema.assert_string("(sin-emergencia)"))
+            
+            if ocio > gastos * politica['ocio-maximo']:
+                hechos.append(self.sistema.assert_string("(ocio-excesivo)"))
+            
+            if ahorro >= ingresos * politica['ahorro-inversion'] and deudas < ingresos * politica['deuda-inversion']:
+                hechos.append(self.sistema.assert_string("(puede-invertir)"))
+            liberar_hechos(hechos)
+            fase = 'assert_string'
         
-        if ahorro >= ingresos * 0.15 and deudas < ingresos * 0.20:
-            self.sistema.assert_string("(puede-invertir)")
+        if metricas is not None:
+            metricas.observar('fase_segundos', perf_counter() - inicio, motor='experto', fase=fase)
+            metricas.incrementar('llamadas_total', motor='experto', operacion='insertar_hechos')
     
     def ejecutar_inferencia(self) -> None:
         """Ejecuta el motor de inferencia CLIPS"""
+        try:
+            self._inferir()
+        except Exception as e:
+            self.resultado_capturado = f"Error en la inferencia: {e}"
+    
+    def evaluar(self, perfil: Dict[str, float], limite: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Inserta un perfil, ejecuta la inferencia y retorna el resultado
+        
+        A diferencia de ejecutar_inferencia, los errores de la inferencia se
+        propagan en lugar de quedar como texto del resultado.
+        
+        Args:
+            perfil: Dict con ingresos, ahorro, gastos, deudas y ocio
+            limite: Disparos máximos (None sin límite)
+            
+        Returns:
+            Dict con 'recomendaciones', 'mensajes', 'disparadas' y
+            'pendientes' (activaciones que quedan en la agenda; solo
+            distinto de 0 si se alcanzó el límite)
+        """
+        self.insertar_hechos(**perfil)
+        disparadas = self._inferir(limite)
+        return {
+            'recomendaciones': self.obtener_resultado(),
+            'mensajes': list(self.mensajes_activados),
+            'disparadas': disparadas,
+            'pendientes': sum(1 for _ in self.sistema.activations())
+        }
+    
+    def _inferir(self, limite: Optional[int] = None) -> int:
+        """
+        Ejecuta las reglas y procesa los mensajes; los errores se propagan
+        
+        Args:
+            limite: Disparos máximos (None sin límite)
+            
+        Returns:
+            int: Número de reglas disparadas
+        """
+        metricas = self.metricas
+        traza = self._traza_actual
+        self._traza_actual = None
         try:
             # Ejecutar el motor de inferencia
-            self.sistema.run()
+            inicio = perf_counter() if metricas is not None else 0.0
+            disparadas = self._ejecutar_con_captura(traza, limite)
+            if traza is not None:
+                # Tras la inferencia: en modo plantilla los hechos derivados
+                # (ahorro-bajo, deuda-alta...) solo existen después de run
+                traza['hechos'] = self.listar_hechos_actuales(incluir_internos=True)
+            if metricas is not None:
+                fin = perf_counter()
+                metricas.observar('fase_segundos', fin - inicio, motor='experto', fase='run')
+                metricas.incrementar('reglas_disparadas_total', disparadas, motor='experto')
+                inicio = fin
             
             # Procesar los hechos de mensaje generados
             self._procesar_mensajes()
             
-        except Exception as e:
-            self.resultado_capturado = f"Error en la inferencia: {e}"
+            if metricas is not None:
+                metricas.observar('fase_segundos', perf_counter() - inicio, motor='experto', fase='procesar_mensajes')
+                metricas.incrementar('llamadas_total', motor='experto', operacion='ejecutar_inferencia')
+            
+            if traza is not None:
+                traza['resultado'] = self.obtener_resultado()
+                self.trazador.registrar(traza)
+            return disparadas
+            
+        except Exception:
+            if metricas is not None:
+                metricas.incrementar('errores_total', motor='experto', operacion='ejecutar_inferencia')
+            raise
+    
+    def _ejecutar_con_captura(self, traza: Optional[Dict[str, Any]], limite: Optional[int] = None) -> int:
+        """
+        Ejecuta las reglas con el router de captura registrado
+        
+        Args:
+            traza: Traza en construcción, o None si la evaluación no se traza
+            limite: Disparos máximos (None sin límite)
+            
+        Returns:
+            int: Número de reglas disparadas
+        """
+        captura = self.router_captura
+        self.sistema.add_router(captura)
+        captura.iniciar()
+        try:
+            if traza is None:
+                return self.sistema.run(limite)
+            return self._ejecutar_con_traza(traza, limite)
+        finally:
+            self.salida_capturada = captura.detener()
+            captura.delete()
+    
+    def _ejecutar_con_traza(self, traza: Dict[str, Any], limite: Optional[int] = None) -> int:
+        """
+        Ejecuta la inferencia capturando las reglas disparadas con (watch rules)
+        
+        Args:
+            traza: Traza en construcción donde se anotan los disparos
+            limite: Disparos máximos (None sin límite)
+            
+        Returns:
+            int: Número de reglas disparadas
+        """
+        if self._router_traza is None:
+            self._router_traza = RouterTraza()
+        
+        # El router solo se registra durante la ejecución trazada: CLIPS consulta
+        # a todos los routers en cada escritura, incluidas las internas
+        inicio = perf_counter()
+        self.sistema.add_router(self._router_traza)
+        self._router_traza.iniciar()
+        self.sistema.call('watch', clips.Symbol('rules'))
+        try:
+            disparadas = self.sistema.run(limite)
+        finally:
+            self.sistema.call('unwatch', clips.Symbol('rules'))
+            traza['reglas_disparadas'] = self._router_traza.detener()
+            self._router_traza.delete()
+        traza['duracion_run_us'] = (perf_counter() - inicio) * 1e6
+        return disparadas
+    
+    def registrar_mensaje(self, relacion: str, texto: str) -> None:
+        """
+        Declara el texto de un hecho de mensaje generado por reglas personalizadas
+        
+        Args:
+            relacion: Nombre del hecho, por ejemplo 'mensajeGastoAlto'
+            texto: Texto que se muestra cuando la regla lo genera
+        """
+        self.registro_mensajes.registrar(relacion, texto)
     
     def _procesar_mensajes(self):
         """Procesa los hechos de mensaje generados por las reglas"""
-        mensajes = []
-        
-        # Mapeo de hechos simbólicos a textos para UI
-        mapa_mensajes = {
-            'mensajeAhorro': "- Estas ahorrando menos del 10% de tus ingresos.\n",
-            'mensajeDeuda': "- Tus deudas superan el 40% de tus ingresos. Reduce o renegocia.\n",
-            'mensajeEmergencia': "- No tienes un fondo de emergencia de al menos 3 meses de gastos.\n",
-            'mensajeOcio': "- Gastas mas del 30% de tus gastos en ocio. Intenta controlarlo.\n",
-            'mensajeInversion': "- Estas en buena posición para considerar inversiones.\n"
-        }
+        hechos = list(self.sistema.facts())
+        try:
+            mensajes, claves = self.registro_mensajes.extraer(hechos)
+        finally:
+            liberar_hechos(hechos)
         
-        # Buscar todos los hechos y traducir a mensajes
-        for fact in self.sistema.facts():
-            fact_str = str(fact)
-            # 1) Compatibilidad: (mensaje "texto")
-            if fact_str.startswith("f-") and "(mensaje" in fact_str and '"' in fact_str:
-                try:
-                    start = fact_str.find('"') + 1
-                    end = fact_str.rfind('"')
-                    if start > 0 and end > start:
-                        mensajes.append(fact_str[start:end])
-                        continue
-                except:
-                    pass
-            
-            # 2) Nuevos hechos simbólicos sin parámetros
-            # Formatos posibles del string del hecho, ejemplos:
-            #   f-3     (mensajeAhorro)
-            #   f-4     (mensajeDeuda)
-            #   f-5     (mensajeEmergencia)
-            #   f-6     (mensajeOcio)
-            #   f-7     (mensajeInversion)
-            for clave, texto in mapa_mensajes.items():
-                patron = f"({clave})"
-                if patron in fact_str:
-                    mensajes.append(texto)
-                    break
-        
-        # Unir todos los mensajes
+        # Claves simbólicas activadas (usadas por las representaciones compactas)
+        self.mensajes_activados = claves
+        
+        # Unir todos los mensajes y, al final, la salida de printout de las reglas
+        if self.salida_capturada:
+            mensajes = mensajes + [self.salida_capturada]
         if mensajes:
             self.resultado_capturado = "\n".join(mensajes)
         else:
@@ -196,14 +831,39 @@ class SistemaExperto:
             return "✅ Tu situación financiera está equilibrada."
         return self.resultado_capturado
     
-    def listar_hechos_actuales(self) -> list:
+    def listar_hechos_actuales(self, incluir_internos: bool = False) -> list:
         """
         Lista los hechos actuales en el sistema
         
+        Args:
+            incluir_internos: Incluir los hechos perfil-financiero y
+                              politica-financiera que usan las reglas derivar-*
+        
         Returns:
             list: Lista de hechos activos
         """
-        return [str(fact) for fact in self.sistema.facts() if not str(fact).startswith("f-0")]
+        hechos = list(self.sistema.facts())
+        try:
+            return [str(fact) for fact in hechos if not str(fact).startswith("f-0")
+                    and (incluir_internos or fact.template.name not in PLANTILLAS_INTERNAS)]
+        finally:
+            liberar_hechos(hechos)
+    
+    def texto_construccion(self, construccion) -> str:
+        """
+        Texto de una regla o deffacts del entorno
+        
+        Los entornos cargados desde una imagen binaria no conservan el texto
+        de sus construcciones; se usa el copiado del sistema de origen.
+        """
+        if self._textos_imagen is not None:
+            return self._textos_imagen.get((type(construccion).__name__, construccion.name), "")
+        return str(construccion)
+    
+    def textos_construcciones(self) -> Dict[tuple, str]:
+        """Texto de cada regla y deffacts, por (tipo, nombre), para desde_imagen"""
+        construcciones = list(self.sistema.rules()) + list(self.sistema.defined_facts())
+        return {(type(c).__name__, c.name): self.texto_construccion(c) for c in construcciones}
     
     def listar_reglas_disponibles(self) -> list:
         """
@@ -212,26 +872,33 @@ class SistemaExperto:
         Returns:
             list: Lista de reglas definidas
         """
-        return [str(rule) for rule in self.sistema.rules()]
+        return [self.texto_construccion(rule) for rule in self.sistema.rules()]
     
     def reiniciar_sistema(self) -> None:
         """Reinicia el sistema (mantiene reglas, limpia hechos)"""
         self.sistema.reset()
         self.resultado_capturado = ""
+        self.salida_capturada = ""
+        self.mensajes_activados = []
     
-    def obtener_estado_completo(self) -> Dict[str, Any]:
+    def obtener_estado_completo(self, incluir_internos: bool = False) -> Dict[str, Any]:
         """
         Obtiene el estado completo del sistema
         
+        Args:
+            incluir_internos: Incluir los hechos de soporte, como en listar_hechos_actuales
+        
         Returns:
             Dict con hechos, reglas y resultado actual
         """
+        hechos = self.listar_hechos_actuales(incluir_internos)
+        reglas = self.listar_reglas_disponibles()
         return {
-            'hechos': self.listar_hechos_actuales(),
-            'reglas': self.listar_reglas_disponibles(),
+            'hechos': hechos,
+            'reglas': reglas,
             'resultado': self.resultado_capturado,
-            'reglas_count': len(self.sistema.rules()),
-            'hechos_count': len(self.sistema.facts())
+            'reglas_count': len(reglas),
+            'hechos_count': len(hechos)
         }
 
 
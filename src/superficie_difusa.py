@@ -0,0 +1,173 @@
+"""
+Superficie Difusa Precalculada
+==============================
+
+Este módulo precalcula la salida del sistema difuso financiero sobre una
+rejilla regular de (ahorro mensual, riesgo de inversión) y la consulta
+mediante interpolación bilineal.
+
+Se usa en el modo de tiempo real de la interfaz gráfica: cada movimiento
+de los deslizadores se resuelve con unas pocas operaciones aritméticas en
+lugar de ejecutar la inferencia completa de scikit-fuzzy.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import threading
+from typing import Dict, Any
+
+import numpy as np
+from skfuzzy import control as ctrl
+
+
+class SuperficieDifusa:
+    """
+    Rejilla precalculada de la salida Mamdani o TSK del sistema difuso.
+
+    La rejilla se calcula una sola vez con una simulación vectorizada de
+    scikit-fuzzy (todas las combinaciones en una llamada a compute()) y
+    después cada consulta interpola entre los cuatro vértices de la celda.
+    """
+
+    # Rangos de las variables de entrada del sistema difuso
+    RANGO_AHORRO = (0.0, 1000.0)
+    RANGO_RIESGO = (0.0, 10.0)
+
+    def __init__(self, sistema_difuso, metodo: str = 'mamdani',
+                 pasos_ahorro: int = 51, pasos_riesgo: int = 41):
+        """
+        Inicializa la superficie (sin calcularla todavía)
+
+        Args:
+            sistema_difuso: Instancia de SistemaDifusoFinanciero
+            metodo: 'mamdani' o 'tsk'
+            pasos_ahorro: Número de puntos de la rejilla en el eje de ahorro
+            pasos_riesgo: Número de puntos de la rejilla en el eje de riesgo
+        """
+        if metodo not in ('mamdani', 'tsk'):
+            raise ValueError("El método debe ser 'mamdani' o 'tsk'")
+        if pasos_ahorro < 2 or pasos_riesgo < 2:
+            raise ValueError("La rejilla necesita al menos 2 puntos por eje")
+
+        self.sistema_difuso = sistema_difuso
+        self.metodo = metodo
+        self.pasos_ahorro = pasos_ahorro
+        self.pasos_riesgo = pasos_riesgo
+
+        self.eje_ahorro = np.linspace(*self.RANGO_AHORRO, pasos_ahorro)
+        self.eje_riesgo = np.linspace(*self.RANGO_RIESGO, pasos_riesgo)
+        self._paso_ahorro = (self.RANGO_AHORRO[1] - self.RANGO_AHORRO[0]) / (pasos_ahorro - 1)
+        self._paso_riesgo = (self.RANGO_RIESGO[1] - self.RANGO_RIESGO[0]) / (pasos_riesgo - 1)
+
+        self.valores = None
+        self._lista = threading.Event()
+
+    @property
+    def lista(self) -> bool:
+        """Indica si la superficie ya fue precalculada"""
+        return self._lista.is_set()
+
+    def precalcular(self) -> None:
+        """
+        Calcula la salida del sistema para todos los puntos de la rejilla.
+
+        Usa una simulación propia para no alterar el estado de los
+        simuladores que atienden las evaluaciones puntuales, por lo que
+        puede ejecutarse en un hilo de fondo.
+        """
+        if self.metodo == 'mamdani':
+            sistema_control = self.sistema_difuso.sistema_mamdani
+            salida = 'nivel_inversion'
+        else:
+            sistema_control = self.sistema_difuso.sistema_tsk
+            salida = 'nivel_inversion_tsk'
+
+        simulador = ctrl.ControlSystemSimulation(sistema_control)
+
+        # Matriz (riesgo × ahorro) aplanada para una única llamada a compute()
+        ahorro, riesgo = np.meshgrid(self.eje_ahorro, self.eje_riesgo)
+        simulador.input['ahorro_mensual'] = ahorro.ravel()
+        simulador.input['riesgo_inversion'] = riesgo.ravel()
+        simulador.compute()
+
+        valores = np.asarray(simulador.output[salida], dtype=float)
+        # Lista de listas: la interpolación escalar es más rápida sobre floats de Python
+        self.valores = valores.reshape(self.pasos_riesgo, self.pasos_ahorro).tolist()
+        self._lista.set()
+
+    def esperar(self, timeout: float = None) -> bool:
+        """
+        Espera a que termine el precálculo lanzado en otro hilo
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+
+        Returns:
+            bool: True si la superficie está lista
+        """
+        return self._lista.wait(timeout)
+
+    def interpolar(self, ahorro: float, riesgo: float) -> float:
+        """
+        Interpola bilinealmente el nivel de inversión en (ahorro, riesgo)
+
+        Args:
+            ahorro: Ahorro mensual en USD (0-1000)
+            riesgo: Nivel de riesgo de inversión (0-10)
+
+        Returns:
+            float: Nivel de inversión aproximado
+        """
+        if not self.lista:
+            raise RuntimeError("La superficie difusa aún no ha sido precalculada")
+
+        x = (ahorro - self.RANGO_AHORRO[0]) / self._paso_ahorro
+        y = (riesgo - self.RANGO_RIESGO[0]) / self._paso_riesgo
+
+        # Índice de la celda; el último punto usa la celda anterior
+        i = min(int(x), self.pasos_ahorro - 2)
+        j = min(int(y), self.pasos_riesgo - 2)
+        fx = x - i
+        fy = y - j
+
+        fila_inferior = self.valores[j]
+        fila_superior = self.valores[j + 1]
+        inferior = fila_inferior[i] + (fila_inferior[i + 1] - fila_inferior[i]) * fx
+        superior = fila_superior[i] + (fila_superior[i + 1] - fila_superior[i]) * fx
+        return inferior + (superior - inferior) * fy
+
+    def consultar(self, ahorro: float, riesgo: float) -> Dict[str, Any]:
+        """
+        Consulta la superficie con el mismo formato que evaluar_mamdani/evaluar_tsk
+
+        Args:
+            ahorro: Ahorro mensual en USD (0-1000)
+            riesgo: Nivel de riesgo de inversión (0-10)
+
+        Returns:
+            Dict con el resultado numérico y la etiqueta lingüística
+        """
+        metodo = 'Difuso' if self.metodo == 'mamdani' else 'TSK'
+        try:
+            if not (0 <= ahorro <= 1000):
+                raise ValueError("Ahorro debe estar entre 0 y 1000 USD")
+            if not (0 <= riesgo <= 10):
+                raise ValueError("Riesgo debe estar entre 0 y 10")
+
+            resultado_numerico = self.interpolar(ahorro, riesgo)
+
+            return {
+                'metodo': metodo,
+                'ahorro_entrada': ahorro,
+                'riesgo_entrada': riesgo,
+                'nivel_inversion': round(resultado_numerico, 2),
+                'etiqueta': self.sistema_difuso._determinar_etiqueta(resultado_numerico),
+                'unidad': '%'
+            }
+
+        except Exception as e:
+            return {
+                'error': f"Error en consulta de la superficie: {str(e)}",
+                'metodo': metodo
+            }
@@ -0,0 +1,186 @@
+"""
+Trazas de Evaluación por Muestreo
+=================================
+
+Este módulo permite registrar, para una fracción de las evaluaciones,
+el detalle de lo que ocurrió dentro de cada motor:
+
+- Sistema experto: hechos de la memoria de trabajo tras la inferencia
+  (el perfil, la política y los hechos derivados), reglas CLIPS disparadas
+  (capturadas con (watch rules) a través de un router) y mensajes resultantes
+- Sistema difuso: grados de pertenencia de cada entrada a cada conjunto
+  y fuerza de activación de cada regla
+
+Las trazas se guardan en un buffer circular de capacidad fija y pueden
+volcarse en formato JSONL.
+
+Autor: Sistema Experto Financiero
+Fecha: 2024
+"""
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any, List, Optional, TextIO, Union
+
+import clips
+
+
+class RouterTraza(clips.Router):
+    """
+    Router CLIPS que captura la salida de (watch rules) mientras está activo.
+
+    Fuera de una evaluación muestreada no reclama ningún nombre lógico, por
+    lo que la salida normal de CLIPS no se ve afectada. Las líneas que no
+    son de traza (por ejemplo printout de reglas) se reenvían al resto de
+    routers.
+    """
+
+    PRIORIDAD = 40
+
+    def __init__(self):
+        super().__init__("traza", self.PRIORIDAD)
+        self.activo = False
+        self._pendiente = ""
+        self.disparos: List[Dict[str, Any]] = []
+
+    def query(self, logical_name: str) -> bool:
+        return self.activo and logical_name == "stdout"
+
+    def write(self, logical_name: str, text: str) -> None:
+        self._pendiente += text
+        while "\n" in self._pendiente:
+            linea, self._pendiente = self._pendiente.split("\n", 1)
+            self._procesar_linea(logical_name, linea)
+
+    def _procesar_linea(self, logical_name: str, linea: str) -> None:
+        """Interpreta una línea completa de salida"""
+        # Formato: "FIRE    1 reglaAhorro: f-1,f-2"
+        if linea.startswith("FIRE"):
+            partes = linea.split(None, 2)
+            if len(partes) == 3:
+                regla, _, hechos = partes[2].partition(":")
+                self.disparos.append({
+                    'orden': int(partes[1]),
+                    'regla': regla.strip(),
+                    'hechos': [h for h in hechos.strip().split(",") if h],
+                })
+                return
+        self.share_message(logical_name, linea + "\n")
+
+    def iniciar(self) -> None:
+        """Empieza a capturar una evaluación"""
+        self.disparos = []
+        self._pendiente = ""
+        self.activo = True
+
+    def detener(self) -> List[Dict[str, Any]]:
+        """
+        Deja de capturar y retorna los disparos registrados
+
+        Returns:
+            list: Reglas disparadas en orden
+        """
+        self.activo = False
+        if self._pendiente:
+            self._procesar_linea("stdout", self._pendiente)
+            self._pendiente = ""
+        return self.disparos
+
+
+class TrazadorMuestreo:
+    """
+    Decide qué evaluaciones se trazan y conserva las trazas recientes.
+
+    La decisión se toma por tasa (probabilidad de muestreo) o por un
+    predicado que recibe el contexto de la evaluación, por ejemplo:
+
+        TrazadorMuestreo(tasa=0.01)
+        TrazadorMuestreo(predicado=lambda ctx: ctx['entradas'].get('deudas', 0) > 10000)
+    """
+
+    def __init__(self, tasa: float = 0.01,
+                 predicado: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 capacidad: int = 1000, semilla: Optional[int] = None):
+        """
+        Inicializa el trazador
+
+        Args:
+            tasa: Fracción de evaluaciones a trazar (0.0 - 1.0)
+            predicado: Función que decide si trazar a partir del contexto;
+                       si se indica, tiene prioridad sobre la tasa
+            capacidad: Número máximo de trazas conservadas
+            semilla: Semilla del muestreo aleatorio (reproducibilidad)
+        """
+        if not 0.0 <= tasa <= 1.0:
+            raise ValueError("La tasa de muestreo debe estar entre 0 y 1")
+
+        self.tasa = tasa
+        self.predicado = predicado
+        self._aleatorio = random.Random(semilla)
+        self._buffer = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+        self._secuencia = 0
+
+    def debe_muestrear(self, contexto: Dict[str, Any]) -> bool:
+        """
+        Decide si la evaluación descrita por el contexto se traza
+
+        Args:
+            contexto: Dict con 'motor' y 'entradas' de la evaluación
+
+        Returns:
+            bool: True si debe trazarse
+        """
+        if self.predicado is not None:
+            return bool(self.predicado(contexto))
+        if self.tasa <= 0.0:
+            return False
+        return self.tasa >= 1.0 or self._aleatorio.random() < self.tasa
+
+    def registrar(self, traza: Dict[str, Any]) -> None:
+        """
+        Guarda una traza en el buffer circular (descarta la más antigua si está lleno)
+
+        Args:
+            traza: Datos de la evaluación
+        """
+        with self._lock:
+            self._secuencia += 1
+            traza['id'] = self._secuencia
+            traza.setdefault('timestamp', time.time())
+            self._buffer.append(traza)
+
+    def trazas(self) -> List[Dict[str, Any]]:
+        """Retorna una copia de las trazas conservadas, de la más antigua a la más reciente"""
+        with self._lock:
+            return list(self._buffer)
+
+    def limpiar(self) -> None:
+        """Descarta todas las trazas conservadas"""
+        with self._lock:
+            self._buffer.clear()
+
+    def volcar_jsonl(self, destino: Union[str, TextIO]) -> int:
+        """
+        Escribe las trazas en formato JSONL (un objeto JSON por línea)
+
+        Args:
+            destino: Ruta del archivo o archivo de texto abierto
+
+        Returns:
+            int: Número de trazas escritas
+        """
+        trazas = self.trazas()
+        if isinstance(destino, str):
+            with open(destino, 'a', encoding='utf-8') as f:
+                return self._escribir(f, trazas)
+        return self._escribir(destino, trazas)
+
+    @staticmethod
+    def _escribir(archivo: TextIO, trazas: List[Dict[str, Any]]) -> int:
+        for traza in trazas:
+            archivo.write(json.dumps(traza, ensure_ascii=False, default=float) + "\n")
+        return len(trazas)
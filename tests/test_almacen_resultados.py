@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Almacén Indexado de Resultados
+==========================================
+
+Verifica el guardado masivo, las consultas por recomendaciones y etiqueta
+(comparadas con un filtrado en Python) y que se resuelven con índices.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+try:
+    from src.almacen_resultados import AlmacenResultados, mascaras_que_cumplen
+    from src.resultados_compactos import ResultadosCompactos, MENSAJE_A_RECOMENDACION
+    ALMACEN_AVAILABLE = True
+except ImportError:
+    ALMACEN_AVAILABLE = False
+
+ETIQUETAS = ('Conservadora', 'Moderada', 'Agresiva')
+
+
+def _resultados(n, semilla=3):
+    rng = random.Random(semilla)
+    resultados = []
+    for i in range(n):
+        mensajes = [m for m in MENSAJE_A_RECOMENDACION if rng.random() < 0.4]
+        resultados.append({
+            'perfil': {'ingresos': 1000 + i},
+            'experto': {'recomendaciones': '', 'mensajes': mensajes},
+            'difuso': {'nivel_inversion': round(rng.uniform(0, 50), 2), 'etiqueta': rng.choice(ETIQUETAS),
+                       'metodo': 'Difuso'},
+        })
+    return resultados
+
+
+def _tiene(resultado, recomendacion):
+    return any(MENSAJE_A_RECOMENDACION[m] == recomendacion for m in resultado['experto']['mensajes'])
+
+
+@unittest.skipUnless(ALMACEN_AVAILABLE, "numpy no disponible")
+class TestAlmacenResultados(unittest.TestCase):
+    """Pruebas de AlmacenResultados"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, True)
+        self.almacen = AlmacenResultados(os.path.join(self.directorio, 'resultados.db'), filas_por_transaccion=64)
+        self.addCleanup(self.almacen.cerrar)
+        self.resultados = _resultados(500)
+        self.assertEqual(self.almacen.guardar(self.resultados, lote='prueba'), 500)
+
+    def test_mascaras_que_cumplen(self):
+        self.assertEqual(len(mascaras_que_cumplen()), 32)
+        self.assertEqual(len(mascaras_que_cumplen(['deuda-alta'])), 16)
+        self.assertEqual(mascaras_que_cumplen(['deuda-alta'], ['deuda-alta']), [])
+        with self.assertRaises(KeyError):
+            mascaras_que_cumplen(['inexistente'])
+
+    def test_consulta_deuda_alta_conservadora(self):
+        """Los filtros devuelven lo mismo que filtrar los resultados en Python"""
+        esperados = [str(i) for i, r in enumerate(self.resultados)
+                     if _tiene(r, 'deuda-alta') and not _tiene(r, 'puede-invertir')
+                     and r['difuso']['etiqueta'] == 'Conservadora']
+        filas = self.almacen.consultar(con=['deuda-alta'], sin=['puede-invertir'], etiqueta='Conservadora')
+        self.assertEqual([f['perfil_id'] for f in filas], esperados)
+        self.assertTrue(all('deuda-alta' in f['recomendaciones'] for f in filas))
+        self.assertEqual(self.almacen.contar(con=['deuda-alta'], sin=['puede-invertir'], etiqueta='Conservadora'),
+                         len(esperados))
+        self.assertEqual(sorted(self.almacen.iterar_ids(con=['deuda-alta'], sin=['puede-invertir'],
+                                                        etiqueta='Conservadora')), sorted(esperados))
+        self.assertEqual(len(self.almacen.consultar(etiqueta='Moderada', limite=3)), 3)
+
+    def test_consultas_con_indices(self):
+        """Ninguna consulta filtrada recorre la tabla entera"""
+        for filtros in ({'con': ['deuda-alta'], 'etiqueta': 'Conservadora'}, {'con': ['ocio-excesivo']},
+                        {'etiqueta': 'Agresiva'}, {'lote': 'prueba'}):
+            with self.subTest(filtros=filtros):
+                plan = ' '.join(self.almacen.plan_consulta(**filtros))
+                self.assertIn('USING INDEX', plan)
+                self.assertNotIn('SCAN resultados', plan)
+
+    def test_obtener_y_lotes(self):
+        """Se recupera un perfil por identificador y los lotes son independientes"""
+        fila = self.almacen.obtener(7, lote='prueba')
+        self.assertEqual(fila['perfil'], {'ingresos': 1007})
+        self.assertEqual(fila['nivel_inversion'], self.resultados[7]['difuso']['nivel_inversion'])
+        self.assertIsNone(self.almacen.obtener(7, lote='otro'))
+        # Sin ids, la numeración continúa tras las filas del lote
+        self.almacen.guardar(self.resultados[:2], lote='prueba', guardar_perfiles=False)
+        self.assertIsNone(self.almacen.obtener(501, lote='prueba')['perfil'])
+        self.almacen.guardar(self.resultados[:3], lote='otro', ids=['a', 'b', 'c'])
+        self.assertEqual(self.almacen.contar(lote='otro'), 3)
+        self.assertEqual(self.almacen.eliminar_lote('otro'), 3)
+        self.assertEqual(self.almacen.contar(), 502)
+
+    def test_guardar_compactos(self):
+        """Un lote de ResultadosCompactos se guarda con sus recomendaciones y etiquetas"""
+        compactos = ResultadosCompactos()
+        compactos.agregar_evaluacion(['mensajeDeuda'], {'nivel_inversion': 12.5, 'etiqueta': 'Conservadora'})
+        compactos.agregar_evaluacion(['mensajeInversion'], None)
+        self.assertEqual(self.almacen.guardar_compactos(compactos, ['x', 'y'], lote='compacto', metodo='tsk'), 2)
+        x, y = self.almacen.obtener('x', 'compacto'), self.almacen.obtener('y', 'compacto')
+        self.assertEqual((x['recomendaciones'], x['etiqueta'], x['nivel_inversion']),
+                         (['deuda-alta'], 'Conservadora', 12.5))
+        self.assertEqual((y['recomendaciones'], y['etiqueta'], y['nivel_inversion']),
+                         (['puede-invertir'], None, None))
+        with self.assertRaises(ValueError):
+            self.almacen.guardar_compactos(compactos, ['x'])
+
+
+if __name__ == "__main__":
+    unittest.main()
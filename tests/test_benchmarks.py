@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la Infraestructura de Benchmarks
+===========================================
+
+Verifica el generador de perfiles sintéticos y la detección de
+regresiones del comando compare.
+"""
+
+import sys
+import os
+import subprocess
+import unittest
+
+RAIZ = os.path.join(os.path.dirname(__file__), '..')
+
+from benchmarks.generador_perfiles import generar_perfiles, entradas_difusas
+
+try:
+    from benchmarks.bench_motores import comparar, percentil
+    MOTORES_AVAILABLE = True
+except ImportError:
+    MOTORES_AVAILABLE = False
+
+try:
+    import clips  # noqa: F401
+    import skfuzzy  # noqa: F401
+    from benchmarks.soak import ejecutar_soak, evaluar_crecimiento
+    SOAK_AVAILABLE = True
+except ImportError:
+    SOAK_AVAILABLE = False
+
+try:
+    from benchmarks.bench_concurrencia import ejecutar as ejecutar_concurrencia, fraccion_paralela
+    CONCURRENCIA_AVAILABLE = True
+except ImportError:
+    CONCURRENCIA_AVAILABLE = False
+
+
+class TestGeneradorPerfiles(unittest.TestCase):
+    """Pruebas del generador de perfiles sintéticos"""
+
+    def test_reproducible(self):
+        """La misma semilla genera los mismos perfiles"""
+        self.assertEqual(generar_perfiles(50, 7), generar_perfiles(50, 7))
+        self.assertNotEqual(generar_perfiles(50, 7), generar_perfiles(50, 8))
+
+    def test_rangos(self):
+        """Los perfiles respetan los rangos de ambos motores"""
+        for perfil in generar_perfiles(500):
+            self.assertGreater(perfil['ingresos'], 0)
+            self.assertGreaterEqual(perfil['deudas'], 0)
+            self.assertLessEqual(perfil['ocio'], perfil['gastos'])
+            ahorro_mensual, riesgo = entradas_difusas(perfil)
+            self.assertTrue(0 <= ahorro_mensual <= 1000)
+            self.assertTrue(0 <= riesgo <= 10)
+
+
+@unittest.skipUnless(MOTORES_AVAILABLE, "Dependencias de los motores no disponibles")
+class TestComparacion(unittest.TestCase):
+    """Pruebas de la detección de regresiones"""
+
+    def _resultados(self, latencia, rendimiento):
+        return {'metricas': {
+            'experto.latencia_p50_us': {'valor': latencia, 'mejor': 'menor'},
+            'experto.lote_perfiles_por_s': {'valor': rendimiento, 'mejor': 'mayor'},
+        }}
+
+    def test_percentil(self):
+        """El percentil interpola linealmente"""
+        self.assertEqual(percentil([1, 2, 3, 4, 5], 50), 3)
+        self.assertAlmostEqual(percentil([0, 10], 95), 9.5)
+
+    def test_sin_regresiones(self):
+        """Los cambios dentro de la tolerancia no se marcan"""
+        base = self._resultados(100, 1000)
+        actual = self._resultados(110, 950)
+        self.assertEqual(comparar(base, actual, 0.15), [])
+
+    def test_regresiones_en_ambos_sentidos(self):
+        """Se marcan más latencia y menos rendimiento"""
+        base = self._resultados(100, 1000)
+        actual = self._resultados(150, 500)
+        regresiones = {r['metrica'] for r in comparar(base, actual, 0.15)}
+        self.assertEqual(regresiones, {'experto.latencia_p50_us', 'experto.lote_perfiles_por_s'})
+
+    def test_mejoras_no_son_regresiones(self):
+        """Menos latencia y más rendimiento nunca son regresiones"""
+        base = self._resultados(100, 1000)
+        actual = self._resultados(50, 2000)
+        self.assertEqual(comparar(base, actual, 0.15), [])
+
+
+
+@unittest.skipUnless(SOAK_AVAILABLE, "Dependencias de los motores no disponibles")
+class TestSoak(unittest.TestCase):
+    """Pruebas de la prueba de resistencia"""
+
+    def _muestras(self, *rss):
+        return [{'rss_bytes': valor, 'tracemalloc_bytes': None, 'clips_bytes': 1000} for valor in rss]
+
+    def test_crecimiento_excedido(self):
+        """Se marca el crecimiento que supera el umbral y el mínimo absoluto"""
+        informe = evaluar_crecimiento(self._muestras(100_000_000, 130_000_000), 0.10, 1_000_000)
+        self.assertTrue(informe['rss_bytes']['excedido'])
+        self.assertFalse(informe['clips_bytes']['excedido'])
+        self.assertNotIn('tracemalloc_bytes', informe)
+
+    def test_ruido_ignorado(self):
+        """Por debajo del mínimo absoluto no hay fallo aunque el relativo sea alto"""
+        informe = evaluar_crecimiento(self._muestras(1_000_000, 2_000_000), 0.10, 4_000_000)
+        self.assertFalse(informe['rss_bytes']['excedido'])
+
+    def test_ejecucion_corta(self):
+        """Una ejecución corta con reciclaje toma todas las muestras"""
+        informe = ejecutar_soak(evaluaciones=60, intervalo=20, calentamiento=5,
+                                motores=('experto',), reciclar_cada=25, variedad=50)
+        self.assertEqual([m['evaluaciones'] for m in informe['muestras']], [0, 20, 40, 60])
+        self.assertEqual(informe['reciclajes'], 2)
+        self.assertGreater(informe['muestras'][-1]['clips_bytes'], 0)
+        self.assertFalse(informe['fallo'])
+
+    def test_memoria_clips_estable(self):
+        """Los ciclos reset/run del experto no acumulan memoria CLIPS"""
+        informe = ejecutar_soak(evaluaciones=400, intervalo=200, calentamiento=20,
+                                motores=('experto',), variedad=100)
+        clips_bytes = [m['clips_bytes'] for m in informe['muestras']]
+        self.assertEqual(clips_bytes[0], clips_bytes[-1])
+
+    def test_sonda_sin_avisos_en_stdout(self):
+        """La comprobación de liberación manual no deja avisos ENVRNMNT8 en el fd 1"""
+        script = (
+            "from src.sistema_experto import SistemaExperto, _liberacion_manual\n"
+            "_liberacion_manual()\n"
+            "s = SistemaExperto()\n"
+            "s.insertar_hechos(ingresos=1000, ahorro=500, gastos=100, deudas=500, ocio=0)\n"
+            "s.ejecutar_inferencia()\n"
+            "import gc; gc.collect()\n"
+        )
+        salida = subprocess.run([sys.executable, '-c', script], cwd=RAIZ,
+                                capture_output=True, check=True).stdout
+        self.assertNotIn(b'ENVRNMNT8', salida)
+
+
+@unittest.skipUnless(CONCURRENCIA_AVAILABLE, "clipspy no disponible")
+class TestConcurrencia(unittest.TestCase):
+    """Pruebas del benchmark de hilos frente a procesos"""
+
+    def test_fraccion_paralela(self):
+        """Amdahl: escalado lineal es 1, sin escalado es 0, acotado a [0, 1]"""
+        self.assertAlmostEqual(fraccion_paralela(4.0, 4), 1.0)
+        self.assertAlmostEqual(fraccion_paralela(1.0, 4), 0.0)
+        self.assertAlmostEqual(fraccion_paralela(1.6, 2), 0.75)
+        self.assertEqual(fraccion_paralela(0.8, 4), 0.0)
+        self.assertEqual(fraccion_paralela(2.0, 1), 0.0)
+
+    def test_informe(self):
+        """El informe JSON tiene una fila por número de trabajadores y una conclusión"""
+        informe = ejecutar_concurrencia((1, 2), num_perfiles=40)
+        self.assertEqual([f['trabajadores'] for f in informe['hilos']], [1, 2])
+        self.assertEqual([f['trabajadores'] for f in informe['procesos']], [1, 2])
+        self.assertEqual(informe['hilos'][0]['escalado'], 1.0)
+        self.assertIn(informe['conclusion']['mejor_modelo'], ('hilos', 'procesos'))
+        self.assertIn('arranque_s', informe['procesos'][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Router de Captura
+=============================
+
+Verifica que la salida de printout de las reglas se captura por
+evaluación, con límite de bytes, marcador de truncado y modo streaming.
+"""
+
+import unittest
+
+try:
+    from src.sistema_experto import SistemaExperto, CapturaRouter, MARCADOR_TRUNCADO
+    from src.trazas import TrazadorMuestreo
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+PERFIL_RIESGOSO = dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+PERFIL_SANO = dict(ingresos=5000, ahorro=20000, gastos=2000, deudas=100, ocio=200)
+
+REGLA_PRINTOUT = '(defrule reglaAviso (deuda-alta) => (printout t "Aviso: deuda alta" crlf))'
+REGLA_VERBOSA = """
+(defrule reglaVerbosa
+    (deuda-alta)
+    =>
+    (loop-for-count (?i 1 2000) do (printout t "linea " ?i crlf)))
+"""
+
+
+def _evaluar(sistema, perfil):
+    sistema.insertar_hechos(**perfil)
+    sistema.ejecutar_inferencia()
+    return sistema.obtener_resultado()
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestCapturaSalida(unittest.TestCase):
+    """Pruebas de la captura de printout"""
+
+    def test_printout_en_resultado(self):
+        """La salida de printout se añade tras los mensajes"""
+        sistema = SistemaExperto()
+        sistema.sistema.build(REGLA_PRINTOUT)
+        resultado = _evaluar(sistema, PERFIL_RIESGOSO)
+
+        self.assertEqual(sistema.salida_capturada, "Aviso: deuda alta\n")
+        self.assertTrue(resultado.endswith("Aviso: deuda alta\n"))
+        self.assertIn('mensajeDeuda', sistema.mensajes_activados)
+
+    def test_aislada_por_evaluacion(self):
+        """La salida de una evaluación no pasa a la siguiente"""
+        sistema = SistemaExperto()
+        sistema.sistema.build(REGLA_PRINTOUT)
+        _evaluar(sistema, PERFIL_RIESGOSO)
+        resultado = _evaluar(sistema, PERFIL_SANO)
+
+        self.assertEqual(sistema.salida_capturada, "")
+        self.assertNotIn("Aviso", resultado)
+
+    def test_limite_y_marcador(self):
+        """Por encima del límite se trunca y se añade el marcador una vez"""
+        sistema = SistemaExperto(limite_salida=100)
+        sistema.sistema.build(REGLA_VERBOSA)
+        _evaluar(sistema, PERFIL_RIESGOSO)
+
+        salida = sistema.salida_capturada
+        self.assertTrue(salida.endswith(MARCADOR_TRUNCADO))
+        self.assertEqual(salida.count(MARCADOR_TRUNCADO), 1)
+        self.assertEqual(len(salida[:-len(MARCADOR_TRUNCADO)].encode('utf-8')), 100)
+        self.assertTrue(sistema.router_captura.truncado)
+        self.assertGreater(sistema.router_captura.bytes_descartados, 0)
+
+    def test_truncado_respeta_utf8(self):
+        """El corte no deja caracteres multibyte a medias"""
+        router = CapturaRouter(limite_bytes=5)
+        router.iniciar()
+        router.write("stdout", "añoñ")
+        salida = router.detener()
+        self.assertEqual(salida, "año" + MARCADOR_TRUNCADO)
+
+    def test_streaming(self):
+        """Con callback la salida se entrega según se escribe y no se acumula"""
+        recibido = []
+        sistema = SistemaExperto(callback_salida=recibido.append)
+        sistema.sistema.build(REGLA_VERBOSA)
+        _evaluar(sistema, PERFIL_RIESGOSO)
+
+        self.assertEqual(sistema.salida_capturada, "")
+        self.assertIn("linea 2000", "".join(recibido))
+
+    def test_con_traza(self):
+        """Con traza activa, el printout se sigue capturando"""
+        trazador = TrazadorMuestreo(tasa=1.0)
+        sistema = SistemaExperto(trazador=trazador)
+        sistema.sistema.build(REGLA_PRINTOUT)
+        _evaluar(sistema, PERFIL_RIESGOSO)
+
+        self.assertEqual(sistema.salida_capturada, "Aviso: deuda alta\n")
+        reglas = {d['regla'] for d in trazador.trazas()[0]['reglas_disparadas']}
+        self.assertIn('reglaAviso', reglas)
+
+    def test_limite_invalido(self):
+        """Un límite negativo se rechaza"""
+        with self.assertRaises(ValueError):
+            CapturaRouter(limite_bytes=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
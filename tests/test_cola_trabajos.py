@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la Cola de Trabajos Reanudable
+=========================================
+
+Verifica que los trozos se evalúan una sola vez, que tras una caída se
+reanuda desde el último trozo confirmado, que una reserva caducada pasa a
+otro trabajador sin duplicar resultados, que un trozo que agota sus
+intentos queda fallido sin bloquear el resto y que el progreso estima el
+tiempo restante.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from src.cola_trabajos import ColaTrabajos, HECHO, EN_CURSO, FALLIDO, PENDIENTE
+
+try:
+    from src.evaluacion_combinada import evaluar_perfil_completo
+    MOTORES_AVAILABLE = True
+except ImportError:
+    MOTORES_AVAILABLE = False
+
+
+def _perfiles(n):
+    return [{'valor': i} for i in range(n)]
+
+
+class _Contador:
+    """Evaluador que cuenta los perfiles vistos y puede fallar en un trozo"""
+
+    def __init__(self, fallar_en=None):
+        self.vistos = []
+        self.fallar_en = fallar_en
+        self._lock = threading.Lock()
+
+    def __call__(self, perfiles):
+        with self._lock:
+            if self.fallar_en is not None and perfiles[0]['valor'] == self.fallar_en:
+                raise RuntimeError("caída simulada")
+            self.vistos.extend(p['valor'] for p in perfiles)
+        return [{'doble': p['valor'] * 2} for p in perfiles]
+
+
+class TestColaTrabajos(unittest.TestCase):
+    """Pruebas de ColaTrabajos"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, 'cola.db')
+        self.addCleanup(shutil.rmtree, self.directorio, True)
+
+    def _cola(self, **opciones):
+        cola = ColaTrabajos(self.ruta, **opciones)
+        self.addCleanup(cola.cerrar)
+        return cola
+
+    def test_ejecucion_completa(self):
+        """Todos los trozos se evalúan una vez y los resultados vuelven en orden"""
+        cola = self._cola()
+        trabajo = cola.crear_trabajo(_perfiles(95), tamano_trozo=10)
+        evaluador = _Contador()
+        resumen = cola.ejecutar(trabajo, evaluador)
+        self.assertEqual((resumen['trozos'], resumen['perfiles']), (10, 95))
+        self.assertEqual(sorted(evaluador.vistos), list(range(95)))
+        self.assertEqual(cola.resultados(trabajo), [{'doble': i * 2} for i in range(95)])
+        progreso = cola.progreso(trabajo)
+        self.assertTrue(progreso['completado'])
+        self.assertEqual(progreso['trozos'][HECHO], 10)
+        self.assertEqual(progreso['segundos_restantes'], 0.0)
+        self.assertEqual(self._cola().ejecutar(trabajo, evaluador)['trozos'], 0)
+
+    def test_modo_wal(self):
+        """La base queda en modo WAL"""
+        self._cola()
+        conexion = sqlite3.connect(self.ruta)
+        self.assertEqual(conexion.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        conexion.close()
+
+    def test_reanudar_tras_caida(self):
+        """Lo confirmado antes de la caída no se repite"""
+        cola = self._cola()
+        trabajo = cola.crear_trabajo(_perfiles(50), tamano_trozo=10)
+        with self.assertRaises(RuntimeError):
+            cola.ejecutar(trabajo, _Contador(fallar_en=30))
+        # Un proceso que muere con un trozo reservado lo deja en curso
+        self.assertEqual(cola.tomar_trozo(trabajo, 'muerto')[0], 3)
+        cola.cerrar()
+
+        nueva = self._cola()
+        progreso = nueva.progreso(trabajo)
+        self.assertEqual(progreso['perfiles_hechos'], 30)
+        self.assertEqual(progreso['trozos'][EN_CURSO], 1)
+        self.assertEqual(nueva.reanudar(trabajo), 1)
+        evaluador = _Contador()
+        nueva.ejecutar(trabajo, evaluador)
+        self.assertEqual(sorted(evaluador.vistos), list(range(30, 50)))
+        self.assertEqual(len(nueva.resultados(trabajo)), 50)
+
+    def test_reserva_caducada(self):
+        """Un trozo caducado pasa a otro trabajador y la confirmación tardía se rechaza"""
+        cola = self._cola(caducidad=0.0)
+        trabajo = cola.crear_trabajo(_perfiles(10), tamano_trozo=10)
+        indice, perfiles = cola.tomar_trozo(trabajo, 'lento')
+        self.assertEqual(cola.tomar_trozo(trabajo, 'rapido')[0], indice)
+        self.assertTrue(cola.completar_trozo(trabajo, indice, [{'de': 'rapido'}] * 10, 'rapido'))
+        self.assertFalse(cola.completar_trozo(trabajo, indice, [{'de': 'lento'}] * 10, 'lento'))
+        self.assertEqual(cola.resultados(trabajo)[0], {'de': 'rapido'})
+        self.assertIsNone(cola.tomar_trozo(trabajo, 'otro'))
+
+    def test_trozo_fallido_no_bloquea(self):
+        """Un trozo que falla max_intentos veces queda fallido y el resto se evalúa"""
+        cola = self._cola(max_intentos=2)
+        trabajo = cola.crear_trabajo(_perfiles(30), tamano_trozo=10)
+        evaluador = _Contador(fallar_en=10)
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                cola.ejecutar(trabajo, evaluador)
+        self.assertEqual(cola.ejecutar(trabajo, evaluador)['trozos'], 1)
+        self.assertEqual(sorted(evaluador.vistos), list(range(10)) + list(range(20, 30)))
+
+        progreso = cola.progreso(trabajo)
+        self.assertEqual(progreso['trozos'][FALLIDO], 1)
+        self.assertEqual((progreso['perfiles_hechos'], progreso['perfiles_fallidos'],
+                          progreso['perfiles_restantes']), (20, 10, 0))
+        self.assertTrue(progreso['terminado'])
+        self.assertFalse(progreso['completado'])
+        with self.assertRaisesRegex(RuntimeError, 'fallidos'):
+            cola.resultados(trabajo)
+
+        self.assertEqual(cola.reintentar_fallidos(trabajo), 1)
+        self.assertEqual(cola.progreso(trabajo)['trozos'][PENDIENTE], 1)
+        cola.ejecutar(trabajo, _Contador())
+        self.assertEqual(len(cola.resultados(trabajo)), 30)
+        self.assertTrue(cola.progreso(trabajo)['completado'])
+
+    def test_reserva_caducada_agota_intentos(self):
+        """Un trozo cuyas reservas caducan max_intentos veces deja de tomarse"""
+        cola = self._cola(caducidad=0.0, max_intentos=2)
+        trabajo = cola.crear_trabajo(_perfiles(20), tamano_trozo=10)
+        self.assertEqual(cola.tomar_trozo(trabajo, 'uno')[0], 0)
+        self.assertEqual(cola.tomar_trozo(trabajo, 'dos')[0], 0)
+        self.assertEqual(cola.tomar_trozo(trabajo, 'tres')[0], 1)
+        progreso = cola.progreso(trabajo)
+        self.assertEqual(progreso['trozos'][FALLIDO], 1)
+        self.assertFalse(cola.completar_trozo(trabajo, 0, [{}] * 10, 'dos'))
+
+    def test_trabajadores_concurrentes(self):
+        """Varios trabajadores con su propia conexión no repiten trozos"""
+        trabajo = self._cola().crear_trabajo(_perfiles(400), tamano_trozo=7)
+        evaluador = _Contador()
+        hilos = [threading.Thread(target=lambda n=n: self._cola().ejecutar(trabajo, evaluador, f"hilo-{n}"))
+                 for n in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(sorted(evaluador.vistos), list(range(400)))
+        self.assertEqual(len(self._cola().resultados(trabajo)), 400)
+
+    def test_progreso_y_estimacion(self):
+        """El progreso parcial estima rendimiento y tiempo restante"""
+        cola = self._cola()
+        trabajo = cola.crear_trabajo(_perfiles(40), tamano_trozo=10)
+        for _ in range(2):
+            indice, perfiles = cola.tomar_trozo(trabajo)
+            cola.completar_trozo(trabajo, indice, perfiles)
+        progreso = cola.progreso(trabajo)
+        self.assertEqual((progreso['perfiles_hechos'], progreso['perfiles_restantes']), (20, 20))
+        self.assertFalse(progreso['completado'])
+        self.assertGreater(progreso['rendimiento'], 0)
+        self.assertGreater(progreso['segundos_restantes'], 0)
+        with self.assertRaises(RuntimeError):
+            cola.resultados(trabajo)
+
+    def test_validaciones(self):
+        cola = self._cola()
+        with self.assertRaises(ValueError):
+            cola.crear_trabajo(_perfiles(3), tamano_trozo=0)
+        with self.assertRaises(ValueError):
+            cola.crear_trabajo(_perfiles(3), metodo='sugeno')
+        with self.assertRaises(KeyError):
+            cola.progreso(99)
+        with self.assertRaises(ValueError):
+            ColaTrabajos(self.ruta, max_intentos=0)
+
+    @unittest.skipUnless(MOTORES_AVAILABLE, "motores no disponibles")
+    def test_evaluador_por_defecto(self):
+        """Sin evaluador se usan ambos motores con el método del trabajo"""
+        perfiles = [dict(ingresos=1000, ahorro=500, gastos=100, deudas=500, ocio=0),
+                    dict(ingresos=5000, ahorro=20000, gastos=2000, deudas=0, ocio=100)]
+        cola = self._cola()
+        trabajo = cola.crear_trabajo(perfiles, tamano_trozo=1, metodo='tsk')
+        cola.ejecutar(trabajo)
+        self.assertEqual(cola.resultados(trabajo), [evaluar_perfil_completo(p, 'tsk') for p in perfiles])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Compilador de Reglas Proposicionales
+================================================
+
+Prueba diferencial: para perfiles aleatorios, la tabla de máscaras de
+bits produce los mismos hechos y mensajes que CLIPS. También verifica el
+encadenamiento hasta el punto fijo y la vuelta a CLIPS con reglas no
+proposicionales.
+"""
+
+import random
+import unittest
+
+try:
+    import numpy as np
+    from src.sistema_experto import SistemaExperto
+    from src.compilador_reglas import compilar, EvaluadorReglas, ReglasNoCompilables
+    from src.resultados_compactos import mascara_recomendaciones
+    DEPENDENCIAS_AVAILABLE = True
+except ImportError:
+    DEPENDENCIAS_AVAILABLE = False
+
+# Reglas encadenadas, declaradas en orden inverso al de su dependencia
+REGLAS_ENCADENADAS = "\n".join([
+    "(defrule reglaAlertaTotal (riesgo-critico) (ocio-excesivo) => (assert (mensajeAlertaTotal)))",
+    "(defrule reglaRiesgoCritico (declare (salience 5)) (deuda-alta) (ahorro-bajo) => (assert (riesgo-critico) (revisar)))",
+    "(defrule reglaSiempre => (assert (evaluado)))",
+])
+MENSAJES_ENCADENADOS = {'mensajeAlertaTotal': "- Deuda, ahorro y ocio fuera de control.\n"}
+
+
+def _perfiles(n, semilla=3):
+    rng = random.Random(semilla)
+    perfiles = [dict(ingresos=1000, ahorro=100, gastos=0, deudas=400, ocio=0),
+                dict(ingresos=0, ahorro=0, gastos=0, deudas=0, ocio=0)]
+    for _ in range(n):
+        ingresos = rng.choice([rng.uniform(0, 10000), float(rng.randrange(0, 10000, 100))])
+        perfiles.append(dict(
+            ingresos=ingresos,
+            ahorro=rng.uniform(0, ingresos * 5),
+            gastos=rng.uniform(0, ingresos * 1.2),
+            deudas=rng.uniform(0, ingresos * 0.8),
+            ocio=rng.uniform(0, ingresos * 0.4),
+        ))
+    return perfiles
+
+
+@unittest.skipUnless(DEPENDENCIAS_AVAILABLE, "Dependencias no disponibles")
+class TestCompiladorReglas(unittest.TestCase):
+    """Pruebas del compilador y del evaluador"""
+
+    def _diferencial(self, sistema, perfiles):
+        compilado = EvaluadorReglas(sistema)
+        self.assertTrue(compilado.compilado, compilado.motivo)
+        hechos = compilado.evaluar_hechos(perfiles)
+        mensajes = compilado.evaluar_lote(perfiles)
+
+        referencia = EvaluadorReglas(sistema)
+        referencia.compiladas = None
+        for perfil, esperados, mensajes_compilados in zip(perfiles, referencia.evaluar_hechos(perfiles), mensajes):
+            self.assertEqual(hechos.pop(0), esperados, perfil)
+            self.assertEqual(set(mensajes_compilados), set(referencia._clips(perfil)[1]), perfil)
+
+    def test_diferencial_reglas_predefinidas(self):
+        """Las reglas predefinidas compiladas coinciden con CLIPS"""
+        self._diferencial(SistemaExperto(), _perfiles(300))
+
+    def test_diferencial_encadenamiento(self):
+        """El punto fijo resuelve reglas que dependen de otras"""
+        sistema = SistemaExperto()
+        self.assertTrue(sistema.cargar_reglas(REGLAS_ENCADENADAS, mensajes=MENSAJES_ENCADENADOS))
+        self._diferencial(sistema, _perfiles(300, semilla=5))
+
+        hechos = EvaluadorReglas(sistema).evaluar_hechos([dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)])[0]
+        self.assertTrue({'riesgo-critico', 'mensajeAlertaTotal', 'evaluado'} <= hechos)
+
+    def test_politica_configurada(self):
+        """La tabla usa la política del sistema"""
+        sistema = SistemaExperto()
+        sistema.configurar_politica(deuda_maxima=0.6)
+        self._diferencial(sistema, _perfiles(100, semilla=9))
+
+    def test_columnas_y_mascaras(self):
+        """Con columnas NumPy el resultado coincide con la máscara de CLIPS"""
+        perfiles = _perfiles(200, semilla=11)
+        columnas = {campo: np.array([p[campo] for p in perfiles]) for campo in perfiles[0]}
+        evaluador = EvaluadorReglas()
+
+        sistema = SistemaExperto()
+        esperadas = []
+        for perfil in perfiles:
+            sistema.insertar_hechos(**perfil)
+            sistema.ejecutar_inferencia()
+            esperadas.append(mascara_recomendaciones(sistema.mensajes_activados))
+        np.testing.assert_array_equal(evaluador.evaluar_mascaras(columnas), esperadas)
+
+    def test_mas_de_64_hechos(self):
+        """Los estados usan varias palabras cuando hay más de 64 hechos"""
+        sistema = SistemaExperto()
+        reglas = "\n".join(f"(defrule r{i} (deuda-alta) => (assert (senal-{i})))" for i in range(80))
+        self.assertTrue(sistema.cargar_reglas(reglas))
+        compiladas = compilar(sistema)
+        self.assertEqual(compiladas.palabras, 2)
+        self._diferencial(sistema, _perfiles(30))
+
+    def test_vuelta_a_clips(self):
+        """Una regla no proposicional hace que se use CLIPS"""
+        for regla in ("(defrule r (not (deuda-alta)) => (assert (sin-deuda)))",
+                      "(defrule r (deuda-alta) => (printout t \"deuda\" crlf))",
+                      "(defrule r (perfil-financiero (ocio ?o&:(> ?o 100))) => (assert (ocio-alto)))",
+                      '(defrule r (deuda-alta) => (assert (mensaje "texto")))'):
+            sistema = SistemaExperto()
+            self.assertTrue(sistema.cargar_reglas(regla))
+            with self.assertRaises(ReglasNoCompilables):
+                compilar(sistema)
+
+            evaluador = EvaluadorReglas(sistema)
+            self.assertFalse(evaluador.compilado)
+            self.assertIsNotNone(evaluador.motivo)
+            resultado = evaluador.evaluar_lote([dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)])
+            self.assertIn('mensajeDeuda', resultado[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Coordinador de Lotes Distribuido
+============================================
+
+Usa trabajadores en hilos locales con evaluadores sencillos para comprobar
+el reparto, el robo de trabajo, los reintentos en otro trabajador y la
+pérdida de trabajadores; y trabajadores en procesos locales para comparar
+con la evaluación combinada directa.
+"""
+
+import threading
+import time
+import unittest
+from multiprocessing.connection import Listener
+
+try:
+    from src.coordinador_lotes import CoordinadorLotes, TrozoFallido, servir_trabajador, iniciar_trabajadores_locales
+    COORDINADOR_AVAILABLE = True
+except ImportError:
+    COORDINADOR_AVAILABLE = False
+
+try:
+    from src.evaluacion_combinada import evaluar_perfil_completo
+    MOTORES_AVAILABLE = True
+except ImportError:
+    MOTORES_AVAILABLE = False
+
+CLAVE = b'pruebas-coordinador'
+
+
+def _doblar(perfiles):
+    return [{'valor': perfil['valor'] * 2} for perfil in perfiles]
+
+
+def _lento(perfiles):
+    time.sleep(0.05)
+    return _doblar(perfiles)
+
+
+def _siempre_falla(perfiles):
+    raise ValueError("fallo simulado")
+
+
+class _TrabajadorHilo:
+    """Trabajador en un hilo del proceso de pruebas"""
+
+    def __init__(self, evaluar_trozo):
+        self.oyente = Listener(('localhost', 0), authkey=CLAVE)
+        self.direccion = self.oyente.address
+        self.hilo = threading.Thread(target=servir_trabajador, args=(self.oyente, evaluar_trozo), daemon=True)
+        self.hilo.start()
+
+
+class _TrabajadorQueSeCae:
+    """Acepta la conexión y la corta al recibir el primer trozo"""
+
+    def __init__(self):
+        self.oyente = Listener(('localhost', 0), authkey=CLAVE)
+        self.direccion = self.oyente.address
+        threading.Thread(target=self._servir, daemon=True).start()
+
+    def _servir(self):
+        conexion = self.oyente.accept()
+        conexion.recv()
+        conexion.close()
+        self.oyente.close()
+
+
+def _perfiles(n):
+    return [{'valor': i} for i in range(n)]
+
+
+@unittest.skipUnless(COORDINADOR_AVAILABLE, "coordinador_lotes no disponible")
+class TestCoordinadorLotes(unittest.TestCase):
+    """Pruebas de CoordinadorLotes con trabajadores en hilos"""
+
+    def _coordinador(self, trabajadores, **opciones):
+        coordinador = CoordinadorLotes([t.direccion for t in trabajadores], CLAVE, **opciones)
+        self.addCleanup(coordinador.cerrar, True)
+        return coordinador
+
+    def test_resultados_en_orden(self):
+        """Todos los perfiles se evalúan y vuelven en su orden"""
+        coordinador = self._coordinador([_TrabajadorHilo(_doblar) for _ in range(3)], tamano_trozo=7)
+        self.assertEqual(coordinador.evaluar(_perfiles(100)), _doblar(_perfiles(100)))
+        self.assertEqual(coordinador.evaluar([]), [])
+        estadisticas = coordinador.estadisticas()
+        self.assertEqual(sum(t['perfiles'] for t in estadisticas['trabajadores'].values()), 100)
+        self.assertEqual(estadisticas['reintentados'], 0)
+
+    def test_robo_de_trabajo(self):
+        """El trabajador rápido roba trozos de la cola del lento"""
+        lento, rapido = _TrabajadorHilo(_lento), _TrabajadorHilo(_doblar)
+        coordinador = self._coordinador([lento, rapido], tamano_trozo=5)
+        self.assertEqual(coordinador.evaluar(_perfiles(200)), _doblar(_perfiles(200)))
+        datos = coordinador.estadisticas()['trabajadores']
+        del_rapido = datos['%s:%d' % rapido.direccion]
+        self.assertGreater(del_rapido['robados'], 0)
+        self.assertGreater(del_rapido['trozos'], datos['%s:%d' % lento.direccion]['trozos'])
+
+    def test_reintento_en_otro_trabajador(self):
+        """Los trozos que fallan en un trabajador se completan en otro"""
+        roto, sano = _TrabajadorHilo(_siempre_falla), _TrabajadorHilo(_doblar)
+        coordinador = self._coordinador([roto, sano], tamano_trozo=10)
+        self.assertEqual(coordinador.evaluar(_perfiles(100)), _doblar(_perfiles(100)))
+        datos = coordinador.estadisticas()
+        self.assertGreater(datos['trabajadores']['%s:%d' % roto.direccion]['fallos'], 0)
+        self.assertEqual(datos['reintentados'], datos['trabajadores']['%s:%d' % roto.direccion]['fallos'])
+
+    def test_trabajador_caido(self):
+        """Un trabajador que pierde la conexión deja su trozo y su cola a los demás"""
+        caido, sano = _TrabajadorQueSeCae(), _TrabajadorHilo(_doblar)
+        coordinador = self._coordinador([caido, sano], tamano_trozo=10)
+        self.assertEqual(coordinador.evaluar(_perfiles(100)), _doblar(_perfiles(100)))
+        self.assertEqual(coordinador.trabajadores, [sano.direccion])
+        self.assertEqual(coordinador.estadisticas()['reintentados'], 1)
+
+    def test_fallo_definitivo(self):
+        """Si ningún trabajador puede evaluar un trozo se informa con los resultados parciales"""
+        coordinador = self._coordinador([_TrabajadorHilo(_siempre_falla) for _ in range(2)],
+                                        tamano_trozo=10, reintentos=3)
+        with self.assertRaises(TrozoFallido) as contexto:
+            coordinador.evaluar(_perfiles(30))
+        errores = contexto.exception.errores
+        self.assertEqual(sorted(e['trozo'] for e in errores), [0, 1, 2])
+        # Cada trozo se intenta una vez en cada trabajador y no más
+        self.assertTrue(all(e['intentos'] == 2 for e in errores))
+        self.assertIn("fallo simulado", errores[0]['error'])
+        self.assertEqual(contexto.exception.resultados, [None] * 30)
+
+    def test_sin_trabajadores(self):
+        """Sin ningún trabajador alcanzable no se crea el coordinador"""
+        oyente = Listener(('localhost', 0), authkey=CLAVE)
+        direccion = oyente.address
+        oyente.close()
+        with self.assertRaises(ConnectionError):
+            CoordinadorLotes([direccion], CLAVE)
+
+
+@unittest.skipUnless(COORDINADOR_AVAILABLE and MOTORES_AVAILABLE, "motores no disponibles")
+class TestTrabajadoresLocales(unittest.TestCase):
+    """Trabajadores en procesos con los motores reales"""
+
+    def test_igual_que_evaluacion_directa(self):
+        perfiles = [
+            dict(ingresos=1000, ahorro=500, gastos=100, deudas=500, ocio=0),
+            dict(ingresos=5000, ahorro=20000, gastos=2000, deudas=0, ocio=100),
+            dict(ingresos=3000, ahorro=200, gastos=2500, deudas=300, ocio=600),
+        ] * 4
+        trabajadores = iniciar_trabajadores_locales(2, CLAVE)
+        try:
+            with CoordinadorLotes([d for _, d in trabajadores], CLAVE, tamano_trozo=3) as coordinador:
+                resultados = coordinador.evaluar(perfiles)
+                coordinador.cerrar(detener_trabajadores=True)
+        finally:
+            for proceso, _ in trabajadores:
+                proceso.join(timeout=30)
+                if proceso.is_alive():
+                    proceso.terminate()
+        esperados = [evaluar_perfil_completo(perfil) for perfil in perfiles]
+        self.assertEqual(len(resultados), len(perfiles))
+        for resultado, esperado in zip(resultados, esperados):
+            self.assertEqual(resultado['experto'], esperado['experto'])
+            self.assertEqual(resultado['difuso'], esperado['difuso'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la Deduplicación de Perfiles
+=======================================
+
+Verifica la cuantización, que cada perfil canónico se evalúa una sola vez,
+que los resultados vuelven a todos los duplicados y que coinciden con la
+evaluación directa.
+"""
+
+import unittest
+
+from src.deduplicacion import agrupar_perfiles, expandir_resultados, evaluar_deduplicado
+
+try:
+    from src.evaluacion_combinada import crear_evaluador_trozos
+    MOTORES_AVAILABLE = True
+except ImportError:
+    MOTORES_AVAILABLE = False
+
+PERFILES = [
+    dict(id=1, ingresos=2500.004, ahorro=1000, gastos=1800, deudas=0, ocio=200, riesgo=5.02),
+    dict(id=2, ingresos=2499.996, ahorro=1000, gastos=1800, deudas=0, ocio=200, riesgo=4.98),
+    dict(id=3, ingresos=4000, ahorro=500, gastos=3900, deudas=2000, ocio=900, riesgo=2),
+    dict(id=4, ingresos=2500, ahorro=1000, gastos=1800, deudas=0, ocio=200, riesgo=5),
+]
+
+
+class _Contador:
+    def __init__(self):
+        self.evaluados = []
+
+    def __call__(self, perfiles):
+        self.evaluados.extend(perfiles)
+        return [{'perfil': perfil, 'suma': sum(perfil.values())} for perfil in perfiles]
+
+
+class TestDeduplicacion(unittest.TestCase):
+    """Pruebas de agrupar_perfiles y evaluar_deduplicado"""
+
+    def test_agrupar_con_precision_por_defecto(self):
+        """Perfiles iguales tras redondear comparten canónico; id no cuenta"""
+        unicos, indices = agrupar_perfiles(PERFILES)
+        self.assertEqual(indices, [0, 0, 1, 0])
+        self.assertEqual(unicos[0], dict(ingresos=2500.0, ahorro=1000.0, gastos=1800.0, deudas=0.0,
+                                         ocio=200.0, riesgo=5.0))
+        self.assertNotIn('id', unicos[1])
+
+    def test_precision_configurable(self):
+        """Un paso común o por campo cambia los grupos"""
+        self.assertEqual(agrupar_perfiles(PERFILES, precision=0.001)[1], [0, 1, 2, 3])
+        self.assertEqual(agrupar_perfiles(PERFILES, precision={'riesgo': 0.01})[1], [0, 1, 2, 3])
+        unicos, indices = agrupar_perfiles(PERFILES, precision=10000)
+        self.assertEqual(indices, [0, 0, 0, 0])
+        self.assertEqual(agrupar_perfiles([{'riesgo': 0.3}], precision=0.1)[0], [{'riesgo': 0.3}])
+        with self.assertRaises(ValueError):
+            agrupar_perfiles(PERFILES, precision=0)
+
+    def test_evaluar_una_vez_y_repartir(self):
+        """Cada canónico se evalúa una vez y cada perfil recibe su resultado con su perfil original"""
+        contador = _Contador()
+        resultados, estadisticas = evaluar_deduplicado(PERFILES, contador)
+        self.assertEqual(len(contador.evaluados), 2)
+        self.assertEqual([r['perfil']['id'] for r in resultados], [1, 2, 3, 4])
+        self.assertEqual(resultados[0]['suma'], resultados[3]['suma'])
+        self.assertEqual((estadisticas['perfiles'], estadisticas['unicos'], estadisticas['duplicados']), (4, 2, 2))
+        self.assertEqual(estadisticas['proporcion_duplicados'], 0.5)
+        self.assertEqual(evaluar_deduplicado([], contador)[0], [])
+
+    def test_expandir_sin_perfiles(self):
+        self.assertEqual(expandir_resultados(['a', 'b'], [1, 0, 1]), ['b', 'a', 'b'])
+
+    @unittest.skipUnless(MOTORES_AVAILABLE, "motores no disponibles")
+    def test_igual_que_evaluacion_directa(self):
+        """Con datos ya cuantizados, el resultado deduplicado es el de la evaluación directa"""
+        perfiles = [dict(p, riesgo=round(p['riesgo'], 1)) for p in PERFILES if p['id'] in (3, 4)] * 3
+        evaluar = crear_evaluador_trozos()
+        resultados, estadisticas = evaluar_deduplicado(perfiles, evaluar)
+        self.assertEqual(estadisticas['unicos'], 2)
+        directos = evaluar(perfiles)
+        for resultado, directo in zip(resultados, directos):
+            self.assertEqual(resultado['experto'], directo['experto'])
+            self.assertEqual(resultado['difuso'], directo['difuso'])
+            self.assertEqual(resultado['perfil'], directo['perfil'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la Evaluación Difusa Escalar
+=======================================
+
+Verifica que la ruta escalar reproduce las pertenencias y las salidas
+Mamdani y TSK de scikit-fuzzy, y que la poda por soporte no cambia el
+resultado.
+"""
+
+import random
+import unittest
+
+try:
+    import numpy as np
+    import skfuzzy as fuzz
+    from src.fuzzy_system import SistemaDifusoFinanciero, TERMINOS_AHORRO, TERMINOS_RIESGO
+    from src.difuso_escalar import EvaluadorDifusoEscalar, IndiceSoportes, pertenencia, trapecio
+    from src.trazas import TrazadorMuestreo
+    FUZZY_AVAILABLE = True
+except ImportError:
+    FUZZY_AVAILABLE = False
+
+# Diferencia máxima permitida frente al centroide muestreado de scikit-fuzzy
+TOLERANCIA_MAMDANI = 0.01
+
+
+def _entradas(n, semilla=7):
+    rng = random.Random(semilla)
+    puntos = [(rng.uniform(0, 1000), rng.uniform(0, 10)) for _ in range(n)]
+    # Vértices de los conjuntos, donde cambian las reglas activas
+    puntos += [(a, r) for a in (0, 200, 400, 500, 600, 800, 1000) for r in (0, 2, 3, 4, 6, 7, 8, 10)]
+    return puntos
+
+
+@unittest.skipUnless(FUZZY_AVAILABLE, "scikit-fuzzy no disponible")
+class TestDifusoEscalar(unittest.TestCase):
+    """Pruebas del evaluador escalar frente a scikit-fuzzy"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sistema = SistemaDifusoFinanciero()
+        cls.escalar = EvaluadorDifusoEscalar()
+
+    def _skfuzzy(self, simulador, salida, ahorro, riesgo):
+        simulador.input['ahorro_mensual'] = ahorro
+        simulador.input['riesgo_inversion'] = riesgo
+        simulador.compute()
+        return simulador.output[salida]
+
+    def test_pertenencias_analiticas(self):
+        """trimf/trapmf analíticos coinciden con los de scikit-fuzzy en su universo"""
+        for terminos, universo in ((TERMINOS_AHORRO, np.arange(0, 1001, 1)),
+                                   (TERMINOS_RIESGO, np.arange(0, 11, 0.1))):
+            for puntos in terminos.values():
+                esperado = (fuzz.trimf if len(puntos) == 3 else fuzz.trapmf)(universo, list(puntos))
+                obtenido = [pertenencia(float(x), *trapecio(puntos)) for x in universo]
+                np.testing.assert_allclose(obtenido, esperado, atol=1e-9)
+
+    def test_mamdani_coincide_con_skfuzzy(self):
+        """El centroide exacto difiere del muestreado en menos de la tolerancia"""
+        for ahorro, riesgo in _entradas(300):
+            esperado = self._skfuzzy(self.sistema.simulador_mamdani, 'nivel_inversion', ahorro, riesgo)
+            self.assertAlmostEqual(self.escalar.mamdani(ahorro, riesgo), esperado,
+                                   delta=TOLERANCIA_MAMDANI, msg=(ahorro, riesgo))
+
+    def test_tsk_coincide_con_skfuzzy(self):
+        """TSK reproduce la media ponderada de los singletones de scikit-fuzzy"""
+        for ahorro, riesgo in _entradas(300, semilla=8):
+            esperado = self._skfuzzy(self.sistema.simulador_tsk, 'nivel_inversion_tsk', ahorro, riesgo)
+            self.assertAlmostEqual(self.escalar.tsk(ahorro, riesgo), esperado, places=9, msg=(ahorro, riesgo))
+
+    def test_sistema_con_ruta_escalar(self):
+        """evaluar_mamdani/evaluar_tsk conservan el formato y la validación"""
+        rapido = SistemaDifusoFinanciero(ruta_escalar=True)
+        for metodo in ('evaluar_mamdani', 'evaluar_tsk'):
+            esperado = getattr(self.sistema, metodo)(700, 3)
+            obtenido = getattr(rapido, metodo)(700, 3)
+            self.assertEqual(set(obtenido), set(esperado))
+            self.assertEqual(obtenido['etiqueta'], esperado['etiqueta'])
+            self.assertAlmostEqual(obtenido['nivel_inversion'], esperado['nivel_inversion'],
+                                   delta=TOLERANCIA_MAMDANI)
+            self.assertIn('error', getattr(rapido, metodo)(1001, 3))
+
+    def test_traza_desde_ruta_escalar(self):
+        """Las trazas de la ruta escalar tienen las mismas pertenencias y activaciones"""
+        trazador = TrazadorMuestreo(tasa=1.0)
+        SistemaDifusoFinanciero(trazador=trazador).evaluar_mamdani(700, 3)
+        SistemaDifusoFinanciero(trazador=trazador, ruta_escalar=True).evaluar_mamdani(700, 3)
+
+        referencia, escalar = trazador.trazas()
+        for variable, grados in referencia['pertenencias'].items():
+            for termino, grado in grados.items():
+                self.assertAlmostEqual(escalar['pertenencias'][variable][termino], grado)
+        for regla, fuerza in referencia['activaciones'].items():
+            self.assertAlmostEqual(escalar['activaciones'][regla], fuerza)
+
+    def test_sin_reglas_activas(self):
+        """Sin ninguna regla activada no hay salida, como en scikit-fuzzy"""
+        escalar = EvaluadorDifusoEscalar(reglas=(('y', 'alto', 'alto', 'agresiva'),))
+        with self.assertRaises(ValueError):
+            escalar.mamdani(100, 1)
+        with self.assertRaises(ValueError):
+            escalar.tsk(100, 1)
+
+
+@unittest.skipUnless(FUZZY_AVAILABLE, "scikit-fuzzy no disponible")
+class TestPodaPorSoporte(unittest.TestCase):
+    """Pruebas del índice de soportes y de la poda de reglas"""
+
+    def test_indice_soportes(self):
+        """Cada tramo contiene todos los términos con pertenencia no nula y descarta el resto"""
+        trapecios = [trapecio(p) for p in TERMINOS_RIESGO.values()]
+        indice = IndiceSoportes(trapecios)
+        for x in list(np.arange(-1, 11.5, 0.05)) + [0, 2, 3, 7, 8, 10]:
+            activos = set(indice.terminos(float(x)))
+            for i, t in enumerate(trapecios):
+                if pertenencia(float(x), *t) > 0:
+                    self.assertIn(i, activos, (x, i))
+        self.assertEqual(indice.terminos(-0.5), ())
+        self.assertEqual(indice.terminos(5), (1,))
+        self.assertEqual(indice.terminos(9), (2,))
+
+    def test_poda_equivale_a_evaluacion_completa(self):
+        """Con cientos de reglas la poda da las mismas fuerzas y salidas"""
+        rng = random.Random(3)
+        ahorro = {f"a{i}": (max(0, (i - 1) * 50), i * 50, min(1000, (i + 1) * 50)) for i in range(21)}
+        riesgo = {f"r{i}": (max(0, i - 1), i, min(10, i + 1)) for i in range(11)}
+        salida = {f"s{i}": (max(0, (i - 1) * 10), i * 10, min(50, (i + 1) * 10)) for i in range(6)}
+        singletones = {nombre: puntos[1] for nombre, puntos in salida.items()}
+        reglas = tuple((rng.choice('yyyo'), rng.choice(list(ahorro)), rng.choice(list(riesgo)),
+                        rng.choice(list(salida))) for _ in range(300))
+
+        completo = EvaluadorDifusoEscalar(ahorro, riesgo, salida, singletones, reglas, podar=False)
+        podado = EvaluadorDifusoEscalar(ahorro, riesgo, salida, singletones, reglas, podar=True)
+        for a, r in _entradas(300, semilla=4):
+            self.assertEqual(podado.fuerzas(a, r), completo.fuerzas(a, r))
+            self.assertAlmostEqual(podado.mamdani(a, r), completo.mamdani(a, r))
+            self.assertAlmostEqual(podado.tsk(a, r), completo.tsk(a, r))
+        self.assertLess(max(len(c) for c in podado._candidatas.values()), len(reglas) // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Sistema Difuso Tensorial
+====================================
+
+Verifica que el motor tensorial reproduce a scikit-fuzzy con el modelo
+financiero de dos entradas y con un modelo de cinco entradas, y que su API
+coincide con la de SistemaDifusoFinanciero.
+"""
+
+import unittest
+from functools import reduce
+
+try:
+    import numpy as np
+    import skfuzzy as fuzz
+    from skfuzzy import control as ctrl
+    from src.fuzzy_system import SistemaDifusoFinanciero
+    from src.difuso_tensorial import (ModeloDifuso, VariableDifusa, SistemaDifusoTensorial, modelo_financiero,
+                                  modelo_financiero_extendido, etiquetas_lote)
+    FUZZY_AVAILABLE = True
+except ImportError:
+    FUZZY_AVAILABLE = False
+
+# skfuzzy añade los puntos de corte al universo de salida; el motor tensorial no
+TOLERANCIA_MAMDANI = 0.01
+
+# Paso del universo de scikit-fuzzy de cada variable del modelo extendido
+PASOS = {'ahorro_mensual': 1, 'riesgo_inversion': 0.1, 'ratio_deuda': 0.01, 'edad': 1, 'horizonte': 0.5}
+
+
+def _simulador_skfuzzy(modelo, metodo):
+    """ControlSystemSimulation equivalente a un ModeloDifuso"""
+    variables = {}
+    for variable in modelo.entradas:
+        minimo, maximo = variable.rango
+        paso = PASOS[variable.nombre]
+        antecedente = ctrl.Antecedent(np.arange(minimo, maximo + paso / 2, paso), variable.nombre)
+        for termino, a, b, c, d in zip(variable.terminos, variable._a, variable._b, variable._c, variable._d):
+            antecedente[termino] = fuzz.trapmf(antecedente.universe, [a, b, c, d])
+        variables[variable.nombre] = antecedente
+
+    salida = ctrl.Consequent(modelo.universo, 'salida')
+    for k, termino in enumerate(modelo.nombres_salida):
+        if metodo == 'tsk':
+            pico = modelo._singletones[k]
+            salida[termino] = fuzz.trimf(salida.universe, [pico, pico, pico])
+        else:
+            salida[termino] = modelo._conjuntos_salida[k]
+
+    reglas = []
+    for operador, antecedentes, conclusion in modelo.reglas:
+        terminos = [variables[v][t] for v, t in antecedentes.items()]
+        condicion = reduce((lambda x, y: x & y) if operador == 'y' else (lambda x, y: x | y), terminos)
+        reglas.append(ctrl.Rule(condicion, salida[conclusion]))
+    return ctrl.ControlSystemSimulation(ctrl.ControlSystem(reglas))
+
+
+def _lote(modelo, n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return {v.nombre: rng.uniform(*v.rango, n) for v in modelo.entradas}
+
+
+@unittest.skipUnless(FUZZY_AVAILABLE, "scikit-fuzzy no disponible")
+class TestDifusoTensorial(unittest.TestCase):
+    """Pruebas del modelo tensorial frente a scikit-fuzzy"""
+
+    def _comparar(self, modelo, n):
+        lote = _lote(modelo, n)
+        for metodo, tolerancia in (('mamdani', TOLERANCIA_MAMDANI), ('tsk', 1e-9)):
+            simulador = _simulador_skfuzzy(modelo, metodo)
+            for nombre, valores in lote.items():
+                simulador.input[nombre] = valores
+            simulador.compute()
+            obtenido = modelo.mamdani(lote) if metodo == 'mamdani' else modelo.tsk(lote)
+            np.testing.assert_allclose(obtenido, simulador.output['salida'], atol=tolerancia, err_msg=metodo)
+
+    def test_modelo_financiero(self):
+        """El modelo de dos entradas coincide con scikit-fuzzy en lote"""
+        self._comparar(modelo_financiero(), 500)
+
+    def test_modelo_cinco_entradas(self):
+        """El modelo extendido coincide con su ControlSystem de scikit-fuzzy"""
+        self._comparar(modelo_financiero_extendido(), 300)
+
+    def test_bloques(self):
+        """El resultado no depende del tamaño de bloque"""
+        modelo = modelo_financiero_extendido()
+        lote = _lote(modelo, 100, semilla=1)
+        esperado = modelo.mamdani(lote)
+        modelo.tamano_bloque = 7
+        np.testing.assert_allclose(modelo.mamdani(lote), esperado)
+
+    def test_entradas_como_matriz(self):
+        """Una matriz (muestras × entradas) equivale al dict de columnas"""
+        modelo = modelo_financiero()
+        lote = _lote(modelo, 50, semilla=2)
+        matriz = np.column_stack([lote['ahorro_mensual'], lote['riesgo_inversion']])
+        np.testing.assert_allclose(modelo.tsk(matriz), modelo.tsk(lote))
+
+    def test_reglas_invalidas(self):
+        """Variables, términos y operadores desconocidos se rechazan al construir"""
+        entradas = [VariableDifusa('x', (0, 1), {'bajo': (0, 0, 1)})]
+        salida = {'s': (0, 1, 2)}
+        for reglas in ([('y', {'x': 'alto'}, 's')], [('y', {'z': 'bajo'}, 's')],
+                       [('no', {'x': 'bajo'}, 's')], [('y', {'x': 'bajo'}, 't')], []):
+            with self.assertRaises(ValueError):
+                ModeloDifuso(entradas, salida, reglas)
+
+
+@unittest.skipUnless(FUZZY_AVAILABLE, "scikit-fuzzy no disponible")
+class TestSistemaDifusoTensorial(unittest.TestCase):
+    """Pruebas de la API de SistemaDifusoTensorial"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.referencia = SistemaDifusoFinanciero()
+        cls.sistema = SistemaDifusoTensorial()
+
+    def test_misma_api_que_sistema_difuso(self):
+        """evaluar_mamdani/evaluar_tsk devuelven el mismo formato y valores"""
+        for ahorro, riesgo in ((700, 3), (100, 8), (500, 5), (1000, 0)):
+            for metodo in ('evaluar_mamdani', 'evaluar_tsk'):
+                esperado = getattr(self.referencia, metodo)(ahorro, riesgo)
+                obtenido = getattr(self.sistema, metodo)(ahorro, riesgo)
+                self.assertEqual(list(obtenido), list(esperado))
+                self.assertEqual(obtenido['etiqueta'], esperado['etiqueta'])
+                self.assertAlmostEqual(obtenido['nivel_inversion'], esperado['nivel_inversion'],
+                                       delta=TOLERANCIA_MAMDANI)
+
+        ambos = self.sistema.evaluar_ambos_metodos(700, 3)
+        self.assertEqual(set(ambos['resultados']), {'mamdani', 'tsk'})
+
+    def test_validacion(self):
+        """Entradas fuera de rango o ausentes devuelven un error"""
+        self.assertIn('error', self.sistema.evaluar_mamdani(1001, 3))
+        self.assertIn('error', self.sistema.evaluar_tsk(500))
+        extendido = SistemaDifusoTensorial(modelo_financiero_extendido())
+        self.assertIn('error', extendido.evaluar_mamdani(500, 3, ratio_deuda=0.2, edad=30))
+
+    def test_entradas_por_nombre(self):
+        """Las entradas adicionales se pasan por nombre y aparecen en el resultado"""
+        extendido = SistemaDifusoTensorial(modelo_financiero_extendido())
+        resultado = extendido.evaluar_tsk(700, 3, ratio_deuda=0.8, edad=70, horizonte=1)
+        self.assertEqual(resultado['ratio_deuda_entrada'], 0.8)
+        self.assertEqual(resultado['etiqueta'], 'Moderada')
+        self.assertLess(resultado['nivel_inversion'],
+                        extendido.evaluar_tsk(700, 3, ratio_deuda=0.0, edad=25, horizonte=30)['nivel_inversion'])
+
+    def test_lote_y_etiquetas(self):
+        """evaluar_lote coincide con las evaluaciones individuales"""
+        lote = {'ahorro_mensual': np.array([700.0, 100.0, 950.0]), 'riesgo_inversion': np.array([3.0, 8.0, 1.0])}
+        niveles = self.sistema.evaluar_lote(lote, metodo='tsk')
+        etiquetas = etiquetas_lote(niveles)
+        for i in range(3):
+            individual = self.sistema.evaluar_tsk(lote['ahorro_mensual'][i], lote['riesgo_inversion'][i])
+            self.assertAlmostEqual(round(niveles[i], 2), individual['nivel_inversion'])
+            self.assertEqual(etiquetas[i], individual['etiqueta'])
+        with self.assertRaises(ValueError):
+            self.sistema.evaluar_lote(lote, metodo='sugeno')
+
+    def test_etiqueta_sin_reglas(self):
+        """Un nivel NaN (ninguna regla activada) no recibe etiqueta"""
+        etiquetas = etiquetas_lote(np.array([10.0, np.nan, 40.0]))
+        self.assertEqual(list(etiquetas), ['Conservadora', '', 'Agresiva'])
+
+    def test_entradas_desconocidas(self):
+        """Las entradas con nombre que no son del modelo se rechazan"""
+        with self.assertRaises(ValueError):
+            self.sistema.evaluar_mamdani(700, 3, riesgo=3)
+        with self.assertRaises(ValueError):
+            self.sistema.evaluar_lote({'ahorro_mensual': np.array([700.0]), 'riesgo_inversion': np.array([3.0]),
+                                       'ahoro': np.array([1.0])})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la Evaluación Combinada
+==================================
+
+Verifica la derivación de entradas difusas y que la evaluación
+concurrente de ambos motores coincide con las llamadas secuenciales.
+"""
+
+import unittest
+
+try:
+    from src.evaluacion_combinada import (
+        EvaluadorCombinado, derivar_entradas_difusas, evaluar_perfil_completo
+    )
+    from src.sistema_experto import SistemaExperto
+    from src.fuzzy_system import SistemaDifusoFinanciero
+    DEPENDENCIAS_AVAILABLE = True
+except ImportError:
+    DEPENDENCIAS_AVAILABLE = False
+
+PERFILES = [
+    dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300, riesgo=8),
+    dict(ingresos=5000, ahorro=20000, gastos=2000, deudas=100, ocio=200, riesgo=2),
+    dict(ingresos=3000, ahorro=9000, gastos=2600, deudas=0, ocio=500),
+]
+
+
+@unittest.skipUnless(DEPENDENCIAS_AVAILABLE, "Dependencias no disponibles")
+class TestEvaluacionCombinada(unittest.TestCase):
+    """Pruebas del evaluador combinado"""
+
+    def _secuencial(self, perfil):
+        experto = SistemaExperto()
+        experto.insertar_hechos(**perfil)
+        experto.ejecutar_inferencia()
+        difuso = SistemaDifusoFinanciero().evaluar_mamdani(*derivar_entradas_difusas(perfil))
+        return experto.obtener_resultado(), difuso
+
+    def test_derivar_entradas(self):
+        """El ahorro mensual es ingresos - gastos acotado a 0-1000"""
+        self.assertEqual(derivar_entradas_difusas(PERFILES[0]), (200.0, 8))
+        self.assertEqual(derivar_entradas_difusas(PERFILES[1]), (1000.0, 2))
+        self.assertEqual(derivar_entradas_difusas({'ingresos': 100, 'gastos': 300}), (0.0, 5.0))
+
+    def test_perfil_completo(self):
+        """La evaluación concurrente coincide con la secuencial"""
+        resultado = evaluar_perfil_completo(PERFILES[0])
+        texto, difuso = self._secuencial(PERFILES[0])
+        self.assertEqual(resultado['experto']['recomendaciones'], texto)
+        self.assertEqual(resultado['difuso'], difuso)
+        self.assertIn('mensajeDeuda', resultado['experto']['mensajes'])
+
+    def test_lote_conserva_orden(self):
+        """El lote devuelve un resultado combinado por perfil y en orden"""
+        perfiles = PERFILES * 3
+        with EvaluadorCombinado(max_workers=2, tamano_bloque=2) as evaluador:
+            resultados = evaluador.evaluar_lote(perfiles)
+            individual = [evaluador.evaluar_perfil_completo(p) for p in perfiles]
+
+        self.assertEqual(len(resultados), len(perfiles))
+        self.assertEqual(resultados, individual)
+
+    def test_lote_vacio(self):
+        """Un lote vacío no crea el pool"""
+        with EvaluadorCombinado(max_workers=1) as evaluador:
+            self.assertEqual(evaluador.evaluar_lote([]), [])
+            self.assertIsNone(evaluador._pool)
+
+    def test_metodo_invalido(self):
+        """Un método difuso desconocido se rechaza"""
+        with self.assertRaises(ValueError):
+            EvaluadorCombinado(metodo='sugeno')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la Fábrica de Sistemas desde Imagen Binaria
+======================================================
+
+Verifica que los sistemas creados con bload dan los mismos resultados que
+los construidos desde texto, que son independientes entre sí y que
+rechazan las construcciones nuevas.
+"""
+
+import os
+import gc
+import multiprocessing
+import random
+import threading
+import unittest
+
+try:
+    from src.sistema_experto import SistemaExperto, MODO_CADENA
+    from src.fabrica_sistemas import FabricaSistemas
+    from src.compilador_reglas import EvaluadorReglas
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+REGLA_GASTO = "(defrule reglaGastoAlto (deuda-alta) (ocio-excesivo) => (assert (mensajeGastoAlto)))"
+MENSAJES_GASTO = {'mensajeGastoAlto': "- Deuda alta y ocio excesivo a la vez.\n"}
+
+
+def _perfiles(n, semilla=5):
+    rng = random.Random(semilla)
+    perfiles = []
+    for _ in range(n):
+        ingresos = rng.uniform(500, 8000)
+        perfiles.append(dict(ingresos=ingresos, ahorro=rng.uniform(0, ingresos * 4),
+                             gastos=rng.uniform(0, ingresos), deudas=rng.uniform(0, ingresos * 0.8),
+                             ocio=rng.uniform(0, ingresos * 0.4)))
+    return perfiles
+
+
+def _crear_fabrica_en_hijo(cola):
+    """Crea una fábrica sin cerrarla en un proceso hijo y envía el directorio de su imagen"""
+    global _fabrica_hijo
+    _fabrica_hijo = FabricaSistemas()
+    cola.put(os.path.dirname(_fabrica_hijo.ruta_imagen))
+
+
+def _resultado(sistema, perfil):
+    sistema.insertar_hechos(**perfil)
+    sistema.ejecutar_inferencia()
+    return sistema.obtener_resultado(), sistema.mensajes_activados
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestFabricaSistemas(unittest.TestCase):
+    """Pruebas de FabricaSistemas y SistemaExperto.desde_imagen"""
+
+    def test_mismos_resultados_que_constructor(self):
+        """Con ambos modos de hechos el clon coincide con SistemaExperto()"""
+        with FabricaSistemas() as fabrica:
+            for modo in ('plantilla', MODO_CADENA):
+                referencia = SistemaExperto(modo_hechos=modo)
+                clon = fabrica.crear(modo_hechos=modo)
+                for perfil in _perfiles(100):
+                    self.assertEqual(_resultado(clon, perfil), _resultado(referencia, perfil), perfil)
+
+    def test_reglas_y_politica_de_la_plantilla(self):
+        """Las reglas, mensajes y política de la fábrica llegan a cada clon"""
+        referencia = SistemaExperto()
+        referencia.configurar_politica(deuda_maxima=0.3)
+        referencia.cargar_reglas(REGLA_GASTO, mensajes=MENSAJES_GASTO)
+        with FabricaSistemas(REGLA_GASTO, MENSAJES_GASTO, politica={'deuda_maxima': 0.3}) as fabrica:
+            clon = fabrica.crear()
+            self.assertEqual(clon.politica, referencia.politica)
+            self.assertEqual(clon.listar_reglas_disponibles(), referencia.listar_reglas_disponibles())
+            for perfil in _perfiles(100, semilla=6):
+                self.assertEqual(_resultado(clon, perfil), _resultado(referencia, perfil), perfil)
+            self.assertIn('mensajeGastoAlto', _resultado(clon, dict(ingresos=1000, ahorro=50, gastos=500,
+                                                                    deudas=500, ocio=300))[1])
+
+    def test_mensajes_con_la_politica_de_la_fabrica(self):
+        """Los clones citan en sus mensajes los umbrales de la política de la fábrica"""
+        with FabricaSistemas(politica={'deuda_maxima': 0.35}) as fabrica:
+            clon = fabrica.crear()
+        resultado = _resultado(clon, dict(ingresos=1000, ahorro=500, gastos=100, deudas=380, ocio=0))[0]
+        self.assertIn("superan el 35%", resultado)
+
+    def test_compilable(self):
+        """El compilador de reglas funciona sobre un clon (usa los textos copiados)"""
+        with FabricaSistemas(REGLA_GASTO, MENSAJES_GASTO) as fabrica:
+            evaluador = EvaluadorReglas(fabrica.crear())
+        self.assertTrue(evaluador.compilado, evaluador.motivo)
+
+    def test_clones_independientes(self):
+        """Los hechos de un clon no aparecen en otro"""
+        with FabricaSistemas() as fabrica:
+            uno, otro = fabrica.crear(), fabrica.crear()
+            _resultado(uno, dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300))
+            otro.reiniciar_sistema()
+            self.assertTrue(any('deuda-alta' in h for h in uno.listar_hechos_actuales()))
+            self.assertFalse(any('deuda-alta' in h for h in otro.listar_hechos_actuales()))
+            self.assertEqual(fabrica.creados, 2)
+
+    def test_construcciones_bloqueadas(self):
+        """Con la imagen cargada no se pueden añadir reglas ni cambiar la política"""
+        with FabricaSistemas() as fabrica:
+            clon = fabrica.crear()
+        self.assertFalse(clon.cargar_reglas(REGLA_GASTO))
+        with self.assertRaises(RuntimeError):
+            clon.configurar_politica(deuda_maxima=0.5)
+        self.assertEqual(clon.politica['deuda-maxima'], 0.4)
+        # El clon sigue funcionando después de cerrar la fábrica
+        self.assertIn('mensajeDeuda', _resultado(clon, dict(ingresos=1000, ahorro=500, gastos=100,
+                                                             deudas=500, ocio=0))[1])
+        with self.assertRaises(RuntimeError):
+            fabrica.crear()
+
+    def test_imagen_borrada_sin_cerrar(self):
+        """La imagen de una fábrica no cerrada se borra al liberarse la fábrica"""
+        fabrica = FabricaSistemas()
+        directorio = os.path.dirname(fabrica.ruta_imagen)
+        self.assertTrue(os.path.isdir(directorio))
+        del fabrica
+        gc.collect()
+        self.assertFalse(os.path.exists(directorio))
+
+    def test_imagen_borrada_en_proceso_hijo(self):
+        """Un proceso hijo que termina con una fábrica abierta borra su imagen"""
+        contexto = multiprocessing.get_context('fork')
+        cola = contexto.Queue()
+        hijo = contexto.Process(target=_crear_fabrica_en_hijo, args=(cola,))
+        hijo.start()
+        directorio = cola.get(timeout=30)
+        hijo.join(30)
+        self.assertEqual(hijo.exitcode, 0)
+        self.assertFalse(os.path.exists(directorio))
+
+    def test_creacion_concurrente(self):
+        """Varios hilos pueden crear sistemas a la vez"""
+        perfil = dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+        esperado = _resultado(SistemaExperto(), perfil)
+        resultados = []
+        with FabricaSistemas() as fabrica:
+            def trabajar():
+                for _ in range(10):
+                    resultados.append(_resultado(fabrica.crear(), perfil))
+            hilos = [threading.Thread(target=trabajar) for _ in range(4)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        self.assertEqual(len(resultados), 40)
+        self.assertTrue(all(r == esperado for r in resultados))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,14 +11,10 @@ Fecha: 2024
 """
 
 import sys
-import os
 import unittest
 
-# Agregar el directorio src al path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-
 try:
-    from fuzzy_system import SistemaDifusoFinanciero
+    from src.fuzzy_system import SistemaDifusoFinanciero
     FUZZY_AVAILABLE = True
 except ImportError:
     FUZZY_AVAILABLE = False
@@ -222,7 +218,7 @@ class TestSistemaDifusoSinDependencias(unittest.TestCase):
         """Prueba que el sistema maneje correctamente la falta de dependencias"""
         if not FUZZY_AVAILABLE:
             with self.assertRaises(ImportError):
-                from fuzzy_system import SistemaDifusoFinanciero
+                from src.fuzzy_system import SistemaDifusoFinanciero
 
 
 def ejecutar_pruebas():
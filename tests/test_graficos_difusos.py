@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los Gráficos Difusos Fuera de Pantalla
+=================================================
+
+Verifica el formato de las figuras, la clave de la caché y que las
+peticiones repetidas se sirven desde disco sin volver a dibujar.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    import matplotlib  # noqa: F401
+    from src.fuzzy_system import SistemaDifusoFinanciero
+    from src import graficos_difusos
+    from src.graficos_difusos import RenderizadorConjuntos, clave_figura, configuracion_financiera
+    GRAFICOS_AVAILABLE = True
+except ImportError:
+    GRAFICOS_AVAILABLE = False
+
+CABECERA_PNG = b'\x89PNG\r\n\x1a\n'
+
+
+@unittest.skipUnless(GRAFICOS_AVAILABLE, "matplotlib o scikit-fuzzy no disponible")
+class TestGraficosDifusos(unittest.TestCase):
+    """Pruebas del renderizador con caché en disco"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def test_formatos(self):
+        """PNG y SVG válidos; un formato desconocido es un error"""
+        renderizador = RenderizadorConjuntos(self.directorio, en_proceso=False)
+        self.assertTrue(renderizador.renderizar().startswith(CABECERA_PNG))
+        self.assertIn(b'<svg', renderizador.renderizar(formato='svg'))
+        with self.assertRaises(ValueError):
+            renderizador.renderizar(formato='gif')
+
+    def test_clave_figura(self):
+        """La clave cambia con la entrada, las pertenencias, el formato y la resolución"""
+        configuracion = configuracion_financiera()
+        base = clave_figura(configuracion)
+        self.assertEqual(base, clave_figura(configuracion_financiera()))
+        self.assertNotEqual(base, clave_figura(configuracion, (700, 3)))
+        self.assertNotEqual(clave_figura(configuracion, (700, 3)), clave_figura(configuracion, (700, 4)))
+        self.assertNotEqual(base, clave_figura(configuracion, formato='svg'))
+        self.assertNotEqual(base, clave_figura(configuracion, dpi=200))
+        configuracion['variables'][0]['terminos']['bajo'] = (0, 0, 300)
+        self.assertNotEqual(base, clave_figura(configuracion))
+
+    def test_cache_en_disco(self):
+        """La segunda petición se lee de disco, también desde otra instancia"""
+        renderizador = RenderizadorConjuntos(self.directorio, en_proceso=False)
+        primera = renderizador.renderizar((700, 3))
+        self.assertEqual(renderizador.renderizar((700, 3)), primera)
+        self.assertEqual(renderizador.estadisticas(), {'aciertos': 1, 'fallos': 1})
+
+        otra = RenderizadorConjuntos(self.directorio, en_proceso=False)
+        self.assertEqual(otra.renderizar((700, 3)), primera)
+        self.assertEqual(otra.estadisticas(), {'aciertos': 1, 'fallos': 0})
+        self.assertEqual(sorted(os.listdir(self.directorio)),
+                         [clave_figura(renderizador.configuracion, (700, 3)) + '.png'])
+
+    def test_entrada_redondeada(self):
+        """Las entradas que solo difieren tras DECIMALES_ENTRADA comparten figura"""
+        configuracion = configuracion_financiera()
+        self.assertEqual(clave_figura(configuracion, (700, 3)), clave_figura(configuracion, (700.0001, 2.999999)))
+        renderizador = RenderizadorConjuntos(self.directorio, en_proceso=False)
+        primera = renderizador.renderizar((700.0001, 3))
+        self.assertEqual(renderizador.renderizar((700, 3.000002)), primera)
+        self.assertEqual(renderizador.estadisticas(), {'aciertos': 1, 'fallos': 1})
+
+    def test_limite_de_figuras(self):
+        """Al superar max_figuras se borra la figura usada hace más tiempo"""
+        renderizador = RenderizadorConjuntos(self.directorio, en_proceso=False, max_figuras=2)
+        claves = [clave_figura(renderizador.configuracion, (v, 5)) + '.png' for v in (100, 500, 900)]
+        renderizador.renderizar((100, 5))
+        renderizador.renderizar((500, 5))
+        # Marcar la primera como usada después de la segunda
+        os.utime(os.path.join(self.directorio, claves[1]), (1, 1))
+        renderizador.renderizar((100, 5))
+        renderizador.renderizar((900, 5))
+        self.assertEqual(sorted(os.listdir(self.directorio)), sorted([claves[0], claves[2]]))
+
+    def test_metodo_tsk(self):
+        """La figura TSK es distinta de la Mamdani para la misma entrada"""
+        configuracion = configuracion_financiera()
+        self.assertNotEqual(clave_figura(configuracion, (700, 3)), clave_figura(configuracion, (700, 3), metodo='tsk'))
+        self.assertEqual(clave_figura(configuracion), clave_figura(configuracion, metodo='tsk'))
+        renderizador = RenderizadorConjuntos(self.directorio, en_proceso=False)
+        mamdani = renderizador.renderizar((700, 3), formato='svg')
+        self.assertNotEqual(renderizador.renderizar((700, 3), formato='svg', metodo='tsk'), mamdani)
+        with self.assertRaises(ValueError):
+            renderizador.renderizar((700, 3), metodo='sugeno')
+
+    def test_peticiones_simultaneas(self):
+        """Varios hilos pidiendo la misma figura comparten un único dibujo"""
+        renderizador = RenderizadorConjuntos(self.directorio, en_proceso=False)
+        resultados = []
+        hilos = [threading.Thread(target=lambda: resultados.append(renderizador.renderizar((300, 8))))
+                 for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(len(set(resultados)), 1)
+        self.assertEqual(renderizador.fallos, 1)
+
+    def test_proceso_trabajador(self):
+        """El dibujo en el proceso trabajador da la misma imagen que en el hilo llamante"""
+        renderizador = RenderizadorConjuntos(self.directorio)
+        try:
+            remoto = renderizador.renderizar((500, 5), formato='svg')
+        finally:
+            renderizador.cerrar()
+        local = RenderizadorConjuntos(tempfile.mkdtemp(dir=self.directorio), en_proceso=False)
+        self.assertEqual(len(remoto), len(local.renderizar((500, 5), formato='svg')))
+
+    def test_sistema_guarda_imagen(self):
+        """visualizar_conjuntos_difusos marca la última entrada y su método y escribe el fichero"""
+        anterior = graficos_difusos._renderizador_compartido
+        graficos_difusos._renderizador_compartido = RenderizadorConjuntos(self.directorio, en_proceso=False)
+        try:
+            sistema = SistemaDifusoFinanciero(ruta_escalar=True)
+            sistema.evaluar_mamdani(700, 3)
+            ruta = os.path.join(self.directorio, 'conjuntos.png')
+            imagen = sistema.visualizar_conjuntos_difusos(guardar_imagen=True, ruta=ruta)
+            with open(ruta, 'rb') as archivo:
+                self.assertEqual(archivo.read(), imagen)
+            clave = clave_figura(configuracion_financiera(), (700, 3))
+            self.assertTrue(os.path.exists(os.path.join(self.directorio, clave + '.png')))
+            sistema.evaluar_tsk(700, 3)
+            sistema.visualizar_conjuntos_difusos()
+            clave = clave_figura(configuracion_financiera(), (700, 3), metodo='tsk')
+            self.assertTrue(os.path.exists(os.path.join(self.directorio, clave + '.png')))
+        finally:
+            graficos_difusos._renderizador_compartido = anterior
+
+
+if __name__ == "__main__":
+    unittest.main()
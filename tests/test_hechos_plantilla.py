@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la Inserción por Plantilla
+=====================================
+
+Verifica que el perfil asertado como hecho perfil-financiero produce las
+mismas recomendaciones que la inserción por cadenas y que la política de
+umbrales se puede cambiar.
+"""
+
+import random
+import unittest
+
+import numpy as np
+
+try:
+    from src.sistema_experto import SistemaExperto, POLITICA_FINANCIERA
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+PERFIL_RIESGOSO = dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestHechosPlantilla(unittest.TestCase):
+    """Pruebas de los modos de inserción de hechos"""
+
+    def _evaluar(self, sistema, perfil):
+        sistema.insertar_hechos(**perfil)
+        sistema.ejecutar_inferencia()
+        return sistema.obtener_resultado(), list(sistema.mensajes_activados)
+
+    def test_modos_equivalentes(self):
+        """Ambos modos dan el mismo texto y el mismo orden de mensajes"""
+        plantilla = SistemaExperto()
+        cadena = SistemaExperto(modo_hechos='cadena')
+        rng = random.Random(7)
+        perfiles = [PERFIL_RIESGOSO,
+                    dict(ingresos=1000, ahorro=100, gastos=0, deudas=400, ocio=0)]
+        for _ in range(200):
+            ingresos = rng.uniform(500, 10000)
+            perfiles.append(dict(
+                ingresos=ingresos,
+                ahorro=rng.uniform(0, ingresos * 6),
+                gastos=rng.uniform(0, ingresos),
+                deudas=rng.uniform(0, ingresos),
+                ocio=rng.uniform(0, ingresos * 0.5)
+            ))
+
+        for perfil in perfiles:
+            self.assertEqual(self._evaluar(plantilla, perfil), self._evaluar(cadena, perfil), perfil)
+
+    def test_un_solo_hecho_de_perfil(self):
+        """El perfil se inserta una vez como hecho de plantilla"""
+        sistema = SistemaExperto()
+        sistema.insertar_hechos(**PERFIL_RIESGOSO)
+        perfiles = [h for h in sistema.sistema.facts() if h.template.name == 'perfil-financiero']
+        self.assertEqual(len(perfiles), 1)
+        self.assertEqual(perfiles[0]['deudas'], 500)
+
+    def test_configurar_politica(self):
+        """Un umbral nuevo se aplica en la siguiente evaluación"""
+        sistema = SistemaExperto()
+        _, mensajes = self._evaluar(sistema, PERFIL_RIESGOSO)
+        self.assertIn('mensajeDeuda', mensajes)
+
+        sistema.configurar_politica(deuda_maxima=0.60)
+        self.assertEqual(sistema.politica['deuda-maxima'], 0.60)
+        _, mensajes = self._evaluar(sistema, PERFIL_RIESGOSO)
+        self.assertNotIn('mensajeDeuda', mensajes)
+        self.assertEqual(POLITICA_FINANCIERA['deuda-maxima'], 0.40)
+
+    def test_politica_numpy_y_cadena(self):
+        """Los umbrales numpy y en cadena se convierten a float y se aplican"""
+        for valor in (np.float64(0.6), '0.6'):
+            with self.subTest(valor=valor):
+                sistema = SistemaExperto()
+                sistema.configurar_politica(deuda_maxima=valor)
+                self.assertEqual(sistema.politica['deuda-maxima'], 0.6)
+                self.assertIsInstance(sistema.politica['deuda-maxima'], float)
+                _, mensajes = self._evaluar(sistema, PERFIL_RIESGOSO)
+                self.assertNotIn('mensajeDeuda', mensajes)
+                self.assertIn('mensajeAhorro', mensajes)
+
+    def test_mensajes_con_los_umbrales_de_la_politica(self):
+        """Los textos predefinidos citan los umbrales vigentes salvo si se personalizaron"""
+        sistema = SistemaExperto()
+        self.assertIn("40%", sistema.registro_mensajes.texto('mensajeDeuda'))
+        sistema.registrar_mensaje('mensajeAhorro', "- Ahorro propio.\n")
+        sistema.configurar_politica(deuda_maxima=0.35, ahorro_minimo=0.2, meses_emergencia=1)
+        self.assertIn("35%", sistema.registro_mensajes.texto('mensajeDeuda'))
+        self.assertIn("al menos 1 mes de", sistema.registro_mensajes.texto('mensajeEmergencia'))
+        self.assertEqual(sistema.registro_mensajes.texto('mensajeAhorro'), "- Ahorro propio.\n")
+        resultado, _ = self._evaluar(sistema, PERFIL_RIESGOSO)
+        self.assertIn("superan el 35% de tus ingresos", resultado)
+        self.assertNotIn("40%", resultado)
+
+    def test_politica_invalida_conserva_la_anterior(self):
+        """Un umbral no numérico se rechaza sin cambiar la política ni el deffacts"""
+        sistema = SistemaExperto()
+        for umbrales in ({'deuda_maxima': 'mucha'}, {'ahorro_minimo': 0.2, 'deuda_maxima': None},
+                         {'ocio_maximo': float('nan')}):
+            with self.subTest(umbrales=umbrales):
+                with self.assertRaises(ValueError):
+                    sistema.configurar_politica(**umbrales)
+                self.assertEqual(sistema.politica, POLITICA_FINANCIERA)
+                _, mensajes = self._evaluar(sistema, PERFIL_RIESGOSO)
+                self.assertIn('mensajeDeuda', mensajes)
+                self.assertIn('mensajeAhorro', mensajes)
+
+    def test_valores_numpy_bool_y_cadena(self):
+        """Los valores numpy, bool y numéricos en cadena se convierten a float en ambos modos"""
+        perfil = dict(ingresos=np.int64(1000), ahorro=np.float32(50), gastos='800', deudas=500, ocio=True)
+        esperado = self._evaluar(SistemaExperto(), dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=1))
+        for modo in ('plantilla', 'cadena'):
+            with self.subTest(modo=modo):
+                self.assertEqual(self._evaluar(SistemaExperto(modo_hechos=modo), perfil), esperado)
+
+    def test_hechos_internos_ocultos(self):
+        """listar_hechos_actuales no muestra el perfil ni la política salvo que se pida"""
+        sistema = SistemaExperto()
+        self._evaluar(sistema, PERFIL_RIESGOSO)
+        hechos = sistema.listar_hechos_actuales()
+        self.assertIn('(deuda-alta)', hechos)
+        self.assertFalse(any('perfil-financiero' in h or 'politica-financiera' in h for h in hechos))
+        internos = sistema.listar_hechos_actuales(incluir_internos=True)
+        self.assertTrue(any(h.startswith('(perfil-financiero') for h in internos))
+        estado = sistema.obtener_estado_completo()
+        self.assertEqual(estado['hechos_count'], len(estado['hechos']))
+        self.assertEqual(sistema.obtener_estado_completo(incluir_internos=True)['hechos_count'], len(internos))
+
+    def test_evaluar(self):
+        """evaluar equivale a insertar_hechos y ejecutar_inferencia, con límite de disparos opcional"""
+        for modo in ('plantilla', 'cadena'):
+            with self.subTest(modo=modo):
+                sistema = SistemaExperto(modo_hechos=modo)
+                evaluacion = sistema.evaluar(PERFIL_RIESGOSO)
+                self.assertEqual((evaluacion['recomendaciones'], evaluacion['mensajes']),
+                                 self._evaluar(SistemaExperto(modo_hechos=modo), PERFIL_RIESGOSO))
+                self.assertGreater(evaluacion['disparadas'], 0)
+                self.assertEqual(evaluacion['pendientes'], 0)
+
+                limitada = sistema.evaluar(PERFIL_RIESGOSO, limite=1)
+                self.assertEqual(limitada['disparadas'], 1)
+                self.assertGreater(limitada['pendientes'], 0)
+
+    def test_errores(self):
+        """Se rechazan modos y umbrales desconocidos"""
+        with self.assertRaises(ValueError):
+            SistemaExperto(modo_hechos='binario')
+        with self.assertRaises(ValueError):
+            SistemaExperto().configurar_politica(umbral_inventado=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
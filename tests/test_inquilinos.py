@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Gestor de Inquilinos
+================================
+
+Verifica que cada inquilino evalúa con la base más sus reglas, que los
+entornos se desalojan por LRU bajo el presupuesto y se reconstruyen al
+pedirse, y las métricas publicadas.
+"""
+
+import threading
+import unittest
+
+try:
+    from src.inquilinos import GestorInquilinos
+    from src.metricas import RegistroMetricas
+    from src.sistema_experto import SistemaExperto
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+PERFIL_RIESGOSO = dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+
+REGLAS_BASE = "(defrule reglaBaseOcioDeuda (deuda-alta) (ocio-excesivo) => (assert (mensajeBase)))"
+MENSAJES_BASE = {'mensajeBase': "- Revisa ocio y deudas a la vez.\n"}
+
+
+def _delta(inquilino):
+    relacion = f"mensaje-{inquilino}"
+    reglas = f"(defrule regla-{inquilino} (deuda-alta) => (assert ({relacion})))"
+    return reglas, {relacion: f"- Consejo de {inquilino}.\n"}
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestGestorInquilinos(unittest.TestCase):
+    """Pruebas del gestor de inquilinos"""
+
+    def _gestor(self, entornos_en_presupuesto, metricas=None, **opciones):
+        # Tamaño de un entorno de referencia para expresar el presupuesto en entornos
+        referencia = GestorInquilinos(reglas_base=REGLAS_BASE, mensajes_base=MENSAJES_BASE)
+        referencia.registrar_inquilino('referencia', *_delta('referencia'))
+        tamano = referencia.bytes_residentes
+        return GestorInquilinos(presupuesto_bytes=int(tamano * (entornos_en_presupuesto + 0.5)),
+                                reglas_base=REGLAS_BASE, mensajes_base=MENSAJES_BASE,
+                                metricas=metricas, **opciones)
+
+    def test_base_y_delta(self):
+        """Cada inquilino ve la base y sus reglas, no las de otros"""
+        gestor = self._gestor(4)
+        gestor.registrar_inquilino('a', *_delta('a'))
+        gestor.registrar_inquilino('b', *_delta('b'))
+
+        mensajes_a = gestor.evaluar('a', PERFIL_RIESGOSO)['mensajes']
+        self.assertIn('mensajeBase', mensajes_a)
+        self.assertIn('mensaje-a', mensajes_a)
+        self.assertNotIn('mensaje-b', mensajes_a)
+        self.assertIn('mensajeDeuda', mensajes_a)
+
+    def test_desalojo_lru_y_reconstruccion(self):
+        """Se desaloja el menos usado y se reconstruye al pedirlo"""
+        metricas = RegistroMetricas()
+        gestor = self._gestor(2, metricas)
+        for inquilino in ('a', 'b'):
+            gestor.registrar_inquilino(inquilino, *_delta(inquilino))
+        gestor.obtener('a')
+        gestor.registrar_inquilino('c', *_delta('c'))
+
+        self.assertEqual(gestor.residentes(), ['a', 'c'])
+        self.assertLessEqual(gestor.bytes_residentes, gestor.presupuesto_bytes)
+        self.assertEqual(metricas.obtener_contador('inquilinos_desalojados_total'), 1)
+
+        resultado = gestor.evaluar('b', PERFIL_RIESGOSO)
+        self.assertIn('mensaje-b', resultado['mensajes'])
+        self.assertEqual(gestor.residentes(), ['c', 'b'])
+        self.assertEqual(metricas.obtener_contador('inquilinos_reconstruidos_total'), 4)
+        self.assertEqual(metricas.obtener_indicador('inquilinos_residentes'), 2)
+        self.assertEqual(metricas.obtener_indicador('inquilinos_memoria_bytes'), gestor.bytes_residentes)
+        histograma = metricas.obtener_histograma('fase_segundos', motor='experto', fase='construir_inquilino')
+        self.assertEqual(histograma.total, 4)
+
+    def test_reglas_invalidas(self):
+        """Unas reglas inválidas no sustituyen a las anteriores"""
+        gestor = self._gestor(4)
+        gestor.registrar_inquilino('a', *_delta('a'))
+        with self.assertRaises(ValueError):
+            gestor.registrar_inquilino('a', "(defrule rota (deuda-alta) =>")
+        self.assertIn('mensaje-a', gestor.evaluar('a', PERFIL_RIESGOSO)['mensajes'])
+
+        with self.assertRaises(ValueError):
+            gestor.registrar_inquilino('nuevo', "(defrule rota (deuda-alta) =>")
+        self.assertNotIn('nuevo', gestor.inquilinos())
+
+    def test_inquilino_desconocido_y_eliminado(self):
+        """Pedir un inquilino no registrado o eliminado falla"""
+        gestor = self._gestor(4)
+        gestor.registrar_inquilino('a', *_delta('a'))
+        gestor.eliminar_inquilino('a')
+        self.assertEqual(gestor.bytes_residentes, 0)
+        with self.assertRaises(KeyError):
+            gestor.obtener('a')
+
+    def test_eliminado_durante_reconstruccion(self):
+        """Un inquilino eliminado mientras se reconstruye no vuelve a quedar residente"""
+        construyendo, continuar = threading.Event(), threading.Event()
+        bloquear = []
+
+        def fabrica():
+            if bloquear:
+                construyendo.set()
+                continuar.wait(10)
+            return SistemaExperto()
+
+        gestor = self._gestor(1, fabrica=fabrica)
+        gestor.registrar_inquilino('a', *_delta('a'))
+        gestor.registrar_inquilino('b', *_delta('b'))
+        self.assertEqual(gestor.residentes(), ['b'])
+
+        errores = []
+
+        def pedir():
+            try:
+                gestor.obtener('a')
+            except KeyError as e:
+                errores.append(e)
+
+        bloquear.append(True)
+        hilo = threading.Thread(target=pedir)
+        hilo.start()
+        self.assertTrue(construyendo.wait(10))
+        gestor.eliminar_inquilino('a')
+        continuar.set()
+        hilo.join()
+
+        self.assertEqual(len(errores), 1)
+        self.assertEqual(gestor.residentes(), ['b'])
+        self.assertEqual(gestor.inquilinos(), ['b'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las Instantáneas de la Memoria de Trabajo
+====================================================
+
+Verifica que los hechos y la agenda se restauran tal como estaban y la
+gestión de archivos por sesión.
+"""
+
+import os
+import tempfile
+import unittest
+import zlib
+
+try:
+    from src.sistema_experto import SistemaExperto
+    from src.instantaneas import (
+        guardar_instantanea, restaurar_instantanea, leer_metadatos, GestorSesiones,
+        _CABECERA
+    )
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+PERFIL_RIESGOSO = dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+
+
+def _hechos(sistema):
+    return [str(hecho) for hecho in sistema.sistema.facts()]
+
+
+def _agenda(sistema):
+    return [activacion.name for activacion in sistema.sistema.activations()]
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestInstantaneas(unittest.TestCase):
+    """Pruebas de guardar y restaurar"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, 'sesion.sfsn')
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_hechos_y_resultado(self):
+        """Los hechos y los mensajes se restauran en otro sistema"""
+        origen = SistemaExperto()
+        origen.insertar_hechos(**PERFIL_RIESGOSO)
+        origen.ejecutar_inferencia()
+        guardados = guardar_instantanea(origen, self.ruta)
+
+        destino = SistemaExperto()
+        destino.insertar_hechos(ingresos=5000, ahorro=20000, gastos=2000, deudas=100, ocio=200)
+        restaurados = restaurar_instantanea(destino, self.ruta)
+
+        self.assertEqual(guardados, restaurados)
+        self.assertEqual(_hechos(destino), _hechos(origen))
+        self.assertEqual(destino.mensajes_activados, origen.mensajes_activados)
+        self.assertEqual(destino.obtener_resultado(), origen.obtener_resultado())
+        self.assertEqual(leer_metadatos(self.ruta)['hechos'], guardados)
+
+    def test_agenda_pendiente(self):
+        """Con agenda, solo quedan pendientes las activaciones no disparadas"""
+        origen = SistemaExperto()
+        origen.insertar_hechos(**PERFIL_RIESGOSO)
+        origen.sistema.run(3)
+        guardar_instantanea(origen, self.ruta, incluir_agenda=True)
+
+        destino = SistemaExperto()
+        restaurar_instantanea(destino, self.ruta)
+        self.assertEqual(_agenda(destino), _agenda(origen))
+
+        origen.ejecutar_inferencia()
+        destino.ejecutar_inferencia()
+        self.assertEqual(destino.mensajes_activados, origen.mensajes_activados)
+
+    def test_sin_agenda_se_reactiva(self):
+        """Sin agenda, las reglas que ya se dispararon vuelven a estar activas"""
+        origen = SistemaExperto()
+        origen.insertar_hechos(**PERFIL_RIESGOSO)
+        origen.sistema.run(3)
+        guardar_instantanea(origen, self.ruta)
+
+        destino = SistemaExperto()
+        restaurar_instantanea(destino, self.ruta)
+        self.assertGreater(len(_agenda(destino)), len(_agenda(origen)))
+
+    def test_archivo_invalido(self):
+        """Un archivo ajeno se rechaza"""
+        with open(self.ruta, 'wb') as f:
+            f.write(b'x' * 64)
+        with self.assertRaises(ValueError):
+            restaurar_instantanea(SistemaExperto(), self.ruta)
+
+    def test_fallo_conserva_el_estado(self):
+        """Una instantánea truncada, corrupta o de otras plantillas deja los hechos y la agenda previos"""
+        origen = SistemaExperto()
+        origen.sistema.build("(deftemplate nota (slot texto))")
+        origen.insertar_hechos(**PERFIL_RIESGOSO)
+        origen.sistema.assert_string('(nota (texto "ajena"))')
+        guardar_instantanea(origen, self.ruta)
+        with open(self.ruta, 'rb') as f:
+            completo = f.read()
+        _, _, _, _, largo_meta, _ = _CABECERA.unpack(completo[:_CABECERA.size])
+        inicio_datos = _CABECERA.size + largo_meta
+        variantes = {
+            'truncada': completo[:-10],
+            'zlib_corrupto': completo[:inicio_datos] + b'\x00' * (len(completo) - inicio_datos),
+            'imagen_ajena': completo[:_CABECERA.size - 4]
+                            + len(zlib.compress(b'\x00' * 100)).to_bytes(4, 'little')
+                            + completo[_CABECERA.size:inicio_datos] + zlib.compress(b'\x00' * 100),
+            'otras_plantillas': completo,
+        }
+
+        destino = SistemaExperto()
+        destino.insertar_hechos(ingresos=2000, ahorro=100, gastos=1500, deudas=1000, ocio=600)
+        destino.sistema.run(3)
+        hechos, agenda = _hechos(destino), _agenda(destino)
+        self.assertTrue(agenda)
+        for nombre, contenido in variantes.items():
+            with self.subTest(nombre):
+                with open(self.ruta, 'wb') as f:
+                    f.write(contenido)
+                with self.assertRaises(ValueError):
+                    restaurar_instantanea(destino, self.ruta)
+                self.assertEqual(_hechos(destino), hechos)
+                self.assertEqual(_agenda(destino), agenda)
+
+    def test_sesiones(self):
+        """Un archivo por sesión, con identificadores validados"""
+        sesiones = GestorSesiones(os.path.join(self.directorio.name, 'sesiones'))
+        sistema = SistemaExperto()
+        sistema.insertar_hechos(**PERFIL_RIESGOSO)
+        sesiones.guardar('cliente-1', sistema)
+        sesiones.guardar('cliente-2', sistema)
+
+        self.assertEqual(sesiones.listar(), ['cliente-1', 'cliente-2'])
+        self.assertTrue(sesiones.existe('cliente-1'))
+        self.assertTrue(sesiones.eliminar('cliente-1'))
+        self.assertFalse(sesiones.eliminar('cliente-1'))
+        with self.assertRaises(ValueError):
+            sesiones.ruta('../fuera')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Registro de Métricas
+================================
+
+Verifica los histogramas y contadores, la exportación en formato
+Prometheus y la instrumentación opcional de ambos motores.
+"""
+
+import os
+import tempfile
+import unittest
+import urllib.request
+
+from src.metricas import RegistroMetricas
+
+try:
+    from src.sistema_experto import SistemaExperto
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+try:
+    from src.fuzzy_system import SistemaDifusoFinanciero
+    FUZZY_AVAILABLE = True
+except ImportError:
+    FUZZY_AVAILABLE = False
+
+
+class TestRegistroMetricas(unittest.TestCase):
+    """Pruebas del registro y la exportación"""
+
+    def setUp(self):
+        self.metricas = RegistroMetricas(prefijo='prueba', buckets=(0.001, 0.01))
+
+    def test_histograma_acumulativo(self):
+        """Los buckets exportados son acumulativos y terminan en +Inf"""
+        for valor in (0.0005, 0.005, 0.005, 0.5):
+            self.metricas.observar('fase_segundos', valor, motor='experto', fase='run')
+
+        texto = self.metricas.exportar_prometheus()
+        self.assertIn('# TYPE prueba_fase_segundos histogram', texto)
+        self.assertIn('prueba_fase_segundos_bucket{fase="run",motor="experto",le="0.001"} 1', texto)
+        self.assertIn('prueba_fase_segundos_bucket{fase="run",motor="experto",le="0.01"} 3', texto)
+        self.assertIn('prueba_fase_segundos_bucket{fase="run",motor="experto",le="+Inf"} 4', texto)
+        self.assertIn('prueba_fase_segundos_count{fase="run",motor="experto"} 4', texto)
+
+    def test_contadores(self):
+        """Los contadores se acumulan por combinación de etiquetas"""
+        self.metricas.incrementar('llamadas_total', motor='difuso', operacion='tsk')
+        self.metricas.incrementar('llamadas_total', 2, motor='difuso', operacion='tsk')
+        self.assertEqual(self.metricas.obtener_contador('llamadas_total', operacion='tsk', motor='difuso'), 3)
+        self.assertIn('# TYPE prueba_llamadas_total counter', self.metricas.exportar_prometheus())
+
+    def test_indicadores(self):
+        """Los indicadores guardan el último valor y se exportan como gauge"""
+        self.metricas.fijar('inquilinos_residentes', 3)
+        self.metricas.fijar('inquilinos_residentes', 2)
+        self.assertEqual(self.metricas.obtener_indicador('inquilinos_residentes'), 2)
+        self.assertIsNone(self.metricas.obtener_indicador('inquilinos_memoria_bytes'))
+        texto = self.metricas.exportar_prometheus()
+        self.assertIn('# TYPE prueba_inquilinos_residentes gauge', texto)
+        self.assertIn('prueba_inquilinos_residentes 2', texto)
+
+    def test_escribir_archivo(self):
+        """El archivo exportado contiene la exposición completa"""
+        self.metricas.incrementar('errores_total', motor='experto', operacion='run')
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'metricas.prom')
+            self.metricas.escribir_archivo(ruta)
+            with open(ruta, encoding='utf-8') as f:
+                self.assertEqual(f.read(), self.metricas.exportar_prometheus())
+
+    def test_servir_http(self):
+        """El endpoint local sirve /metrics"""
+        self.metricas.incrementar('llamadas_total', motor='experto', operacion='insertar_hechos')
+        servidor = self.metricas.servir_http(puerto=0)
+        try:
+            puerto = servidor.server_address[1]
+            with urllib.request.urlopen(f'http://127.0.0.1:{puerto}/metrics') as respuesta:
+                cuerpo = respuesta.read().decode('utf-8')
+            self.assertIn('prueba_llamadas_total', cuerpo)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestInstrumentacionExperto(unittest.TestCase):
+    """Pruebas de la instrumentación del sistema experto"""
+
+    def test_fases_y_reglas(self):
+        """Se registran las cuatro fases y las reglas disparadas"""
+        metricas = RegistroMetricas()
+        sistema = SistemaExperto(metricas=metricas)
+        sistema.insertar_hechos(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+        sistema.ejecutar_inferencia()
+
+        for fase in ('reset', 'assert_fact', 'run', 'procesar_mensajes'):
+            histograma = metricas.obtener_histograma('fase_segundos', motor='experto', fase=fase)
+            self.assertIsNotNone(histograma, fase)
+            self.assertEqual(histograma.total, 1)
+        # Cuatro reglas de derivación y cuatro de recomendación
+        self.assertEqual(metricas.obtener_contador('reglas_disparadas_total', motor='experto'), 8)
+
+    def test_fase_modo_cadena(self):
+        """En modo cadena la fase de inserción es assert_string"""
+        metricas = RegistroMetricas()
+        sistema = SistemaExperto(metricas=metricas, modo_hechos='cadena')
+        sistema.insertar_hechos(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+        sistema.ejecutar_inferencia()
+
+        self.assertIsNotNone(metricas.obtener_histograma('fase_segundos', motor='experto', fase='assert_string'))
+        self.assertEqual(metricas.obtener_contador('reglas_disparadas_total', motor='experto'), 4)
+
+    def test_sin_metricas(self):
+        """Sin registro el sistema funciona igual"""
+        sistema = SistemaExperto()
+        sistema.insertar_hechos(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+        sistema.ejecutar_inferencia()
+        self.assertIn("10%", sistema.obtener_resultado())
+
+
+@unittest.skipUnless(FUZZY_AVAILABLE, "scikit-fuzzy no disponible")
+class TestInstrumentacionDifuso(unittest.TestCase):
+    """Pruebas de la instrumentación del sistema difuso"""
+
+    def test_compute_y_errores(self):
+        """Se registran compute() por método y los errores de validación"""
+        metricas = RegistroMetricas()
+        sistema = SistemaDifusoFinanciero(metricas=metricas)
+        sistema.evaluar_ambos_metodos(700, 3)
+        sistema.evaluar_mamdani(2000, 3)
+
+        self.assertEqual(metricas.obtener_histograma('fase_segundos', motor='difuso', fase='compute_mamdani').total, 1)
+        self.assertEqual(metricas.obtener_histograma('fase_segundos', motor='difuso', fase='compute_tsk').total, 1)
+        self.assertEqual(metricas.obtener_contador('errores_total', motor='difuso', operacion='mamdani'), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
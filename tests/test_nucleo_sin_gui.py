@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Núcleo sin Interfaz
+===============================
+
+Verifica, en intérpretes nuevos, que importar el paquete src y los módulos
+de MODULOS_NUCLEO no carga tkinter ni matplotlib, y que la interfaz
+gráfica solo se importa al usarla.
+"""
+
+import sys
+import os
+import json
+import subprocess
+import unittest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+try:
+    import src
+    NUCLEO_AVAILABLE = True
+except ImportError:
+    NUCLEO_AVAILABLE = False
+
+GRAFICOS = ('tkinter', '_tkinter', 'matplotlib')
+
+
+def _modulos_cargados(codigo: str) -> list:
+    """Módulos gráficos cargados tras ejecutar `codigo` en un intérprete nuevo"""
+    script = codigo + (
+        "\nimport json, sys"
+        f"\nprint(json.dumps(sorted(m for m in sys.modules if m.split('.')[0] in {GRAFICOS!r})))"
+    )
+    salida = subprocess.run([sys.executable, '-c', script], cwd=RAIZ, capture_output=True,
+                            text=True, check=True).stdout
+    # clipspy puede escribir avisos al salir; se toma la línea del JSON
+    linea = next(l for l in salida.splitlines() if l.startswith('['))
+    return json.loads(linea)
+
+
+@unittest.skipUnless(NUCLEO_AVAILABLE, "clipspy o numpy no disponible")
+class TestNucleoSinGUI(unittest.TestCase):
+    """Pruebas de las importaciones del núcleo"""
+
+    def test_paquete_sin_dependencias_graficas(self):
+        """import src no carga tkinter ni matplotlib"""
+        self.assertEqual(_modulos_cargados("import src"), [])
+
+    def test_modulos_nucleo_sin_dependencias_graficas(self):
+        """Ningún módulo del núcleo carga tkinter ni matplotlib al importarse"""
+        for modulo in src.MODULOS_NUCLEO:
+            with self.subTest(modulo=modulo):
+                self.assertEqual(_modulos_cargados(f"import src.{modulo}"), [])
+
+    def test_gui_perezosa(self):
+        """Importar src.gui no importa main_window ni tkinter"""
+        self.assertEqual(_modulos_cargados(
+            "import sys, src.gui\nassert 'src.gui.main_window' not in sys.modules"), [])
+
+    def test_motores_del_nucleo(self):
+        """Los motores difusos del núcleo evalúan sin cargar dependencias gráficas"""
+        codigo = (
+            "from src.difuso_tensorial import SistemaDifusoTensorial\n"
+            "from src.difuso_escalar import EvaluadorDifusoEscalar\n"
+            "assert SistemaDifusoTensorial().evaluar_mamdani(700, 3)['etiqueta']\n"
+            "assert EvaluadorDifusoEscalar().tsk(700, 3) > 0"
+        )
+        self.assertEqual(_modulos_cargados(codigo), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la Recarga en Caliente de Reglas
+===========================================
+
+Verifica que un cambio en el archivo de reglas produce un entorno nuevo
+validado, que las reglas inválidas no llegan a servirse y que las
+evaluaciones en curso terminan sobre el entorno anterior.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import unittest
+
+try:
+    from src.recarga_reglas import GestorRecargaReglas, ErrorRecarga, ruta_mensajes
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+PERFIL_RIESGOSO = dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+
+REGLA_V1 = """
+(defrule reglaDeudaCritica
+    (deuda-alta)
+    (ahorro-bajo)
+    =>
+    (assert (mensajeDeudaCritica)))
+"""
+
+REGLA_V2 = """
+(defrule reglaOcioYDeuda
+    (deuda-alta)
+    (ocio-excesivo)
+    =>
+    (assert (mensajeOcioYDeuda)))
+"""
+
+MENSAJES = {
+    'mensajeDeudaCritica': "- Deuda alta sin ahorro: prioriza el pago de deudas.\n",
+    'mensajeOcioYDeuda': "- Reduce el ocio hasta bajar la deuda.\n",
+}
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestRecargaReglas(unittest.TestCase):
+    """Pruebas del gestor de recarga"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, 'cliente.clp')
+        with open(ruta_mensajes(self.ruta), 'w', encoding='utf-8') as f:
+            json.dump(MENSAJES, f)
+        self._escribir(REGLA_V1)
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def _escribir(self, contenido):
+        with open(self.ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        # Forzar una firma distinta aunque el sistema de archivos tenga poca resolución
+        ahora = time.time_ns()
+        os.utime(self.ruta, ns=(ahora, ahora + 1_000_000_000 * len(contenido)))
+
+    def test_carga_inicial(self):
+        """Las reglas y mensajes del archivo se sirven desde la versión 1"""
+        gestor = GestorRecargaReglas([self.ruta])
+        resultado = gestor.evaluar(PERFIL_RIESGOSO)
+        self.assertEqual(resultado['version'], 1)
+        self.assertIn('mensajeDeudaCritica', resultado['mensajes'])
+        self.assertFalse(gestor.comprobar())
+
+    def test_recarga_por_cambio(self):
+        """Un archivo modificado produce un entorno nuevo con sus reglas"""
+        gestor = GestorRecargaReglas([self.ruta])
+        self._escribir(REGLA_V2)
+        self.assertTrue(gestor.comprobar())
+
+        resultado = gestor.evaluar(PERFIL_RIESGOSO)
+        self.assertEqual(resultado['version'], 2)
+        self.assertIn('mensajeOcioYDeuda', resultado['mensajes'])
+        self.assertNotIn('mensajeDeudaCritica', resultado['mensajes'])
+
+    def test_reglas_invalidas_no_se_sirven(self):
+        """Un archivo con errores deja en servicio el entorno anterior"""
+        gestor = GestorRecargaReglas([self.ruta])
+        self._escribir("(defrule rota (deuda-alta) => (assert (mensajeX))")
+        self.assertFalse(gestor.comprobar())
+        self.assertIsNotNone(gestor.ultimo_error)
+        self.assertEqual(gestor.evaluar(PERFIL_RIESGOSO)['version'], 1)
+        # Sin cambios nuevos no se reintenta
+        self.assertFalse(gestor.comprobar())
+
+    def test_bucle_de_reglas_rechazado(self):
+        """Unas reglas que no terminan no superan la validación"""
+        gestor = GestorRecargaReglas([self.ruta])
+        self._escribir("(defrule bucle ?h <- (deuda-alta) => (retract ?h) (assert (deuda-alta)))")
+        self.assertFalse(gestor.comprobar())
+        self.assertIn('no terminan', gestor.ultimo_error)
+
+    def test_validacion_sin_salida_estandar(self):
+        """Un printout en las reglas candidatas no llega al descriptor 1 durante la validación"""
+        gestor = GestorRecargaReglas([self.ruta])
+        self._escribir("(defrule aviso (deuda-alta) => (printout t \"SALIDA-DE-VALIDACION\" crlf))")
+        sys.stdout.flush()
+        with tempfile.TemporaryFile() as capturado:
+            original = os.dup(1)
+            os.dup2(capturado.fileno(), 1)
+            try:
+                self.assertTrue(gestor.comprobar())
+            finally:
+                os.dup2(original, 1)
+                os.close(original)
+            capturado.seek(0)
+            self.assertNotIn(b'SALIDA-DE-VALIDACION', capturado.read())
+        self.assertIn('SALIDA-DE-VALIDACION', gestor.evaluar(PERFIL_RIESGOSO)['recomendaciones'])
+
+    def test_validador_y_error_inicial(self):
+        """El validador puede rechazar y las reglas iniciales inválidas fallan"""
+        with self.assertRaises(ErrorRecarga):
+            GestorRecargaReglas([self.ruta], validador=lambda perfil, sistema: False)
+        self._escribir("(defrule")
+        with self.assertRaises(ErrorRecarga):
+            GestorRecargaReglas([self.ruta])
+
+    def test_evaluacion_en_curso_termina_en_entorno_anterior(self):
+        """Una evaluación que tiene el entorno viejo no ve el intercambio"""
+        gestor = GestorRecargaReglas([self.ruta])
+        entorno = gestor.obtener_entorno()
+        resultados = []
+
+        with entorno.lock:
+            hilo = threading.Thread(target=lambda: resultados.append(gestor.evaluar(PERFIL_RIESGOSO)))
+            hilo.start()
+            time.sleep(0.05)
+            self._escribir(REGLA_V2)
+            self.assertTrue(gestor.recargar())
+            # El entorno nuevo atiende mientras el viejo sigue ocupado
+            self.assertEqual(gestor.evaluar(PERFIL_RIESGOSO)['version'], 2)
+        hilo.join()
+
+        self.assertEqual(resultados[0]['version'], 1)
+        self.assertIn('mensajeDeudaCritica', resultados[0]['mensajes'])
+
+    def test_vigilancia_en_segundo_plano(self):
+        """El hilo de vigilancia detecta el cambio"""
+        with GestorRecargaReglas([self.ruta], intervalo=0.02) as gestor:
+            gestor.iniciar()
+            self._escribir(REGLA_V2)
+            limite = time.time() + 5
+            while gestor.version == 1 and time.time() < limite:
+                time.sleep(0.02)
+        self.assertEqual(gestor.version, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Registro de Sistemas por Hilo
+=========================================
+
+Verifica que cada hilo obtiene su propio SistemaExperto, que el mismo hilo
+lo reutiliza, que las evaluaciones concurrentes no se mezclan y que los
+sistemas de los hilos terminados se liberan.
+"""
+
+import os
+import gc
+import threading
+import unittest
+
+try:
+    from src.sistema_experto import SistemaExperto
+    from src.registro_hilos import RegistroPorHilo, sistema_del_hilo
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+PERFIL_DEUDA = dict(ingresos=1000, ahorro=500, gastos=100, deudas=500, ocio=0)
+PERFIL_INVERSION = dict(ingresos=5000, ahorro=20000, gastos=2000, deudas=0, ocio=100)
+
+
+def _en_hilo(funcion):
+    """Ejecuta funcion en un hilo nuevo; su excepción se relanza en el llamante"""
+    resultado = []
+
+    def ejecutar():
+        try:
+            resultado.append(funcion())
+        except Exception as e:
+            resultado.append(e)
+
+    hilo = threading.Thread(target=ejecutar)
+    hilo.start()
+    hilo.join()
+    if isinstance(resultado[0], Exception):
+        raise resultado[0]
+    return resultado[0]
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestRegistroPorHilo(unittest.TestCase):
+    """Pruebas de RegistroPorHilo"""
+
+    def test_un_sistema_por_hilo(self):
+        """El mismo hilo reutiliza su sistema; otro hilo recibe uno distinto"""
+        registro = RegistroPorHilo()
+        self.addCleanup(registro.cerrar)
+        propio = registro.obtener()
+        self.assertIs(registro.obtener(), propio)
+        self.assertIsNot(_en_hilo(registro.obtener), propio)
+        self.assertEqual(registro.creados, 2)
+
+    def test_evaluaciones_concurrentes(self):
+        """Hilos evaluando perfiles distintos a la vez obtienen sus propios resultados"""
+        registro = RegistroPorHilo()
+        self.addCleanup(registro.cerrar)
+        errores = []
+
+        def trabajar(perfil, mensaje):
+            for _ in range(50):
+                if mensaje not in registro.evaluar(perfil)['mensajes']:
+                    errores.append(perfil)
+
+        hilos = [threading.Thread(target=trabajar, args=args) for args in
+                 ((PERFIL_DEUDA, 'mensajeDeuda'), (PERFIL_INVERSION, 'mensajeInversion')) * 2]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        self.assertEqual(registro.creados, 4)
+
+    def test_liberacion_al_terminar_hilo(self):
+        """El sistema de un hilo terminado deja de estar activo"""
+        registro = RegistroPorHilo()
+        self.addCleanup(registro.cerrar)
+        _en_hilo(lambda: registro.obtener() and None)
+        gc.collect()
+        self.assertEqual(registro.activos, 0)
+        registro.obtener()
+        self.assertEqual(registro.activos, 1)
+
+    def test_fabrica_personalizada_y_descartar(self):
+        """Se usa la fábrica indicada; descartar fuerza un sistema nuevo"""
+        creados = []
+
+        def fabrica():
+            creados.append(SistemaExperto(modo_hechos='cadena'))
+            return creados[-1]
+
+        registro = RegistroPorHilo(fabrica)
+        self.assertIs(registro.obtener(), creados[0])
+        self.assertEqual(registro.obtener().modo_hechos, 'cadena')
+        registro.descartar()
+        self.assertIs(registro.obtener(), creados[1])
+
+    def test_cerrar_borra_la_imagen(self):
+        """Cerrar el registro borra la imagen de la fábrica que creó"""
+        registro = RegistroPorHilo()
+        registro.obtener()
+        ruta = registro._fabrica.ruta_imagen
+        self.assertTrue(os.path.exists(ruta))
+        registro.cerrar()
+        self.assertFalse(os.path.exists(ruta))
+        # Los sistemas ya creados siguen funcionando
+        self.assertIn('mensajeDeuda', registro.evaluar(PERFIL_DEUDA)['mensajes'])
+        self.assertIsNone(registro._fabrica)
+        # Un hilo nuevo recibe un error claro, no el de la fábrica cerrada
+        with self.assertRaisesRegex(RuntimeError, 'registro está cerrado'):
+            _en_hilo(registro.obtener)
+        registro.cerrar()
+
+    def test_registro_compartido(self):
+        """sistema_del_hilo devuelve el mismo sistema dentro de un hilo"""
+        self.assertIs(sistema_del_hilo(), sistema_del_hilo())
+        self.assertIsNot(_en_hilo(sistema_del_hilo), sistema_del_hilo())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Pruebas del Registro de Mensajes
+================================
+
+Verifica que las reglas personalizadas declaran sus hechos de mensaje al
+cargarse y que la extracción usa el índice relación → texto.
+"""
+
+import unittest
+
+try:
+    from src.sistema_experto import SistemaExperto, RegistroMensajes, MENSAJES_FINANCIEROS
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+PERFIL_RIESGOSO = dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestRegistroMensajes(unittest.TestCase):
+    """Pruebas del índice de mensajes"""
+
+    def test_registro_basico(self):
+        """Registrar, consultar y copiar"""
+        registro = RegistroMensajes({'mensajeA': "- A"})
+        registro.registrar('mensajeB', "- B")
+        copia = registro.copiar()
+        copia.registrar('mensajeC', "- C")
+
+        self.assertEqual(registro.texto('mensajeB'), "- B")
+        self.assertIn('mensajeA', registro)
+        self.assertNotIn('mensajeC', registro)
+        self.assertEqual(len(copia), 3)
+
+    def test_relaciones_invalidas(self):
+        """Se rechazan nombres no simbólicos y la relación reservada"""
+        registro = RegistroMensajes()
+        with self.assertRaises(ValueError):
+            registro.registrar('(mensajeA)', "- A")
+        with self.assertRaises(ValueError):
+            registro.registrar('mensaje', "- A")
+
+    def test_mensajes_predefinidos(self):
+        """Las reglas financieras producen sus textos registrados"""
+        sistema = SistemaExperto()
+        sistema.insertar_hechos(**PERFIL_RIESGOSO)
+        sistema.ejecutar_inferencia()
+
+        resultado = sistema.obtener_resultado()
+        for clave in ('mensajeAhorro', 'mensajeDeuda', 'mensajeEmergencia', 'mensajeOcio'):
+            self.assertIn(MENSAJES_FINANCIEROS[clave], resultado)
+            self.assertIn(clave, sistema.mensajes_activados)
+
+    def test_reglas_personalizadas_con_mensajes(self):
+        """cargar_reglas registra los mensajes declarados por las reglas"""
+        sistema = SistemaExperto()
+        cargadas = sistema.cargar_reglas(
+            "(defrule reglaDeudaCritica (deuda-alta) (ahorro-bajo) => (assert (mensajeDeudaCritica)))",
+            mensajes={'mensajeDeudaCritica': "- Deuda alta sin ahorro: prioriza el pago de deudas.\n"}
+        )
+        self.assertTrue(cargadas)
+
+        sistema.insertar_hechos(**PERFIL_RIESGOSO)
+        sistema.ejecutar_inferencia()
+        self.assertIn("prioriza el pago de deudas", sistema.obtener_resultado())
+        self.assertIn('mensajeDeudaCritica', sistema.mensajes_activados)
+
+    def test_mensaje_texto_libre(self):
+        """Los hechos (mensaje "texto") siguen siendo compatibles"""
+        sistema = SistemaExperto()
+        sistema.cargar_reglas('(defrule reglaLibre (deuda-alta) => (assert (mensaje "Texto libre")))')
+        sistema.insertar_hechos(**PERFIL_RIESGOSO)
+        sistema.ejecutar_inferencia()
+        self.assertIn("Texto libre", sistema.obtener_resultado())
+
+    def test_relaciones_no_registradas_se_ignoran(self):
+        """Un hecho sin mensaje declarado no aparece en el resultado"""
+        sistema = SistemaExperto()
+        sistema.cargar_reglas("(defrule reglaSilenciosa (deuda-alta) => (assert (mensajeSinTexto)))")
+        sistema.insertar_hechos(**PERFIL_RIESGOSO)
+        sistema.ejecutar_inferencia()
+        self.assertNotIn('mensajeSinTexto', sistema.mensajes_activados)
+        self.assertNotIn("mensajeSinTexto", sistema.obtener_resultado())
+
+
+if __name__ == "__main__":
+    unittest.main()
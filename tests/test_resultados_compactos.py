@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los Resultados Compactos
+===================================
+
+Verifica la máscara de recomendaciones, las columnas, la vista por fila
+y el formato de archivo binario columnar.
+"""
+
+import os
+import math
+import tempfile
+import unittest
+
+try:
+    from src.resultados_compactos import (
+        ResultadosCompactos, FilaResultado, mascara_recomendaciones, SIN_ETIQUETA, BIT_RECOMENDACION
+    )
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from src.sistema_experto import SistemaExperto
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy no disponible")
+class TestResultadosCompactos(unittest.TestCase):
+    """Pruebas de la representación columnar"""
+
+    def _lote(self):
+        lote = ResultadosCompactos(capacidad=2)
+        lote.agregar_evaluacion(['mensajeAhorro', 'mensajeDeuda'],
+                                {'nivel_inversion': 10.0, 'etiqueta': 'Conservadora'})
+        lote.agregar_evaluacion(['mensajeInversion'],
+                                {'nivel_inversion': 39.5, 'etiqueta': 'Agresiva'})
+        lote.agregar_evaluacion([], {'error': 'fuera de rango'})
+        return lote
+
+    def test_mascara(self):
+        """Acepta claves de mensaje y nombres de recomendación"""
+        self.assertEqual(mascara_recomendaciones(['mensajeAhorro', 'deuda-alta']), 0b11)
+        self.assertEqual(mascara_recomendaciones(['mensajeDesconocido']), 0)
+
+    def test_crecimiento_y_filas(self):
+        """Las columnas crecen y la vista por fila decodifica los valores"""
+        lote = self._lote()
+        self.assertEqual(len(lote), 3)
+
+        fila = lote[0]
+        self.assertIsInstance(fila, FilaResultado)
+        self.assertEqual(fila.lista_recomendaciones(), ['ahorro-bajo', 'deuda-alta'])
+        self.assertEqual(fila.etiqueta, 'Conservadora')
+        self.assertTrue(fila.tiene('deuda-alta'))
+        self.assertFalse(hasattr(fila, '__dict__'))
+
+        self.assertAlmostEqual(lote[1].nivel_inversion, 39.5, places=4)
+        self.assertTrue(math.isnan(lote[-1].nivel_inversion))
+        self.assertEqual(lote[-1].etiqueta_codigo, SIN_ETIQUETA)
+        with self.assertRaises(IndexError):
+            lote[3]
+
+    def test_agregar_tras_vaciar(self):
+        """Se puede agregar a un lote con columnas vacías (compactado o desde columnas vacías)"""
+        vacio = ResultadosCompactos()
+        vacio.compactar()
+        for lote in (vacio, ResultadosCompactos.desde_columnas([], [], [])):
+            lote.agregar(BIT_RECOMENDACION['deuda-alta'], 12.0, 'Conservadora')
+            lote.agregar()
+            self.assertEqual(len(lote), 2)
+            self.assertEqual(lote[0].lista_recomendaciones(), ['deuda-alta'])
+
+    def test_filtrar(self):
+        """El filtrado combina recomendación y etiqueta"""
+        lote = self._lote()
+        self.assertEqual(list(lote.filtrar(recomendacion='deuda-alta')), [0])
+        self.assertEqual(list(lote.filtrar(etiqueta='Agresiva')), [1])
+        self.assertEqual(list(lote.filtrar(recomendacion='deuda-alta', etiqueta='Agresiva')), [])
+
+    def test_guardar_y_cargar(self):
+        """El archivo columnar conserva todas las filas"""
+        lote = self._lote()
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'lote.sfrc')
+            lote.guardar(ruta)
+            self.assertLess(os.path.getsize(ruta) - lote.nbytes, 100)
+            cargado = ResultadosCompactos.cargar(ruta)
+
+        self.assertEqual(len(cargado), 3)
+        for original, leido in zip(lote, cargado):
+            self.assertEqual(original.recomendaciones, leido.recomendaciones)
+            self.assertEqual(original.etiqueta_codigo, leido.etiqueta_codigo)
+
+    def test_archivo_invalido(self):
+        """Un archivo ajeno se rechaza"""
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'otro.bin')
+            with open(ruta, 'wb') as f:
+                f.write(b'x' * 64)
+            with self.assertRaises(ValueError):
+                ResultadosCompactos.cargar(ruta)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE and CLIPS_AVAILABLE, "Dependencias no disponibles")
+class TestIntegracionExperto(unittest.TestCase):
+    """La máscara se obtiene de los mensajes activados del sistema experto"""
+
+    def test_mensajes_activados(self):
+        sistema = SistemaExperto()
+        sistema.insertar_hechos(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+        sistema.ejecutar_inferencia()
+
+        lote = ResultadosCompactos()
+        lote.agregar_evaluacion(sistema.mensajes_activados)
+        self.assertEqual(set(lote[0].lista_recomendaciones()),
+                         {'ahorro-bajo', 'deuda-alta', 'sin-emergencia', 'ocio-excesivo'})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,7 @@ def test_basico():
     print("🧪 Probando sistema experto básico...")
     
     try:
-        from sistema_experto import SistemaExperto
+        from src.sistema_experto import SistemaExperto
         
         # Crear instancia
         sistema = SistemaExperto()
@@ -62,7 +62,7 @@ def test_funciones_conveniencia():
     print("\n🧪 Probando funciones de conveniencia...")
     
     try:
-        from sistema_experto import (
+        from src.sistema_experto import (
             cargar_reglas, 
             insertar_hechos, 
             ejecutar_inferencia, 
@@ -102,7 +102,7 @@ def test_reglas_con_assert():
     print("\n🧪 Probando reglas con assert...")
     
     try:
-        from sistema_experto import SistemaExperto
+        from src.sistema_experto import SistemaExperto
         
         # Crear sistema
         sistema = SistemaExperto()
@@ -151,7 +151,7 @@ def test_procesamiento_mensajes():
     print("\n🧪 Probando procesamiento de mensajes...")
     
     try:
-        from sistema_experto import SistemaExperto
+        from src.sistema_experto import SistemaExperto
         
         # Crear sistema
         sistema = SistemaExperto()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la Superficie Difusa Precalculada
+==============================================
+
+Verifica que la rejilla precalculada reproduce la salida del sistema
+difuso y respeta el formato de resultado de evaluar_mamdani/evaluar_tsk.
+"""
+
+import unittest
+
+try:
+    from src.fuzzy_system import SistemaDifusoFinanciero
+    from src.superficie_difusa import SuperficieDifusa
+    FUZZY_AVAILABLE = True
+except ImportError:
+    FUZZY_AVAILABLE = False
+
+
+@unittest.skipUnless(FUZZY_AVAILABLE, "scikit-fuzzy no disponible")
+class TestSuperficieDifusa(unittest.TestCase):
+    """Pruebas para la clase SuperficieDifusa"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sistema = SistemaDifusoFinanciero()
+        cls.superficie = SuperficieDifusa(cls.sistema, pasos_ahorro=21, pasos_riesgo=11)
+        cls.superficie.precalcular()
+
+    def test_consulta_antes_de_precalcular(self):
+        """Consultar sin precalcular devuelve un error en lugar de lanzar"""
+        superficie = SuperficieDifusa(self.sistema)
+        self.assertFalse(superficie.lista)
+        self.assertIn('error', superficie.consultar(500, 5))
+
+    def test_vertices_coinciden_con_inferencia(self):
+        """En los puntos de la rejilla la superficie es exacta"""
+        for ahorro, riesgo in [(0, 0), (500, 5), (1000, 10), (650, 3)]:
+            esperado = self.sistema.evaluar_mamdani(ahorro, riesgo)
+            obtenido = self.superficie.consultar(ahorro, riesgo)
+            self.assertAlmostEqual(obtenido['nivel_inversion'], esperado['nivel_inversion'], places=1)
+            self.assertEqual(obtenido['etiqueta'], esperado['etiqueta'])
+
+    def test_interpolacion_entre_vertices(self):
+        """Entre vértices el valor queda acotado por la rejilla"""
+        valor = self.superficie.interpolar(525, 5.5)
+        self.assertGreaterEqual(valor, 0)
+        self.assertLessEqual(valor, 50)
+
+    def test_validacion_rangos(self):
+        """Los valores fuera de rango se rechazan igual que en la inferencia"""
+        self.assertIn('error', self.superficie.consultar(-1, 5))
+        self.assertIn('error', self.superficie.consultar(500, 11))
+
+    def test_metodo_tsk(self):
+        """La superficie TSK reproduce evaluar_tsk en los vértices"""
+        superficie = SuperficieDifusa(self.sistema, metodo='tsk', pasos_ahorro=11, pasos_riesgo=11)
+        superficie.precalcular()
+        esperado = self.sistema.evaluar_tsk(700, 3)
+        obtenido = superficie.consultar(700, 3)
+        self.assertEqual(obtenido['metodo'], 'TSK')
+        self.assertAlmostEqual(obtenido['nivel_inversion'], esperado['nivel_inversion'], places=1)
+
+    def test_metodo_invalido(self):
+        """Un método desconocido se rechaza al construir"""
+        with self.assertRaises(ValueError):
+            SuperficieDifusa(self.sistema, metodo='sugeno')
+
+
+if __name__ == "__main__":
+    unittest.main()
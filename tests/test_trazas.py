@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las Trazas por Muestreo
+==================================
+
+Verifica la decisión de muestreo, el buffer circular, el volcado JSONL
+y la captura de reglas disparadas y grados de pertenencia.
+"""
+
+import io
+import json
+import unittest
+
+try:
+    from src.trazas import TrazadorMuestreo
+    from src.sistema_experto import SistemaExperto
+    CLIPS_AVAILABLE = True
+except ImportError:
+    CLIPS_AVAILABLE = False
+
+try:
+    from src.fuzzy_system import SistemaDifusoFinanciero
+    FUZZY_AVAILABLE = True
+except ImportError:
+    FUZZY_AVAILABLE = False
+
+PERFIL_RIESGOSO = dict(ingresos=1000, ahorro=50, gastos=800, deudas=500, ocio=300)
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestTrazadorMuestreo(unittest.TestCase):
+    """Pruebas del trazador independientes de los motores"""
+
+    def test_tasas_extremas(self):
+        """Tasa 0 nunca muestrea y tasa 1 siempre"""
+        nunca = TrazadorMuestreo(tasa=0.0)
+        siempre = TrazadorMuestreo(tasa=1.0)
+        self.assertFalse(any(nunca.debe_muestrear({}) for _ in range(100)))
+        self.assertTrue(all(siempre.debe_muestrear({}) for _ in range(100)))
+
+    def test_tasa_aproximada(self):
+        """Con semilla fija la fracción muestreada se aproxima a la tasa"""
+        trazador = TrazadorMuestreo(tasa=0.1, semilla=1)
+        muestreadas = sum(trazador.debe_muestrear({}) for _ in range(10000))
+        self.assertTrue(800 < muestreadas < 1200)
+
+    def test_predicado(self):
+        """El predicado tiene prioridad sobre la tasa"""
+        trazador = TrazadorMuestreo(tasa=0.0, predicado=lambda ctx: ctx['entradas']['deudas'] > 100)
+        self.assertTrue(trazador.debe_muestrear({'entradas': {'deudas': 500}}))
+        self.assertFalse(trazador.debe_muestrear({'entradas': {'deudas': 50}}))
+
+    def test_buffer_circular_y_jsonl(self):
+        """El buffer conserva las más recientes y se vuelca una por línea"""
+        trazador = TrazadorMuestreo(capacidad=3)
+        for i in range(5):
+            trazador.registrar({'valor': i})
+        self.assertEqual([t['valor'] for t in trazador.trazas()], [2, 3, 4])
+
+        salida = io.StringIO()
+        self.assertEqual(trazador.volcar_jsonl(salida), 3)
+        lineas = salida.getvalue().splitlines()
+        self.assertEqual(json.loads(lineas[0])['id'], 3)
+
+    def test_tasa_invalida(self):
+        """Las tasas fuera de [0, 1] se rechazan"""
+        with self.assertRaises(ValueError):
+            TrazadorMuestreo(tasa=1.5)
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE, "clipspy no disponible")
+class TestTrazasExperto(unittest.TestCase):
+    """Pruebas de las trazas del sistema experto"""
+
+    def test_reglas_disparadas(self):
+        """La traza contiene las reglas disparadas y el resultado"""
+        trazador = TrazadorMuestreo(tasa=1.0)
+        sistema = SistemaExperto(trazador=trazador)
+        sistema.insertar_hechos(**PERFIL_RIESGOSO)
+        sistema.ejecutar_inferencia()
+
+        traza = trazador.trazas()[0]
+        reglas = {disparo['regla'] for disparo in traza['reglas_disparadas']}
+        self.assertEqual(reglas - {r for r in reglas if r.startswith('derivar-')},
+                         {'reglaAhorro', 'reglaDeuda', 'reglaEmergencia', 'reglaOcio'})
+        self.assertIn('derivar-deuda-alta', reglas)
+        self.assertTrue(any(h.startswith('(perfil-financiero') for h in traza['hechos']))
+        self.assertEqual(traza['resultado'], sistema.obtener_resultado())
+
+    def test_hechos_derivados_en_ambos_modos(self):
+        """La traza muestra los hechos derivados que explican el resultado en ambos modos"""
+        for modo in ('plantilla', 'cadena'):
+            with self.subTest(modo=modo):
+                trazador = TrazadorMuestreo(tasa=1.0)
+                sistema = SistemaExperto(trazador=trazador, modo_hechos=modo)
+                sistema.insertar_hechos(**PERFIL_RIESGOSO)
+                sistema.ejecutar_inferencia()
+                hechos = trazador.trazas()[0]['hechos']
+                for hecho in ('(ahorro-bajo)', '(deuda-alta)', '(mensajeDeuda)'):
+                    self.assertIn(hecho, hechos)
+
+    def test_sin_muestreo_no_hay_trazas(self):
+        """Con tasa 0 el resultado es el mismo y no se guardan trazas"""
+        trazador = TrazadorMuestreo(tasa=0.0)
+        sistema = SistemaExperto(trazador=trazador)
+        sistema.insertar_hechos(**PERFIL_RIESGOSO)
+        sistema.ejecutar_inferencia()
+        self.assertEqual(trazador.trazas(), [])
+        self.assertIn("40%", sistema.obtener_resultado())
+
+
+@unittest.skipUnless(CLIPS_AVAILABLE and FUZZY_AVAILABLE, "Dependencias no disponibles")
+class TestTrazasDifuso(unittest.TestCase):
+    """Pruebas de las trazas del sistema difuso"""
+
+    def test_pertenencias_y_activaciones(self):
+        """La traza contiene los grados de pertenencia y la fuerza de cada regla"""
+        trazador = TrazadorMuestreo(tasa=1.0)
+        sistema = SistemaDifusoFinanciero(trazador=trazador)
+        sistema.evaluar_mamdani(700, 3)
+
+        traza = trazador.trazas()[0]
+        self.assertAlmostEqual(traza['pertenencias']['ahorro_mensual']['medio'], 1 / 3)
+        self.assertAlmostEqual(traza['pertenencias']['riesgo_inversion']['moderado'], 0.5)
+        self.assertAlmostEqual(traza['activaciones']['R2'], 1 / 3)
+        self.assertAlmostEqual(traza['activaciones']['R5'], 0.25)
+        self.assertEqual(traza['activaciones']['R1'], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()